@@ -78,7 +78,7 @@ class ReportGenerator:
                 "duration": simulation_results.get("duration", 0),
                 "player_count": len(simulation_results.get("player_preferences", {})),
                 "machine_count": len(simulation_results.get("machine_popularity", {})),
-                "session_count": len(simulation_results.get("sessions", [])),
+                "session_count": simulation_results.get("session_count", len(simulation_results.get("sessions", []))),
                 "start_time": simulation_results.get("start_time"),
                 "end_time": simulation_results.get("end_time")
             },
@@ -103,6 +103,70 @@ class ReportGenerator:
         self.logger.info(f"Detailed report saved to {filepath}")
         return filepath
         
+    def generate_distribution_report(self, distribution_stats: Dict[str, Any],
+                                     state: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate a report of mergeable distribution statistics (moments, quantiles and
+        histograms per pair, machine and overall).
+        
+        Args:
+            distribution_stats: DistributionAggregator.to_dict() output
+            state: Optional DistributionAggregator.to_state() output, saved next to the report
+                   so that shards can be merged later
+            
+        Returns:
+            Path to the generated report file
+        """
+        self.logger.info("Generating distribution report")
+        
+        report = {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **distribution_stats
+        }
+        
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        filename = f"distribution_report_{timestamp}.json"
+        filepath = os.path.join(self.output_dir, filename)
+        
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        
+        if state is not None:
+            state_path = os.path.join(self.output_dir, f"distribution_state_{timestamp}.json")
+            with open(state_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            
+        self.logger.info(f"Distribution report saved to {filepath}")
+        return filepath
+        
+    def generate_spin_metrics_report(self, spin_metrics: Dict[str, Any]) -> str:
+        """
+        Generate a report of spin-level metrics (drawdown, profit volatility, win
+        multipliers and bet progression) per pair and overall.
+        
+        Args:
+            spin_metrics: {"overall": ..., "pairs": ...} in the format of
+                          spin_stream_analyzer.analyze_task_dir
+            
+        Returns:
+            Path to the generated report file
+        """
+        self.logger.info("Generating spin metrics report")
+        
+        report = {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **spin_metrics
+        }
+        
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        filepath = os.path.join(self.output_dir, f"spin_metrics_report_{timestamp}.json")
+        
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        
+        self.logger.info(f"Spin metrics report saved to {filepath}")
+        return filepath
+        
     def _create_simulation_summary(self, simulation_results: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a summary of simulation results.
@@ -113,6 +177,27 @@ class ReportGenerator:
         Returns:
             Dictionary with simulation summary
         """
+        # The coordinator passes an already aggregated summary (no per-session rows)
+        if "sessions" not in simulation_results and "total_sessions" in simulation_results:
+            return dict(simulation_results)
+        
+        # Full coordinator results: totals come from the streamed distribution stats,
+        # since per-session rows are only kept when keep_session_results is enabled
+        overall = simulation_results.get("distribution_stats", {}).get("overall")
+        if overall:
+            total_bet = overall.get("total_bet", 0.0)
+            total_win = overall.get("total_win", 0.0)
+            start_time, end_time = simulation_results.get("start_time"), simulation_results.get("end_time")
+            return {
+                "session_count": simulation_results.get("session_count", overall.get("sessions", 0)),
+                "total_spins": overall.get("total_spins", 0),
+                "total_bet": total_bet,
+                "total_win": total_win,
+                "overall_rtp": total_win / total_bet if total_bet > 0 else 0,
+                "average_session_duration": overall.get("session", {}).get("duration", {}).get("mean", 0.0),
+                "simulation_duration": end_time - start_time if start_time and end_time else 0
+            }
+        
         sessions = simulation_results.get("sessions", [])
         
         # Calculate aggregates
@@ -0,0 +1,382 @@
+# src/application/analysis/ruin_model.py
+import math
+import logging
+from fractions import Fraction
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, Any, Optional, Union
+
+import numpy as np
+
+from src.domain.machine.services.batch_evaluation import BatchWinEvaluator
+from src.domain.machine.services.payout_distribution import PayoutDistribution, spin_distributions
+
+
+@dataclass
+class RuinResult:
+    """固定投注玩家的会话结局（破产概率、会话长度、最终余额分布）"""
+    bet: float
+    end_probability: float
+    max_spins: Optional[int]
+    bust_probability: float
+    stop_probability: float
+    limit_probability: float
+    unresolved_probability: float
+    expected_spins: float
+    spins_std: float
+    expected_initial_balance: float
+    expected_final_balance: float
+    capped_probability: float
+    resolution: float
+    balance_cap: float
+    length_probabilities: np.ndarray = field(repr=False, default=None)
+    final_balances: np.ndarray = field(repr=False, default=None)
+    final_probabilities: np.ndarray = field(repr=False, default=None)
+
+    def spins_quantile(self, q: float) -> int:
+        """会话spin数的分位数"""
+        cumulative = np.cumsum(self.length_probabilities)
+        return int(np.searchsorted(cumulative, q * cumulative[-1] - 1e-15))
+
+    def final_balance_quantile(self, q: float) -> float:
+        """最终余额的分位数"""
+        cumulative = np.cumsum(self.final_probabilities)
+        index = int(np.searchsorted(cumulative, q * cumulative[-1] - 1e-15))
+        return float(self.final_balances[min(index, len(cumulative) - 1)])
+
+    def to_dict(self, include_distributions: bool = False) -> Dict[str, Any]:
+        result = {
+            "bet": self.bet,
+            "end_probability": self.end_probability,
+            "max_spins": self.max_spins,
+            "bust_probability": self.bust_probability,
+            "stop_probability": self.stop_probability,
+            "limit_probability": self.limit_probability,
+            "unresolved_probability": self.unresolved_probability,
+            "expected_spins": self.expected_spins,
+            "spins_std": self.spins_std,
+            "median_spins": self.spins_quantile(0.5),
+            "expected_initial_balance": self.expected_initial_balance,
+            "expected_final_balance": self.expected_final_balance,
+            "expected_loss": self.expected_initial_balance - self.expected_final_balance,
+            "final_balance_quantiles": {str(q): self.final_balance_quantile(q) for q in (0.05, 0.25, 0.5, 0.75, 0.95)},
+            "capped_probability": self.capped_probability,
+            "resolution": self.resolution,
+            "balance_cap": self.balance_cap
+        }
+        if include_distributions:
+            keep = self.final_probabilities > 0
+            result["length_probabilities"] = self.length_probabilities.tolist()
+            result["final_balance_distribution"] = {
+                "values": self.final_balances[keep].tolist(),
+                "probabilities": self.final_probabilities[keep].tolist()
+            }
+        return result
+
+
+def initial_balance_bounds(balance_config: Union[float, Dict[str, Any]]) -> tuple:
+    """初始余额的取值范围（与Player.generate_initial_balance一致）"""
+    if isinstance(balance_config, (int, float)):
+        return float(balance_config), float(balance_config)
+    avg = float(balance_config.get("avg", 1000.0))
+    std = float(balance_config.get("std", 0.0))
+    if std <= 0:
+        return avg, avg
+    return float(balance_config.get("min", avg * 0.1)), float(balance_config.get("max", avg * 10.0))
+
+
+def _split(positions: np.ndarray, probabilities: np.ndarray, size: int, start: int = 0) -> np.ndarray:
+    """
+    把连续位置（以网格步长为单位）上的概率线性分摊到相邻两个格点，保持均值不变。
+
+    Args:
+        positions: 位置（格点单位）
+        probabilities: 对应概率
+        size: 输出数组长度
+        start: 输出数组第0个元素对应的格点编号
+
+    Returns:
+        长度为size的数组（越界部分截到两端）
+    """
+    lower = np.floor(positions + 1e-9).astype(np.int64)
+    fraction = np.clip(positions - lower, 0.0, 1.0)
+    fraction[fraction < 1e-9] = 0.0
+    dense = np.zeros(size)
+    np.add.at(dense, np.clip(lower - start, 0, size - 1), probabilities * (1 - fraction))
+    np.add.at(dense, np.clip(lower + 1 - start, 0, size - 1), probabilities * fraction)
+    return dense
+
+
+def initial_balance_distribution(balance_config: Union[float, Dict[str, Any]], resolution: float,
+                                 size: int) -> np.ndarray:
+    """
+    初始余额配置在余额网格上的分布。
+
+    数值配置为单点；{avg, std, min, max}配置与Player.generate_initial_balance一致：
+    正态分布N(avg, std)截断到[min, max]，两侧尾部概率落在边界上。
+
+    Args:
+        balance_config: 玩家配置中的initial_balance
+        resolution: 网格步长
+        size: 网格点数
+
+    Returns:
+        长度为size的概率数组
+    """
+    low, high = initial_balance_bounds(balance_config)
+    if low == high:
+        return _split(np.array([low / resolution]), np.array([1.0]), size)
+
+    normal = NormalDist(float(balance_config["avg"]), float(balance_config["std"]))
+    # 每个网格单元[x - h/2, x + h/2]与[min, max]的交集概率放在单元中心
+    first, last = int(math.ceil(low / resolution - 0.5)), int(math.floor(high / resolution + 0.5))
+    centers = np.arange(first, last + 1) * resolution
+    edges = np.clip(np.concatenate([centers - resolution / 2, [centers[-1] + resolution / 2]]), low, high)
+    cdf = np.array([normal.cdf(edge) for edge in edges])
+    positions = np.concatenate([centers, [low, high]]) / resolution
+    probabilities = np.concatenate([np.diff(cdf), [normal.cdf(low), 1.0 - normal.cdf(high)]])
+    return _split(positions, probabilities, size)
+
+
+class RuinModel:
+    """
+    固定投注玩家的会话结局解析模型（不做模拟）。
+
+    会话按spin推进，状态为（余额，剩余免费旋转次数），余额离散到等距网格上。
+    规则与GamingSession + SessionRunner一致：
+    - 基础spin扣除投注，中奖按机器的单spin分布（区分是否触发免费旋转）加回；
+    - 免费旋转不扣投注，剩余次数减一，中奖按bonus spin分布加回；
+    - 每次spin之后依次检查：余额小于投注（Player.play返回-1）记为破产，
+      达到max_spins记为达到上限，否则以end_probability的概率主动结束。
+
+    end_probability对应随机玩家RandomDecisionEngine.should_end_session中每次spin一次的结束判定。
+
+    每一步的余额转移是与单spin中奖分布的卷积（FFT）。单spin分布由
+    payout_distribution精确计算，因此除网格离散化外没有抽样误差，可作为
+    模拟结果的校验基准，也可以直接替代模拟得到破产概率、期望spin数和最终余额分布。
+    """
+
+    def __init__(self, machine, bet: float = 1.0, end_probability: float = 0.0,
+                 max_spins: Optional[int] = None, balance_cap: Optional[float] = None,
+                 resolution: Optional[float] = None, max_grid: int = 1 << 18,
+                 tolerance: float = 1e-12, max_steps: int = 100000):
+        """
+        初始化模型。
+
+        Args:
+            machine: SlotMachine实例
+            bet: 每次基础spin的固定投注额
+            end_probability: 每次spin后主动结束会话的概率
+            max_spins: 每个会话的最大spin数（None表示不限制）
+            balance_cap: 余额网格上限（默认：最大初始余额 + 1000倍投注），超出部分截到上限
+            resolution: 网格步长（默认：中奖金额的精确格点，网格过大时放粗）
+            max_grid: 网格点数上限
+            tolerance: 存活概率低于该值时停止迭代
+            max_steps: 最大迭代步数
+        """
+        self.logger = logging.getLogger("application.analysis.ruin")
+        if bet <= 0:
+            raise ValueError("bet must be positive")
+        if not 0 <= end_probability <= 1:
+            raise ValueError("end_probability must be in [0, 1]")
+
+        self.bet = float(bet)
+        self.end_probability = float(end_probability)
+        self.max_spins = max_spins
+        self.balance_cap = balance_cap
+        self.resolution = resolution
+        self.max_grid = max_grid
+        self.tolerance = tolerance
+        self.max_steps = max_steps
+
+        evaluator = BatchWinEvaluator(machine)
+        self.free_spins_count = evaluator.free_spins_count
+        self.no_trigger, self.trigger = spin_distributions(evaluator, in_free=False)
+        bonus_spin = PayoutDistribution.from_values(np.zeros(0), np.zeros(0))
+        for part in spin_distributions(evaluator, in_free=True):
+            bonus_spin = bonus_spin.mixture(part)
+        self.bonus_spin = bonus_spin
+
+    @classmethod
+    def from_player_config(cls, machine, player_config: Dict[str, Any], **overrides) -> 'RuinModel':
+        """
+        从玩家配置读取停止规则（model_config_<version>中的end_probability和max_spins_per_session）。
+
+        缺省值与RandomDecisionEngine一致（0.01和500）。
+
+        Args:
+            machine: SlotMachine实例
+            player_config: 玩家YAML配置
+            **overrides: 覆盖的构造参数（如bet）
+
+        Returns:
+            RuinModel实例
+        """
+        model_config = player_config.get(f"model_config_{player_config.get('model_version', 'random')}", {})
+        options = {
+            "end_probability": min(max(float(model_config.get("end_probability", 0.01)), 0.0), 1.0),
+            "max_spins": model_config.get("max_spins_per_session", 500)
+        }
+        options.update(overrides)
+        return cls(machine, **options)
+
+    def _grid(self, balance_config) -> tuple:
+        """网格步长和点数"""
+        low, high = initial_balance_bounds(balance_config)
+        cap = self.balance_cap if self.balance_cap is not None else high + 1000 * self.bet
+        if cap < high:
+            raise ValueError(f"balance_cap {cap} is below the largest initial balance {high}")
+        resolution = self.resolution
+        if resolution is None:
+            # 中奖金额的格点 bet / lcm(分母)；单点初始余额也放到格点上
+            denominator = math.lcm(self.no_trigger.denominator, self.trigger.denominator, self.bonus_spin.denominator)
+            step = Fraction(self.bet).limit_denominator(10 ** 6) / denominator
+            if low == high:
+                point = Fraction(low).limit_denominator(10 ** 6)
+                step = Fraction(math.gcd(step.numerator * point.denominator, point.numerator * step.denominator),
+                                step.denominator * point.denominator)
+            resolution = float(step)
+            if cap / resolution + 1 > self.max_grid:
+                resolution = cap / (self.max_grid - 1)
+        return resolution, int(math.floor(cap / resolution + 1e-9)) + 1
+
+    def _kernel(self, distribution: PayoutDistribution, resolution: float, cost: float):
+        """余额变化（bet * 中奖 - cost）在网格上的分布：(起始格点, 概率数组)"""
+        positions = (self.bet * distribution.values - cost) / resolution
+        if len(positions) == 0:
+            return 0, np.zeros(1)
+        start = int(np.floor(positions.min() + 1e-9))
+        size = int(np.floor(positions.max() + 1e-9)) - start + 2
+        return start, _split(positions, distribution.probabilities, size, start)
+
+    def solve(self, initial_balance: Union[float, Dict[str, Any]]) -> RuinResult:
+        """
+        计算会话结局分布。
+
+        Args:
+            initial_balance: 初始余额（数值或{avg, std, min, max}配置）
+
+        Returns:
+            RuinResult
+        """
+        resolution, size = self._grid(initial_balance)
+        kernels = {
+            "no_trigger": self._kernel(self.no_trigger, resolution, self.bet),
+            "trigger": self._kernel(self.trigger, resolution, self.bet),
+            "bonus": self._kernel(self.bonus_spin, resolution, 0.0)
+        }
+        length = size + max(len(kernel) for _, kernel in kernels.values()) - 1
+        fft_size = 1 << int(math.ceil(math.log2(length)))
+        spectra = {name: np.fft.rfft(kernel, fft_size) for name, (_, kernel) in kernels.items()}
+        bust_index = int(math.ceil(self.bet / resolution - 1e-9))
+
+        capped = 0.0
+
+        def place(convolved: np.ndarray, start: int) -> np.ndarray:
+            """卷积结果平移到余额网格，越界部分截到两端"""
+            nonlocal capped
+            convolved = np.maximum(convolved, 0.0)  # FFT舍入误差
+            result = np.zeros(size)
+            begin, end = start, start + len(convolved)
+            inner_begin, inner_end = max(begin, 0), min(end, size)
+            result[inner_begin:inner_end] = convolved[inner_begin - begin:inner_end - begin]
+            if begin < 0:
+                result[0] += convolved[:-begin].sum()
+            if end > size:
+                overflow = convolved[size - begin:].sum()
+                result[-1] += overflow
+                capped += overflow
+            return result
+
+        def advance(states: np.ndarray, name: str) -> np.ndarray:
+            start, _ = kernels[name]
+            convolved = np.fft.irfft(np.fft.rfft(states, fft_size) * spectra[name], fft_size)[..., :length]
+            if convolved.ndim == 1:
+                return place(convolved, start)
+            return np.stack([place(row, start) for row in convolved])
+
+        initial = initial_balance_distribution(initial_balance, resolution, size)
+        balances = np.arange(size) * resolution
+        final = np.zeros(size)
+        lengths = [0.0]
+        outcomes = {"bust": 0.0, "stop": 0.0, "limit": 0.0}
+
+        # 开始前余额不足一次投注：0次spin即结束
+        final[:bust_index] += initial[:bust_index]
+        lengths[0] = outcomes["bust"] = float(initial[:bust_index].sum())
+        base = initial.copy()
+        base[:bust_index] = 0.0
+        free = np.zeros((self.free_spins_count, size))  # 第k行：还剩k+1次免费旋转
+
+        step = 0
+        alive = float(base.sum())
+        while alive > self.tolerance and step < self.max_steps:
+            step += 1
+            new_base = advance(base, "no_trigger")
+            if self.free_spins_count:
+                new_free = np.zeros_like(free)
+                new_free[-1] = advance(base, "trigger")
+                if free.any():
+                    moved = advance(free, "bonus")
+                    new_base += moved[0]
+                    new_free[:-1] = moved[1:]
+            else:
+                new_base += advance(base, "trigger")
+                new_free = free
+            base, free = new_base, new_free
+
+            ended = np.zeros(size)
+            busted = base[:bust_index] + free[:, :bust_index].sum(axis=0)
+            ended[:bust_index] += busted
+            outcomes["bust"] += float(busted.sum())
+            base[:bust_index] = 0.0
+            free[:, :bust_index] = 0.0
+
+            if self.max_spins is not None and step >= self.max_spins:
+                remaining = base + free.sum(axis=0)
+                ended += remaining
+                outcomes["limit"] += float(remaining.sum())
+                base, free = np.zeros(size), np.zeros_like(free)
+            elif self.end_probability > 0:
+                stopped = self.end_probability * (base + free.sum(axis=0))
+                ended += stopped
+                outcomes["stop"] += float(stopped.sum())
+                base *= 1 - self.end_probability
+                free *= 1 - self.end_probability
+
+            final += ended
+            lengths.append(float(ended.sum()))
+            alive = float(base.sum() + free.sum())
+
+        if alive > self.tolerance:
+            self.logger.warning(f"达到最大迭代步数{self.max_steps}，仍有{alive:.3e}的概率未结束")
+        final += base + free.sum(axis=0)
+
+        lengths = np.array(lengths)
+        spins = np.arange(len(lengths))
+        resolved = lengths.sum()
+        expected_spins = float(spins @ lengths / resolved) if resolved > 0 else 0.0
+        spins_variance = float((spins - expected_spins) ** 2 @ lengths / resolved) if resolved > 0 else 0.0
+
+        result = RuinResult(
+            bet=self.bet,
+            end_probability=self.end_probability,
+            max_spins=self.max_spins,
+            bust_probability=outcomes["bust"],
+            stop_probability=outcomes["stop"],
+            limit_probability=outcomes["limit"],
+            unresolved_probability=alive,
+            expected_spins=expected_spins,
+            spins_std=spins_variance ** 0.5,
+            expected_initial_balance=float(balances @ initial),
+            expected_final_balance=float(balances @ final / final.sum()),
+            capped_probability=capped,
+            resolution=resolution,
+            balance_cap=float(balances[-1]),
+            length_probabilities=lengths,
+            final_balances=balances,
+            final_probabilities=final
+        )
+        self.logger.info(f"破产概率 {result.bust_probability:.4f}, 期望spin数 {result.expected_spins:.1f}, "
+                         f"期望最终余额 {result.expected_final_balance:.2f} ({step}步, 网格{size}点)")
+        return result
@@ -1,8 +1,9 @@
 # src/application/analysis/session_analyzer.py
 import logging
-import statistics
 from typing import Dict, List, Any, Optional, Tuple
 
+from src.application.analysis.spin_stream_analyzer import SessionAccumulator, spins_to_chunk
+
 
 class SessionAnalyzer:
     """
@@ -43,9 +44,12 @@ class SessionAnalyzer:
         base_game_rtp = base_game_win / total_bet if total_bet > 0 else 0.0
         free_spins_rtp = free_spins_win / total_bet if total_bet > 0 else 0.0
         
-        # 如果有详细的旋转数据，计算波动指标
-        spin_results = session_data.get("results", [])
-        volatility_metrics = self._calculate_volatility_metrics(spin_results) if spin_results else {}
+        # spin级指标：协调器为记录了spin的会话附带"spin_metrics"（SessionAccumulator.to_dict()），
+        # 直接传入完整spin列表（"spins"）时现场计算；都没有时波动和投注进展为空
+        spin_metrics = session_data.get("spin_metrics")
+        if not spin_metrics and session_data.get("spins"):
+            spin_metrics = self._calculate_spin_metrics(session_data["spins"])
+        volatility_metrics = self._volatility_from_metrics(spin_metrics) if spin_metrics else {}
         
         # 创建分析结果
         analysis = {
@@ -73,7 +77,7 @@ class SessionAnalyzer:
             "player_behavior": {
                 "duration": session_data.get("duration", 0.0),
                 "avg_bet": total_bet / total_spins if total_spins > 0 else 0.0,
-                "bet_progression": self._analyze_bet_progression(spin_results),
+                "bet_progression": self._bet_progression_from_metrics(spin_metrics) if spin_metrics else {},
                 "quit_balance": session_data.get("end_balance", 0.0),
                 "balance_change_percent": self._calculate_balance_change_percent(session_data)
             },
@@ -130,93 +134,59 @@ class SessionAnalyzer:
             "machine_count": len(machine_sessions)
         }
         
-    def _calculate_volatility_metrics(self, spin_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_spin_metrics(self, spin_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        计算会话的波动性指标。
+        用流式分析引擎的累加器计算会话的spin级指标，结果与逐块分析原始数据一致。
         
         Args:
             spin_results: 旋转结果列表
             
         Returns:
-            波动性指标字典
+            SessionAccumulator.to_dict()，出错时为空字典
         """
-        if not spin_results:
-            return {}
-            
-        # 提取每次旋转的输赢值
-        profits = []
-        win_sizes = []
-        balance_progression = []
-        
-        for result in spin_results:
-            bet = result.get("bet", 0.0)
-            win = result.get("win", 0.0)
-            profit = win - bet
-            
-            profits.append(profit)
-            if win > 0:
-                win_sizes.append(win / bet if bet > 0 else 0.0)  # 赢额与投注的比例
-                
-            balance_progression.append(result.get("balance_after", 0.0))
-        
-        # 计算波动性指标
         try:
-            profit_std_dev = statistics.stdev(profits) if len(profits) > 1 else 0.0
-            max_win_multiplier = max(win_sizes) if win_sizes else 0.0
-            
-            # 计算余额最大回撤
-            max_drawdown = 0.0
-            peak_balance = balance_progression[0] if balance_progression else 0.0
-            
-            for balance in balance_progression:
-                if balance > peak_balance:
-                    peak_balance = balance
-                else:
-                    drawdown = peak_balance - balance
-                    if drawdown > max_drawdown:
-                        max_drawdown = drawdown
-            
-            return {
-                "profit_std_dev": profit_std_dev,
-                "max_win_multiplier": max_win_multiplier,
-                "max_drawdown": max_drawdown,
-                "max_drawdown_percent": max_drawdown / peak_balance if peak_balance > 0 else 0.0,
-                "win_frequency": len(win_sizes) / len(spin_results)
-            }
+            session = SessionAccumulator()
+            session.update(spins_to_chunk(spin_results))
+            return session.to_dict()
         except Exception as e:
-            self.logger.error(f"Error calculating volatility metrics: {str(e)}")
+            self.logger.error(f"Error calculating spin metrics: {str(e)}")
             return {}
             
-    def _analyze_bet_progression(self, spin_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _volatility_from_metrics(self, spin_metrics: Dict[str, Any]) -> Dict[str, Any]:
         """
-        分析玩家的投注进展。
+        从spin级指标中提取波动性指标。
         
         Args:
-            spin_results: 旋转结果列表
+            spin_metrics: SessionAccumulator.to_dict()
             
         Returns:
-            投注进展分析
+            波动性指标字典
         """
-        if not spin_results:
-            return {}
+        return {
+            "profit_std_dev": spin_metrics["profit_std_dev"],
+            "max_win_multiplier": spin_metrics["max_win_multiplier"],
+            "max_drawdown": spin_metrics["max_drawdown"],
+            "max_drawdown_percent": spin_metrics["max_drawdown_percent"],
+            "win_frequency": spin_metrics["hit_rate"]
+        }
             
-        # 提取投注额
-        bets = [result.get("bet", 0.0) for result in spin_results]
-        
-        # 识别投注模式
-        bet_changes = sum(1 for i in range(1, len(bets)) if bets[i] != bets[i-1])
-        
-        # 最大和最小投注
-        max_bet = max(bets) if bets else 0.0
-        min_bet = min(bets) if bets else 0.0
+    def _bet_progression_from_metrics(self, spin_metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        从spin级指标中提取玩家的投注进展（只计实际扣款的spin）。
         
+        Args:
+            spin_metrics: SessionAccumulator.to_dict()
+            
+        Returns:
+            投注进展分析
+        """
         return {
-            "bet_change_count": bet_changes,
-            "bet_change_frequency": bet_changes / (len(bets) - 1) if len(bets) > 1 else 0.0,
-            "max_bet": max_bet,
-            "min_bet": min_bet,
-            "bet_range": max_bet - min_bet,
-            "last_bet": bets[-1] if bets else 0.0
+            "bet_change_count": spin_metrics["bet_change_count"],
+            "bet_change_frequency": spin_metrics["bet_change_frequency"],
+            "max_bet": spin_metrics["max_bet"],
+            "min_bet": spin_metrics["min_bet"],
+            "bet_range": spin_metrics["max_bet"] - spin_metrics["min_bet"],
+            "last_bet": spin_metrics["last_bet"]
         }
         
     def _calculate_balance_change_percent(self, session_data: Dict[str, Any]) -> float:
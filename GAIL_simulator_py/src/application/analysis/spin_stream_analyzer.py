@@ -0,0 +1,560 @@
+# src/application/analysis/spin_stream_analyzer.py
+import os
+import csv
+import logging
+import functools
+import numpy as np
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from src.infrastructure.concurrency.task_executor import TaskExecutor, ExecutionMode
+from src.infrastructure.output.compression import open_text_reader, CODEC_EXTENSIONS
+from src.infrastructure.output.spin_segments import SpinSegmentReader, SEGMENT_EXTENSION
+from src.infrastructure.output.spin_binary import BinarySpinLogReader, BINARY_EXTENSION, FLAG_IN_FREE_SPINS, FLAG_BIG_WIN
+from src.infrastructure.output.spin_columnar import COLUMNAR_FORMATS, FILE_EXTENSIONS
+
+
+# 分析所需的spin列
+ANALYSIS_COLUMNS = ("bet", "payout", "balance_before", "balance_after", "in_free_spins", "big_win")
+
+# 中奖倍数（payout / bet）分布的分箱边界
+MULTIPLIER_BINS = np.array([0.0, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 500.0, 1000.0, np.inf])
+
+DEFAULT_CHUNK_ROWS = 65536
+
+logger = logging.getLogger("application.analysis.stream")
+
+
+class Moments:
+    """可合并的计数/均值/方差/极值（Chan并行合并公式）"""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add_array(self, values: np.ndarray):
+        """加入一批值"""
+        n = len(values)
+        if n == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        self._combine(n, mean, m2, float(values.min()), float(values.max()))
+
+    def add(self, value: float):
+        self._combine(1, float(value), 0.0, float(value), float(value))
+
+    def merge(self, other: 'Moments'):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, n: int, mean: float, m2: float, min_value: float, max_value: float):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, min_value)
+        self.max = max(self.max, max_value)
+
+    @property
+    def std(self) -> float:
+        """样本标准差"""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+
+def normalize_chunk(columns: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    把任意来源的列（列表、字符串、pyarrow转换结果）统一为分析用的numpy数组
+
+    Args:
+        columns: 列名 -> 序列（至少包含bet, payout, balance_before, balance_after）
+
+    Returns:
+        列名 -> numpy数组（金额为float64，标志为bool）
+    """
+    chunk = {}
+    for name in ("bet", "payout", "balance_before", "balance_after"):
+        chunk[name] = np.asarray(columns[name], dtype=np.float64)
+    for name in ("in_free_spins", "big_win"):
+        values = columns.get(name)
+        if values is None:
+            chunk[name] = np.zeros(len(chunk["bet"]), dtype=bool)
+            continue
+        values = np.asarray(values)
+        if values.dtype.kind in ("U", "S", "O"):
+            values = np.isin(values.astype(str), ("True", "true", "1"))
+        chunk[name] = values.astype(bool)
+    return chunk
+
+
+def spins_to_chunk(spins: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    把内存中的spin字典列表转换为分析数据块
+
+    兼容旧格式中用"win"表示赢额、缺少余额字段的记录。
+
+    Args:
+        spins: spin字典列表
+
+    Returns:
+        normalize_chunk()格式的列
+    """
+    columns = {name: [] for name in ANALYSIS_COLUMNS}
+    balance = 0.0
+    for spin in spins:
+        bet = spin.get("bet", 0.0)
+        payout = spin.get("payout", spin.get("win", 0.0))
+        before = spin.get("balance_before", balance)
+        after = spin.get("balance_after", before - (0.0 if spin.get("in_free_spins") else bet) + payout)
+        balance = after
+        columns["bet"].append(bet)
+        columns["payout"].append(payout)
+        columns["balance_before"].append(before)
+        columns["balance_after"].append(after)
+        columns["in_free_spins"].append(bool(spin.get("in_free_spins", False)))
+        columns["big_win"].append(bool(spin.get("big_win", False)))
+    return normalize_chunk(columns)
+
+
+class SpinMetricsAccumulator:
+    """
+    可合并的spin级指标（会话、player-machine对、全局共用）
+
+    现金流以余额变化为准：profit = balance_after - balance_before，
+    实际扣除的投注 = payout - profit（免费旋转为0），不依赖bet字段在免费旋转中的含义。
+    """
+
+    def __init__(self):
+        self.spins = 0
+        self.paid_spins = 0
+        self.free_spins = 0
+        self.hits = 0
+        self.big_wins = 0
+        self.total_wagered = 0.0
+        self.total_payout = 0.0
+        self.profit = Moments()
+        self.max_multiplier = 0.0
+        self.multiplier_counts = np.zeros(len(MULTIPLIER_BINS) - 1, dtype=np.int64)
+
+    def update(self, chunk: Dict[str, np.ndarray]):
+        """
+        加入一个数据块
+
+        Args:
+            chunk: normalize_chunk()返回的列
+        """
+        payout = chunk["payout"]
+        if not len(payout):
+            return
+        profit = chunk["balance_after"] - chunk["balance_before"]
+        wagered = payout - profit
+        paid = wagered > 1e-9
+
+        self.spins += len(payout)
+        self.paid_spins += int(paid.sum())
+        self.free_spins += int(chunk["in_free_spins"].sum())
+        self.big_wins += int(chunk["big_win"].sum())
+        self.total_wagered += float(wagered[paid].sum())
+        self.total_payout += float(payout.sum())
+        self.profit.add_array(profit)
+
+        wins = payout > 0
+        self.hits += int(wins.sum())
+        bet = chunk["bet"]
+        valid = wins & (bet > 0)
+        if valid.any():
+            multipliers = payout[valid] / bet[valid]
+            self.max_multiplier = max(self.max_multiplier, float(multipliers.max()))
+            self.multiplier_counts += np.histogram(multipliers, bins=MULTIPLIER_BINS)[0]
+
+    def merge(self, other: 'SpinMetricsAccumulator'):
+        """合并另一个累加器"""
+        self.spins += other.spins
+        self.paid_spins += other.paid_spins
+        self.free_spins += other.free_spins
+        self.hits += other.hits
+        self.big_wins += other.big_wins
+        self.total_wagered += other.total_wagered
+        self.total_payout += other.total_payout
+        self.profit.merge(other.profit)
+        self.max_multiplier = max(self.max_multiplier, other.max_multiplier)
+        self.multiplier_counts += other.multiplier_counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"{low:g}-{high:g}" for low, high in zip(MULTIPLIER_BINS[:-1], MULTIPLIER_BINS[1:])]
+        return {
+            "spins": self.spins,
+            "paid_spins": self.paid_spins,
+            "free_spins": self.free_spins,
+            "total_wagered": self.total_wagered,
+            "total_payout": self.total_payout,
+            "rtp": self.total_payout / self.total_wagered if self.total_wagered > 0 else 0.0,
+            "hit_rate": self.hits / self.spins if self.spins else 0.0,
+            "big_win_rate": self.big_wins / self.spins if self.spins else 0.0,
+            "free_spin_rate": self.free_spins / self.spins if self.spins else 0.0,
+            "profit_mean": self.profit.mean,
+            "profit_std_dev": self.profit.std,
+            "max_win_multiplier": self.max_multiplier,
+            "win_multiplier_distribution": dict(zip(labels, self.multiplier_counts.tolist()))
+        }
+
+
+class SessionAccumulator(SpinMetricsAccumulator):
+    """
+    单个会话的流式指标：在spin级指标之外按顺序追踪余额回撤和投注变化，
+    状态跨数据块延续，因此会话可以分块读入。
+    """
+
+    def __init__(self, session_id: str = ""):
+        super().__init__()
+        self.session_id = session_id
+        self.start_balance = None
+        self.end_balance = 0.0
+        self.peak_balance = -np.inf
+        self.max_drawdown = 0.0
+        self.max_drawdown_percent = 0.0
+        self.last_bet = None
+        self.first_bet = None
+        self.bet_changes = 0
+        self.bet_increases = 0
+        self.bet_decreases = 0
+        self.bets = Moments()
+
+    def update(self, chunk: Dict[str, np.ndarray]):
+        super().update(chunk)
+        balance = chunk["balance_after"]
+        if not len(balance):
+            return
+
+        if self.start_balance is None:
+            self.start_balance = float(chunk["balance_before"][0])
+            self.peak_balance = self.start_balance
+        self.end_balance = float(balance[-1])
+
+        # 回撤：运行峰值减当前余额
+        peak = np.maximum.accumulate(np.concatenate(([self.peak_balance], balance)))[1:]
+        drawdown = peak - balance
+        worst = int(np.argmax(drawdown))
+        if drawdown[worst] > self.max_drawdown:
+            self.max_drawdown = float(drawdown[worst])
+            self.max_drawdown_percent = self.max_drawdown / peak[worst] if peak[worst] > 0 else 0.0
+        self.peak_balance = float(peak[-1])
+
+        # 投注变化：只看实际扣款的spin
+        profit = balance - chunk["balance_before"]
+        paid_bets = (chunk["payout"] - profit)[(chunk["payout"] - profit) > 1e-9]
+        if len(paid_bets):
+            self.bets.add_array(paid_bets)
+            if self.first_bet is None:
+                self.first_bet = float(paid_bets[0])
+            sequence = paid_bets if self.last_bet is None else np.concatenate(([self.last_bet], paid_bets))
+            steps = np.diff(sequence)
+            self.bet_changes += int(np.count_nonzero(steps))
+            self.bet_increases += int((steps > 0).sum())
+            self.bet_decreases += int((steps < 0).sum())
+            self.last_bet = float(paid_bets[-1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        metrics = super().to_dict()
+        metrics.pop("win_multiplier_distribution")
+        metrics.update({
+            "session_id": self.session_id,
+            "start_balance": self.start_balance or 0.0,
+            "end_balance": self.end_balance,
+            "net_result": self.end_balance - (self.start_balance or 0.0),
+            "max_drawdown": self.max_drawdown,
+            "max_drawdown_percent": self.max_drawdown_percent,
+            "bet_change_count": self.bet_changes,
+            "bet_increase_count": self.bet_increases,
+            "bet_decrease_count": self.bet_decreases,
+            "bet_change_frequency": self.bet_changes / (self.paid_spins - 1) if self.paid_spins > 1 else 0.0,
+            "first_bet": self.first_bet or 0.0,
+            "last_bet": self.last_bet or 0.0,
+            "min_bet": self.bets.min if self.bets.count else 0.0,
+            "max_bet": self.bets.max if self.bets.count else 0.0,
+            "avg_bet": self.bets.mean
+        })
+        return metrics
+
+
+class PairAccumulator(SpinMetricsAccumulator):
+    """player-machine对（或全局）的聚合：spin级指标 + 会话级指标的分布"""
+
+    def __init__(self, player_id: str = "", machine_id: str = ""):
+        super().__init__()
+        self.player_id = player_id
+        self.machine_id = machine_id
+        self.sessions = 0
+        self.net_result = Moments()
+        self.max_drawdown = Moments()
+        self.session_spins = Moments()
+        self.bet_change_frequency = Moments()
+        self.sessions_with_bet_changes = 0
+
+    def add_session(self, session: SessionAccumulator):
+        """加入一个已完成的会话"""
+        SpinMetricsAccumulator.merge(self, session)
+        self.sessions += 1
+        self.net_result.add(session.end_balance - (session.start_balance or 0.0))
+        self.max_drawdown.add(session.max_drawdown)
+        self.session_spins.add(session.spins)
+        self.bet_change_frequency.add(
+            session.bet_changes / (session.paid_spins - 1) if session.paid_spins > 1 else 0.0
+        )
+        self.sessions_with_bet_changes += int(session.bet_changes > 0)
+
+    def merge(self, other: 'PairAccumulator'):
+        super().merge(other)
+        self.sessions += other.sessions
+        self.net_result.merge(other.net_result)
+        self.max_drawdown.merge(other.max_drawdown)
+        self.session_spins.merge(other.session_spins)
+        self.bet_change_frequency.merge(other.bet_change_frequency)
+        self.sessions_with_bet_changes += other.sessions_with_bet_changes
+
+    def to_dict(self) -> Dict[str, Any]:
+        metrics = super().to_dict()
+        metrics.update({
+            "sessions": self.sessions,
+            "session_net_result": self.net_result.to_dict(),
+            "session_max_drawdown": self.max_drawdown.to_dict(),
+            "session_spins": self.session_spins.to_dict(),
+            "bet_progression": {
+                "sessions_with_bet_changes": self.sessions_with_bet_changes,
+                "bet_change_frequency": self.bet_change_frequency.to_dict()
+            }
+        })
+        if self.player_id or self.machine_id:
+            metrics = dict({"player_id": self.player_id, "machine_id": self.machine_id}, **metrics)
+        return metrics
+
+
+def _slices(chunk: Dict[str, np.ndarray], chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    """把一个大块按行数切分（视图，不复制）"""
+    rows = len(chunk["bet"])
+    for start in range(0, rows, chunk_rows):
+        yield {name: values[start:start + chunk_rows] for name, values in chunk.items()}
+
+
+def _raw_file_session_id(filename: str) -> Optional[Tuple[str, str]]:
+    """
+    识别每个会话一个文件的原始数据
+
+    Returns:
+        (session_id, 格式) 或 None
+    """
+    for file_format in COLUMNAR_FORMATS:
+        suffix = "_raw" + FILE_EXTENSIONS[file_format]
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)], file_format
+    for extension in CODEC_EXTENSIONS.values():
+        suffix = "_raw.csv" + extension
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)], "csv"
+    return None
+
+
+def _iter_csv_file(path: str, chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    with open_text_reader(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        wanted = [name for name in ANALYSIS_COLUMNS if name in header]
+        indices = [header.index(name) for name in wanted]
+        buffers = [[] for _ in wanted]
+        for row in reader:
+            for buffer, index in zip(buffers, indices):
+                buffer.append(row[index])
+            if len(buffers[0]) >= chunk_rows:
+                yield normalize_chunk(dict(zip(wanted, buffers)))
+                buffers = [[] for _ in wanted]
+        if buffers and buffers[0]:
+            yield normalize_chunk(dict(zip(wanted, buffers)))
+
+
+def _table_chunk(table) -> Dict[str, np.ndarray]:
+    return normalize_chunk({name: table.column(name).to_numpy(zero_copy_only=False)
+                            for name in ANALYSIS_COLUMNS if name in table.column_names})
+
+
+def _iter_columnar_file(path: str, file_format: str, chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    import pyarrow.parquet as pq
+    import pyarrow.ipc as ipc
+
+    if file_format == "parquet":
+        parquet_file = pq.ParquetFile(path)
+        columns = [name for name in ANALYSIS_COLUMNS if name in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield _table_chunk(batch)
+        return
+
+    with ipc.open_file(path) as reader:
+        for index in range(reader.num_record_batches):
+            yield from _slices(_table_chunk(reader.get_batch(index)), chunk_rows)
+
+
+def iter_pair_sessions(raw_dir: str, chunk_rows: int = DEFAULT_CHUNK_ROWS
+                       ) -> Iterator[Tuple[str, Iterator[Dict[str, np.ndarray]]]]:
+    """
+    逐会话、逐块读取一个player-machine对的原始spin数据
+
+    支持所有输出布局：每会话一个csv(.gz/.zst)/parquet/arrow文件、段文件(.seg)、
+    二进制日志(.spinlog)。每个会话产出一个数据块迭代器，内存占用以chunk_rows为上限
+    （段文件的块以单个会话为单位解码）。
+
+    Args:
+        raw_dir: raw_data目录
+        chunk_rows: 每块最大行数
+
+    Yields:
+        (session_id, 数据块迭代器)
+    """
+    if not os.path.isdir(raw_dir):
+        return
+
+    for filename in sorted(os.listdir(raw_dir)):
+        path = os.path.join(raw_dir, filename)
+
+        if filename.endswith(BINARY_EXTENSION):
+            reader = BinarySpinLogReader(path)
+            for session_id in reader.session_ids():
+                records = reader.session(session_id)
+
+                def binary_chunks(records=records):
+                    for start in range(0, len(records), chunk_rows):
+                        block = records[start:start + chunk_rows]
+                        yield normalize_chunk({
+                            "bet": block["bet"], "payout": block["payout"],
+                            "balance_before": block["balance_before"], "balance_after": block["balance_after"],
+                            "in_free_spins": (block["flags"] & FLAG_IN_FREE_SPINS) != 0,
+                            "big_win": (block["flags"] & FLAG_BIG_WIN) != 0
+                        })
+
+                yield session_id, binary_chunks()
+            continue
+
+        if filename.endswith(SEGMENT_EXTENSION):
+            reader = SpinSegmentReader(path)
+            for session_id in reader.session_ids():
+                def segment_chunks(reader=reader, session_id=session_id):
+                    rows = reader.read_session(session_id, columns=list(ANALYSIS_COLUMNS))
+                    if rows:
+                        chunk = normalize_chunk({name: [row.get(name) for row in rows] for name in ANALYSIS_COLUMNS})
+                        yield from _slices(chunk, chunk_rows)
+
+                yield session_id, segment_chunks()
+            continue
+
+        parsed = _raw_file_session_id(filename)
+        if parsed is None:
+            continue
+        session_id, file_format = parsed
+        if file_format == "csv":
+            yield session_id, _iter_csv_file(path, chunk_rows)
+        else:
+            yield session_id, _iter_columnar_file(path, file_format, chunk_rows)
+
+
+def analyze_pair(task_dir: str, player_id: str, machine_id: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 session_metrics_path: Optional[str] = None) -> PairAccumulator:
+    """
+    流式分析一个player-machine对
+
+    Args:
+        task_dir: 模拟任务目录
+        player_id: 玩家ID
+        machine_id: 机器ID
+        chunk_rows: 每块最大行数
+        session_metrics_path: 可选，逐会话指标CSV的输出路径（流式写出，不在内存中保留）
+
+    Returns:
+        该对的PairAccumulator
+    """
+    pair = PairAccumulator(player_id, machine_id)
+    raw_dir = os.path.join(task_dir, player_id, machine_id, "raw_data")
+
+    metrics_file = writer = None
+    try:
+        for session_id, chunks in iter_pair_sessions(raw_dir, chunk_rows):
+            session = SessionAccumulator(session_id)
+            for chunk in chunks:
+                session.update(chunk)
+            pair.add_session(session)
+
+            if session_metrics_path:
+                row = session.to_dict()
+                if writer is None:
+                    os.makedirs(os.path.dirname(session_metrics_path) or ".", exist_ok=True)
+                    metrics_file = open(session_metrics_path, 'w', newline='', encoding='utf-8')
+                    writer = csv.DictWriter(metrics_file, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+    finally:
+        if metrics_file is not None:
+            metrics_file.close()
+
+    logger.info(f"Analyzed {pair.sessions} sessions / {pair.spins} spins for {player_id}/{machine_id}")
+    return pair
+
+
+def find_pairs(task_dir: str) -> List[Tuple[str, str]]:
+    """列出任务目录中有raw_data的player-machine对"""
+    pairs = []
+    for player_id in sorted(os.listdir(task_dir)):
+        player_dir = os.path.join(task_dir, player_id)
+        if not os.path.isdir(player_dir) or player_id == "reports":
+            continue
+        for machine_id in sorted(os.listdir(player_dir)):
+            if os.path.isdir(os.path.join(player_dir, machine_id, "raw_data")):
+                pairs.append((player_id, machine_id))
+    return pairs
+
+
+def analyze_task_dir(task_dir: str, mode: ExecutionMode = ExecutionMode.MULTIPROCESS,
+                     max_workers: Optional[int] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                     session_metrics_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    并行流式分析整个模拟任务目录
+
+    每个player-machine对是一个独立任务（默认多进程），结果为可合并的累加器，
+    最后合并为全局指标。
+
+    Args:
+        task_dir: 模拟任务目录（sim_xxx）
+        mode: 执行模式
+        max_workers: 最大并行数
+        chunk_rows: 每块最大行数
+        session_metrics_dir: 可选，逐会话指标CSV的输出目录（每对一个文件）
+
+    Returns:
+        {"overall": {...}, "pairs": {pair_key: {...}}}
+    """
+    pairs = find_pairs(task_dir)
+    tasks = []
+    for player_id, machine_id in pairs:
+        metrics_path = None
+        if session_metrics_dir:
+            metrics_path = os.path.join(session_metrics_dir, f"{player_id}_{machine_id}_session_metrics.csv")
+        tasks.append(functools.partial(analyze_pair, task_dir, player_id, machine_id, chunk_rows, metrics_path))
+
+    executor = TaskExecutor(mode if len(tasks) > 1 else ExecutionMode.SEQUENTIAL, max_workers=max_workers)
+    results = executor.execute(tasks) if tasks else []
+
+    overall = PairAccumulator()
+    report = {}
+    for pair in sorted(results, key=lambda p: (p.player_id, p.machine_id)):
+        overall.merge(pair)
+        report[f"{pair.player_id}_{pair.machine_id}"] = pair.to_dict()
+
+    return {"task_dir": task_dir, "overall": overall.to_dict(), "pairs": report}
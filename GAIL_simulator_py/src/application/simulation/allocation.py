@@ -0,0 +1,166 @@
+# src/application/simulation/allocation.py
+import math
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from src.application.simulation.convergence import PairConvergence, MEAN_METRICS
+
+
+logger = logging.getLogger("application.simulation.allocation")
+
+
+class NeymanAllocator:
+    """
+    固定全局预算下的自适应会话分配
+
+    目标是最小化各对估计量方差之和 Σ σ_i²/n_i（σ_i为对i单个会话的标准差，
+    由实时的标准误反推：σ_i² = SE_i²·n_i），最优解即Neyman分配 n_i ∝ σ_i。
+    这里逐个会话贪心地分给边际方差下降 σ_i²/n_i - σ_i²/(n_i+1) 最大的对，
+    n_i计入已调度但未完成的会话，因此可以在流式执行中边运行边调整，
+    与一次性按Neyman比例分配的结果一致（取整误差内）。
+
+    每个对先跑pilot_sessions个试探会话；方差尚未可估的对按已知的最大σ对待，
+    避免刚开始时被饿死。
+
+    配置示例（simulation配置中的allocation段）:
+        allocation:
+          enabled: true
+          total_sessions: 20000     # 全局会话预算
+          pilot_sessions: 20        # 每对的试探会话数
+          metric: rtp               # rtp / session_length / net_result / final_balance / total_bet
+          max_in_flight: null       # 同时在运行的会话数上限（默认2×工作线程数）
+    """
+
+    def __init__(self, config: Dict[str, Any], pairs: List[Tuple[str, str]], default_budget: int):
+        """
+        Args:
+            config: allocation配置
+            pairs: player-machine对
+            default_budget: 未配置total_sessions时的全局预算
+        """
+        self.metric = config.get("metric", "rtp")
+        if self.metric != "rtp" and self.metric not in MEAN_METRICS:
+            raise ValueError(f"Unknown allocation metric: {self.metric}")
+
+        self.pairs = list(pairs)
+        self.total_sessions = int(config.get("total_sessions") or default_budget)
+        self.pilot_sessions = max(int(config.get("pilot_sessions", 20)), 2)
+        self.max_in_flight = config.get("max_in_flight")
+        self.trackers = {pair: PairConvergence({self.metric: {"tolerance": math.inf}}, 1.0, 2)
+                         for pair in self.pairs}
+        self.scheduled = {pair: 0 for pair in self.pairs}
+        self.finished = {pair: 0 for pair in self.pairs}
+        self.failed = {pair: 0 for pair in self.pairs}
+
+    @property
+    def remaining(self) -> int:
+        """尚未调度的预算"""
+        return max(self.total_sessions - sum(self.scheduled.values()), 0)
+
+    def session_std(self, pair: Tuple[str, str]) -> Optional[float]:
+        """对的单会话标准差估计，样本不足时为None"""
+        tracker = self.trackers[pair]
+        _, standard_error = tracker.estimate(self.metric)
+        if not math.isfinite(standard_error):
+            return None
+        return standard_error * math.sqrt(tracker.sessions)
+
+    def next_pair(self) -> Optional[Tuple[str, str, int]]:
+        """
+        选出下一个会话所属的对
+
+        Returns:
+            (player_id, machine_id, session_num)，预算用完时为None
+        """
+        if not self.pairs or self.remaining <= 0:
+            return None
+
+        # 试探阶段：先把每个对补到pilot_sessions
+        pilot = [pair for pair in self.pairs if self.scheduled[pair] < self.pilot_sessions]
+        if pilot:
+            pair = min(pilot, key=lambda p: self.scheduled[p])
+        else:
+            stds = {pair: self.session_std(pair) for pair in self.pairs}
+            known = [std for std in stds.values() if std is not None]
+            fallback = max(known) if known else 1.0
+            pair = max(self.pairs, key=lambda p: self._marginal_gain(
+                stds[p] if stds[p] is not None else fallback, self.scheduled[p]))
+
+        self.scheduled[pair] += 1
+        return pair[0], pair[1], self.scheduled[pair]
+
+    def ready(self) -> bool:
+        """
+        流式执行时是否可以继续分配：试探阶段结束后，方差未知且仍有会话在运行的对
+        需要先等结果回来，否则分配会退化为按已调度数轮转
+        """
+        if self.pairs and any(self.scheduled[pair] < self.pilot_sessions for pair in self.pairs):
+            return True
+        return all(self.session_std(pair) is not None or self.finished[pair] >= self.scheduled[pair]
+                   for pair in self.pairs)
+
+    @staticmethod
+    def _marginal_gain(std: float, n: int) -> float:
+        """再加一个会话时估计量方差的下降量"""
+        return std * std / (n * (n + 1)) if n > 0 else math.inf
+
+    def next_round(self, round_size: int) -> List[Tuple[str, str, int]]:
+        """按当前方差估计分配一轮（最多round_size个会话）"""
+        batch = []
+        for _ in range(round_size):
+            item = self.next_pair()
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def add_result(self, result: Optional[Dict[str, Any]]) -> None:
+        """
+        记录一个会话结果
+
+        失败的会话（带error字段）也算作完成，只是不进入方差估计，否则ready()会一直等它。
+        结果必须带player_id和machine_id：None无法归属到对，调用方应把失败包装成error结果。
+        """
+        if not result:
+            logger.warning("Session result without player/machine ids ignored by the allocator")
+            return
+        pair = (result.get("player_id"), result.get("machine_id"))
+        if pair in self.trackers:
+            self.finished[pair] += 1
+            if result.get("error"):
+                self.failed[pair] += 1
+            self.trackers[pair].add_result(result)
+
+    def neyman_shares(self) -> Dict[str, float]:
+        """按当前σ估计的Neyman最优比例（报告用）"""
+        stds = {pair: self.session_std(pair) or 0.0 for pair in self.pairs}
+        total = sum(stds.values())
+        return {f"{p}_{m}": (std / total if total > 0 else 1.0 / len(self.pairs)) for (p, m), std in stds.items()}
+
+    def report(self) -> Dict[str, Any]:
+        """分配报告"""
+        shares = self.neyman_shares()
+        pairs = {}
+        variance_sum = 0.0
+        for pair in self.pairs:
+            tracker = self.trackers[pair]
+            estimate, standard_error = tracker.estimate(self.metric)
+            key = f"{pair[0]}_{pair[1]}"
+            if math.isfinite(standard_error):
+                variance_sum += standard_error ** 2
+            pairs[key] = {
+                "sessions": tracker.sessions,
+                "scheduled": self.scheduled[pair],
+                "failed": self.failed[pair],
+                "estimate": estimate,
+                "standard_error": standard_error if math.isfinite(standard_error) else None,
+                "session_std": self.session_std(pair),
+                "neyman_share": shares[key]
+            }
+        return {
+            "metric": self.metric,
+            "total_sessions": sum(self.scheduled.values()),
+            "budget": self.total_sessions,
+            "estimator_variance_sum": variance_sum,
+            "pairs": pairs
+        }
@@ -0,0 +1,239 @@
+# src/application/simulation/convergence.py
+import math
+import logging
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Tuple
+
+from src.domain.session.entities.incremental_stats import IncrementalStats
+
+
+# 会话级均值指标：从SessionRunner的结果字典中取值
+MEAN_METRICS = {
+    "session_length": lambda r: r.get("total_spins", 0),
+    "net_result": lambda r: r.get("final_balance", 0.0) - r.get("initial_balance", 0.0),
+    "final_balance": lambda r: r.get("final_balance", 0.0),
+    "total_bet": lambda r: r.get("total_bet", 0.0),
+}
+
+logger = logging.getLogger("application.simulation.convergence")
+
+
+@dataclass
+class RatioStats:
+    """
+    比率估计量 R = ΣW / ΣB 的可合并统计（以会话为独立单元）。
+
+    RTP是总赢额与总投注之比，不是会话RTP的均值；按delta方法，
+    Var(R) ≈ Σ(W_i - R·B_i)² / (n(n-1)·B̄²)，只需保存五个和即可随时计算。
+    """
+    count: int = 0
+    sum_x: float = 0.0
+    sum_y: float = 0.0
+    sum_xx: float = 0.0
+    sum_yy: float = 0.0
+    sum_xy: float = 0.0
+
+    def update(self, x: float, y: float) -> None:
+        """
+        加入一个会话
+
+        Args:
+            x: 分子（总赢额）
+            y: 分母（总投注）
+        """
+        self.count += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_yy += y * y
+        self.sum_xy += x * y
+
+    def merge(self, other: 'RatioStats') -> 'RatioStats':
+        """合并，返回新对象"""
+        return RatioStats(self.count + other.count, self.sum_x + other.sum_x, self.sum_y + other.sum_y,
+                          self.sum_xx + other.sum_xx, self.sum_yy + other.sum_yy, self.sum_xy + other.sum_xy)
+
+    @property
+    def ratio(self) -> float:
+        return self.sum_x / self.sum_y if self.sum_y > 0 else 0.0
+
+    def standard_error(self) -> float:
+        """比率的标准误（delta方法），样本不足时为inf"""
+        if self.count < 2 or self.sum_y <= 0:
+            return math.inf
+        r = self.ratio
+        residual = max(self.sum_xx - 2 * r * self.sum_xy + r * r * self.sum_yy, 0.0)
+        mean_y = self.sum_y / self.count
+        return math.sqrt(residual / (self.count * (self.count - 1))) / mean_y
+
+
+class PairConvergence:
+    """
+    单个player-machine对的收敛跟踪
+
+    每个目标指标维护一个运行中的置信区间（CLT），全部指标的半宽都不超过容差时判定收敛。
+    """
+
+    def __init__(self, targets: Dict[str, Dict[str, Any]], z: float, min_sessions: int):
+        """
+        Args:
+            targets: 指标名 -> {"tolerance": 绝对半宽, "relative": 是否按估计值的比例}
+            z: 置信水平对应的正态分位数
+            min_sessions: 判定收敛前的最少会话数
+        """
+        self.targets = targets
+        self.z = z
+        self.min_sessions = min_sessions
+        self.sessions = 0
+        self.rtp = RatioStats()
+        self.means = {name: IncrementalStats() for name in targets if name != "rtp"}
+
+    def add_result(self, result: Dict[str, Any]) -> None:
+        """加入一个会话结果（SessionRunner.run()的返回值）"""
+        if result.get("error"):
+            return
+        self.sessions += 1
+        self.rtp.update(result.get("total_win", 0.0), result.get("total_bet", 0.0))
+        for name, stats in self.means.items():
+            stats.update(MEAN_METRICS[name](result))
+
+    def estimate(self, name: str) -> Tuple[float, float]:
+        """
+        指标的(估计值, 标准误)，样本不足时标准误为inf
+
+        Args:
+            name: 指标名
+        """
+        if name == "rtp":
+            return self.rtp.ratio, self.rtp.standard_error()
+        stats = self.means[name]
+        if stats.count < 2:
+            return stats.mean, math.inf
+        return stats.mean, stats.get_std_dev() / math.sqrt(stats.count)
+
+    def interval(self, name: str) -> Tuple[float, float]:
+        """
+        指标的(估计值, 置信区间半宽)
+
+        Args:
+            name: 指标名
+        """
+        estimate, standard_error = self.estimate(name)
+        return estimate, self.z * standard_error
+
+    def _tolerance(self, name: str, estimate: float) -> float:
+        target = self.targets[name]
+        tolerance = float(target.get("tolerance", 0.01))
+        return tolerance * abs(estimate) if target.get("relative", False) else tolerance
+
+    @property
+    def converged(self) -> bool:
+        """所有目标指标的半宽都不超过容差"""
+        if self.sessions < self.min_sessions:
+            return False
+        for name in self.targets:
+            estimate, half_width = self.interval(name)
+            if half_width > self._tolerance(name, estimate):
+                return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        metrics = {}
+        for name in self.targets:
+            estimate, half_width = self.interval(name)
+            metrics[name] = {
+                "estimate": estimate,
+                "half_width": half_width if math.isfinite(half_width) else None,
+                "tolerance": self._tolerance(name, estimate)
+            }
+        return {"sessions": self.sessions, "converged": self.converged, "metrics": metrics}
+
+
+class ConvergenceController:
+    """
+    收敛驱动的会话调度
+
+    按轮调度：每轮给每个未收敛的对安排batch_size个会话，运行后更新置信区间，
+    半宽达到容差或达到max_sessions预算上限的对不再安排新会话。
+
+    配置示例（simulation配置中的convergence段）:
+        convergence:
+          enabled: true
+          confidence: 0.95
+          min_sessions: 30
+          max_sessions: 100000      # 每对的预算上限
+          batch_size: 50            # 每轮每对的会话数
+          targets:
+            rtp: {tolerance: 0.01}
+            session_length: {tolerance: 0.05, relative: true}
+    """
+
+    def __init__(self, config: Dict[str, Any], pairs: List[Tuple[str, str]]):
+        """
+        Args:
+            config: convergence配置
+            pairs: player-machine对
+        """
+        targets = config.get("targets") or {"rtp": {"tolerance": 0.01}}
+        unknown = set(targets) - set(MEAN_METRICS) - {"rtp"}
+        if unknown:
+            raise ValueError(f"Unknown convergence targets: {', '.join(sorted(unknown))}")
+
+        confidence = float(config.get("confidence", 0.95))
+        if not 0 < confidence < 1:
+            raise ValueError(f"confidence must be in (0, 1): {confidence}")
+
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.confidence = confidence
+        self.min_sessions = max(int(config.get("min_sessions", 30)), 2)
+        self.max_sessions = int(config.get("max_sessions", 10000))
+        self.batch_size = max(int(config.get("batch_size", 50)), 1)
+        self.pairs = list(pairs)
+        self.trackers = {pair: PairConvergence(targets, self.z, self.min_sessions) for pair in self.pairs}
+        self.scheduled = {pair: 0 for pair in self.pairs}
+        self.rounds = 0
+
+    def active_pairs(self) -> List[Tuple[str, str]]:
+        """仍需调度的对：未收敛且未达到预算上限"""
+        return [pair for pair in self.pairs
+                if self.scheduled[pair] < self.max_sessions and not self.trackers[pair].converged]
+
+    def next_round(self) -> List[Tuple[str, str, int]]:
+        """
+        生成下一轮要运行的会话
+
+        Returns:
+            [(player_id, machine_id, session_num), ...]，session_num从1开始连续编号；空列表表示结束
+        """
+        batch = []
+        for pair in self.active_pairs():
+            start = self.scheduled[pair]
+            count = min(self.batch_size, self.max_sessions - start)
+            batch.extend((pair[0], pair[1], start + n + 1) for n in range(count))
+            self.scheduled[pair] = start + count
+        if batch:
+            self.rounds += 1
+        return batch
+
+    def add_result(self, result: Optional[Dict[str, Any]]) -> None:
+        """记录一个会话结果"""
+        if not result:
+            return
+        tracker = self.trackers.get((result.get("player_id"), result.get("machine_id")))
+        if tracker is not None:
+            tracker.add_result(result)
+
+    def report(self) -> Dict[str, Any]:
+        """收敛报告"""
+        pairs = {f"{p}_{m}": dict(self.trackers[(p, m)].to_dict(), scheduled=self.scheduled[(p, m)],
+                                  budget_exhausted=self.scheduled[(p, m)] >= self.max_sessions
+                                  and not self.trackers[(p, m)].converged)
+                 for p, m in self.pairs}
+        return {
+            "confidence": self.confidence,
+            "rounds": self.rounds,
+            "total_sessions": sum(self.scheduled.values()),
+            "converged_pairs": sum(1 for info in pairs.values() if info["converged"]),
+            "pairs": pairs
+        }
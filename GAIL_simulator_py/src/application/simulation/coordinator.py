@@ -1,19 +1,25 @@
 # src/application/simulation/coordinator.py
+import sys
 import logging
 import time
 import threading
 from typing import Dict, List, Any, Optional, Tuple
-from collections import defaultdict
 
 from src.domain.events.event_dispatcher import EventDispatcher
 from src.domain.session.factories.session_factory import SessionFactory
+from src.domain.session.entities.distribution_stats import DistributionAggregator
 from src.application.registry.registry_service import RegistryService
 from src.application.simulation.session_runner import SessionRunner
+from src.application.simulation.convergence import ConvergenceController
+from src.application.simulation.allocation import NeymanAllocator
 
 from src.application.analysis.session_analyzer import SessionAnalyzer
+from src.application.analysis.spin_stream_analyzer import SessionAccumulator, PairAccumulator, spins_to_chunk
 from src.application.analysis.preference_analyzer import PreferenceAnalyzer
 from src.application.analysis.report_generator import ReportGenerator
 from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.replay_log import REPLAY_RNG
+from src.infrastructure.rng.rng_provider import RNGProvider
 
 
 class SimulationCoordinator:
@@ -50,12 +56,29 @@ class SimulationCoordinator:
         # Results storage
         self.results = {}
         
+        # 每个工作线程一个分布统计聚合器，模拟结束时合并
+        self._local = threading.local()
+        self._distribution_aggregators: List[DistributionAggregator] = []
+        self._distribution_lock = threading.Lock()
+        self._distribution: Optional[DistributionAggregator] = None
+        # 每个工作线程一组按对的spin级指标累加器（回撤、波动、投注变化），模拟结束时合并
+        self._spin_metric_groups: List[Dict[Tuple[str, str], PairAccumulator]] = []
+        # 会话结果写出后只计数；keep_session_results启用时才保留在results["sessions"]中
+        self._keep_session_results = False
+        self._session_counts = {"completed": 0, "failed": 0}
+        self._session_lock = threading.Lock()
+        
     def run_simulation(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """
         运行简化的模拟
         """
         self.logger.info("Starting simplified simulation with stateless instances")
         
+        # 两种模式各自决定会话数，不能同时生效
+        if config.get("allocation", {}).get("enabled", False) and config.get("convergence", {}).get("enabled", False):
+            raise ValueError("allocation and convergence cannot both be enabled; "
+                             "allocation spends a fixed budget, convergence stops at a tolerance")
+        
         # 初始化输出管理器
         output_config = config.get("output", {})
         if output_config:
@@ -66,11 +89,23 @@ class SimulationCoordinator:
         self.output_manager.copy_config(config)
         
         # 重置结果
+        with self._distribution_lock:
+            self._distribution_aggregators = []
+            self._spin_metric_groups = []
+        self._local = threading.local()
+        # 详细会话报告需要逐会话结果，请求该报告时自动保留
+        detailed_report = config.get("analysis", {}).get("include", {}).get("detailed_session_report", False)
+        self._keep_session_results = config.get("keep_session_results", False) or detailed_report
+        if detailed_report and not config.get("keep_session_results", False):
+            self.logger.info("Detailed session report requested, keeping session results in memory")
+        self._session_counts = {"completed": 0, "failed": 0}
         self.results = {
             "start_time": time.time(),
             "end_time": None,
             "player_machine_pairs": [],
             "sessions": [],
+            "session_count": 0,
+            "failed_sessions": 0,
             "simulation_dir": sim_dir
         }
         
@@ -89,21 +124,51 @@ class SimulationCoordinator:
         self.logger.info(f"Created {len(pairs)} player-machine pairs")
         
         # 执行sessions
-        if use_concurrency and self.task_executor:
+        if config.get("allocation", {}).get("enabled", False):
+            session_results = self._execute_sessions_allocated(pairs, sessions_per_pair, config, use_concurrency)
+        elif config.get("convergence", {}).get("enabled", False):
+            session_results = self._execute_sessions_until_converged(pairs, config, use_concurrency)
+        elif use_concurrency and self.task_executor:
             session_results = self._execute_sessions_concurrent(pairs, sessions_per_pair, config)
         else:
             session_results = self._execute_sessions_sequential(pairs, sessions_per_pair, config)
         
         # 存储结果
         self.results["sessions"] = [r for r in session_results if r is not None]
+        self.results["session_count"] = self._session_counts["completed"]
+        self.results["failed_sessions"] = self._session_counts["failed"]
         self.results["player_machine_pairs"] = pairs
         self.results["end_time"] = time.time()
         
+        # 合并各线程的分布统计
+        self._distribution = self._merge_distribution_stats()
+        self.results["distribution_stats"] = self._distribution.to_dict()
+        self.results["spin_metrics"] = self._merge_spin_metrics()
+        
+        # 关闭V1玩家的微批推理代理并收集其统计
+        self.results["inference_brokers"] = self._close_inference_brokers()
+        
+        # 等待后台写入完成（async_write启用时）
+        self.results["output_write_metrics"] = self.output_manager.close_write_pipeline()
+        
+        # 关闭段文件（layout为segments时）
+        self.output_manager.close_segment_store()
+        self.output_manager.close_binary_log_store()
+        
+        # 关闭回放日志（replay.enabled时）
+        self.results["replay_logs"] = self.output_manager.close_replay_store()
+        
+        # 写出抽样的spin（sampling.policy为reservoir时）
+        self.results["sampling_metrics"] = self.output_manager.close_spin_sampler()
+        
         # ===== 合并所有临时summary文件 =====
         self.logger.info("Finalizing session summaries...")
         merged_summaries = self.output_manager.finalize_all_summaries()
         self.results["merged_summary_files"] = merged_summaries
         self.logger.info(f"Finalized summaries for {len(merged_summaries)} player-machine pairs")
+        
+        # 等待对象存储上传完成
+        self.results["upload_metrics"] = self.output_manager.close_object_store()
 
         # 生成分析和报告
         self._generate_analysis_and_reports(config)
@@ -112,7 +177,7 @@ class SimulationCoordinator:
         pool_stats = self.registry_service.get_pool_stats()
         self.logger.info(f"Instance pool stats: {pool_stats}")
         
-        self.logger.info(f"Simulation completed with {len(self.results['sessions'])} sessions in {self.results['end_time'] - self.results['start_time']:.2f} seconds")
+        self.logger.info(f"Simulation completed with {self.results['session_count']} sessions in {self.results['end_time'] - self.results['start_time']:.2f} seconds")
         
         return self.results
     
@@ -162,7 +227,7 @@ class SimulationCoordinator:
                 # 创建任务函数
                 def create_task(p_id=player_id, m_id=machine_id, s_id=session_id, s_config=session_config):
                     def task():
-                        return self._run_single_session(p_id, m_id, s_id, s_config)
+                        return self._collect_session(self._run_single_session(p_id, m_id, s_id, s_config))
                     return task
                 
                 all_tasks.append(create_task())
@@ -204,7 +269,8 @@ class SimulationCoordinator:
             for session_num in range(sessions_per_pair):
                 session_id = f"{player_id}_{machine_id}_{session_num+1}"
                 
-                result = self._run_single_session(player_id, machine_id, session_id, session_config)
+                result = self._collect_session(
+                    self._run_single_session(player_id, machine_id, session_id, session_config))
                 if result:
                     results.append(result)
                 
@@ -216,6 +282,113 @@ class SimulationCoordinator:
         
         return results
     
+    def _execute_sessions_until_converged(self, pairs: List[Tuple[str, str]], config: Dict[str, Any],
+                                          use_concurrency: bool) -> List[Dict[str, Any]]:
+        """
+        收敛驱动执行：按轮调度会话，直到每个对的目标指标置信区间半宽达到容差或用完预算
+        （此模式下忽略sessions_per_pair）
+        """
+        controller = ConvergenceController(config.get("convergence", {}), pairs)
+        session_config = {
+            "max_spins": config.get("max_spins", 10000),
+            "max_sim_duration": config.get("max_sim_duration", 300),
+            "max_player_duration": config.get("max_player_duration", 7200),
+            "output_manager": self.output_manager
+        }
+        
+        results = []
+        while True:
+            batch = controller.next_round()
+            if not batch:
+                break
+            
+            tasks = []
+            for player_id, machine_id, session_num in batch:
+                session_id = f"{player_id}_{machine_id}_{session_num}"
+                
+                def create_task(p_id=player_id, m_id=machine_id, s_id=session_id):
+                    def task():
+                        return self._run_single_session(p_id, m_id, s_id, session_config)
+                    return task
+                
+                tasks.append(create_task())
+            
+            if use_concurrency and self.task_executor:
+                round_results = self.task_executor.execute(tasks)
+            else:
+                round_results = [task() for task in tasks]
+            
+            for result in round_results:
+                if self._collect_session(result) is not None:
+                    results.append(result)
+                if result is not None:
+                    controller.add_result(result)
+            
+            self.logger.info(f"Convergence round {controller.rounds}: {len(batch)} sessions, "
+                             f"{len(controller.active_pairs())}/{len(pairs)} pairs still running")
+        
+        self.results["convergence"] = controller.report()
+        self.logger.info(f"Convergence reached for {self.results['convergence']['converged_pairs']}/{len(pairs)} "
+                         f"pairs with {self.results['convergence']['total_sessions']} sessions")
+        return results
+    
+    def _execute_sessions_allocated(self, pairs: List[Tuple[str, str]], sessions_per_pair: int,
+                                    config: Dict[str, Any], use_concurrency: bool) -> List[Dict[str, Any]]:
+        """
+        自适应分配执行：全局会话预算按实时的各对方差做Neyman式分配，
+        每空出一个执行槽位就把下一个会话分给边际方差下降最大的对
+        （未配置total_sessions时预算为sessions_per_pair × 对数）
+        """
+        allocator = NeymanAllocator(config.get("allocation", {}), pairs, sessions_per_pair * len(pairs))
+        session_config = {
+            "max_spins": config.get("max_spins", 10000),
+            "max_sim_duration": config.get("max_sim_duration", 300),
+            "max_player_duration": config.get("max_player_duration", 7200),
+            "output_manager": self.output_manager
+        }
+        
+        def next_task():
+            # 方差未知的对还有会话在运行时先等结果，由执行器在有结果后再次询问
+            if not allocator.ready():
+                return None
+            item = allocator.next_pair()
+            if item is None:
+                return None
+            player_id, machine_id, session_num = item
+            session_id = f"{player_id}_{machine_id}_{session_num}"
+            
+            def task():
+                return player_id, machine_id, self._run_single_session(player_id, machine_id, session_id,
+                                                                       session_config)
+            return task
+        
+        results = []
+        
+        def on_result(item):
+            player_id, machine_id, result = item
+            if self._collect_session(result) is not None:
+                results.append(result)
+            if result is None:
+                # 拿不到实例的会话也记为完成（失败），否则分配器会一直等它的结果
+                allocator.add_result({"player_id": player_id, "machine_id": machine_id,
+                                      "error": "instances unavailable"})
+                return
+            allocator.add_result(result)
+        
+        if use_concurrency and self.task_executor:
+            self.task_executor.execute_streaming(next_task, on_result, allocator.max_in_flight)
+        else:
+            while True:
+                task = next_task()
+                if task is None:
+                    break
+                on_result(task())
+        
+        self.results["allocation"] = allocator.report()
+        self.logger.info(f"Allocated {self.results['allocation']['total_sessions']} sessions across {len(pairs)} "
+                         f"pairs by {allocator.metric} variance")
+        return results
+    
     def _run_single_session(self, player_id: str, machine_id: str, session_id: str, 
                           session_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -229,6 +402,13 @@ class SimulationCoordinator:
             self.logger.error(f"Failed to get instances for session {session_id}")
             return None
         
+        # 回放记录：会话期间机器使用由会话ID派生种子的独立RNG
+        original_rng = machine_instance.rng
+        replay_store = self.output_manager.get_replay_store()
+        if replay_store is not None:
+            rng_provider = getattr(self.registry_service, "rng_provider", None) or RNGProvider()
+            machine_instance.set_rng(rng_provider.get_rng(REPLAY_RNG, replay_store.session_seed(session_id)))
+        
         try:
             # 创建带状态管理的session
             session = self.session_factory.create_session(
@@ -247,6 +427,10 @@ class SimulationCoordinator:
             )
             
             result = runner.run()
+            self._get_distribution_aggregator().add_session(session.stats)
+            spin_metrics = self._add_spin_metrics(session)
+            if spin_metrics is not None:
+                result["spin_metrics"] = spin_metrics
             return result
             
         except Exception as e:
@@ -265,12 +449,103 @@ class SimulationCoordinator:
             }
         
         finally:
+            if replay_store is not None:
+                machine_instance.set_rng(original_rng)
+            
             # 归还实例到池中
             if player_instance:
                 self.registry_service.return_player_instance(player_id, player_instance)
             if machine_instance:
                 self.registry_service.return_machine_instance(machine_id, machine_instance)
     
+    def _collect_session(self, result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        记录一个会话的结果（输出已由会话写出，这里只计数）
+        
+        result为None（拿不到实例）或带error的会话记为失败。
+        
+        Returns:
+            启用keep_session_results时返回result，否则返回None
+        """
+        with self._session_lock:
+            self._session_counts["completed"] += 1
+            if result is None or "error" in result:
+                self._session_counts["failed"] += 1
+        return result if self._keep_session_results else None
+    
+    def _get_distribution_aggregator(self) -> DistributionAggregator:
+        """当前工作线程的分布统计聚合器（首次使用时创建并登记）"""
+        aggregator = getattr(self._local, "distribution", None)
+        if aggregator is None:
+            aggregator = self._local.distribution = DistributionAggregator()
+            with self._distribution_lock:
+                self._distribution_aggregators.append(aggregator)
+        return aggregator
+    
+    def _merge_distribution_stats(self) -> DistributionAggregator:
+        """合并所有线程的分布统计"""
+        merged = DistributionAggregator()
+        with self._distribution_lock:
+            for aggregator in self._distribution_aggregators:
+                merged = merged.merge(aggregator)
+        return merged
+    
+    def _add_spin_metrics(self, session) -> Optional[Dict[str, Any]]:
+        """
+        用会话在内存中记录的spin计算spin级指标，并入当前线程该对的累加器
+        
+        Returns:
+            SessionAccumulator.to_dict()；会话未记录spin（record_spins关闭或未被抽样）时为None
+        """
+        if not session.spins:
+            return None
+        accumulator = SessionAccumulator(session.id)
+        accumulator.update(spins_to_chunk(session.spins))
+        
+        groups = getattr(self._local, "spin_metrics", None)
+        if groups is None:
+            groups = self._local.spin_metrics = {}
+            with self._distribution_lock:
+                self._spin_metric_groups.append(groups)
+        key = (session.player.id, session.machine.id)
+        if key not in groups:
+            groups[key] = PairAccumulator(*key)
+        groups[key].add_session(accumulator)
+        return accumulator.to_dict()
+    
+    def _merge_spin_metrics(self) -> Dict[str, Any]:
+        """合并所有线程的spin级指标（格式同spin_stream_analyzer.analyze_task_dir）"""
+        pairs: Dict[Tuple[str, str], PairAccumulator] = {}
+        with self._distribution_lock:
+            for groups in self._spin_metric_groups:
+                for key, accumulator in groups.items():
+                    if key not in pairs:
+                        pairs[key] = PairAccumulator(*key)
+                    pairs[key].merge(accumulator)
+        
+        overall = PairAccumulator()
+        report = {}
+        for key in sorted(pairs):
+            overall.merge(pairs[key])
+            report[f"{key[0]}_{key[1]}"] = pairs[key].to_dict()
+        return {"overall": overall.to_dict(), "pairs": report}
+    
+    def _close_inference_brokers(self) -> Dict[str, Any]:
+        """
+        关闭所有聚类推理代理，返回各代理的批大小和延迟统计
+        
+        只在V1模型已被加载时才访问代理模块，避免在其他玩家类型下导入torch。
+        """
+        broker_module = sys.modules.get("src.domain.player.models.v1.services.inference_broker")
+        if broker_module is None:
+            return {}
+        metrics = broker_module.get_all_broker_metrics()
+        broker_module.shutdown_all_brokers()
+        for name, info in metrics.items():
+            self.logger.info(f"Inference broker {name}: {info['requests']} requests in {info['batches']} batches, "
+                             f"avg batch {info['avg_batch_size']:.1f}, {info['timeouts']} timeouts")
+        return metrics
+    
     def _generate_analysis_and_reports(self, config: Dict[str, Any]):
         """
         生成分析和报告
@@ -291,12 +566,7 @@ class SimulationCoordinator:
         生成分析报告
         """
         try:
-            # 分析所有会话
-            session_analyses = []
-            for session_data in self.results["sessions"]:
-                analysis = self.session_analyzer.analyze_session(session_data)
-                session_analyses.append(analysis)
-            
+            # 报告只使用流式聚合的统计（distribution_stats、spin_metrics），不逐会话分析
             # 获取报告目录路径
             reports_dir = self.output_manager.get_reports_directory()
             
@@ -307,19 +577,28 @@ class SimulationCoordinator:
             include_config = analysis_config.get("include", {})
             
             if include_config.get("summary_report", True):
-                summary_report = self._generate_summary_report(session_analyses)
+                summary_report = self._generate_summary_report()
                 report_generator.generate_summary_report(summary_report, {})
             
+            if include_config.get("distribution_report", True) and self.results.get("distribution_stats"):
+                report_generator.generate_distribution_report(
+                    self.results["distribution_stats"],
+                    state=self._distribution.to_state() if self._distribution else None)
+            
+            spin_metrics = self.results.get("spin_metrics", {})
+            if include_config.get("spin_metrics_report", True) and spin_metrics.get("pairs"):
+                report_generator.generate_spin_metrics_report(spin_metrics)
+            
             if include_config.get("player_preference_report", False):
                 pass
                 # TODO
-                # preference_analysis = self.preference_analyzer.analyze_player_preferences(session_analyses)
+                # preference_analysis = self.preference_analyzer.analyze_player_preferences(self.results)
                 # report_generator.generate_player_preference_report(preference_analysis)
             
             if include_config.get("machine_performance_report", False):
                 pass
                 # TODO 
-                # machine_analysis = self._generate_machine_performance_analysis(session_analyses)
+                # machine_analysis = self._generate_machine_performance_analysis()
                 # report_generator.generate_machine_performance_report(machine_analysis)
             
             self.logger.info("Reports generated successfully")
@@ -329,22 +608,22 @@ class SimulationCoordinator:
             import traceback
             self.logger.debug(f"Full traceback: {traceback.format_exc()}")
     
-    def _generate_summary_report(self, session_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_summary_report(self) -> Dict[str, Any]:
         """
         生成汇总报告
         """
-        if not session_analyses:
+        if not self.results.get("session_count"):
             return {}
         
-        total_sessions = len(session_analyses)
-        total_spins = sum(a.get("performance", {}).get("total_spins", 0) for a in session_analyses)
-        total_bet = sum(a.get("performance", {}).get("total_bet", 0.0) for a in session_analyses)
-        total_win = sum(a.get("performance", {}).get("total_win", 0.0) for a in session_analyses)
+        # 总计取自合并后的分布统计，不再逐会话累加
+        overall = self.results.get("distribution_stats", {}).get("overall", {})
+        total_sessions = overall.get("sessions", 0)
+        total_spins = overall.get("total_spins", 0)
+        total_bet = overall.get("total_bet", 0.0)
+        total_win = overall.get("total_win", 0.0)
         
         overall_rtp = total_win / total_bet if total_bet > 0 else 0.0
-        
-        durations = [a.get("player_behavior", {}).get("duration", 0.0) for a in session_analyses]
-        avg_duration = sum(durations) / len(durations) if durations else 0.0
+        avg_duration = overall.get("session", {}).get("duration", {}).get("mean", 0.0)
         
         return {
             "total_sessions": total_sessions,
@@ -354,32 +633,29 @@ class SimulationCoordinator:
             "overall_rtp": overall_rtp,
             "avg_session_duration": avg_duration,
             "net_result": total_win - total_bet,
-            "simulation_duration": self.results["end_time"] - self.results["start_time"]
+            "failed_sessions": self.results.get("failed_sessions", 0),
+            "simulation_duration": self.results["end_time"] - self.results["start_time"],
+            "session_quantiles": overall.get("quantiles", {}),
+            "spin_metrics": self.results.get("spin_metrics", {}).get("overall"),
+            "inference_brokers": self.results.get("inference_brokers") or None,
+            "convergence": self.results.get("convergence"),
+            "allocation": self.results.get("allocation")
         }
     
-    def _generate_machine_performance_analysis(self, session_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_machine_performance_analysis(self) -> Dict[str, Any]:
         """
-        生成机器性能分析
+        生成机器性能分析（取自按机器合并的分布统计）
         """
-        machine_stats = defaultdict(lambda: {
-            "total_spins": 0,
-            "total_bet": 0.0,
-            "total_win": 0.0,
-            "session_count": 0
-        })
-        
-        for analysis in session_analyses:
-            machine_id = analysis.get("machine_id", "unknown")
-            performance = analysis.get("performance", {})
-            
-            machine_stats[machine_id]["total_spins"] += performance.get("total_spins", 0)
-            machine_stats[machine_id]["total_bet"] += performance.get("total_bet", 0.0)
-            machine_stats[machine_id]["total_win"] += performance.get("total_win", 0.0)
-            machine_stats[machine_id]["session_count"] += 1
-        
-        # 计算每台机器的RTP
-        for machine_id, stats in machine_stats.items():
-            stats["rtp"] = stats["total_win"] / stats["total_bet"] if stats["total_bet"] > 0 else 0.0
-            stats["avg_spins_per_session"] = stats["total_spins"] / stats["session_count"]
+        machine_stats = {}
+        for machine_id, group in self.results.get("distribution_stats", {}).get("machines", {}).items():
+            sessions = group.get("sessions", 0)
+            machine_stats[machine_id] = {
+                "total_spins": group.get("total_spins", 0),
+                "total_bet": group.get("total_bet", 0.0),
+                "total_win": group.get("total_win", 0.0),
+                "session_count": sessions,
+                "rtp": group.get("rtp", 0.0),
+                "avg_spins_per_session": group.get("total_spins", 0) / sessions if sessions else 0.0
+            }
         
-        return dict(machine_stats)
\ No newline at end of file
+        return machine_stats
\ No newline at end of file
@@ -0,0 +1,93 @@
+# src/application/simulation/session_replayer.py
+import logging
+from typing import Dict, List, Any, Optional
+
+from src.domain.session.entities.gaming_session import GamingSession
+from src.infrastructure.output.replay_log import decode_runs
+from src.infrastructure.output.spin_binary import machine_config_hash
+from src.infrastructure.rng.rng_provider import RNGProvider
+
+
+class ReplayPlayer:
+    """
+    回放用的玩家替身：初始余额取自回放条目，投注由回放序列给出，不做任何决策
+    """
+
+    def __init__(self, entry: Dict[str, Any]):
+        """
+        Args:
+            entry: 回放条目
+        """
+        self.id = entry["player_id"]
+        self.currency = entry.get("currency", "CNY")
+        self.config = {"active_lines": entry.get("active_lines")}
+        self._initial_balance = entry["initial_balance"]
+        bets = decode_runs(entry.get("bets", []))
+        self._first_bet = bets[0] if bets else 0.0
+
+    def generate_initial_balance(self) -> float:
+        return self._initial_balance
+
+    def generate_first_bet(self, balance: float) -> float:
+        return self._first_bet
+
+
+class SessionReplayer:
+    """
+    会话回放器
+
+    用回放条目中的种子重建机器RNG，再把记录的投注序列依次交给
+    GamingSession.execute_spin，与原始模拟走同一条代码路径，
+    因此结果网格、赢额、余额和免费旋转状态逐spin一致。
+    时间戳为回放时的墙钟时间，不参与比对。
+    """
+
+    def __init__(self, machine, rng_provider: Optional[RNGProvider] = None):
+        """
+        初始化回放器
+
+        Args:
+            machine: 与原始模拟相同配置的SlotMachine实例（回放期间会替换其RNG）
+            rng_provider: RNG提供器
+        """
+        self.machine = machine
+        self.rng_provider = rng_provider or RNGProvider()
+        self.machine_hash = machine_config_hash(getattr(machine, "config", None)).hex()
+        self.logger = logging.getLogger("application.simulation.replayer")
+
+    def replay(self, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        重建一个会话的全部spin
+
+        Args:
+            entry: 回放条目
+
+        Returns:
+            与原始记录格式相同的spin字典列表
+
+        Raises:
+            ValueError: 机器不匹配或重建结果与记录的最终余额不一致
+        """
+        if entry["machine_id"] != self.machine.id:
+            raise ValueError(f"Replay entry is for machine {entry['machine_id']}, not {self.machine.id}")
+        if entry.get("machine_hash") and entry["machine_hash"] != self.machine_hash:
+            self.logger.warning(f"Machine config hash differs from recording: {entry['session_id']}")
+
+        original_rng = self.machine.rng
+        self.machine.set_rng(self.rng_provider.get_rng(entry.get("rng", "mersenne"), entry["seed"]))
+        try:
+            session = GamingSession(entry["session_id"], ReplayPlayer(entry), self.machine)
+            session.start()
+            for bet in decode_runs(entry.get("bets", [])):
+                result = session.execute_spin(bet)
+                if "error" in result:
+                    raise ValueError(f"Replay diverged at spin {session.stats.total_spins + 1}: {result['error']}")
+            session.active = False
+        finally:
+            self.machine.set_rng(original_rng)
+
+        final_balance = entry.get("final_balance")
+        if final_balance is not None and session.get_current_balance() != final_balance:
+            raise ValueError(f"Replay final balance {session.get_current_balance()} != recorded {final_balance} "
+                             f"({entry['session_id']})")
+        return session.spins
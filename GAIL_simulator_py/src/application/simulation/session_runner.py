@@ -93,8 +93,8 @@ class SessionRunner:
                 # 玩家决策：决定下一次的投注、延迟和是否结束（无状态调用）
                 next_bet_amount, next_delay_time = self.session.player.play(self.session.machine.id, session_data)
                 
-                # 检查玩家是否想结束会话
-                if next_bet_amount < 0 or self.session.player.should_end_session(self.session.machine.id, session_data):
+                # 检查玩家是否想结束会话（投注额为0表示模型决定结束，负数表示余额不足）
+                if next_bet_amount <= 0 or self.session.player.should_end_session(self.session.machine.id, session_data):
                     self._dispatch_event(SessionEventType.SESSION_ENDED, {
                         "reason": "player_decision",
                         "total_spins": self.session.stats.total_spins,
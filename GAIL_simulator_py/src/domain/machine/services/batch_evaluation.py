@@ -0,0 +1,263 @@
+# src/domain/machine/services/batch_evaluation.py
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class BatchWinEvaluator:
+    """
+    Vectorized counterpart of WinEvaluator for many spins at once.
+
+    Works on reel stops instead of grids: a batch of stops with shape (N, num_reels)
+    is turned into symbol grids and evaluated with numpy, giving the same payouts
+    as SlotMachine.spin() + WinEvaluator.evaluate_wins() for those stops. Symbols are
+    mapped to compact integer codes so all lookups (pay table, wild multipliers)
+    are plain array indexing. Wins are returned per unit of bet.
+    """
+
+    def __init__(self, machine, chunk_size: int = 65536):
+        """
+        Initialize lookup tables from a slot machine.
+
+        Args:
+            machine: SlotMachine instance (reels, paylines and pay table are read once)
+            chunk_size: Spins evaluated per array operation (bounds temporary memory)
+        """
+        self.chunk_size = max(int(chunk_size), 1)
+        self.window_size = machine.window_size
+        self.free_spins_count = machine.free_spins_count
+        self.free_multiplier = machine.free_spins_multiplier
+        self.num_lines = len(machine.paylines)
+
+        # Reel strips per reel set, in the same (sorted) order SlotMachine.spin() uses
+        reel_names = {name: sorted(reel_set.keys()) for name, reel_set in machine.reels.items()}
+        all_symbols = {symbol for name, reel_set in machine.reels.items()
+                       for reel in reel_set.values() for symbol in reel.symbols}
+        all_symbols.update(machine.wild_symbols)
+        all_symbols.add(machine.scatter_symbol)
+        for symbol in machine.pay_table:
+            try:
+                all_symbols.add(int(symbol))
+            except (TypeError, ValueError):
+                continue
+
+        self.symbols = np.array(sorted(all_symbols))
+        self._codes = {int(symbol): code for code, symbol in enumerate(self.symbols.tolist())}
+        self.strips: Dict[str, List[np.ndarray]] = {
+            name: [self.encode(machine.reels[name][reel].symbols) for reel in reel_names[name]]
+            for name in machine.reels
+        }
+        self.num_reels = len(self.strips["normal"])
+
+        # Per-code lookups
+        num_codes = len(self.symbols)
+        self.scatter_code = self._codes[int(machine.scatter_symbol)]
+        self.is_wild = np.zeros(num_codes, dtype=bool)
+        self.wild_multiplier = np.ones(num_codes)
+        for symbol in machine.wild_symbols:
+            code = self._codes[int(symbol)]
+            self.is_wild[code] = True
+            self.wild_multiplier[code] = machine.evaluator._get_wild_multiplier(symbol)
+
+        self.paylines = [list(line) for line in machine.paylines]
+        grid_size = self.num_reels * self.window_size
+        for line in self.paylines:
+            if max(line) >= grid_size:
+                raise ValueError(f"Payline {line} exceeds the {grid_size}-cell grid")
+        max_length = max(len(line) for line in self.paylines)
+
+        # pay_matrix[code, k - 3] = line pay for k matching symbols starting with code
+        self.pay_matrix = np.zeros((num_codes, max(max_length - 2, 1)))
+        self.pays_line = np.zeros(num_codes, dtype=bool)
+        for symbol, payouts in machine.pay_table.items():
+            try:
+                code = self._codes[int(symbol)]
+            except (TypeError, ValueError):
+                continue
+            if code == self.scatter_code or self.is_wild[code]:
+                continue
+            self.pays_line[code] = True
+            width = min(len(payouts), self.pay_matrix.shape[1])
+            self.pay_matrix[code, :width] = payouts[:width]
+
+        # Scatter pays: index min(count - 3, 2), as in WinEvaluator
+        self.scatter_pays = np.array(machine.pay_table.get(str(machine.scatter_symbol), [])[:3], dtype=float)
+
+        # Paylines grouped by length so each group is one array operation
+        self._line_groups = {}
+        for line in self.paylines:
+            self._line_groups.setdefault(len(line), []).append(line)
+        self._line_groups = {length: np.array(lines) for length, lines in self._line_groups.items()}
+
+    def encode(self, symbols) -> np.ndarray:
+        """Map symbol ids to compact codes."""
+        return np.array([self._codes[int(symbol)] for symbol in symbols], dtype=np.int64)
+
+    def reel_set_name(self, in_free: bool) -> str:
+        """Reel set used for a spin (same fallback as SlotMachine.spin)."""
+        return "bonus" if in_free and "bonus" in self.strips else "normal"
+
+    def reel_lengths(self, reel_set: str = "normal") -> np.ndarray:
+        """Number of stops on each reel of a reel set."""
+        return np.array([len(strip) for strip in self.strips[reel_set]])
+
+    def random_stops(self, rng: np.random.Generator, count: int, reel_set: str = "normal") -> np.ndarray:
+        """Uniform random stops, shape (count, num_reels)."""
+        return rng.integers(0, self.reel_lengths(reel_set), size=(count, self.num_reels))
+
+    def grid_codes(self, stops: np.ndarray, reel_set: str = "normal") -> np.ndarray:
+        """
+        Build flattened grids (row-major, like SlotMachine.spin) of symbol codes.
+
+        Args:
+            stops: Reel stops, shape (N, num_reels)
+            reel_set: Reel set name
+
+        Returns:
+            Array of shape (N, window_size * num_reels)
+        """
+        stops = np.asarray(stops)
+        rows = np.arange(self.window_size)
+        columns = []
+        for reel, strip in enumerate(self.strips[reel_set]):
+            columns.append(strip[(stops[:, reel, None] + rows) % len(strip)])
+        # (N, reels, rows) -> (N, rows, reels) -> flattened row-major
+        return np.stack(columns, axis=1).transpose(0, 2, 1).reshape(len(stops), -1)
+
+    def grids(self, stops: np.ndarray, reel_set: str = "normal") -> np.ndarray:
+        """Flattened grids of symbol ids (for comparison with SlotMachine.spin)."""
+        return self.symbols[self.grid_codes(stops, reel_set)]
+
+    def evaluate(self, stops: np.ndarray, in_free: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Evaluate a batch of spins.
+
+        Args:
+            stops: Reel stops, shape (N, num_reels)
+            in_free: Whether the spins are free spins (bonus reels, free multiplier, no trigger)
+
+        Returns:
+            Dictionary of arrays per spin, in units of bet:
+            line_win, scatter_win, total_win, scatter_count, trigger
+        """
+        stops = np.asarray(stops)
+        if len(stops) <= self.chunk_size:
+            return self._evaluate_chunk(stops, in_free)
+        parts = [self._evaluate_chunk(stops[start:start + self.chunk_size], in_free)
+                 for start in range(0, len(stops), self.chunk_size)]
+        return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+    def _line_runs(self, grid: np.ndarray):
+        """
+        Matches on every payline, one group of equally long lines at a time.
+
+        Yields:
+            (first symbol code, run length, wild multiplier, payable) arrays of shape (N, lines);
+            payable marks runs with an entry in pay_matrix
+        """
+        for length, lines in self._line_groups.items():
+            symbols = grid[:, lines]                      # (N, lines, length)
+            first = symbols[:, :, 0]
+            matches = (symbols[:, :, 1:] == first[:, :, None]) | self.is_wild[symbols[:, :, 1:]]
+            run = np.cumprod(matches, axis=2).astype(bool)
+            count = 1 + run.sum(axis=2)
+            multiplier = np.where(run, self.wild_multiplier[symbols[:, :, 1:]], 1.0).prod(axis=2)
+            payable = (count >= 3) & (count - 3 < self.pay_matrix.shape[1]) & self.pays_line[first]
+            yield first, count, multiplier, payable
+
+    def _scatter_index(self, grid: np.ndarray):
+        """Scatter count per spin and the scatter pay index (-1 when nothing pays)."""
+        scatter_count = (grid == self.scatter_code).sum(axis=1)
+        index = np.minimum(scatter_count - 3, 2)
+        index = np.where((scatter_count >= 3) & (index < len(self.scatter_pays)), index, -1)
+        return scatter_count, index
+
+    def _evaluate_chunk(self, stops: np.ndarray, in_free: bool) -> Dict[str, np.ndarray]:
+        grid = self.grid_codes(stops, self.reel_set_name(in_free))
+        base_multiplier = self.free_multiplier if in_free else 1
+
+        line_win = np.zeros(len(grid))
+        for first, count, multiplier, payable in self._line_runs(grid):
+            pays = self.pay_matrix[first, np.clip(count - 3, 0, self.pay_matrix.shape[1] - 1)]
+            line_win += (np.where(payable, pays, 0.0) * multiplier).sum(axis=1)
+        line_win *= base_multiplier / self.num_lines
+
+        is_scatter = grid == self.scatter_code
+        scatter_count, index = self._scatter_index(grid)
+        scatter_win = np.zeros(len(grid))
+        payable = index >= 0
+        scatter_win[payable] = self.scatter_pays[index[payable]]
+
+        if in_free:
+            trigger = np.zeros(len(grid), dtype=bool)
+        else:
+            columns = is_scatter.reshape(len(grid), self.window_size, self.num_reels).any(axis=1)
+            trigger = columns.sum(axis=1) >= 3
+
+        return {
+            "line_win": line_win,
+            "scatter_win": scatter_win,
+            "total_win": line_win + scatter_win,
+            "scatter_count": scatter_count,
+            "trigger": trigger
+        }
+
+    def hit_features(self, stops: np.ndarray, in_free: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Per-spin pay-table hit counts, the linear features of the win.
+
+        total_win equals line_hits . pay_matrix (summed over both axes) plus the
+        scatter pay selected by scatter_hits, so the win of any pay table with the
+        same shape follows from these counts without re-evaluating the spins.
+
+        Args:
+            stops: Reel stops, shape (N, num_reels)
+            in_free: Whether the spins are free spins
+
+        Returns:
+            Dictionary with line_hits (N, num_codes, pay columns; multiplier-weighted
+            and divided by the number of lines), scatter_hits (N, len(scatter_pays))
+            and trigger (N,)
+        """
+        stops = np.asarray(stops)
+        base_multiplier = self.free_multiplier if in_free else 1
+        width = self.pay_matrix.shape[1]
+        line_hits = np.zeros((len(stops), len(self.symbols), width))
+        scatter_hits = np.zeros((len(stops), len(self.scatter_pays)))
+        trigger = np.zeros(len(stops), dtype=bool)
+        for start in range(0, len(stops), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            grid = self.grid_codes(stops[chunk], self.reel_set_name(in_free))
+            rows = np.arange(len(grid))[:, None]
+            for first, count, multiplier, payable in self._line_runs(grid):
+                weight = np.where(payable, multiplier, 0.0) * base_multiplier / self.num_lines
+                column = np.clip(count - 3, 0, width - 1)
+                np.add.at(line_hits[chunk], (np.broadcast_to(rows, first.shape), first, column), weight)
+            _, index = self._scatter_index(grid)
+            payable = np.flatnonzero(index >= 0)
+            scatter_hits[start + payable, index[payable]] = 1.0
+            if not in_free:
+                columns = (grid == self.scatter_code).reshape(len(grid), self.window_size, self.num_reels).any(axis=1)
+                trigger[chunk] = columns.sum(axis=1) >= 3
+        return {"line_hits": line_hits, "scatter_hits": scatter_hits, "trigger": trigger}
+
+    def free_game_wins(self, rng: np.random.Generator, count: int,
+                       stops: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Total win of complete free-spin rounds (free_spins_count bonus spins each).
+
+        Args:
+            rng: Random generator used when stops are not given
+            count: Number of rounds
+            stops: Optional bonus stops, shape (count * free_spins_count, num_reels)
+
+        Returns:
+            Array of shape (count,) in units of bet
+        """
+        spins = count * self.free_spins_count
+        if spins == 0:
+            return np.zeros(count)
+        if stops is None:
+            stops = self.random_stops(rng, spins, self.reel_set_name(True))
+        wins = self.evaluate(stops, in_free=True)["total_win"]
+        return wins.reshape(count, self.free_spins_count).sum(axis=1)
@@ -0,0 +1,363 @@
+# src/domain/machine/services/payout_distribution.py
+import logging
+from dataclasses import dataclass
+from fractions import Fraction
+from math import lcm
+from statistics import NormalDist
+from typing import Dict, List, Any, Sequence, Tuple
+
+import numpy as np
+
+from .batch_evaluation import BatchWinEvaluator
+
+
+# Win bands (in multiples of the bet) of the default hit-frequency table
+DEFAULT_BANDS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Largest lattice (number of win points) convolved with dense arrays
+_DENSE_LIMIT = 50_000_000
+
+
+@dataclass
+class PayoutDistribution:
+    """
+    Discrete distribution of a win, in units of bet.
+
+    Wins live on the lattice points / denominator (line pays are divided by the
+    number of lines, so the lattice is exact for integer pay tables). The total
+    probability may be below 1 for the pieces of a split distribution (e.g. the
+    base-spin wins that do not trigger free spins).
+    """
+    points: np.ndarray
+    probabilities: np.ndarray
+    denominator: int = 1
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, probabilities: np.ndarray,
+                    max_denominator: int = 10 ** 6) -> 'PayoutDistribution':
+        """Build a distribution from float wins, merging equal values."""
+        values = np.asarray(values, dtype=float)
+        probabilities = np.asarray(probabilities, dtype=float)
+        distinct = np.unique(np.round(values, 9))
+        denominator = 1
+        for value in distinct.tolist():
+            denominator = lcm(denominator, Fraction(value).limit_denominator(max_denominator).denominator)
+        points = np.rint(values * denominator).astype(np.int64)
+        return cls._merged(points, probabilities, denominator)
+
+    @classmethod
+    def point_mass(cls, value: float = 0.0) -> 'PayoutDistribution':
+        return cls.from_values(np.array([value]), np.array([1.0]))
+
+    @classmethod
+    def _merged(cls, points: np.ndarray, probabilities: np.ndarray, denominator: int) -> 'PayoutDistribution':
+        unique, inverse = np.unique(points, return_inverse=True)
+        merged = np.bincount(inverse.ravel(), probabilities, len(unique))
+        keep = merged > 0
+        return cls(unique[keep], merged[keep], denominator)
+
+    def _rescaled(self, denominator: int) -> np.ndarray:
+        return self.points * (denominator // self.denominator)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.points / self.denominator
+
+    @property
+    def total_probability(self) -> float:
+        return float(self.probabilities.sum())
+
+    def mixture(self, other: 'PayoutDistribution') -> 'PayoutDistribution':
+        """Sum of two (partial) distributions over disjoint events."""
+        denominator = lcm(self.denominator, other.denominator)
+        return self._merged(np.concatenate([self._rescaled(denominator), other._rescaled(denominator)]),
+                            np.concatenate([self.probabilities, other.probabilities]), denominator)
+
+    def convolve(self, other: 'PayoutDistribution') -> 'PayoutDistribution':
+        """Distribution of the sum of two independent wins."""
+        denominator = lcm(self.denominator, other.denominator)
+        a_points, a_probabilities = self._rescaled(denominator), self.probabilities
+        b_points, b_probabilities = other._rescaled(denominator), other.probabilities
+        if len(a_points) < len(b_points):
+            a_points, a_probabilities, b_points, b_probabilities = b_points, b_probabilities, a_points, a_probabilities
+        if len(b_points) == 0:
+            return PayoutDistribution(np.zeros(0, dtype=np.int64), np.zeros(0), denominator)
+
+        offset = a_points.min() + b_points.min()
+        length = int(a_points.max() + b_points.max() - offset + 1)
+        if length <= _DENSE_LIMIT:
+            # Shift the larger support by every point of the smaller one
+            dense = np.zeros(length)
+            shifted = a_points - a_points.min()
+            for point, probability in zip((b_points - b_points.min()).tolist(), b_probabilities.tolist()):
+                dense[shifted + point] += a_probabilities * probability
+            nonzero = np.flatnonzero(dense)
+            return PayoutDistribution(nonzero + offset, dense[nonzero], denominator)
+        return self._merged(np.add.outer(a_points, b_points).ravel(),
+                            np.multiply.outer(a_probabilities, b_probabilities).ravel(), denominator)
+
+    def power(self, count: int) -> 'PayoutDistribution':
+        """Distribution of the sum of count independent copies."""
+        result = self.point_mass(0.0)
+        for _ in range(count):
+            result = result.convolve(self)
+        return result
+
+    def mean(self) -> float:
+        return float(self.values @ self.probabilities)
+
+    def variance(self) -> float:
+        values = self.values
+        mean = values @ self.probabilities
+        return float(((values - mean) ** 2) @ self.probabilities)
+
+    def std(self) -> float:
+        return self.variance() ** 0.5
+
+    def hit_frequency(self) -> float:
+        """Probability of a non-zero win."""
+        return float(self.probabilities[self.points > 0].sum())
+
+    def tail(self, threshold: float) -> float:
+        """P(win >= threshold)."""
+        return float(self.probabilities[self.points >= round(threshold * self.denominator - 1e-9)].sum())
+
+    def quantile(self, q: float) -> float:
+        cumulative = np.cumsum(self.probabilities)
+        index = int(np.searchsorted(cumulative, q * cumulative[-1] - 1e-15))
+        return float(self.values[min(index, len(cumulative) - 1)])
+
+    def volatility_index(self, confidence: float = 0.9) -> float:
+        """Industry volatility index: standard deviation times the two-sided normal quantile."""
+        return NormalDist().inv_cdf((1 + confidence) / 2) * self.std()
+
+    def bands(self, edges: Sequence[float] = DEFAULT_BANDS) -> List[Dict[str, Any]]:
+        """
+        Hit-frequency table: probability of a win in each band.
+
+        The first band is "no win" (exactly the first edge); the others are
+        (edge_i, edge_i+1], with the last one open-ended.
+        """
+        values = self.values
+        edges = [float(edge) for edge in edges]
+        table = [{"low": edges[0], "high": edges[0],
+                  "probability": float(self.probabilities[np.isclose(values, edges[0])].sum())}]
+        for low, high in zip(edges, edges[1:] + [float("inf")]):
+            mask = (values > low + 1e-12) & (values <= high + 1e-12)
+            probability = float(self.probabilities[mask].sum())
+            table.append({"low": low, "high": high, "probability": probability,
+                          "rtp_share": float(values[mask] @ self.probabilities[mask])})
+        return table
+
+    def summary(self, confidence: float = 0.9) -> Dict[str, float]:
+        return {
+            "mean": self.mean(),
+            "std": self.std(),
+            "hit_frequency": self.hit_frequency(),
+            "volatility_index": self.volatility_index(confidence),
+            "max_win": float(self.values.max()) if len(self.points) else 0.0,
+            "support_size": int(len(self.points))
+        }
+
+
+def _windows(evaluator: BatchWinEvaluator, reel_set: str) -> List[np.ndarray]:
+    """Window (stops x rows) of symbol codes for every reel."""
+    rows = np.arange(evaluator.window_size)
+    return [strip[(np.arange(len(strip))[:, None] + rows) % len(strip)] for strip in evaluator.strips[reel_set]]
+
+
+def _merge_states(states: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Merge identical states and add up their probabilities."""
+    keys = np.column_stack([states["symbol"].astype(float), states["multiplier"],
+                            states["scatters"], states["columns"], states["pay"]])
+    rows = np.ascontiguousarray(keys).view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    merged = {name: values[first] for name, values in states.items() if name != "probability"}
+    merged["probability"] = np.bincount(inverse.ravel(), states["probability"], len(first))
+    return merged
+
+
+def _merge_max(states: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Merge states that differ only in the settled pay, keeping the largest pay."""
+    keys = np.column_stack([states["symbol"].astype(float), states["multiplier"],
+                            states["scatters"], states["columns"]])
+    rows = np.ascontiguousarray(keys).view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    merged = {name: values[first] for name, values in states.items() if name not in ("probability", "pay")}
+    merged["probability"] = np.bincount(inverse.ravel(), states["probability"], len(first))
+    merged["pay"] = np.full(len(first), -np.inf)
+    np.maximum.at(merged["pay"], inverse.ravel(), states["pay"])
+    return merged
+
+
+def _spin_states(evaluator: BatchWinEvaluator, in_free: bool, max_rows: int,
+                 merge=_merge_states) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run the reel-by-reel line-state recursion of a single spin.
+
+    Args:
+        evaluator: Batch evaluator of the machine
+        in_free: Use the free-spin reel set and multiplier (never triggers)
+        max_rows: Expanded states processed per array operation
+        merge: State merge (_merge_states keeps the distribution, _merge_max only the largest pay)
+
+    Returns:
+        (win, trigger, probability) of the final states
+    """
+    num_reels = evaluator.num_reels
+    for line in evaluator.paylines:
+        if any(position % num_reels != k for k, position in enumerate(line)):
+            raise ValueError(f"Payline {line} does not read the reels left to right, one cell per reel")
+
+    lengths = np.array([len(line) for line in evaluator.paylines])
+    rows = np.full((len(lengths), num_reels), -1)
+    for index, line in enumerate(evaluator.paylines):
+        rows[index, :len(line)] = [position // num_reels for position in line]
+    pay_width = evaluator.pay_matrix.shape[1]
+    windows = _windows(evaluator, evaluator.reel_set_name(in_free))
+
+    def settle(states, reel):
+        """Pay the lines whose match ends after reel `reel` (run length reel + 1 or break)."""
+        alive = states["symbol"] >= 0
+        ending = alive & (lengths == reel + 1)
+        run = reel + 1
+        if ending.any() and run >= 3 and run - 3 < pay_width:
+            pays = evaluator.pay_matrix[np.where(ending, states["symbol"], 0), run - 3]
+            states["pay"] = states["pay"] + (np.where(ending, pays, 0.0) * states["multiplier"]).sum(axis=1)
+        states["symbol"] = np.where(ending, -1, states["symbol"])
+        states["multiplier"] = np.where(ending, 0.0, states["multiplier"])
+
+    def add_reel(states, reel, window):
+        count, stops = len(states["probability"]), len(window)
+        states = {name: np.repeat(values, stops, axis=0) for name, values in states.items()}
+        window = np.tile(window, (count, 1))
+        states["probability"] = states["probability"] / stops
+
+        scatters = (window == evaluator.scatter_code).sum(axis=1)
+        states["scatters"] = np.minimum(states["scatters"] + scatters, 5)
+        if not in_free:
+            states["columns"] = np.minimum(states["columns"] + (scatters > 0), 3)
+
+        active = lengths > reel
+        symbols = window[:, np.where(active, rows[:, reel], 0)]
+        alive = (states["symbol"] >= 0) & active
+        matched = alive & ((symbols == states["symbol"]) | evaluator.is_wild[symbols])
+        broken = alive & ~matched
+        if reel >= 3 and reel - 3 < pay_width and broken.any():
+            pays = evaluator.pay_matrix[np.where(broken, states["symbol"], 0), reel - 3]
+            states["pay"] = states["pay"] + (np.where(broken, pays, 0.0) * states["multiplier"]).sum(axis=1)
+        states["symbol"] = np.where(matched, states["symbol"], -1)
+        states["multiplier"] = np.where(matched, states["multiplier"] * evaluator.wild_multiplier[symbols], 0.0)
+        settle(states, reel)
+        return states
+
+    first = windows[0]
+    start = first[:, rows[:, 0]]
+    scatters = (first == evaluator.scatter_code).sum(axis=1)
+    states = {
+        "symbol": np.where(evaluator.pays_line[start], start, -1),
+        "multiplier": np.where(evaluator.pays_line[start], 1.0, 0.0),
+        "scatters": np.minimum(scatters, 5),
+        "columns": np.zeros(len(first), dtype=np.int64) if in_free else (scatters > 0).astype(np.int64),
+        "pay": np.zeros(len(first)),
+        "probability": np.full(len(first), 1.0 / len(first))
+    }
+    settle(states, 0)
+    states = merge(states)
+
+    for reel in range(1, num_reels):
+        window = windows[reel]
+        chunk = max(max_rows // len(window), 1)
+        parts = []
+        for begin in range(0, len(states["probability"]), chunk):
+            part = {name: values[begin:begin + chunk] for name, values in states.items()}
+            parts.append(merge(add_reel(part, reel, window)))
+        states = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        states = merge(states)
+
+    multiplier = evaluator.free_multiplier if in_free else 1
+    win = states["pay"] * multiplier / evaluator.num_lines
+    if len(evaluator.scatter_pays):
+        index = np.minimum(states["scatters"] - 3, 2)
+        payable = (states["scatters"] >= 3) & (index < len(evaluator.scatter_pays))
+        win = win + np.where(payable, evaluator.scatter_pays[np.clip(index, 0, len(evaluator.scatter_pays) - 1)], 0.0)
+    return win, states["columns"] >= 3, states["probability"]
+
+
+def spin_distributions(evaluator: BatchWinEvaluator, in_free: bool = False,
+                       max_rows: int = 500000) -> Tuple[PayoutDistribution, PayoutDistribution]:
+    """
+    Exact win distribution of a single spin, split by whether it triggers free spins.
+
+    The reels are processed left to right. A state holds, for every payline, the
+    start symbol and the wild multiplier of its still-running match (lines share
+    grid cells, so all lines are tracked jointly rather than one at a time), the
+    scatter and scatter-column counts so far and the line pay already settled.
+    Each reel multiplies the states by its stops; identical states are merged, so
+    the work grows with the number of distinct states instead of the product of
+    the reel lengths.
+
+    Args:
+        evaluator: Batch evaluator of the machine
+        in_free: Use the free-spin reel set and multiplier (never triggers)
+        max_rows: Expanded states processed per array operation
+
+    Returns:
+        (no-trigger part, trigger part); each is a partial distribution and their
+        probabilities add up to 1
+    """
+    win, trigger, probability = _spin_states(evaluator, in_free, max_rows)
+    return (PayoutDistribution.from_values(win[~trigger], probability[~trigger]),
+            PayoutDistribution.from_values(win[trigger], probability[trigger]))
+
+
+def max_wins(evaluator: BatchWinEvaluator, max_rows: int = 500000) -> Dict[str, float]:
+    """
+    Exact largest attainable wins, in units of bet.
+
+    Uses the same recursion as spin_distributions, but states that differ only in
+    the pay already settled are merged keeping the largest pay (the rest of the
+    spin pays the same on top of either), so the state space stays small. Free
+    spins are independent, so the largest free round is free_spins_count times the
+    largest bonus spin.
+
+    Returns:
+        Dictionary with base_spin, bonus_spin, free_round and round maxima
+    """
+    win, trigger, _ = _spin_states(evaluator, False, max_rows, _merge_max)
+    bonus_spin = float(_spin_states(evaluator, True, max_rows, _merge_max)[0].max())
+    free_round = evaluator.free_spins_count * bonus_spin
+    base_spin = float(win.max())
+    game_round = max(float(win[~trigger].max()) if (~trigger).any() else 0.0,
+                     float(win[trigger].max()) + free_round if trigger.any() else 0.0)
+    return {"base_spin": base_spin, "bonus_spin": bonus_spin, "free_round": free_round, "round": game_round}
+
+
+def game_distributions(evaluator: BatchWinEvaluator) -> Dict[str, Any]:
+    """
+    Exact win distributions of a machine, in units of bet.
+
+    The free-spin round is the free_spins_count-fold convolution of the bonus-spin
+    distribution (the free-spin multiplier is already part of every bonus spin), and
+    a game round is a base spin plus, when it triggers, an independent free round.
+
+    Returns:
+        Dictionary with base_spin, bonus_spin, free_round and round distributions
+        and the trigger probability
+    """
+    logger = logging.getLogger("domain.machine.payout_distribution")
+    no_trigger, trigger = spin_distributions(evaluator, in_free=False)
+    bonus_spin = PayoutDistribution.from_values(np.zeros(0), np.zeros(0))
+    for part in spin_distributions(evaluator, in_free=True):
+        bonus_spin = bonus_spin.mixture(part)
+    free_round = bonus_spin.power(evaluator.free_spins_count)
+    game_round = no_trigger.mixture(trigger.convolve(free_round))
+    logger.info(f"Exact distributions: {len(bonus_spin.points)} bonus-spin wins, "
+                f"{len(free_round.points)} free-round wins, {len(game_round.points)} round wins")
+    return {
+        "base_spin": no_trigger.mixture(trigger),
+        "bonus_spin": bonus_spin,
+        "free_round": free_round,
+        "round": game_round,
+        "trigger": trigger.total_probability
+    }
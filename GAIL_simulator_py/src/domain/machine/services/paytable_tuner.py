@@ -0,0 +1,385 @@
+# src/domain/machine/services/paytable_tuner.py
+import re
+import logging
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch_evaluation import BatchWinEvaluator
+from .reel_statistics import line_hit_matrix, scatter_hit_vector, trigger_probability
+
+
+@dataclass
+class TuningResult:
+    """A tuned pay table and its round-level statistics (per unit bet)."""
+    pay_table: List[Dict[str, Any]]
+    rtp: float
+    std: float
+    target_rtp: float
+    target_std: Optional[float]
+    original_rtp: float
+    original_std: float
+    scale: float
+    tilt: float
+    moments: str
+    changes: Dict[str, Tuple[List[float], List[float]]] = field(default_factory=dict)
+
+    def volatility_index(self, confidence: float = 0.9) -> float:
+        return NormalDist().inv_cdf((1 + confidence) / 2) * self.std
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pay_table": self.pay_table,
+            "rtp": self.rtp,
+            "std": self.std,
+            "volatility_index": self.volatility_index(),
+            "target_rtp": self.target_rtp,
+            "target_std": self.target_std,
+            "original_rtp": self.original_rtp,
+            "original_std": self.original_std,
+            "scale": self.scale,
+            "tilt": self.tilt,
+            "moments": self.moments,
+            "changes": {symbol: {"old": old, "new": new} for symbol, (old, new) in self.changes.items()}
+        }
+
+
+class PayTableTuner:
+    """
+    Pay-table tuning from the linearity of the win in the payouts.
+
+    For a fixed set of reels and paylines, the win of a spin is hits . pays, where
+    the hits count every (symbol, match length) line win (multiplier-weighted, per
+    line) and every scatter pay. The free-spin trigger does not depend on the pay
+    table, so the round RTP is c . pays with
+    c = E[base hits] + P(trigger) * free_spins_count * E[bonus hits], computed
+    exactly from the reel strips. The round variance is a quadratic form in the
+    payouts built from the second moments of the hits, taken once from a full
+    enumeration of the stops when that is small enough, otherwise from one batched
+    simulation. Every candidate pay table is then scored without re-simulating.
+
+    The solver scales the current payouts to the target RTP and tilts them by the
+    rarity of each entry (pays * (1 / c)^tilt, renormalized); the tilt that meets
+    the target standard deviation is found by bisection. The result is rounded to
+    integers and made monotonic (longer matches pay at least as much; symbols keep
+    their original ranking), and single-unit changes then bring the RTP back to
+    the target.
+    """
+
+    def __init__(self, machine, moment_spins: int = 1000000, seed: Optional[int] = None,
+                 exact_limit: int = 2000000, batch_size: int = 65536):
+        """
+        Initialize the tuner and compute the hit moments.
+
+        Args:
+            machine: SlotMachine instance
+            moment_spins: Spins per reel set used for the second moments when the
+                stops are not enumerated
+            seed: Seed for the numpy generator
+            exact_limit: Enumerate all stops when a reel set has at most this many combinations
+            batch_size: Spins evaluated per batch
+        """
+        self.logger = logging.getLogger("domain.machine.paytable_tuner")
+        self.evaluator = BatchWinEvaluator(machine, batch_size)
+        self.rng = np.random.default_rng(seed)
+        self.machine = machine
+        evaluator = self.evaluator
+
+        # Tunable entries: (pay table symbol, payout index, code or None for the scatter)
+        self.entries: List[Tuple[str, int, Optional[int]]] = []
+        scatter_key = str(machine.scatter_symbol)
+        for symbol, payouts in machine.pay_table.items():
+            if symbol == scatter_key:
+                self.entries.extend((symbol, index, None) for index in range(min(len(payouts), len(evaluator.scatter_pays))))
+                continue
+            try:
+                code = evaluator.encode([int(symbol)])[0]
+            except (KeyError, TypeError, ValueError):
+                continue
+            if evaluator.pays_line[code]:
+                width = min(len(payouts), evaluator.pay_matrix.shape[1])
+                self.entries.extend((symbol, index, int(code)) for index in range(width))
+        self.current = np.array([float(machine.pay_table[symbol][index]) for symbol, index, _ in self.entries])
+
+        self.free_spins = evaluator.free_spins_count
+        self.trigger = trigger_probability(evaluator)
+        self.base_hits = self._vector(line_hit_matrix(evaluator, False), scatter_hit_vector(evaluator, False))
+        self.bonus_hits = self._vector(line_hit_matrix(evaluator, True), scatter_hit_vector(evaluator, True))
+        self.coefficients = self.base_hits + self.trigger * self.free_spins * self.bonus_hits
+
+        self.moments = "exact"
+        self.base_second, self.base_trigger = self._second_moments(False, moment_spins, exact_limit)
+        self.bonus_second, _ = self._second_moments(True, moment_spins, exact_limit)
+
+    def _vector(self, line_hits: np.ndarray, scatter_hits: np.ndarray) -> np.ndarray:
+        """Pick the tunable entries out of per-code line hits and scatter hits (last axes)."""
+        return np.stack([scatter_hits[..., index] if code is None else line_hits[..., code, index]
+                         for _, index, code in self.entries], axis=-1)
+
+    def _second_moments(self, in_free: bool, spins: int, exact_limit: int):
+        """E[hits hits^T] and E[hits; trigger] of one spin, enumerated or sampled."""
+        evaluator = self.evaluator
+        reel_set = evaluator.reel_set_name(in_free)
+        lengths = evaluator.reel_lengths(reel_set)
+        total = int(np.prod(lengths))
+        exact = total <= exact_limit
+        count = total if exact else spins
+        if not exact:
+            self.moments = f"sampled ({spins} spins per reel set)"
+
+        second = np.zeros((len(self.entries), len(self.entries)))
+        with_trigger = np.zeros(len(self.entries))
+        batch = evaluator.chunk_size
+        for start in range(0, count, batch):
+            size = min(batch, count - start)
+            if exact:
+                stops = np.stack(np.unravel_index(np.arange(start, start + size), lengths), axis=1)
+            else:
+                stops = evaluator.random_stops(self.rng, size, reel_set)
+            features = evaluator.hit_features(stops, in_free)
+            hits = self._vector(features["line_hits"], features["scatter_hits"])
+            second += hits.T @ hits
+            with_trigger += hits[features["trigger"]].sum(axis=0)
+        return second / count, with_trigger / count
+
+    def pay_vector(self, pay_table: Optional[Dict[str, Sequence[float]]] = None) -> np.ndarray:
+        """Tunable payouts of a pay table ({symbol: payouts}; default: the machine's)."""
+        if pay_table is None:
+            return self.current.copy()
+        return np.array([float(pay_table[symbol][index]) for symbol, index, _ in self.entries])
+
+    def rtp(self, pays: np.ndarray) -> float:
+        """Round RTP (base spin plus free-spin round) of a payout vector."""
+        return float(self.coefficients @ pays)
+
+    def std(self, pays: np.ndarray) -> float:
+        """Standard deviation of the round win of a payout vector, in units of bet."""
+        bonus_mean = self.bonus_hits @ pays
+        second = (pays @ self.base_second @ pays
+                  + 2 * self.free_spins * (self.base_trigger @ pays) * bonus_mean
+                  + self.trigger * (self.free_spins * (pays @ self.bonus_second @ pays)
+                                    + self.free_spins * (self.free_spins - 1) * bonus_mean ** 2))
+        return float(max(second - self.rtp(pays) ** 2, 0.0) ** 0.5)
+
+    def _constraint_groups(self, free: np.ndarray, monotonic: bool, keep_ranking: bool) -> List[List[int]]:
+        """Chains of tunable entry indices whose payouts must be non-decreasing along the chain."""
+        chains = []
+        by_symbol: Dict[str, List[int]] = {}
+        by_index: Dict[Tuple[bool, int], List[int]] = {}
+        for j, (symbol, index, code) in enumerate(self.entries):
+            if not free[j]:
+                continue
+            by_symbol.setdefault(symbol, []).append(j)
+            by_index.setdefault((code is None, index), []).append(j)
+        if monotonic:
+            chains.extend(sorted(group, key=lambda j: self.entries[j][1]) for group in by_symbol.values())
+        if keep_ranking:
+            for (is_scatter, _), group in by_index.items():
+                if not is_scatter:
+                    # Lowest-paying symbol first; ties keep pay table order
+                    chains.append(sorted(group, key=lambda j: (self.current[j], -j)))
+        return [chain for chain in chains if len(chain) > 1]
+
+    @staticmethod
+    def _project(pays: np.ndarray, chains: List[List[int]], floor: np.ndarray) -> np.ndarray:
+        """Raise payouts until every chain is non-decreasing and every floor holds."""
+        pays = np.maximum(pays, floor)
+        for _ in range(100):
+            before = pays.copy()
+            for chain in chains:
+                pays[chain] = np.maximum.accumulate(pays[chain])
+            if np.array_equal(before, pays):
+                break
+        return pays
+
+    def _tilted(self, tilt: float, target_rtp: float, free: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Current payouts tilted towards rare entries and scaled to the target RTP."""
+        log_rarity = np.zeros(len(self.entries))
+        log_rarity[free] = -np.log(self.coefficients[free])
+        log_rarity[free] -= log_rarity[free].mean()
+        pays = self.current.copy()
+        pays[free] *= np.exp(tilt * log_rarity[free])
+        free_rtp = self.coefficients[free] @ pays[free]
+        scale = (target_rtp - self.coefficients[~free] @ pays[~free]) / free_rtp
+        if scale <= 0:
+            raise ValueError(f"Target RTP {target_rtp} is below what the fixed entries already pay")
+        pays[free] *= scale
+        return pays, float(scale)
+
+    def solve(self, target_rtp: float, target_std: Optional[float] = None, integer: bool = True,
+              monotonic: bool = True, keep_ranking: bool = True, fixed_symbols: Sequence[str] = (),
+              min_pay: float = 1.0, tilt_range: Tuple[float, float] = (-1.0, 1.5),
+              tolerance: float = 1e-4, max_adjustments: int = 100000) -> TuningResult:
+        """
+        Solve for a pay table with the target RTP (and standard deviation).
+
+        Args:
+            target_rtp: Target round RTP, e.g. 0.96
+            target_std: Target standard deviation of the round win in units of bet
+                (None keeps the shape of the current pay table and only rescales)
+            integer: Round payouts to integers
+            monotonic: Longer matches of a symbol pay at least as much as shorter ones
+            keep_ranking: Symbols keep their original payout ranking at every match length
+            fixed_symbols: Pay table symbols whose payouts are not changed
+            min_pay: Smallest payout of an entry that currently pays
+            tilt_range: Search range of the rarity tilt
+            tolerance: Acceptable absolute RTP error after rounding
+            max_adjustments: Cap on single-unit adjustments after rounding
+
+        Returns:
+            TuningResult
+        """
+        fixed = np.array([symbol in set(fixed_symbols) for symbol, _, _ in self.entries])
+        free = ~fixed & (self.coefficients > 0) & (self.current > 0)
+        if not free.any():
+            raise ValueError("No tunable pay table entries")
+
+        tilt = 0.0
+        if target_std is not None:
+            low, high = tilt_range
+            std_low = self.std(self._tilted(low, target_rtp, free)[0])
+            std_high = self.std(self._tilted(high, target_rtp, free)[0])
+            if not min(std_low, std_high) <= target_std <= max(std_low, std_high):
+                tilt = low if abs(std_low - target_std) < abs(std_high - target_std) else high
+                self.logger.warning(f"Target std {target_std:.3f} is outside [{min(std_low, std_high):.3f}, "
+                                    f"{max(std_low, std_high):.3f}] reachable with tilts {tilt_range}; using {tilt}")
+            else:
+                increasing = std_high >= std_low
+                for _ in range(60):
+                    tilt = (low + high) / 2
+                    if (self.std(self._tilted(tilt, target_rtp, free)[0]) < target_std) == increasing:
+                        low = tilt
+                    else:
+                        high = tilt
+        pays, scale = self._tilted(tilt, target_rtp, free)
+
+        chains = self._constraint_groups(free, monotonic, keep_ranking)
+        floor = np.where(free, min_pay, self.current)
+        if integer:
+            pays = np.where(free, np.round(pays), pays)
+        pays = self._project(pays, chains, floor)
+        pays = self._adjust(pays, target_rtp, free, chains, floor, 1.0 if integer else None,
+                            tolerance, max_adjustments)
+
+        result_table = []
+        changes = {}
+        for symbol, payouts in self.machine.pay_table.items():
+            new = [float(p) for p in payouts]
+            for j, (entry_symbol, index, _) in enumerate(self.entries):
+                if entry_symbol == symbol:
+                    new[index] = float(pays[j])
+            if integer and all(float(p).is_integer() for p in new):
+                new = [int(p) for p in new]
+            result_table.append({"symbol": symbol, "payouts": new})
+            if list(map(float, payouts)) != list(map(float, new)):
+                changes[symbol] = (list(payouts), new)
+
+        result = TuningResult(
+            pay_table=result_table,
+            rtp=self.rtp(pays),
+            std=self.std(pays),
+            target_rtp=target_rtp,
+            target_std=target_std,
+            original_rtp=self.rtp(self.current),
+            original_std=self.std(self.current),
+            scale=scale,
+            tilt=tilt,
+            moments=self.moments,
+            changes=changes
+        )
+        if abs(result.rtp - target_rtp) > tolerance:
+            self.logger.warning(f"RTP {result.rtp:.6f} misses the target {target_rtp:.6f} by more than {tolerance}")
+        self.logger.info(f"Tuned pay table: RTP {result.original_rtp:.6f} -> {result.rtp:.6f}, "
+                         f"std {result.original_std:.4f} -> {result.std:.4f} (scale {scale:.4f}, tilt {tilt:.4f})")
+        return result
+
+    def _adjust(self, pays: np.ndarray, target_rtp: float, free: np.ndarray, chains: List[List[int]],
+                floor: np.ndarray, unit: Optional[float], tolerance: float, max_adjustments: int) -> np.ndarray:
+        """Greedy single-unit changes that move the RTP towards the target without breaking constraints."""
+        if unit is None:
+            # Continuous payouts: one more scaling of the free entries lands on the target
+            # (projection only raised payouts, so the RTP is at or above the target)
+            excess = self.rtp(pays) - target_rtp
+            if excess > 0:
+                candidate = pays.copy()
+                candidate[free] *= 1 - excess / (self.coefficients[free] @ pays[free])
+                candidate = self._project(candidate, chains, floor)
+                if abs(self.rtp(candidate) - target_rtp) < excess:
+                    pays = candidate
+            return pays
+
+        # Neighbours of every entry in the chains: value must stay within [below, above]
+        below = [[] for _ in pays]
+        above = [[] for _ in pays]
+        for chain in chains:
+            for lower, upper in zip(chain, chain[1:]):
+                above[lower].append(upper)
+                below[upper].append(lower)
+
+        pays = pays.copy()
+        candidates = np.flatnonzero(free)
+        for _ in range(max_adjustments):
+            gap = target_rtp - self.rtp(pays)
+            if abs(gap) <= tolerance:
+                break
+            step = unit if gap > 0 else -unit
+            best, best_gain = None, 0.0
+            for j in candidates:
+                value = pays[j] + step
+                if value < floor[j]:
+                    continue
+                if step > 0 and any(value > pays[k] for k in above[j]):
+                    continue
+                if step < 0 and any(value < pays[k] for k in below[j]):
+                    continue
+                gain = abs(gap) - abs(gap - step * self.coefficients[j])
+                if gain > best_gain:
+                    best, best_gain = j, gain
+            if best is None:
+                break
+            pays[best] += step
+        return pays
+
+
+def pay_table_yaml(source: str, pay_table: List[Dict[str, Any]], machine_id: Optional[str] = None) -> str:
+    """
+    Replace the payouts (and optionally the machine_id) in the text of a machine YAML file.
+
+    Only the `payouts: [...]` lines of the pay_table section are rewritten, so comments,
+    reels and formatting of the source file are kept.
+
+    Args:
+        source: Text of the original machine YAML
+        pay_table: New pay table entries ({"symbol", "payouts"})
+        machine_id: New machine id
+
+    Returns:
+        Text of the new machine YAML
+    """
+    payouts = {str(entry["symbol"]): entry["payouts"] for entry in pay_table}
+    lines = source.splitlines(keepends=True)
+    in_pay_table = False
+    symbol = None
+    replaced = set()
+    for i, line in enumerate(lines):
+        if re.match(r"^\S", line):
+            in_pay_table = line.startswith("pay_table:")
+            if machine_id is not None and line.startswith("machine_id:"):
+                lines[i] = f'machine_id: "{machine_id}"\n'
+            continue
+        if not in_pay_table:
+            continue
+        match = re.search(r"symbol:\s*['\"]?([^'\",}\s]+)['\"]?", line)
+        if match:
+            symbol = match.group(1)
+        match = re.search(r"payouts:\s*\[[^\]]*\]", line)
+        if match and symbol in payouts:
+            values = ", ".join(f"{p:g}" if isinstance(p, float) else str(p) for p in payouts[symbol])
+            lines[i] = line[:match.start()] + f"payouts: [{values}]" + line[match.end():]
+            replaced.add(symbol)
+    missing = set(payouts) - replaced
+    if missing:
+        raise ValueError(f"Pay table entries not found in the YAML text: {', '.join(sorted(missing))}")
+    return "".join(lines)
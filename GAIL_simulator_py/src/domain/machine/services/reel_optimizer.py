@@ -0,0 +1,428 @@
+# src/domain/machine/services/reel_optimizer.py
+import re
+import math
+import time
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch_evaluation import BatchWinEvaluator
+from .reel_statistics import line_hit_matrix, scatter_hit_vector, trigger_probability
+
+
+@dataclass
+class ReelMetrics:
+    """Exact game statistics of a set of reel strips (per unit bet)."""
+    rtp: float
+    base_win: float
+    bonus_spin_win: float
+    trigger: float
+    hit_rate: float
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "rtp": self.rtp,
+            "base_win": self.base_win,
+            "bonus_spin_win": self.bonus_spin_win,
+            "trigger": self.trigger,
+            "trigger_one_in": 1 / self.trigger if self.trigger > 0 else math.inf,
+            "hit_rate": self.hit_rate
+        }
+
+
+@dataclass
+class OptimizationResult:
+    """Optimized reel strips, their statistics and the search summary."""
+    strips: Dict[str, Dict[str, List[int]]]
+    metrics: ReelMetrics
+    original: ReelMetrics
+    targets: Dict[str, float]
+    score: float
+    original_score: float
+    iterations: int
+    accepted: int
+    elapsed: float
+    composition: Dict[str, Dict[str, Dict[int, int]]] = field(default_factory=dict)
+
+    @property
+    def evaluations_per_minute(self) -> float:
+        return 60 * self.iterations / self.elapsed if self.elapsed > 0 else math.inf
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "targets": self.targets,
+            "original": self.original.to_dict(),
+            "optimized": self.metrics.to_dict(),
+            "original_score": self.original_score,
+            "score": self.score,
+            "iterations": self.iterations,
+            "accepted": self.accepted,
+            "elapsed_seconds": self.elapsed,
+            "evaluations_per_minute": self.evaluations_per_minute,
+            "composition_changes": {name: {reel: {str(symbol): delta for symbol, delta in changes.items()}
+                                           for reel, changes in reels.items()}
+                                    for name, reels in self.composition.items()},
+            "strips": self.strips
+        }
+
+
+class ReelStripOptimizer:
+    """
+    Simulated annealing over reel strips, scored with exact reel statistics.
+
+    Moves keep every strip length: a swap exchanges two stops of one reel, an
+    insertion removes one stop and inserts a symbol from the reel set's palette
+    elsewhere on the same reel. Every candidate is scored exactly:
+
+    - RTP, base win and bonus win come from the per-reel symbol probabilities and
+      scatter-count distributions (reel_statistics), cached per reel so a move only
+      recomputes the reel it touched.
+    - The base-game hit rate, P(a line or scatter pays), needs the joint windows:
+      a line pays iff its first three cells match, so only the reels under those
+      cells (the prefix reels) are enumerated, and the no-line-win probability is
+      kept per prefix scatter count. The remaining reels enter through their
+      scatter-count distribution. A move on a prefix reel only enumerates the
+      windows it added or removed against the other prefix reels.
+
+    The score is the weighted sum of squared relative deviations from the targets.
+    """
+
+    METRICS = ("rtp", "hit_rate", "trigger")
+
+    def __init__(self, machine, reel_sets: Sequence[str] = ("normal",),
+                 palette: Optional[Dict[str, Sequence[int]]] = None,
+                 fixed_reels: Sequence[str] = (), chunk_size: int = 65536):
+        """
+        Initialize the optimizer and the per-reel caches.
+
+        Args:
+            machine: SlotMachine instance
+            reel_sets: Reel sets whose strips may change ("normal", "bonus")
+            palette: Symbols that insertions may place, per reel set (default:
+                the symbols already on that reel set)
+            fixed_reels: Reels that never change, as "reel_set/reel" (e.g. "bonus/reel3")
+            chunk_size: Window combinations enumerated per array operation
+        """
+        self.logger = logging.getLogger("domain.machine.reel_optimizer")
+        self.evaluator = BatchWinEvaluator(machine)
+        self.machine = machine
+        self.chunk_size = max(int(chunk_size), 1)
+        evaluator = self.evaluator
+
+        self.reel_names = {name: sorted(machine.reels[name].keys()) for name in evaluator.strips}
+        self.strips = {name: [strip.copy() for strip in strips] for name, strips in evaluator.strips.items()}
+        self.bonus_set = evaluator.reel_set_name(True)
+        for name in reel_sets:
+            if name not in self.strips:
+                raise ValueError(f"Unknown reel set: {name}")
+        self.reel_sets = list(reel_sets)
+
+        fixed = set(fixed_reels)
+        self.movable = [(name, reel) for name in self.reel_sets
+                        for reel, reel_name in enumerate(self.reel_names[name])
+                        if f"{name}/{reel_name}" not in fixed and len(self.strips[name][reel]) > 1]
+        if not self.movable:
+            raise ValueError("No reels to optimize")
+
+        self.palette = {}
+        for name in self.reel_sets:
+            if palette and name in palette:
+                self.palette[name] = evaluator.encode(palette[name])
+            else:
+                self.palette[name] = np.unique(np.concatenate(self.strips[name]))
+
+        # Prefix cells: the first three cells of every line that can pay
+        lines = [line[:3] for line in evaluator.paylines if len(line) >= 3]
+        self.prefix_reels = sorted({cell % evaluator.num_reels for line in lines for cell in line})
+        self.rest_reels = [reel for reel in range(evaluator.num_reels) if reel not in self.prefix_reels]
+        slots = {reel: slot for slot, reel in enumerate(self.prefix_reels)}
+        self._line_rows = np.array([[cell // evaluator.num_reels for cell in line] for line in lines], dtype=np.int64)
+        self._line_slots = np.array([[slots[cell % evaluator.num_reels] for cell in line] for line in lines],
+                                    dtype=np.int64)
+        self._scatter_pays = bool(len(evaluator.scatter_pays)) and bool((evaluator.scatter_pays > 0).any())
+
+        self.probabilities = {name: np.array([self._reel_probabilities(strip) for strip in strips])
+                              for name, strips in self.strips.items()}
+        self.scatter_counts = {name: np.array([self._reel_scatter_counts(strip) for strip in strips])
+                               for name, strips in self.strips.items()}
+        self.misses = self._prefix_misses([self._windows(self.strips["normal"][reel]) for reel in self.prefix_reels])
+
+    def _reel_probabilities(self, strip: np.ndarray) -> np.ndarray:
+        return np.bincount(strip, minlength=len(self.evaluator.symbols)) / len(strip)
+
+    def _reel_scatter_counts(self, strip: np.ndarray) -> np.ndarray:
+        counts = (self._windows(strip)[0] == self.evaluator.scatter_code).sum(axis=1)
+        return np.bincount(counts, minlength=self.evaluator.window_size + 1) / len(strip)
+
+    def _windows(self, strip: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Visible window of every stop and its probability."""
+        rows = np.arange(self.evaluator.window_size)
+        windows = strip[(np.arange(len(strip))[:, None] + rows) % len(strip)]
+        return windows, np.full(len(strip), 1.0 / len(strip))
+
+    def _prefix_misses(self, windows: List[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        """
+        Probability mass of prefix windows without a line win, by scatters in the prefix.
+
+        Args:
+            windows: (windows, weights) per prefix reel; weights may be negative to
+                remove windows, so a changed reel can be passed as a difference
+
+        Returns:
+            Array indexed by the number of scatters on the prefix reels
+        """
+        evaluator = self.evaluator
+        misses = np.zeros(evaluator.window_size * len(self.prefix_reels) + 1)
+        sizes = [len(weights) for _, weights in windows]
+        total = int(np.prod(sizes))
+        for start in range(0, total, self.chunk_size):
+            index = np.unravel_index(np.arange(start, min(total, start + self.chunk_size)), sizes)
+            weight = np.ones(len(index[0]))
+            columns = []
+            for (reel_windows, reel_weights), reel_index in zip(windows, index):
+                weight *= reel_weights[reel_index]
+                columns.append(reel_windows[reel_index])
+            cells = np.stack(columns, axis=2)                          # (N, rows, prefix reels)
+            scatters = (cells == evaluator.scatter_code).sum(axis=(1, 2))
+            symbols = cells[:, self._line_rows, self._line_slots]      # (N, lines, 3)
+            first = symbols[:, :, 0]
+            hit = evaluator.pays_line[first]
+            for j in (1, 2):
+                hit &= (symbols[:, :, j] == first) | evaluator.is_wild[symbols[:, :, j]]
+            miss = ~hit.any(axis=1)
+            misses += np.bincount(scatters[miss], weight[miss], minlength=len(misses))
+        return misses
+
+    def _window_difference(self, old: np.ndarray, new: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Windows added (+1/L) and removed (-1/L) by changing a strip of the same length."""
+        old_windows = Counter(map(tuple, self._windows(old)[0].tolist()))
+        new_windows = Counter(map(tuple, self._windows(new)[0].tolist()))
+        added = list((new_windows - old_windows).elements())
+        removed = list((old_windows - new_windows).elements())
+        windows = np.array(added + removed, dtype=np.int64).reshape(-1, self.evaluator.window_size)
+        weights = np.concatenate([np.ones(len(added)), -np.ones(len(removed))]) / len(new)
+        return windows, weights
+
+    def _metrics(self, probabilities: Dict[str, np.ndarray], scatter_counts: Dict[str, np.ndarray],
+                 misses: np.ndarray) -> ReelMetrics:
+        evaluator = self.evaluator
+        base = ((line_hit_matrix(evaluator, False, probabilities["normal"]) * evaluator.pay_matrix).sum()
+                + scatter_hit_vector(evaluator, False, scatter_counts["normal"]) @ evaluator.scatter_pays)
+        bonus = ((line_hit_matrix(evaluator, True, probabilities[self.bonus_set]) * evaluator.pay_matrix).sum()
+                 + scatter_hit_vector(evaluator, True, scatter_counts[self.bonus_set]) @ evaluator.scatter_pays)
+        trigger = trigger_probability(evaluator, scatter_counts["normal"])
+
+        if self._scatter_pays:
+            rest = np.array([1.0])
+            for reel in self.rest_reels:
+                rest = np.convolve(rest, scatter_counts["normal"][reel])
+            # P(scatters on the other reels <= 2 - prefix scatters)
+            below = np.array([rest[:max(3 - count, 0)].sum() for count in range(len(misses))])
+            no_win = misses @ below
+        else:
+            no_win = misses.sum()
+
+        return ReelMetrics(
+            rtp=float(base + trigger * evaluator.free_spins_count * bonus),
+            base_win=float(base),
+            bonus_spin_win=float(bonus),
+            trigger=float(trigger),
+            hit_rate=float(1.0 - no_win)
+        )
+
+    def metrics(self) -> ReelMetrics:
+        """Exact statistics of the current strips."""
+        return self._metrics(self.probabilities, self.scatter_counts, self.misses)
+
+    @staticmethod
+    def score(metrics: ReelMetrics, targets: Dict[str, float], weights: Dict[str, float]) -> float:
+        """Weighted sum of squared relative deviations from the targets."""
+        return float(sum(weights.get(name, 1.0) * ((getattr(metrics, name) - target) / target) ** 2
+                         for name, target in targets.items()))
+
+    def _propose(self, rng: np.random.Generator, swap_probability: float) -> Tuple[str, int, np.ndarray]:
+        """A random swap or insertion on one movable reel (never a no-op)."""
+        while True:
+            name, reel = self.movable[rng.integers(len(self.movable))]
+            strip = self.strips[name][reel]
+            length = len(strip)
+            if rng.random() < swap_probability:
+                i, j = rng.integers(length, size=2)
+                if strip[i] == strip[j]:
+                    continue
+                new = strip.copy()
+                new[i], new[j] = strip[j], strip[i]
+            else:
+                i = rng.integers(length)
+                j = rng.integers(length)
+                symbol = self.palette[name][rng.integers(len(self.palette[name]))]
+                new = np.insert(np.delete(strip, i), j, symbol)
+            if not np.array_equal(new, strip):
+                return name, reel, new
+
+    def optimize(self, target_rtp: float, target_hit_rate: Optional[float] = None,
+                 target_trigger: Optional[float] = None, weights: Optional[Dict[str, float]] = None,
+                 iterations: int = 5000, initial_temperature: Optional[float] = None,
+                 cooling: float = 1e-3, swap_probability: float = 0.5, seed: Optional[int] = None,
+                 max_seconds: Optional[float] = None, tolerance: float = 0.0) -> OptimizationResult:
+        """
+        Anneal the strips towards the targets.
+
+        Args:
+            target_rtp: Target round RTP
+            target_hit_rate: Target base-game hit rate (None: not scored)
+            target_trigger: Target free-spin trigger probability (None: not scored)
+            weights: Score weight per metric ("rtp", "hit_rate", "trigger"), default 1
+            iterations: Number of candidate moves
+            initial_temperature: Starting temperature (default: a tenth of the starting score)
+            cooling: Final temperature as a fraction of the initial one (geometric schedule)
+            swap_probability: Share of swaps among the moves (the rest are insertions)
+            seed: Seed for the numpy generator
+            max_seconds: Stop early after this much time
+            tolerance: Stop early once the score is at or below this value
+
+        Returns:
+            OptimizationResult with the best strips found
+        """
+        targets = {"rtp": target_rtp}
+        if target_hit_rate is not None:
+            targets["hit_rate"] = target_hit_rate
+        if target_trigger is not None:
+            targets["trigger"] = target_trigger
+        weights = dict(weights or {})
+        unknown = set(weights) - set(self.METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+
+        rng = np.random.default_rng(seed)
+        original_strips = {name: [strip.copy() for strip in strips] for name, strips in self.strips.items()}
+        original = self.metrics()
+        current_score = original_score = self.score(original, targets, weights)
+        best_score, best_strips = current_score, original_strips
+        temperature = initial_temperature if initial_temperature is not None else max(original_score / 10, 1e-12)
+        decay = cooling ** (1.0 / max(iterations, 1))
+
+        started = time.perf_counter()
+        accepted = 0
+        iteration = 0
+        while iteration < iterations and best_score > tolerance:
+            if max_seconds is not None and time.perf_counter() - started > max_seconds:
+                break
+            iteration += 1
+            name, reel, new = self._propose(rng, swap_probability)
+
+            probabilities = dict(self.probabilities)
+            scatter_counts = dict(self.scatter_counts)
+            probabilities[name] = self.probabilities[name].copy()
+            probabilities[name][reel] = self._reel_probabilities(new)
+            scatter_counts[name] = self.scatter_counts[name].copy()
+            scatter_counts[name][reel] = self._reel_scatter_counts(new)
+            misses = self.misses
+            if name == "normal" and reel in self.prefix_reels:
+                windows = [self._windows(self.strips["normal"][other]) for other in self.prefix_reels]
+                windows[self.prefix_reels.index(reel)] = self._window_difference(self.strips[name][reel], new)
+                misses = self.misses + self._prefix_misses(windows)
+
+            candidate = self.score(self._metrics(probabilities, scatter_counts, misses), targets, weights)
+            if candidate <= current_score or rng.random() < math.exp((current_score - candidate) / temperature):
+                self.strips[name][reel] = new
+                self.probabilities, self.scatter_counts, self.misses = probabilities, scatter_counts, misses
+                current_score = candidate
+                accepted += 1
+                if candidate < best_score:
+                    best_score = candidate
+                    best_strips = {key: [strip.copy() for strip in strips] for key, strips in self.strips.items()}
+            temperature *= decay
+        elapsed = time.perf_counter() - started
+
+        # Rebuild the caches from the best strips (no accumulated rounding)
+        self.set_strips(best_strips)
+        metrics = self.metrics()
+
+        composition = {}
+        for name in self.reel_sets:
+            for reel, reel_name in enumerate(self.reel_names[name]):
+                old = Counter(self.evaluator.symbols[original_strips[name][reel]].tolist())
+                new = Counter(self.evaluator.symbols[self.strips[name][reel]].tolist())
+                changes = {int(symbol): new[symbol] - old[symbol] for symbol in sorted(set(old) | set(new))
+                           if new[symbol] != old[symbol]}
+                if changes:
+                    composition.setdefault(name, {})[reel_name] = changes
+
+        result = OptimizationResult(
+            strips=self.strip_symbols(),
+            metrics=metrics,
+            original=original,
+            targets=targets,
+            score=self.score(metrics, targets, weights),
+            original_score=original_score,
+            iterations=iteration,
+            accepted=accepted,
+            elapsed=elapsed,
+            composition=composition
+        )
+        self.logger.info(f"Reel optimization: score {original_score:.3e} -> {result.score:.3e} after "
+                         f"{iteration} moves ({accepted} accepted, {result.evaluations_per_minute:,.0f}/min); "
+                         f"RTP {original.rtp:.6f} -> {metrics.rtp:.6f}, hit rate {original.hit_rate:.4f} -> "
+                         f"{metrics.hit_rate:.4f}, trigger {original.trigger:.6f} -> {metrics.trigger:.6f}")
+        return result
+
+    def set_strips(self, strips: Dict[str, List[np.ndarray]]):
+        """Replace the strips (symbol codes) and rebuild every cache."""
+        self.strips = {name: [strip.copy() for strip in reels] for name, reels in strips.items()}
+        self.probabilities = {name: np.array([self._reel_probabilities(strip) for strip in reels])
+                              for name, reels in self.strips.items()}
+        self.scatter_counts = {name: np.array([self._reel_scatter_counts(strip) for strip in reels])
+                               for name, reels in self.strips.items()}
+        self.misses = self._prefix_misses([self._windows(self.strips["normal"][reel]) for reel in self.prefix_reels])
+
+    def strip_symbols(self) -> Dict[str, Dict[str, List[int]]]:
+        """Current strips as symbol ids, by reel set and reel name."""
+        return {name: {reel_name: self.evaluator.symbols[strip].tolist()
+                       for reel_name, strip in zip(self.reel_names[name], self.strips[name])}
+                for name in self.strips}
+
+
+def reel_strips_yaml(source: str, strips: Dict[str, Dict[str, List[int]]], machine_id: Optional[str] = None) -> str:
+    """
+    Replace reel strips (and optionally the machine_id) in the text of a machine YAML file.
+
+    Only the flow-style `reelN: [...]` lines of the reels section are rewritten, so
+    comments, paylines and the pay table of the source file are kept.
+
+    Args:
+        source: Text of the original machine YAML
+        strips: New strips as {reel set: {reel name: symbols}}
+        machine_id: New machine id
+
+    Returns:
+        Text of the new machine YAML
+    """
+    lines = source.splitlines(keepends=True)
+    in_reels = False
+    reel_set = None
+    replaced = set()
+    for i, line in enumerate(lines):
+        if re.match(r"^\S", line):
+            in_reels = line.startswith("reels:")
+            if machine_id is not None and line.startswith("machine_id:"):
+                lines[i] = f'machine_id: "{machine_id}"\n'
+            continue
+        if not in_reels:
+            continue
+        match = re.match(r"^\s+(\w+):\s*(#.*)?$", line)
+        if match:
+            reel_set = match.group(1)
+            continue
+        match = re.match(r"^(\s+)(\w+):\s*\[[^\]]*\]", line)
+        if match and reel_set in strips and match.group(2) in strips[reel_set]:
+            values = ",".join(str(symbol) for symbol in strips[reel_set][match.group(2)])
+            lines[i] = f"{match.group(1)}{match.group(2)}: [{values}]" + line[match.end():]
+            replaced.add((reel_set, match.group(2)))
+    missing = {(name, reel) for name, reels in strips.items() for reel in reels} - replaced
+    if missing:
+        raise ValueError(f"Reels not found in the YAML text: {', '.join(f'{n}/{r}' for n, r in sorted(missing))}")
+    return "".join(lines)
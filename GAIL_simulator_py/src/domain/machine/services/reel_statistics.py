@@ -0,0 +1,156 @@
+# src/domain/machine/services/reel_statistics.py
+from typing import Dict, Optional
+
+import numpy as np
+
+from .batch_evaluation import BatchWinEvaluator
+
+
+def symbol_probabilities(evaluator: BatchWinEvaluator, reel_set: str = "normal") -> np.ndarray:
+    """
+    Probability of each symbol code on each reel (stops are uniform).
+
+    Every row of the window sees the same marginal distribution, since the window
+    just shifts the uniform stop.
+
+    Returns:
+        Array of shape (num_reels, num_codes)
+    """
+    probabilities = np.zeros((evaluator.num_reels, len(evaluator.symbols)))
+    for reel, strip in enumerate(evaluator.strips[reel_set]):
+        probabilities[reel] = np.bincount(strip, minlength=len(evaluator.symbols)) / len(strip)
+    return probabilities
+
+
+def line_hit_matrix(evaluator: BatchWinEvaluator, in_free: bool = False,
+                    probabilities: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Exact expected pay-table hits per spin, the coefficients of the line win.
+
+    A payline reads one cell per reel and the reels stop independently, so the
+    symbols along a line are independent with the per-reel marginals. For a start
+    symbol s the run continues on reel i with probability m_i(s) = P(s) + P(wild)
+    and contributes the expected multiplier e_i(s) = P(s) + sum_w P(w) * mult(w),
+    so E[multiplier; run == k] = P_0(s) * prod_{i<k} e_i(s) * (1 - m_k(s)).
+
+    Args:
+        evaluator: Batch evaluator of the machine
+        in_free: Use the free-spin reel set and multiplier
+        probabilities: Per-reel symbol probabilities to use instead of the
+            evaluator's strips (shape (num_reels, num_codes))
+
+    Returns:
+        Array shaped like evaluator.pay_matrix; the expected line win is
+        (hits * pay_matrix).sum()
+    """
+    if probabilities is None:
+        probabilities = symbol_probabilities(evaluator, evaluator.reel_set_name(in_free))
+    wild_probability = probabilities[:, evaluator.is_wild].sum(axis=1)
+    wild_value = (probabilities[:, evaluator.is_wild] * evaluator.wild_multiplier[evaluator.is_wild]).sum(axis=1)
+
+    hits = np.zeros_like(evaluator.pay_matrix)
+    for line in evaluator.paylines:
+        reels = [position % evaluator.num_reels for position in line]
+        if len(set(reels)) != len(reels):
+            raise ValueError(f"Payline {line} reads the same reel twice; cells are not independent")
+
+        start = np.where(evaluator.pays_line, probabilities[reels[0]], 0.0)
+        # Vectorized over start symbols: continued = P_0(s) * prod of e_i(s) so far
+        continued = start.copy()
+        for k in range(1, len(line) + 1):
+            if k >= 3:
+                stop = 1.0 if k == len(line) else 1.0 - (probabilities[reels[k]] + wild_probability[reels[k]])
+                if k - 3 < hits.shape[1]:
+                    hits[:, k - 3] += continued * stop
+            if k < len(line):
+                continued = continued * (probabilities[reels[k]] + wild_value[reels[k]])
+
+    multiplier = evaluator.free_multiplier if in_free else 1
+    return hits * multiplier / evaluator.num_lines
+
+
+def expected_line_win(evaluator: BatchWinEvaluator, in_free: bool = False) -> float:
+    """
+    Exact expected line win per spin, in units of bet.
+
+    Args:
+        evaluator: Batch evaluator of the machine
+        in_free: Use the free-spin reel set and multiplier
+
+    Returns:
+        Expected line win
+    """
+    return float((line_hit_matrix(evaluator, in_free) * evaluator.pay_matrix).sum())
+
+
+def reel_scatter_counts(evaluator: BatchWinEvaluator, reel_set: str = "normal") -> np.ndarray:
+    """
+    Distribution of the number of scatters visible in each reel's window.
+
+    Returns:
+        Array of shape (num_reels, window_size + 1)
+    """
+    distribution = np.zeros((evaluator.num_reels, evaluator.window_size + 1))
+    rows = np.arange(evaluator.window_size)
+    for reel, strip in enumerate(evaluator.strips[reel_set]):
+        stops = np.arange(len(strip))
+        counts = (strip[(stops[:, None] + rows) % len(strip)] == evaluator.scatter_code).sum(axis=1)
+        distribution[reel] = np.bincount(counts, minlength=evaluator.window_size + 1) / len(strip)
+    return distribution
+
+
+def scatter_count_distribution(evaluator: BatchWinEvaluator, reel_set: str = "normal",
+                               reel_counts: Optional[np.ndarray] = None) -> np.ndarray:
+    """Exact distribution of the total scatter count on the grid (convolution over reels)."""
+    if reel_counts is None:
+        reel_counts = reel_scatter_counts(evaluator, reel_set)
+    distribution = np.array([1.0])
+    for reel_distribution in reel_counts:
+        distribution = np.convolve(distribution, reel_distribution)
+    return distribution
+
+
+def scatter_hit_vector(evaluator: BatchWinEvaluator, in_free: bool = False,
+                       reel_counts: Optional[np.ndarray] = None) -> np.ndarray:
+    """Exact probability of every scatter pay (index min(count - 3, 2)) per spin."""
+    distribution = scatter_count_distribution(evaluator, evaluator.reel_set_name(in_free), reel_counts)
+    hits = np.zeros(len(evaluator.scatter_pays))
+    for count in range(3, len(distribution)):
+        index = min(count - 3, 2)
+        if index < len(hits):
+            hits[index] += distribution[count]
+    return hits
+
+
+def expected_scatter_win(evaluator: BatchWinEvaluator, in_free: bool = False) -> float:
+    """Exact expected scatter win per spin, in units of bet."""
+    return float(scatter_hit_vector(evaluator, in_free) @ evaluator.scatter_pays)
+
+
+def trigger_probability(evaluator: BatchWinEvaluator, reel_counts: Optional[np.ndarray] = None) -> float:
+    """Exact probability that a base spin shows scatters on at least 3 reels."""
+    if reel_counts is None:
+        reel_counts = reel_scatter_counts(evaluator, "normal")
+    column_probability = 1.0 - reel_counts[:, 0]
+    # Poisson-binomial over reels
+    distribution = np.array([1.0])
+    for p in column_probability:
+        distribution = np.convolve(distribution, [1.0 - p, p])
+    return float(distribution[3:].sum())
+
+
+def base_game_expectations(evaluator: BatchWinEvaluator) -> Dict[str, float]:
+    """
+    Exact per-spin expectations of the base game, in units of bet.
+
+    Returns:
+        Dictionary with line_win, scatter_win, base_win and trigger
+    """
+    line_win = expected_line_win(evaluator, in_free=False)
+    scatter_win = expected_scatter_win(evaluator, in_free=False)
+    return {
+        "line_win": line_win,
+        "scatter_win": scatter_win,
+        "base_win": line_win + scatter_win,
+        "trigger": trigger_probability(evaluator)
+    }
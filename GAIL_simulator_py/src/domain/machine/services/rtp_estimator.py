@@ -0,0 +1,229 @@
+# src/domain/machine/services/rtp_estimator.py
+import logging
+from dataclasses import dataclass, field, asdict
+from statistics import NormalDist
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from .batch_evaluation import BatchWinEvaluator
+from .reel_statistics import base_game_expectations
+
+
+# Base-game quantities with exactly known means that can serve as control variates
+CONTROL_VARIATES = ("line_win", "scatter_win", "trigger")
+
+
+@dataclass
+class RTPEstimate:
+    """Result of a (variance-reduced) RTP estimation run."""
+    rtp: float
+    standard_error: float
+    confidence: float
+    half_width: float
+    spins: int
+    strata: int
+    antithetic: bool
+    control_variates: Sequence[str]
+    plain_variance: float
+    estimator_variance: float
+    effective_spins: float
+    ess_gain: float
+    free_rtp: float
+    exact: Dict[str, float] = field(default_factory=dict)
+    control_coefficients: Dict[str, float] = field(default_factory=dict)
+    antithetic_correlation: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["control_variates"] = list(self.control_variates)
+        return result
+
+
+class RTPEstimator:
+    """
+    Monte Carlo RTP estimation for machine certification (fixed bet, no player model).
+
+    Spins are evaluated in batches with BatchWinEvaluator and three variance-reduction
+    techniques can be combined:
+
+    - stratification: the stops of every reel are split into equal blocks and each
+      combination of blocks is a stratum, sampled with proportional allocation;
+    - antithetic pairs: each sampled stop vector s is paired with its mirror L - 1 - s
+      and the pair average is the sampling unit;
+    - control variates: base-game quantities whose exact means are known
+      (line win, scatter win, free-spin trigger) are regressed out of the
+      free-spin-inclusive win with a pooled within-stratum coefficient.
+
+    Free-spin rounds of triggering spins are simulated with plain random stops.
+    The variance of the combined estimator is compared with the per-spin variance
+    of plain Monte Carlo to report the effective sample size.
+    """
+
+    def __init__(self, machine, seed: Optional[int] = None, chunk_size: int = 65536):
+        """
+        Initialize the estimator.
+
+        Args:
+            machine: SlotMachine instance
+            seed: Seed for the numpy generator
+            chunk_size: Spins evaluated per array operation
+        """
+        self.logger = logging.getLogger("domain.machine.rtp_estimator")
+        self.evaluator = BatchWinEvaluator(machine, chunk_size)
+        self.rng = np.random.default_rng(seed)
+        self.exact = base_game_expectations(self.evaluator)
+
+    def _strata(self, blocks: int):
+        """Block boundaries per reel and stratum weights (product of block fractions)."""
+        lengths = self.evaluator.reel_lengths("normal")
+        if blocks < 1 or blocks > lengths.min():
+            raise ValueError(f"strata_blocks must be between 1 and the shortest reel length ({lengths.min()})")
+        bounds = [np.linspace(0, length, blocks + 1).astype(np.int64) for length in lengths]
+        fractions = [np.diff(bound) / length for bound, length in zip(bounds, lengths)]
+        weights = fractions[0]
+        for fraction in fractions[1:]:
+            weights = np.multiply.outer(weights, fraction)
+        return bounds, weights.ravel()
+
+    @staticmethod
+    def _allocate(units: int, weights: np.ndarray) -> np.ndarray:
+        """Proportional allocation with largest-remainder rounding, at least 2 units per stratum."""
+        if units < 2 * len(weights):
+            raise ValueError(f"Need at least {2 * len(weights)} sampling units for {len(weights)} strata")
+        extra = units - 2 * len(weights)
+        target = weights * extra
+        counts = np.floor(target).astype(np.int64)
+        remainder = extra - counts.sum()
+        counts[np.argsort(counts - target)[:remainder]] += 1
+        return counts + 2
+
+    def _sample_stops(self, labels: np.ndarray, bounds) -> np.ndarray:
+        blocks = len(bounds[0]) - 1
+        block_index = np.unravel_index(labels, (blocks,) * self.evaluator.num_reels)
+        low = np.stack([bound[index] for bound, index in zip(bounds, block_index)], axis=1)
+        high = np.stack([bound[index + 1] for bound, index in zip(bounds, block_index)], axis=1)
+        return self.rng.integers(low, high)
+
+    def _play(self, stops: np.ndarray):
+        """Base spin plus its free-spin round; returns (total win, free win, control matrix)."""
+        base = self.evaluator.evaluate(stops)
+        free = np.zeros(len(stops))
+        triggered = np.flatnonzero(base["trigger"])
+        if len(triggered):
+            free[triggered] = self.evaluator.free_game_wins(self.rng, len(triggered))
+        controls = np.stack([base["line_win"], base["scatter_win"], base["trigger"].astype(float)], axis=1)
+        return base["total_win"] + free, free, controls
+
+    def estimate(self, num_spins: int, strata_blocks: int = 1, antithetic: bool = False,
+                 control_variates: Sequence[str] = (), confidence: float = 0.95,
+                 batch_size: int = 100000) -> RTPEstimate:
+        """
+        Estimate the free-spin-inclusive RTP.
+
+        Args:
+            num_spins: Number of base spins to evaluate (free spins come on top)
+            strata_blocks: Stop blocks per reel (1 = no stratification; strata = blocks ** reels)
+            antithetic: Use antithetic stop pairs
+            control_variates: Subset of CONTROL_VARIATES to regress out
+            confidence: Confidence level of the reported interval
+            batch_size: Sampling units per batch
+
+        Returns:
+            RTPEstimate
+        """
+        unknown = set(control_variates) - set(CONTROL_VARIATES)
+        if unknown:
+            raise ValueError(f"Unknown control variates: {', '.join(sorted(unknown))}")
+        control_index = [CONTROL_VARIATES.index(name) for name in control_variates]
+        control_means = np.array([self.exact[name] for name in control_variates])
+
+        units = num_spins // 2 if antithetic else num_spins
+        bounds, weights = self._strata(strata_blocks)
+        counts = self._allocate(units, weights)
+        offsets = np.cumsum(counts)
+        lengths = self.evaluator.reel_lengths("normal")
+
+        num_strata, num_controls = len(weights), len(control_index)
+        sum_y = np.zeros(num_strata)
+        sum_free = np.zeros(num_strata)
+        sum_yy = np.zeros(num_strata)
+        sum_x = np.zeros((num_strata, num_controls))
+        sum_xy = np.zeros((num_strata, num_controls))
+        sum_xx = np.zeros((num_strata, num_controls, num_controls))
+        spin_sum = spin_square_sum = 0.0
+        pair_sums = np.zeros(5)  # y1, y2, y1², y2², y1·y2
+
+        for start in range(0, units, batch_size):
+            batch_labels = np.searchsorted(offsets, np.arange(start, min(start + batch_size, units)), side="right")
+            stops = self._sample_stops(batch_labels, bounds)
+            y, free, x = self._play(stops)
+            spin_sum += y.sum()
+            spin_square_sum += (y * y).sum()
+            if antithetic:
+                y2, free2, x2 = self._play(lengths - 1 - stops)
+                spin_sum += y2.sum()
+                spin_square_sum += (y2 * y2).sum()
+                pair_sums += [y.sum(), y2.sum(), (y * y).sum(), (y2 * y2).sum(), (y * y2).sum()]
+                y, free, x = (y + y2) / 2, (free + free2) / 2, (x + x2) / 2
+            x = x[:, control_index]
+
+            sum_y += np.bincount(batch_labels, y, num_strata)
+            sum_free += np.bincount(batch_labels, free, num_strata)
+            sum_yy += np.bincount(batch_labels, y * y, num_strata)
+            for i in range(num_controls):
+                sum_x[:, i] += np.bincount(batch_labels, x[:, i], num_strata)
+                sum_xy[:, i] += np.bincount(batch_labels, x[:, i] * y, num_strata)
+                for j in range(num_controls):
+                    sum_xx[:, i, j] += np.bincount(batch_labels, x[:, i] * x[:, j], num_strata)
+
+        n = counts.astype(float)
+        mean_y = sum_y / n
+        mean_x = sum_x / n[:, None]
+        # Within-stratum centered sums of squares and cross products
+        s_yy = sum_yy - n * mean_y ** 2
+        s_xy = sum_xy - n[:, None] * mean_x * mean_y[:, None]
+        s_xx = sum_xx - n[:, None, None] * mean_x[:, :, None] * mean_x[:, None, :]
+
+        beta = np.zeros(num_controls)
+        if num_controls:
+            beta = np.linalg.lstsq(s_xx.sum(axis=0), s_xy.sum(axis=0), rcond=None)[0]
+        residual = np.maximum(s_yy - 2 * s_xy @ beta + np.einsum("hij,i,j->h", s_xx, beta, beta), 0.0)
+        stratum_variance = residual / (n - 1)
+
+        rtp = float(weights @ (mean_y - mean_x @ beta) + control_means @ beta)
+        variance = float((weights ** 2 * stratum_variance / n).sum())
+
+        spins = units * (2 if antithetic else 1)
+        plain_variance = spin_square_sum / spins - (spin_sum / spins) ** 2
+        effective_spins = plain_variance / variance if variance > 0 else float("inf")
+        standard_error = variance ** 0.5
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+        correlation = None
+        if antithetic:
+            s1, s2, s11, s22, s12 = pair_sums / units
+            denominator = ((s11 - s1 * s1) * (s22 - s2 * s2)) ** 0.5
+            correlation = float((s12 - s1 * s2) / denominator) if denominator > 0 else 0.0
+
+        result = RTPEstimate(
+            rtp=rtp,
+            standard_error=standard_error,
+            confidence=confidence,
+            half_width=z * standard_error,
+            spins=spins,
+            strata=num_strata,
+            antithetic=antithetic,
+            control_variates=tuple(control_variates),
+            plain_variance=float(plain_variance),
+            estimator_variance=variance,
+            effective_spins=float(effective_spins),
+            ess_gain=float(effective_spins / spins),
+            free_rtp=float(weights @ (sum_free / n)),
+            exact=dict(self.exact),
+            control_coefficients={name: float(b) for name, b in zip(control_variates, beta)},
+            antithetic_correlation=correlation
+        )
+        self.logger.info(f"RTP {rtp:.6f} ± {result.half_width:.6f} from {spins} spins "
+                         f"(effective {effective_spins:.0f}, gain {result.ess_gain:.2f}x)")
+        return result
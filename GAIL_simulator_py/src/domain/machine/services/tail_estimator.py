@@ -0,0 +1,455 @@
+# src/domain/machine/services/tail_estimator.py
+import logging
+from dataclasses import dataclass, field, asdict
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch_evaluation import BatchWinEvaluator
+from .payout_distribution import max_wins
+
+
+@dataclass
+class ReelMixture:
+    """
+    Sampling distribution of the stops of one spin on a reel set.
+
+    A mixture of the nominal uniform stops and K tilted components,
+    m(s) = (1 - sum_k w_k) * prod_j 1/L_j + sum_k w_k * prod_j q_kj(s_j): a spin
+    first picks a component, then every reel stops independently according to it.
+    Tilted components can each concentrate on one family of windows that line up
+    a big win (e.g. one top symbol next to large wild multipliers), while the
+    uniform part keeps the ordinary spins of a round and bounds the likelihood
+    ratio of a spin by 1 / (1 - sum_k w_k).
+    """
+    weights: np.ndarray
+    components: List[List[np.ndarray]]
+
+    @classmethod
+    def uniform(cls, lengths: Sequence[int]) -> 'ReelMixture':
+        """The nominal reels: no tilted component."""
+        return cls(np.zeros(0), [])
+
+    @classmethod
+    def perturbed(cls, lengths: Sequence[int], components: int, weight: float,
+                  rng: np.random.Generator, spread: float = 2.0) -> 'ReelMixture':
+        """Starting point of a fit: components close to uniform but different from each other."""
+        return cls(np.full(components, weight / components),
+                   [[g / g.sum() for g in (rng.gamma(spread, size=length) for length in lengths)]
+                    for _ in range(components)])
+
+    def _log_tilts(self, stops: np.ndarray) -> np.ndarray:
+        """log(q_k(s) / uniform(s)) of every spin and component, shape (N, K)."""
+        return np.stack([sum(np.log(len(p) * p[stops[:, reel]]) for reel, p in enumerate(component))
+                         for component in self.components], axis=1) if self.components else np.zeros((len(stops), 0))
+
+    def log_ratio(self, stops: np.ndarray) -> np.ndarray:
+        """log(uniform / mixture) of every spin."""
+        if not self.components:
+            return np.zeros(len(stops))
+        with np.errstate(divide="ignore"):
+            terms = np.column_stack([np.full(len(stops), np.log1p(-self.weights.sum())),
+                                     np.log(self.weights) + self._log_tilts(stops)])
+        return -np.logaddexp.reduce(terms, axis=1)
+
+    def draw(self, rng: np.random.Generator, count: int, lengths: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw stops; returns (stops, log likelihood ratio per spin)."""
+        stops = np.column_stack([rng.integers(0, length, size=count) for length in lengths])
+        if self.components:
+            chosen = rng.choice(len(self.weights) + 1, size=count,
+                                p=np.concatenate([[1 - self.weights.sum()], self.weights]))
+            for k, component in enumerate(self.components):
+                rows = np.flatnonzero(chosen == k + 1)
+                for reel, p in enumerate(component):
+                    stops[rows, reel] = rng.choice(len(p), size=len(rows), p=p)
+        return stops, self.log_ratio(stops)
+
+    def refit(self, stops: np.ndarray, weights: np.ndarray, smoothing: float, max_weight: float,
+              steps: int = 3) -> 'ReelMixture':
+        """
+        Fit the tilted components to weighted spins (EM steps on the cross-entropy objective).
+
+        Every spin is split between the uniform part and the components by its
+        posterior responsibilities; a component's weight becomes its weighted mean
+        responsibility and its stop probabilities the responsibility-weighted stop
+        frequencies.
+        """
+        if not self.components or weights.sum() <= 0:
+            return self
+        total = weights.sum()
+        current = self
+        for _ in range(steps):
+            with np.errstate(divide="ignore"):
+                log_joint = np.log(current.weights) + current._log_tilts(stops) + current.log_ratio(stops)[:, None]
+            responsibility = np.exp(log_joint) * weights[:, None]
+            mass = responsibility.sum(axis=0)
+            if (mass <= 0).any():
+                break
+            component_weights = mass / total
+            if component_weights.sum() > max_weight:
+                component_weights *= max_weight / component_weights.sum()
+            component_weights = np.maximum(component_weights, 1e-4)
+            components = [[np.bincount(stops[:, reel], responsibility[:, k], len(p)) / mass[k]
+                           for reel, p in enumerate(component)] for k, component in enumerate(current.components)]
+            current = ReelMixture(component_weights, components)
+        return ReelMixture(smoothing * current.weights + (1 - smoothing) * self.weights,
+                           [[smoothing * new + (1 - smoothing) * old for new, old in zip(fitted, previous)]
+                            for fitted, previous in zip(current.components, self.components)])
+
+    def max_log_ratio(self) -> float:
+        """Log of the largest likelihood ratio of a spin."""
+        if not self.components:
+            return 0.0
+        smallest = [float(np.prod([len(p) * p.min() for p in component])) for component in self.components]
+        return -float(np.log((1 - self.weights.sum()) + self.weights @ np.array(smallest)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"weights": self.weights.tolist(),
+                "components": [[p.tolist() for p in component] for component in self.components]}
+
+
+@dataclass
+class StopProposal:
+    """Sampling distribution of the stops of a round: base-spin and free-spin reel mixtures."""
+    base: ReelMixture
+    bonus: ReelMixture
+    tilt: float = 0.0
+
+    @classmethod
+    def uniform(cls, lengths: Dict[str, Sequence[int]]) -> 'StopProposal':
+        """The nominal machine: every stop equally likely."""
+        return cls(ReelMixture.uniform(lengths["base"]), ReelMixture.uniform(lengths["bonus"]))
+
+    def max_log_ratio(self, free_spins: int) -> float:
+        """Log of the largest likelihood ratio a round (base spin and free spins) can have."""
+        return self.base.max_log_ratio() + free_spins * self.bonus.max_log_ratio()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"tilt": self.tilt, "base": self.base.to_dict(), "bonus": self.bonus.to_dict()}
+
+
+@dataclass
+class TailEstimate:
+    """
+    Tail probability P(round win >= threshold x bet) estimated by importance sampling.
+
+    Without hits the interval is [0, upper bound]: the likelihood ratio of a round
+    is bounded by the proposal, so P <= max ratio * P_proposal(hit), and the
+    proposal probability of an event never seen in `rounds` draws is bounded at the
+    confidence level. Thresholds above the exact largest win have probability 0.
+    """
+    threshold: float
+    probability: float
+    standard_error: float
+    confidence: float
+    ci_low: float
+    ci_high: float
+    relative_error: float
+    hits: int
+    rounds: int
+    brute_force_rounds: float
+    variance_reduction: float
+    attainable: bool = True
+
+
+@dataclass
+class TailReport:
+    """Result of a tail-risk run."""
+    estimates: List[TailEstimate]
+    rounds: int
+    spins_evaluated: int
+    observed_max_win: float
+    max_win: Dict[str, float]
+    proposal: Dict[str, Any] = field(default_factory=dict)
+    fit_levels: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "estimates": [asdict(estimate) for estimate in self.estimates],
+            "rounds": self.rounds,
+            "spins_evaluated": self.spins_evaluated,
+            "observed_max_win": self.observed_max_win,
+            "max_win": self.max_win,
+            "proposal": self.proposal,
+            "fit_levels": self.fit_levels
+        }
+
+
+class TailRiskEstimator:
+    """
+    Importance sampling for rare big wins (e.g. rounds paying >= 1000x bet).
+
+    A game round is a base spin plus, when it triggers, its whole free-spin round.
+    Stops are drawn from a StopProposal instead of uniformly and every round is
+    reweighted by its likelihood ratio, which keeps the estimator unbiased.
+
+    The proposal approximates the exponentially tilted round, whose density is
+    proportional to exp(tilt * round win). The tilt factorizes over the spins of a
+    round: free spins are tilted by exp(tilt * W) and the base spin by
+    exp(tilt * B) * M(tilt)^(free_spins_count * trigger), with M the moment
+    generating function of a bonus spin. The tilt is chosen so the tilted mean
+    round win equals the threshold, which makes the big wins typical instead of
+    rare. Each reel's stop probabilities are then fitted to the per-reel marginals
+    of the tilted spins (a cross-entropy projection with smooth weights, so every
+    sampled spin contributes, not only the rare elite rounds). When the tilt that
+    reaches the threshold would leave too few effective samples, the iteration
+    stops at an intermediate tilt and continues from the refitted proposal.
+    """
+
+    def __init__(self, machine, seed: Optional[int] = None, chunk_size: int = 65536):
+        """
+        Initialize the estimator.
+
+        Args:
+            machine: SlotMachine instance
+            seed: Seed for the numpy generator
+            chunk_size: Spins evaluated per array operation
+        """
+        self.logger = logging.getLogger("domain.machine.tail_estimator")
+        self.evaluator = BatchWinEvaluator(machine, chunk_size)
+        self.rng = np.random.default_rng(seed)
+        self.lengths = {"base": self.evaluator.reel_lengths("normal").tolist(),
+                        "bonus": self.evaluator.reel_lengths(self.evaluator.reel_set_name(True)).tolist()}
+        self.proposal = StopProposal.uniform(self.lengths)
+        self.fit_levels: List[float] = []
+        self._max_win: Optional[Dict[str, float]] = None
+
+    def sample_rounds(self, count: int, proposal: Optional[StopProposal] = None) -> Dict[str, np.ndarray]:
+        """
+        Play rounds with stops drawn from a proposal.
+
+        Args:
+            count: Number of rounds
+            proposal: Stop proposal (default: the fitted one)
+
+        Returns:
+            Dictionary with win (per unit bet), log_ratio, base_stops, trigger,
+            bonus_stops (shape (triggered, free_spins_count, reels)) and bonus_rounds
+            (round index of each row of bonus_stops)
+        """
+        proposal = proposal or self.proposal
+        base_stops, log_ratio = proposal.base.draw(self.rng, count, self.lengths["base"])
+        base = self.evaluator.evaluate(base_stops)
+        win = base["total_win"].copy()
+
+        triggered = np.flatnonzero(base["trigger"])
+        free_spins = self.evaluator.free_spins_count
+        bonus_stops = np.empty((0, free_spins, self.evaluator.num_reels), dtype=np.int64)
+        if len(triggered) and free_spins > 0:
+            stops, bonus_ratio = proposal.bonus.draw(self.rng, len(triggered) * free_spins, self.lengths["bonus"])
+            free_win = self.evaluator.evaluate(stops, in_free=True)["total_win"]
+            win[triggered] += free_win.reshape(len(triggered), free_spins).sum(axis=1)
+            log_ratio[triggered] += bonus_ratio.reshape(len(triggered), free_spins).sum(axis=1)
+            bonus_stops = stops.reshape(len(triggered), free_spins, -1)
+
+        return {
+            "win": win,
+            "log_ratio": log_ratio,
+            "base_stops": base_stops,
+            "trigger": base["trigger"],
+            "bonus_stops": bonus_stops,
+            "bonus_rounds": triggered
+        }
+
+    @staticmethod
+    def _normalized(log_weights: np.ndarray) -> np.ndarray:
+        weights = np.exp(log_weights - log_weights.max())
+        return weights / weights.sum()
+
+    def _tilted(self, tilt: float, base: Dict[str, np.ndarray], bonus: Dict[str, np.ndarray]):
+        """
+        Self-normalized weights of sampled base and bonus spins under the tilted round.
+
+        Returns:
+            (base weights, bonus weights, tilted mean round win)
+        """
+        free_spins = self.evaluator.free_spins_count
+        bonus_log = bonus["log_ratio"] + tilt * bonus["win"]
+        log_mgf = np.logaddexp.reduce(bonus_log) - np.log(len(bonus_log))
+        bonus_weights = self._normalized(bonus_log)
+        base_weights = self._normalized(base["log_ratio"] + tilt * base["win"]
+                                        + base["trigger"] * free_spins * log_mgf)
+        mean = base_weights @ base["win"] + (base_weights @ base["trigger"]) * free_spins * (bonus_weights @ bonus["win"])
+        return base_weights, bonus_weights, float(mean)
+
+    @staticmethod
+    def _ess(weights: np.ndarray) -> float:
+        """Effective sample size of normalized weights."""
+        return 1.0 / float(weights @ weights)
+
+    def _sample_spins(self, proposal: StopProposal, count: int, in_free: bool) -> Dict[str, np.ndarray]:
+        mixture = proposal.bonus if in_free else proposal.base
+        stops, log_ratio = mixture.draw(self.rng, count, self.lengths["bonus" if in_free else "base"])
+        result = self.evaluator.evaluate(stops, in_free=in_free)
+        return {"stops": stops, "log_ratio": log_ratio, "win": result["total_win"], "trigger": result["trigger"]}
+
+    def fit(self, threshold: float, spins_per_iteration: int = 50000, max_iterations: int = 30,
+            smoothing: float = 0.7, max_alpha: float = 0.9, min_ess: float = 200,
+            components: int = 4, patience: int = 5, settle: int = 4) -> StopProposal:
+        """
+        Fit the tilt and the per-stop probabilities of the proposal.
+
+        Args:
+            threshold: Target win in units of bet
+            spins_per_iteration: Base spins and bonus spins sampled per iteration
+            max_iterations: Iteration cap
+            smoothing: Weight of the new stop probabilities against the previous ones
+            max_alpha: Bound on the total weight of the tilted components (the likelihood
+                ratio of a spin is at most 1 / (1 - max_alpha))
+            components: Tilted components per reel set
+            min_ess: Smallest effective sample size allowed for a tilt (base and bonus spins)
+            patience: Capped iterations without a higher tilted mean before giving up
+            settle: Refits at a tilt that reaches the threshold before stopping
+
+        Returns:
+            The fitted proposal (also kept as self.proposal)
+        """
+        proposal = StopProposal(ReelMixture.perturbed(self.lengths["base"], components, 0.5, self.rng),
+                                ReelMixture.perturbed(self.lengths["bonus"], components, 0.5, self.rng))
+        self.fit_levels = []
+        best_level, stalled, reached = -np.inf, 0, 0
+        for iteration in range(max_iterations):
+            base = self._sample_spins(proposal, spins_per_iteration, False)
+            bonus = self._sample_spins(proposal, spins_per_iteration, True)
+
+            def usable(tilt):
+                base_weights, bonus_weights, _ = self._tilted(tilt, base, bonus)
+                return min(self._ess(base_weights), self._ess(bonus_weights)) >= min_ess
+
+            def reaches(tilt):
+                return self._tilted(tilt, base, bonus)[2] >= threshold
+
+            # Smallest tilt reaching the threshold, capped by the effective sample size
+            high = 1e-3
+            while usable(high) and not reaches(high) and high < 1e3:
+                high *= 2
+            low = 0.0 if high == 1e-3 else high / 2
+            if reaches(0.0):
+                low = high = 0.0
+            for _ in range(40):
+                middle = (low + high) / 2
+                if usable(middle) and not reaches(middle):
+                    low = middle
+                else:
+                    high = middle
+            capped = not usable(high)
+            tilt = low if capped else high
+            base_weights, bonus_weights, level = self._tilted(tilt, base, bonus)
+            self.fit_levels.append(level)
+
+            proposal = StopProposal(proposal.base.refit(base["stops"], base_weights, smoothing, max_alpha),
+                                    proposal.bonus.refit(bonus["stops"], bonus_weights, smoothing, max_alpha), tilt)
+            self.logger.info(f"Cross-entropy iteration {iteration + 1}: tilt {tilt:.4g}, tilted mean {level:.2f}"
+                             f"{' (capped)' if capped else ''}, tilted weights {proposal.base.weights.sum():.3f}/"
+                             f"{proposal.bonus.weights.sum():.3f}, "
+                             f"base trigger rate {base['trigger'].mean():.3f}, "
+                             f"mean bonus spin {bonus['win'].mean():.2f}")
+
+            if capped:
+                reached = 0
+                if level > best_level * 1.01:
+                    best_level, stalled = level, 0
+                else:
+                    stalled += 1
+                if stalled >= patience:
+                    break
+            else:
+                # Refit at the target tilt until the stop probabilities settle
+                best_level, reached = level, reached + 1
+                if reached >= settle:
+                    break
+
+        if best_level < threshold:
+            self.logger.warning(f"Tilted mean stopped at {best_level:.2f} below the target {threshold:g}x")
+        self.proposal = proposal
+        return proposal
+
+    def max_win(self) -> Dict[str, float]:
+        """Exact largest attainable wins (base spin, bonus spin, free round, round), in units of bet."""
+        if self._max_win is None:
+            self._max_win = max_wins(self.evaluator)
+        return self._max_win
+
+    def estimate(self, thresholds: Sequence[float], num_rounds: int, confidence: float = 0.95,
+                 batch_size: int = 100000, proposal: Optional[StopProposal] = None) -> TailReport:
+        """
+        Estimate tail probabilities with the fitted (or given) proposal.
+
+        Args:
+            thresholds: Win thresholds in units of bet
+            num_rounds: Number of rounds to sample
+            confidence: Confidence level of the intervals
+            batch_size: Rounds sampled per batch
+            proposal: Stop proposal (default: the fitted one)
+
+        Returns:
+            TailReport
+        """
+        proposal = proposal or self.proposal
+        thresholds = sorted(float(t) for t in thresholds)
+        sums = np.zeros(len(thresholds))
+        squares = np.zeros(len(thresholds))
+        hits = np.zeros(len(thresholds), dtype=np.int64)
+        spins = 0
+        observed_max = 0.0
+
+        for start in range(0, num_rounds, batch_size):
+            rounds = self.sample_rounds(min(batch_size, num_rounds - start), proposal)
+            ratio = np.exp(rounds["log_ratio"])
+            spins += len(rounds["win"]) + rounds["bonus_stops"].shape[0] * self.evaluator.free_spins_count
+            observed_max = max(observed_max, float(rounds["win"].max()))
+            for i, threshold in enumerate(thresholds):
+                weighted = np.where(rounds["win"] >= threshold, ratio, 0.0)
+                sums[i] += weighted.sum()
+                squares[i] += (weighted * weighted).sum()
+                hits[i] += int((weighted > 0).sum())
+
+        max_win = self.max_win()
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        # One-sided bound on the proposal probability of an event never sampled
+        unseen = -np.expm1(np.log1p(-confidence) / num_rounds)
+        max_ratio = float(np.exp(proposal.max_log_ratio(self.evaluator.free_spins_count)))
+        estimates = []
+        for i, threshold in enumerate(thresholds):
+            probability = sums[i] / num_rounds
+            variance = max(squares[i] / num_rounds - probability ** 2, 0.0) / max(num_rounds - 1, 1)
+            standard_error = variance ** 0.5
+            attainable = threshold <= max_win["round"] + 1e-9
+            if not attainable:
+                ci_high = 0.0
+            elif hits[i] == 0:
+                ci_high = min(max_ratio * unseen, 1.0)
+            else:
+                ci_high = probability + z * standard_error
+            # Rounds plain simulation would need for the same variance
+            brute_force = probability * (1 - probability) / variance if variance > 0 else float("nan")
+            estimates.append(TailEstimate(
+                threshold=threshold,
+                probability=float(probability),
+                standard_error=float(standard_error),
+                confidence=confidence,
+                ci_low=float(max(probability - z * standard_error, 0.0)) if hits[i] else 0.0,
+                ci_high=float(ci_high),
+                relative_error=float(standard_error / probability) if probability > 0 else float("inf"),
+                hits=int(hits[i]),
+                rounds=num_rounds,
+                brute_force_rounds=float(brute_force),
+                variance_reduction=float(brute_force / num_rounds),
+                attainable=attainable
+            ))
+
+        report = TailReport(estimates, num_rounds, spins, observed_max, max_win,
+                            proposal.to_dict(), list(self.fit_levels))
+        for estimate in estimates:
+            if not estimate.attainable:
+                self.logger.info(f"P(win >= {estimate.threshold:g}x) = 0: the largest possible win is "
+                                 f"{max_win['round']:g}x")
+                continue
+            self.logger.info(f"P(win >= {estimate.threshold:g}x) = {estimate.probability:.3e} "
+                             f"± {estimate.standard_error:.1e} ({estimate.hits} hits, "
+                             f"{estimate.variance_reduction:.0f}x fewer rounds than brute force)")
+            if estimate.hits < 10:
+                self.logger.warning(f"Only {estimate.hits} rounds reached {estimate.threshold:g}x; "
+                                    f"the estimate is unreliable")
+        return report
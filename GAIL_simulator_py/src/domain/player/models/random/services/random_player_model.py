@@ -24,7 +24,6 @@ class RandomPlayerModel(BasePlayerModel):
         self.max_bet_factor = self.config.get("max_bet_factor", 1.0)  # 最大投注比例
         self.min_delay = self.config.get("min_delay", 0.5)  # 最小延迟时间
         self.max_delay = self.config.get("max_delay", 3.0)  # 最大延迟时间
-        self.end_probability = self.config.get("end_probability", 0.01)  # 结束概率
         
         # 创建随机数生成器
         self.rng = random.Random()
@@ -81,12 +80,9 @@ class RandomPlayerModel(BasePlayerModel):
         available_bets = model_input.get("available_bets", [1.0])
         current_balance = model_input.get("current_balance", 0.0)
         
-        # 随机决定是否结束会话
-        end_session = self.rng.random() < self.end_probability
-        
-        # 如果余额不足，强制结束会话
-        if current_balance <= 0:
-            end_session = True
+        # 按end_probability随机结束由RandomDecisionEngine.should_end_session负责（每次spin只判定一次），
+        # 这里只在余额不足时强制结束
+        end_session = current_balance <= 0
         
         # 随机选择投注额
         if available_bets and not end_session:
@@ -12,11 +12,19 @@ This package contains the V1 player model implementation with:
 from .entities.v1_decision_engine import V1DecisionEngine
 from .services.v1_model_service import V1ModelService
 from .services.data_processor_service import DataProcessorService
+from .services.isolation_forest_scorer import CompiledIsolationForest
+from .services.tda_features import SlidingTDAFeatures
+from .services.inference_broker import InferenceBroker
+from .services.feature_store import SessionFeatureStore
 
 __all__ = [
     'V1DecisionEngine',
     'V1ModelService', 
-    'DataProcessorService'
+    'DataProcessorService',
+    'CompiledIsolationForest',
+    'SlidingTDAFeatures',
+    'InferenceBroker',
+    'SessionFeatureStore'
 ]
 
 # Package metadata
@@ -7,6 +7,8 @@ import random
 from ....entities.decision_engine import BaseDecisionEngine
 from ..services.v1_model_service import V1ModelService
 from ..services.data_processor_service import DataProcessorService
+from ..services.inference_broker import get_cluster_broker
+from ..services.feature_store import SessionFeatureStore
 
 
 class V1DecisionEngine(BaseDecisionEngine):
@@ -31,6 +33,8 @@ class V1DecisionEngine(BaseDecisionEngine):
         # 模型服务和数据处理器
         self.model_service = None
         self.data_processor = DataProcessorService()
+        # 每个会话的模型输入特征（增量更新，会话变化时自动重置）
+        self.feature_store = SessionFeatureStore()
 
         self.rng = random.Random()
         
@@ -91,6 +95,19 @@ class V1DecisionEngine(BaseDecisionEngine):
                 base_model_dir=base_model_dir
             )
             
+            # 可选：多线程会话共享同一聚类的微批推理代理
+            broker_config = self.config.get('inference_broker', {}) or {}
+            if broker_config.get('enabled', False):
+                broker = get_cluster_broker(
+                    self.cluster_id,
+                    self.model_service,
+                    max_batch_size=broker_config.get('max_batch_size', 64),
+                    max_wait_us=broker_config.get('max_wait_us', 500.0),
+                    timeout=broker_config.get('timeout', 30.0)
+                )
+                self.model_service.attach_inference_broker(broker)
+                self.logger.info(f"V1决策引擎 - Cluster {self.cluster_id} - 已启用微批推理代理")
+            
             self.logger.info(f"V1决策引擎 - Cluster {self.cluster_id} - 模型服务初始化成功")
             
         except Exception as e:
@@ -135,10 +152,9 @@ class V1DecisionEngine(BaseDecisionEngine):
                 if hasattr(first_layer, 'in_features'):
                     expected_dim = first_layer.in_features
             
-            # 准备终止模型输入
-            termination_state = self.data_processor.prepare_termination_input(
-                session_data, expected_dim=expected_dim
-            )
+            # 准备终止模型输入（特征存储中的视图）
+            self.feature_store.sync(session_data)
+            termination_state = self.feature_store.termination_input(expected_dim)
             
             # 使用模型预测
             should_terminate = self.model_service.predict_termination(
@@ -156,8 +172,9 @@ class V1DecisionEngine(BaseDecisionEngine):
     def _decide_bet_amount(self, session_data: Dict[str, Any]) -> float:
         """使用投注模型决定投注额"""
         try:
-            # 准备投注模型输入 (12维观察向量)
-            betting_observation = self.data_processor.prepare_betting_input(session_data)
+            # 准备投注模型输入 (12维观察向量，特征存储中的视图)
+            self.feature_store.sync(session_data)
+            betting_observation = self.feature_store.betting_input
             
             # 使用模型预测
             bet_amount = self.model_service.predict_bet_amount(
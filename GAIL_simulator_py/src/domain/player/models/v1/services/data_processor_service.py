@@ -3,6 +3,8 @@ import logging
 import numpy as np
 from typing import Dict, Any, List
 
+from .feature_store import get_currency_flag
+
 
 class DataProcessorService:
     """
@@ -32,12 +34,10 @@ class DataProcessorService:
         try:
             # 从session_data提取基本信息
             current_balance = session_data.get('current_balance', 1000.0)
-            spins = session_data.get('spins', [])  # SpinResult列表
-            machine_info = session_data.get('machine', {})
+            spins = session_data.get('results', [])  # 最近的spin结果（SpinResult.to_dict()）
             
             # 计算profit相关数据
             current_profit = 0
-            total_profit = 0
             prev_bet = 0
             prev_profit = 0
             prev_basepoint = current_balance
@@ -48,9 +48,6 @@ class DataProcessorService:
                 last_spin = spins[-1]
                 current_profit = last_spin.get('profit', 0)
                 
-                # 计算总利润（所有spin的profit总和）
-                total_profit = sum(spin.get('profit', 0) for spin in spins)
-                
                 # 获取连胜/连败streak
                 streak = last_spin.get('streak', 0)
                 
@@ -200,19 +197,4 @@ class DataProcessorService:
         根据货币类型返回标志位
         基于您的bet_dictionary中的货币类型
         """
-        currency_mapping = {
-            'AUD': 0.0,
-            'BRL': 1.0,
-            'CNY': 2.0,
-            'EUR': 3.0,
-            'IDR': 4.0,
-            'INR': 5.0,
-            'JPY': 6.0,
-            'KER': 7.0,
-            'MMK': 8.0,
-            'MYR': 9.0,
-            'THB': 10.0,
-            'USD': 11.0,
-            'VND': 12.0
-        }
-        return currency_mapping.get(currency, 2.0)  # 默认CNY
\ No newline at end of file
+        return get_currency_flag(currency)
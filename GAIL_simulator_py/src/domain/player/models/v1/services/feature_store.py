@@ -0,0 +1,197 @@
+# src/domain/player/models/v1/services/feature_store.py
+import logging
+import numpy as np
+from typing import Dict, Any, Mapping, Optional
+
+
+CURRENCY_FLAGS = {
+    'AUD': 0.0,
+    'BRL': 1.0,
+    'CNY': 2.0,
+    'EUR': 3.0,
+    'IDR': 4.0,
+    'INR': 5.0,
+    'JPY': 6.0,
+    'KER': 7.0,
+    'MMK': 8.0,
+    'MYR': 9.0,
+    'THB': 10.0,
+    'USD': 11.0,
+    'VND': 12.0
+}
+
+
+def get_currency_flag(currency: str) -> float:
+    """根据货币类型返回标志位（默认CNY）"""
+    return CURRENCY_FLAGS.get(currency, 2.0)
+
+
+class SessionFeatureStore:
+    """
+    V1模型输入的增量特征存储
+
+    每个会话一份预分配的float32缓冲区，前12维是投注模型输入，后8维是终止模型输入：
+
+        投注: [balance, profit, streak, slot_type, base_point, delta_t, delta_profit,
+               delta_payout, prev_bet, prev_basepoint, prev_profit, currency_flag]
+        终止: [current_balance, total_profit, current_bet, streak, win_streak,
+               prev_bet, prev_balance, prev_profit]
+
+    每次spin只用最近一次结果做O(1)更新（上一次结果整体移到prev_*），
+    betting_input / termination_input 直接返回缓冲区视图，不再每次从字典重建数组。
+    视图会在下一次sync时被原地改写，需要保留的调用方应自行copy。
+    """
+
+    BETTING_DIM = 12
+    TERMINATION_DIM = 8
+
+    # 缓冲区下标
+    B_BALANCE, B_PROFIT, B_STREAK, B_SLOT_TYPE, B_BASE_POINT, B_DELTA_T, \
+        B_DELTA_PROFIT, B_DELTA_PAYOUT, B_PREV_BET, B_PREV_BASEPOINT, B_PREV_PROFIT, B_CURRENCY = range(12)
+    T_BALANCE, T_TOTAL_PROFIT, T_CURRENT_BET, T_STREAK, T_WIN_STREAK, \
+        T_PREV_BET, T_PREV_BALANCE, T_PREV_PROFIT = range(12, 20)
+
+    DEFAULT_DELTA_T = 2.0
+
+    def __init__(self):
+        """初始化特征存储"""
+        self.logger = logging.getLogger("domain.player.models.v1.feature_store")
+        self._buffer = np.zeros(self.BETTING_DIM + self.TERMINATION_DIM, dtype=np.float32)
+        self._betting_view = self._buffer[:self.BETTING_DIM]
+        self._termination_view = self._buffer[self.BETTING_DIM:]
+
+        self.session_id: Optional[str] = None
+        self.last_spin_number = 0
+        self.initial_balance = 1000.0
+        self._last: Optional[Dict[str, float]] = None
+        self._has_prev = False
+        self.reset()
+
+    def reset(self, session_id: Optional[str] = None, initial_balance: float = 1000.0,
+              currency: str = 'CNY'):
+        """
+        为新会话重置缓冲区
+
+        Args:
+            session_id: 会话ID
+            initial_balance: 初始余额
+            currency: 货币类型
+        """
+        self.session_id = session_id
+        self.last_spin_number = 0
+        self.initial_balance = initial_balance
+        self._last = None
+        self._has_prev = False
+
+        b = self._buffer
+        b[:] = 0.0
+        b[self.B_BALANCE] = initial_balance
+        b[self.B_SLOT_TYPE] = 1.0
+        b[self.B_BASE_POINT] = initial_balance
+        b[self.B_DELTA_T] = self.DEFAULT_DELTA_T
+        b[self.B_PREV_BASEPOINT] = initial_balance
+        b[self.B_CURRENCY] = get_currency_flag(currency)
+        b[self.T_BALANCE] = initial_balance
+        b[self.T_CURRENT_BET] = 1.0
+        b[self.T_PREV_BALANCE] = initial_balance
+
+    def observe_spin(self, spin: Mapping[str, Any]):
+        """
+        用一次新的spin结果更新特征（O(1)）
+
+        Args:
+            spin: SpinResult.to_dict()格式的结果
+        """
+        b = self._buffer
+        bet = float(spin.get('bet', 0.0))
+        profit = float(spin.get('profit', 0.0))
+        payout = float(spin.get('payout', 0.0))
+        streak = float(spin.get('streak', 0))
+
+        # 上一次结果移到prev_*
+        previous = self._last
+        if previous is not None:
+            b[self.B_PREV_BET] = previous['bet']
+            b[self.B_PREV_BASEPOINT] = previous['balance_after']
+            b[self.B_PREV_PROFIT] = previous['profit']
+            b[self.T_PREV_BET] = previous['bet']
+            b[self.T_PREV_BALANCE] = previous['balance_before']
+            b[self.T_PREV_PROFIT] = previous['profit']
+            self._has_prev = True
+
+        b[self.B_PROFIT] = profit
+        b[self.B_STREAK] = streak
+        b[self.B_SLOT_TYPE] = 2.0 if spin.get('in_free_spins', False) else 1.0
+        b[self.B_DELTA_PROFIT] = profit
+        b[self.B_DELTA_PAYOUT] = payout - bet
+        b[self.T_CURRENT_BET] = bet
+        b[self.T_STREAK] = streak
+        b[self.T_WIN_STREAK] = max(streak, 0.0)
+
+        self._last = {
+            'bet': bet,
+            'profit': profit,
+            'balance_before': float(spin.get('balance_before', 0.0)),
+            'balance_after': float(spin.get('balance_after', 0.0))
+        }
+        self.last_spin_number = int(spin.get('spin_number', self.last_spin_number + 1))
+
+    def sync(self, session_data: Dict[str, Any]):
+        """
+        根据会话数据同步特征：会话变化时重置，出现新spin时增量更新
+
+        Args:
+            session_data: GamingSession.get_session_data()返回的会话数据
+        """
+        session_id = session_data.get('session_id')
+        if session_id != self.session_id:
+            self.reset(
+                session_id=session_id,
+                initial_balance=session_data.get('initial_balance', 1000.0),
+                currency=session_data.get('currency', 'CNY')
+            )
+
+        last_spin = session_data.get('last_spin')
+        if last_spin is None:
+            results = session_data.get('results') or []
+            last_spin = results[-1] if results else None
+
+        if last_spin is not None:
+            spin_number = int(last_spin.get('spin_number', 0))
+            if spin_number > self.last_spin_number:
+                # 跳过了中间的spin时，从最近结果中补上前一次
+                results = session_data.get('results') or []
+                if spin_number > self.last_spin_number + 1 and len(results) >= 2:
+                    self._last = None
+                    self.observe_spin(results[-2])
+                self.observe_spin(last_spin)
+
+        b = self._buffer
+        balance = session_data.get('current_balance', 1000.0)
+        b[self.B_BALANCE] = balance
+        b[self.B_BASE_POINT] = balance
+        b[self.B_DELTA_T] = session_data.get('delta_t', self.DEFAULT_DELTA_T)
+        if not self._has_prev:
+            b[self.B_PREV_BASEPOINT] = balance
+        b[self.T_BALANCE] = balance
+        b[self.T_TOTAL_PROFIT] = session_data.get('total_profit', 0.0)
+
+    @property
+    def betting_input(self) -> np.ndarray:
+        """12维投注模型输入（缓冲区视图）"""
+        return self._betting_view
+
+    def termination_input(self, expected_dim: int = 8) -> np.ndarray:
+        """
+        终止模型输入（缓冲区视图）
+
+        Args:
+            expected_dim: 期望的输入维度，不超过8
+
+        Returns:
+            expected_dim维视图
+        """
+        if expected_dim > self.TERMINATION_DIM:
+            raise ValueError(f"expected_dim ({expected_dim}) cannot be greater than 8. "
+                             f"Only 8 features are supported.")
+        return self._termination_view[:expected_dim]
@@ -0,0 +1,272 @@
+# src/domain/player/models/v1/services/inference_broker.py
+import logging
+import queue
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# 批处理函数：输入堆叠后的(n, dim)数组，返回长度为n的结果序列
+BatchHandler = Callable[[np.ndarray], Sequence[Any]]
+
+_STOP = object()
+
+
+class _Request:
+    """队列中的单个推理请求"""
+    __slots__ = ("kind", "observation", "future", "enqueued_at")
+
+    def __init__(self, kind: str, observation: np.ndarray):
+        self.kind = kind
+        self.observation = observation
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceBroker:
+    """
+    微批推理代理
+
+    会话线程提交单个观察向量并等待Future，单个工作线程最多等待max_wait_us微秒
+    或凑满max_batch_size个样本后，按请求类型（bet / termination）各做一次批量前向，
+    再把结果分发回各个Future。所有torch调用都发生在工作线程中，避免几十个会话线程
+    同时争用GIL和torch的intra-op线程池。
+    """
+
+    def __init__(self, name: str, handlers: Dict[str, BatchHandler],
+                 max_batch_size: int = 64, max_wait_us: float = 500.0, timeout: Optional[float] = 30.0):
+        """
+        初始化推理代理并启动工作线程
+
+        Args:
+            name: 代理名称（用于日志和线程名）
+            handlers: 请求类型到批处理函数的映射
+            max_batch_size: 单批最大样本数
+            max_wait_us: 从批内第一个请求入队起的最大等待时间（微秒）
+            timeout: infer()默认的等待上限（秒），None为不限
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size必须为正数: {max_batch_size}")
+
+        self.name = name
+        self.handlers = dict(handlers)
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(float(max_wait_us), 0.0) / 1e6
+        self.timeout = timeout
+        self.logger = logging.getLogger(f"domain.player.models.v1.inference_broker.{name}")
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._reset_metrics()
+
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=f"inference-broker-{name}", daemon=True)
+        self._worker.start()
+        self.logger.info(f"推理代理已启动: max_batch_size={self.max_batch_size}, max_wait_us={max_wait_us}")
+
+    def submit(self, kind: str, observation: np.ndarray) -> Future:
+        """
+        提交一个推理请求
+
+        Args:
+            kind: 请求类型，必须在handlers中注册
+            observation: 一维观察向量
+
+        Returns:
+            完成时返回对应handler结果的Future
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"未注册的推理类型: {kind}")
+        if self._closed:
+            raise RuntimeError(f"推理代理已关闭: {self.name}")
+
+        request = _Request(kind, np.asarray(observation, dtype=np.float32))
+        self._queue.put(request)
+        return request.future
+
+    @property
+    def closed(self) -> bool:
+        """代理是否已关闭"""
+        return self._closed
+
+    def infer(self, kind: str, observation: np.ndarray, timeout: Optional[float] = None) -> Any:
+        """
+        提交请求并阻塞等待结果
+
+        Args:
+            kind: 请求类型
+            observation: 一维观察向量
+            timeout: 等待上限（秒），默认使用构造时的timeout
+
+        Raises:
+            TimeoutError: 超时未返回（请求被取消，工作线程不会再处理它）
+        """
+        future = self.submit(kind, observation)
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._metrics_lock:
+                self._timeouts += 1
+            raise TimeoutError(f"推理代理{self.name}在{timeout}秒内未返回{kind}结果") from None
+
+    def shutdown(self, timeout: Optional[float] = 5.0):
+        """停止工作线程（已入队的请求会先处理完）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join(timeout=timeout)
+        self.logger.info(f"推理代理已关闭: {self.get_metrics()}")
+
+    def _run(self):
+        """工作线程主循环"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = item.enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process_batch(batch)
+
+    def _process_batch(self, batch: List[_Request]):
+        """按类型分组做批量前向并分发结果"""
+        started_at = time.perf_counter()
+
+        groups: Dict[str, List[_Request]] = {}
+        for request in batch:
+            # 已超时取消的请求不再计算
+            if request.future.set_running_or_notify_cancel():
+                groups.setdefault(request.kind, []).append(request)
+
+        for kind, requests in groups.items():
+            try:
+                results = self.handlers[kind](np.stack([r.observation for r in requests]))
+                if len(results) != len(requests):
+                    raise RuntimeError(f"{kind}批处理返回{len(results)}个结果, 期望{len(requests)}")
+            except Exception as e:
+                self.logger.error(f"批量推理失败 ({kind}, batch={len(requests)}): {e}")
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+
+            for request, result in zip(requests, results):
+                request.future.set_result(result)
+
+        self._record_batch(batch, started_at)
+
+    def _reset_metrics(self):
+        self._batches = 0
+        self._requests = 0
+        self._max_batch_size_seen = 0
+        self._batch_size_histogram: Dict[int, int] = {}
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        self._requests_by_kind: Dict[str, int] = {}
+        self._timeouts = 0
+
+    def _record_batch(self, batch: List[_Request], started_at: float):
+        latencies = [started_at - r.enqueued_at for r in batch]
+        with self._metrics_lock:
+            size = len(batch)
+            self._batches += 1
+            self._requests += size
+            self._max_batch_size_seen = max(self._max_batch_size_seen, size)
+            self._batch_size_histogram[size] = self._batch_size_histogram.get(size, 0) + 1
+            self._latency_sum += sum(latencies)
+            self._latency_max = max(self._latency_max, max(latencies))
+            for request in batch:
+                self._requests_by_kind[request.kind] = self._requests_by_kind.get(request.kind, 0) + 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        获取批大小和排队延迟统计
+
+        Returns:
+            包含批次数、请求数、平均/最大批大小、批大小分布、平均/最大排队延迟（微秒）、超时数的字典
+        """
+        with self._metrics_lock:
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "requests_by_kind": dict(self._requests_by_kind),
+                "avg_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch_size_seen,
+                "batch_size_histogram": dict(sorted(self._batch_size_histogram.items())),
+                "avg_queue_latency_us": self._latency_sum / self._requests * 1e6 if self._requests else 0.0,
+                "max_queue_latency_us": self._latency_max * 1e6,
+                "timeouts": self._timeouts,
+                "queue_depth": self._queue.qsize()
+            }
+
+    def reset_metrics(self):
+        """清空统计"""
+        with self._metrics_lock:
+            self._reset_metrics()
+
+
+# 每个聚类一个代理
+_cluster_brokers: Dict[Tuple[int, Optional[str]], InferenceBroker] = {}
+_cluster_brokers_lock = threading.Lock()
+
+
+def get_cluster_broker(cluster_id: int, model_service, max_batch_size: int = 64,
+                       max_wait_us: float = 500.0, timeout: Optional[float] = 30.0) -> InferenceBroker:
+    """
+    获取（必要时创建）某个聚类的共享推理代理
+
+    同一聚类的模型权重相同，代理使用第一个注册的模型服务做批量前向。
+
+    Args:
+        cluster_id: 聚类ID
+        model_service: 提供predict_bet_actions / predict_dqn_batch的V1ModelService
+        max_batch_size: 单批最大样本数
+        max_wait_us: 最大等待时间（微秒）
+        timeout: infer()的等待上限（秒）
+
+    Returns:
+        InferenceBroker实例
+    """
+    key = (cluster_id, getattr(model_service, "model_dir", None))
+    with _cluster_brokers_lock:
+        broker = _cluster_brokers.get(key)
+        if broker is None or broker.closed:
+            handlers = {
+                "bet": lambda batch: model_service.predict_bet_actions(batch, deterministic=True),
+                "termination": lambda batch: list(zip(*model_service.predict_dqn_batch(batch)))
+            }
+            broker = InferenceBroker(f"cluster_{cluster_id}", handlers,
+                                     max_batch_size=max_batch_size, max_wait_us=max_wait_us, timeout=timeout)
+            _cluster_brokers[key] = broker
+        return broker
+
+
+def get_all_broker_metrics() -> Dict[str, Dict[str, Any]]:
+    """获取所有聚类代理的统计"""
+    with _cluster_brokers_lock:
+        return {broker.name: broker.get_metrics() for broker in _cluster_brokers.values()}
+
+
+def shutdown_all_brokers():
+    """关闭所有聚类代理（挂接了已关闭代理的模型服务改回逐条推理）"""
+    with _cluster_brokers_lock:
+        brokers = list(_cluster_brokers.values())
+        _cluster_brokers.clear()
+    for broker in brokers:
+        broker.shutdown()
@@ -0,0 +1,243 @@
+# src/domain/player/models/v1/services/isolation_forest_scorer.py
+import logging
+import pickle
+import numpy as np
+from typing import Dict, Any, Optional
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """
+    iTree中n个样本的平均路径长度 c(n)，与sklearn的_average_path_length一致
+
+    Args:
+        n_samples: 叶子节点的训练样本数
+
+    Returns:
+        与输入同形状的平均路径长度
+    """
+    n = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    mask = n > 2
+    result[mask] = 2.0 * (np.log(n[mask] - 1.0) + np.euler_gamma) - 2.0 * (n[mask] - 1.0) / n[mask]
+    return result
+
+
+class CompiledIsolationForest:
+    """
+    扁平化的Isolation Forest打分器
+
+    将sklearn IsolationForest的所有树拼接成连续的 feature/threshold/left/right/path_length
+    数组，用向量化的逐层遍历代替每棵树一次的tree.apply调用，单行和批量都不经过sklearn分发。
+    叶子节点的左右孩子指向自身、阈值为+inf，因此固定迭代max_depth次即可全部落到叶子。
+    可选地附带StandardScaler的mean/scale数组，输入为未缩放的原始特征。
+    """
+
+    ARRAY_KEYS = ("feature", "threshold", "left", "right", "path_length", "roots")
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, path_length: np.ndarray, roots: np.ndarray,
+                 max_depth: int, offset: float, denominator: float, n_features: int,
+                 scaler_mean: Optional[np.ndarray] = None, scaler_scale: Optional[np.ndarray] = None):
+        """
+        初始化扁平化打分器
+
+        Args:
+            feature: 每个节点的分裂特征（原始特征空间索引），叶子为0
+            threshold: 每个节点的分裂阈值，叶子为+inf
+            left: 左孩子的全局节点索引，叶子指向自身
+            right: 右孩子的全局节点索引，叶子指向自身
+            path_length: 叶子节点的路径长度 depth + c(n_node_samples)
+            roots: 每棵树根节点的全局索引
+            max_depth: 所有树的最大深度
+            offset: sklearn的offset_，decision_function = score_samples - offset
+            denominator: n_estimators * c(max_samples)
+            n_features: 期望的输入特征数
+            scaler_mean: 可选的缩放均值
+            scaler_scale: 可选的缩放尺度
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.path_length = path_length
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.offset = float(offset)
+        self.denominator = float(denominator)
+        self.n_features = int(n_features)
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+
+    @classmethod
+    def from_sklearn(cls, forest, scaler=None) -> 'CompiledIsolationForest':
+        """
+        从已训练的sklearn IsolationForest转换
+
+        Args:
+            forest: sklearn.ensemble.IsolationForest实例
+            scaler: 可选的StandardScaler（TDA scaler）
+
+        Returns:
+            CompiledIsolationForest实例
+
+        Raises:
+            ValueError: scaler不是StandardScaler（调用方应继续使用sklearn打分）
+        """
+        n_features = int(forest.n_features_in_)
+        # 与sklearn一致：只有max_features小于特征总数时才按estimators_features_取子集
+        subsample_features = getattr(forest, "_max_features", n_features) != n_features
+
+        features, thresholds, lefts, rights, path_lengths, roots = [], [], [], [], [], []
+        max_depth = 0
+        node_offset = 0
+
+        for estimator, tree_features in zip(forest.estimators_, forest.estimators_features_):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            children_left = tree.children_left
+            children_right = tree.children_right
+            is_leaf = children_left == -1
+
+            # 计算节点深度（根节点深度为0）
+            depth = np.zeros(n_nodes, dtype=np.int64)
+            stack = [0]
+            while stack:
+                node = stack.pop()
+                if not is_leaf[node]:
+                    depth[children_left[node]] = depth[node] + 1
+                    depth[children_right[node]] = depth[node] + 1
+                    stack.extend((children_left[node], children_right[node]))
+            max_depth = max(max_depth, int(depth.max()))
+
+            local_index = np.arange(n_nodes, dtype=np.int64)
+            node_feature = np.where(is_leaf, 0, tree.feature).astype(np.int64)
+            if subsample_features:
+                node_feature = np.asarray(tree_features, dtype=np.int64)[node_feature]
+
+            features.append(node_feature)
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, local_index, children_left) + node_offset)
+            rights.append(np.where(is_leaf, local_index, children_right) + node_offset)
+            path_lengths.append(np.where(is_leaf, depth + average_path_length(tree.n_node_samples), 0.0))
+            roots.append(node_offset)
+            node_offset += n_nodes
+
+        denominator = len(forest.estimators_) * float(average_path_length(np.array([forest.max_samples_]))[0])
+
+        scaler_mean, scaler_scale = None, None
+        if scaler is not None:
+            from sklearn.preprocessing import StandardScaler
+            if not isinstance(scaler, StandardScaler):
+                raise ValueError(f"只支持StandardScaler，实际为{type(scaler).__name__}")
+            # with_mean=False时mean_仍然存在，但transform不减均值
+            if scaler.with_mean:
+                scaler_mean = np.asarray(scaler.mean_, dtype=np.float64)
+            if scaler.with_std:
+                scaler_scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            path_length=np.concatenate(path_lengths),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            offset=forest.offset_,
+            denominator=denominator,
+            n_features=n_features,
+            scaler_mean=scaler_mean,
+            scaler_scale=scaler_scale
+        )
+
+    @classmethod
+    def from_pickle(cls, path: str) -> 'CompiledIsolationForest':
+        """
+        从termination_25_model_XX_isolation_forest.pkl转换
+
+        Args:
+            path: pickle文件路径（dict格式或直接的IsolationForest）
+
+        Returns:
+            CompiledIsolationForest实例
+        """
+        with open(path, 'rb') as f:
+            model_data = pickle.load(f)
+
+        if isinstance(model_data, dict):
+            forest = model_data['isolation_forest']
+            scaler = model_data.get('scaler') or model_data.get('tda_scaler')
+        else:
+            forest, scaler = model_data, None
+
+        return cls.from_sklearn(forest, scaler)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """导出为扁平数组字典（可直接np.savez保存）"""
+        arrays = {key: getattr(self, key) for key in self.ARRAY_KEYS}
+        arrays["params"] = np.array([self.max_depth, self.offset, self.denominator, self.n_features], dtype=np.float64)
+        if self.scaler_mean is not None:
+            arrays["scaler_mean"] = self.scaler_mean
+        if self.scaler_scale is not None:
+            arrays["scaler_scale"] = self.scaler_scale
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'CompiledIsolationForest':
+        """从to_arrays()导出的数组字典恢复（数组可以是只读的memmap）"""
+        max_depth, offset, denominator, n_features = (float(v) for v in arrays["params"])
+        return cls(
+            **{key: arrays[key] for key in cls.ARRAY_KEYS},
+            max_depth=int(max_depth),
+            offset=offset,
+            denominator=denominator,
+            n_features=int(n_features),
+            scaler_mean=arrays.get("scaler_mean"),
+            scaler_scale=arrays.get("scaler_scale")
+        )
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """应用预计算的StandardScaler变换"""
+        X = np.asarray(X, dtype=np.float64)
+        if self.scaler_mean is not None:
+            X = X - self.scaler_mean
+        if self.scaler_scale is not None:
+            X = X / self.scaler_scale
+        return X
+
+    def score_samples(self, X: np.ndarray, scaled: bool = False) -> np.ndarray:
+        """
+        计算异常分数，等价于IsolationForest.score_samples
+
+        Args:
+            X: 形状为(n_features,)或(n_samples, n_features)的输入
+            scaled: 输入是否已经缩放过（为False时应用附带的scaler）
+
+        Returns:
+            形状为(n_samples,)的分数，越低越异常
+        """
+        X = np.atleast_2d(X)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"特征维度错误: 期望{self.n_features}, 实际{X.shape[1]}")
+
+        if not scaled:
+            X = self.transform(X)
+        # sklearn的树在float32上比较阈值
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+
+        n_samples = X.shape[0]
+        rows = np.arange(n_samples)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_samples, len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        depths = self.path_length[nodes].sum(axis=1)
+        if self.denominator == 0:
+            return -np.ones(n_samples)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X: np.ndarray, scaled: bool = False) -> np.ndarray:
+        """等价于IsolationForest.decision_function：score_samples - offset_"""
+        return self.score_samples(X, scaled=scaled) - self.offset
@@ -0,0 +1,242 @@
+# src/domain/player/models/v1/services/model_artifacts.py
+import hashlib
+import json
+import logging
+import os
+import time
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
+
+from .isolation_forest_scorer import CompiledIsolationForest
+
+
+ARTIFACT_DIR_NAME = "mmap"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+# 数组名前缀
+BETTING_PREFIX = "betting."
+DQN_PREFIX = "dqn."
+FOREST_PREFIX = "forest."
+
+logger = logging.getLogger("domain.player.models.v1.model_artifacts")
+
+
+class ArtifactChecksumError(ValueError):
+    """模型工件校验和不匹配"""
+    pass
+
+
+def default_weights_dir() -> str:
+    """默认的models/v1/weights目录"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "weights")
+
+
+def get_artifact_dir(model_dir: str) -> str:
+    """cluster_N目录下的内存映射工件目录"""
+    return os.path.join(model_dir, ARTIFACT_DIR_NAME)
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    计算文件的sha256
+
+    Args:
+        path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_checkpoints(model_dir: str, cluster_id: int) -> Dict[str, str]:
+    """
+    工件所转换的原始模型文件（存在的投注模型、DQN和Isolation Forest文件）
+
+    Args:
+        model_dir: cluster_N目录
+        cluster_id: 聚类ID
+
+    Returns:
+        文件名到路径的映射
+    """
+    names = (f"betting_cluster_{cluster_id}.pth",
+             f"termination_25_model_{cluster_id:02d}.pth",
+             f"termination_25_model_{cluster_id:02d}_isolation_forest.pkl")
+    return {name: os.path.join(model_dir, name) for name in names if os.path.exists(os.path.join(model_dir, name))}
+
+
+def source_checksums(model_dir: str, cluster_id: int) -> Dict[str, str]:
+    """原始模型文件的sha256（文件名到摘要）"""
+    return {name: file_sha256(path) for name, path in source_checkpoints(model_dir, cluster_id).items()}
+
+
+def check_sources(manifest: Dict[str, Any], model_dir: str, cluster_id: int):
+    """
+    确认工件仍对应目录中的原始模型文件（重新训练后旧工件即失效）
+
+    Raises:
+        ArtifactChecksumError: manifest未记录原始文件，或原始文件已变化
+    """
+    expected = manifest.get("sources")
+    if expected is None:
+        raise ArtifactChecksumError("工件manifest未记录原始模型文件的校验和，请重新转换")
+    actual = source_checksums(model_dir, cluster_id)
+    if actual != expected:
+        changed = sorted(name for name in set(expected) | set(actual) if expected.get(name) != actual.get(name))
+        raise ArtifactChecksumError(f"原始模型文件已变化，工件已过期: {', '.join(changed)}")
+
+
+def write_artifacts(artifact_dir: str, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> str:
+    """
+    把数组逐个写成.npy并生成manifest.json
+
+    Args:
+        artifact_dir: 输出目录
+        arrays: 数组名到数组的映射
+        metadata: 写入manifest的附加信息
+
+    Returns:
+        manifest文件路径
+    """
+    os.makedirs(artifact_dir, exist_ok=True)
+
+    entries = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        file_name = f"{name}.npy"
+        path = os.path.join(artifact_dir, file_name)
+        np.save(path, array, allow_pickle=False)
+        entries[name] = {
+            "file": file_name,
+            "shape": list(array.shape),
+            "dtype": array.dtype.str,
+            "sha256": file_sha256(path)
+        }
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "arrays": entries,
+        **metadata
+    }
+
+    manifest_path = os.path.join(artifact_dir, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest_path
+
+
+def load_artifacts(artifact_dir: str, verify_checksums: bool = True) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    以只读内存映射方式加载工件，所有进程共享同一份页缓存
+
+    Args:
+        artifact_dir: 工件目录
+        verify_checksums: 是否校验每个文件的sha256
+
+    Returns:
+        (manifest, 数组名到只读memmap的映射)
+
+    Raises:
+        FileNotFoundError: manifest或数组文件缺失
+        ArtifactChecksumError: 校验和、形状或类型不匹配
+    """
+    manifest_path = os.path.join(artifact_dir, MANIFEST_FILE)
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"不支持的工件格式版本: {manifest.get('format_version')}")
+
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        path = os.path.join(artifact_dir, entry["file"])
+        if verify_checksums:
+            actual = file_sha256(path)
+            if actual != entry["sha256"]:
+                raise ArtifactChecksumError(f"工件校验和不匹配: {path} (期望{entry['sha256']}, 实际{actual})")
+
+        array = np.load(path, mmap_mode='r', allow_pickle=False)
+        if list(array.shape) != entry["shape"] or array.dtype.str != entry["dtype"]:
+            raise ArtifactChecksumError(
+                f"工件形状或类型不匹配: {path} ({array.shape}/{array.dtype.str}, "
+                f"期望{tuple(entry['shape'])}/{entry['dtype']})"
+            )
+        arrays[name] = array
+
+    return manifest, arrays
+
+
+def split_prefix(arrays: Dict[str, np.ndarray], prefix: str) -> Dict[str, np.ndarray]:
+    """取出某个前缀下的数组并去掉前缀"""
+    return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+
+def export_cluster_artifacts(model_service, output_dir: Optional[str] = None) -> str:
+    """
+    把已加载的V1ModelService模型导出为内存映射工件（一次性转换）
+
+    Args:
+        model_service: 已从.pth/.pkl加载完成的V1ModelService
+        output_dir: 输出目录，默认cluster_N/mmap
+
+    Returns:
+        manifest文件路径
+    """
+    if model_service.ppo_model is None or model_service.dqn_model is None:
+        raise RuntimeError("投注模型和终止模型必须都已加载")
+
+    output_dir = output_dir or get_artifact_dir(model_service.model_dir)
+    arrays: Dict[str, np.ndarray] = {}
+
+    for name, tensor in model_service.ppo_model.policy.state_dict().items():
+        arrays[BETTING_PREFIX + name] = tensor.detach().cpu().numpy()
+    for name, tensor in model_service.dqn_model.state_dict().items():
+        arrays[DQN_PREFIX + name] = tensor.detach().cpu().numpy()
+
+    forest_info = None
+    scorer = model_service.forest_scorer
+    if scorer is None and model_service.isolation_forest is not None:
+        scorer = CompiledIsolationForest.from_sklearn(model_service.isolation_forest, model_service.tda_scaler)
+    if scorer is not None:
+        for name, array in scorer.to_arrays().items():
+            arrays[FOREST_PREFIX + name] = array
+        forest_info = {"n_nodes": int(len(scorer.feature)), "max_depth": scorer.max_depth}
+
+    # policy_kwargs只保留可JSON化的部分（激活函数记录类名）
+    policy_kwargs = {}
+    for key, value in (model_service.ppo_model.policy_kwargs or {}).items():
+        if key == "activation_fn":
+            policy_kwargs[key] = value.__name__
+        elif key == "net_arch":
+            policy_kwargs[key] = value
+        else:
+            logger.warning(f"忽略无法导出的policy_kwargs: {key}")
+
+    first_layer = model_service.dqn_model.network[0]
+    metadata = {
+        "cluster_id": model_service.cluster_id,
+        "sources": source_checksums(model_service.model_dir, model_service.cluster_id),
+        "betting": {
+            "policy": "MlpPolicy",
+            "policy_kwargs": policy_kwargs,
+            "obs_dim": 12,
+            "action_dim": len(model_service.bet_mapping)
+        },
+        "dqn": {"state_dim": int(first_layer.in_features), "hidden_dims": model_service.dqn_hidden_dims},
+        "isolation_forest": forest_info,
+        "model_metadata": model_service.metadata
+    }
+
+    manifest_path = write_artifacts(output_dir, arrays, metadata)
+    logger.info(f"Cluster {model_service.cluster_id} 工件已导出: {manifest_path} ({len(arrays)}个数组)")
+    return manifest_path
@@ -0,0 +1,248 @@
+# src/domain/player/models/v1/services/tda_features.py
+import logging
+import numpy as np
+from typing import List, Optional, Tuple
+
+
+def pairwise_distances(points: np.ndarray) -> np.ndarray:
+    """
+    计算点云的欧氏距离矩阵
+
+    Args:
+        points: 形状为(n_points, n_dims)的点云
+
+    Returns:
+        形状为(n_points, n_points)的对称距离矩阵
+    """
+    diff = points[:, None, :] - points[None, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+
+
+def pca_project(points: np.ndarray, n_components: int) -> np.ndarray:
+    """
+    用小规模SVD做PCA投影（等价于sklearn PCA.fit_transform，仅符号可能不同）
+
+    Args:
+        points: 形状为(n_points, n_dims)的点云
+        n_components: 保留的主成分数
+
+    Returns:
+        形状为(n_points, n_components)的投影
+    """
+    centered = points - points.mean(axis=0)
+    u, s, _ = np.linalg.svd(centered, full_matrices=False)
+    return u[:, :n_components] * s[:n_components]
+
+
+def h0_lifetimes(distances: np.ndarray) -> np.ndarray:
+    """
+    闭式计算H0持久性：Vietoris-Rips的H0条码即最小生成树的边长（去掉无穷条）
+
+    Args:
+        distances: 对称距离矩阵
+
+    Returns:
+        n_points-1个有限条码的寿命（出生均为0）
+    """
+    n_points = distances.shape[0]
+    # Prim算法，n<=5时比排序+并查集更省
+    in_tree = np.zeros(n_points, dtype=bool)
+    in_tree[0] = True
+    best = distances[0].copy()
+    lifetimes = np.empty(n_points - 1)
+    for i in range(n_points - 1):
+        candidates = np.where(in_tree, np.inf, best)
+        node = int(np.argmin(candidates))
+        lifetimes[i] = candidates[node]
+        in_tree[node] = True
+        best = np.minimum(best, distances[node])
+    return lifetimes
+
+
+def h1_intervals(distances: np.ndarray) -> List[Tuple[float, float]]:
+    """
+    在2-骨架上做Z2边界矩阵约简，精确计算H1持久性（适用于极小点云）
+
+    Args:
+        distances: 对称距离矩阵
+
+    Returns:
+        (birth, death)列表，只包含寿命为正的区间
+    """
+    n_points = distances.shape[0]
+    if n_points < 3:
+        return []
+
+    # 边按长度排序，行号即过滤顺序
+    rows, cols = np.triu_indices(n_points, k=1)
+    edge_lengths = distances[rows, cols]
+    edge_order = np.argsort(edge_lengths, kind='stable')
+    edge_rank = {}
+    for rank, e in enumerate(edge_order):
+        edge_rank[(int(rows[e]), int(cols[e]))] = rank
+    sorted_lengths = edge_lengths[edge_order]
+
+    # 三角形按直径（最长边）排序，边界用位集表示
+    triangles = []
+    for a in range(n_points):
+        for b in range(a + 1, n_points):
+            for c in range(b + 1, n_points):
+                faces = (edge_rank[(a, b)], edge_rank[(a, c)], edge_rank[(b, c)])
+                triangles.append((max(faces), (1 << faces[0]) | (1 << faces[1]) | (1 << faces[2])))
+    triangles.sort(key=lambda t: t[0])
+
+    intervals = []
+    pivot_owner = {}
+    for diameter_rank, column in triangles:
+        while column:
+            low = column.bit_length() - 1
+            owner = pivot_owner.get(low)
+            if owner is None:
+                break
+            column ^= owner
+        if not column:
+            continue
+        low = column.bit_length() - 1
+        pivot_owner[low] = column
+        birth = float(sorted_lengths[low])
+        death = float(sorted_lengths[diameter_rank])
+        if death > birth:
+            intervals.append((birth, death))
+    return intervals
+
+
+def persistence_entropy(lifetimes: np.ndarray, nan_fill_value: float = -1.0) -> float:
+    """
+    持久性熵（以2为底），与gtda.diagrams.PersistenceEntropy(normalize=False)一致
+
+    Args:
+        lifetimes: 条码寿命数组
+        nan_fill_value: 没有有效条码时的填充值
+
+    Returns:
+        熵值
+    """
+    lifetimes = np.asarray(lifetimes, dtype=np.float64)
+    lifetimes = lifetimes[lifetimes > 0]
+    total = lifetimes.sum()
+    if lifetimes.size == 0 or total <= 0:
+        return nan_fill_value
+    p = lifetimes / total
+    return float(-np.sum(p * np.log2(p)))
+
+
+class SlidingTDAFeatures:
+    """
+    面向小窗口点云的增量TDA特征
+
+    等价于原来的 PCA(n_components) -> VietorisRipsPersistence([0, 1]) -> PersistenceEntropy 流水线，
+    但不依赖sklearn/giotto-tda：
+    - 窗口点数-1 <= n_components时，中心化后的点云秩不超过n_components，PCA投影是等距的，
+      直接在原空间算距离即可，窗口滑动时只需计算新点到旧点的距离；
+    - 否则用小规模SVD投影后重新计算距离矩阵；
+    - H0由最小生成树边长闭式给出，H1在2-骨架上精确约简。
+    """
+
+    def __init__(self, window_size: int = 5, n_components: int = 4, nan_fill_value: float = -1.0):
+        """
+        初始化增量TDA特征计算器
+
+        Args:
+            window_size: 点云窗口大小
+            n_components: 特征维数超过该值时做PCA降维
+            nan_fill_value: 熵无定义时的填充值（gtda默认-1）
+        """
+        self.window_size = window_size
+        self.n_components = n_components
+        self.nan_fill_value = nan_fill_value
+        self.logger = logging.getLogger("domain.player.models.v1.tda_features")
+
+        self._points: Optional[np.ndarray] = None
+        self._distances = np.zeros((window_size, window_size))
+        self._count = 0
+        self._features: Optional[np.ndarray] = None
+
+    def reset(self):
+        """清空窗口"""
+        self._points = None
+        self._distances[:] = 0.0
+        self._count = 0
+        self._features = None
+
+    def is_ready(self) -> bool:
+        """窗口是否已填满"""
+        return self._count >= self.window_size
+
+    def _pca_is_isometric(self, n_dims: int) -> bool:
+        return n_dims <= self.n_components or self.window_size - 1 <= self.n_components
+
+    def push(self, point: np.ndarray):
+        """
+        追加一个点并更新距离矩阵（只计算新点到窗口内其余点的距离）
+
+        Args:
+            point: 一维状态向量
+        """
+        point = np.asarray(point, dtype=np.float64)
+        if self._points is None:
+            self._points = np.zeros((self.window_size, point.shape[0]))
+
+        if self._count >= self.window_size:
+            # 整体左移一格，丢弃最旧的点
+            self._points[:-1] = self._points[1:]
+            self._distances[:-1, :-1] = self._distances[1:, 1:]
+            slot = self.window_size - 1
+        else:
+            slot = self._count
+
+        self._points[slot] = point
+        if self._pca_is_isometric(point.shape[0]):
+            row = np.sqrt(np.sum((self._points[:slot] - point) ** 2, axis=1))
+            self._distances[slot, :slot] = row
+            self._distances[:slot, slot] = row
+            self._distances[slot, slot] = 0.0
+
+        self._count = min(self._count + 1, self.window_size)
+        self._features = None
+
+    def features(self) -> np.ndarray:
+        """
+        当前窗口的 [H0熵, H1熵]，窗口未满时抛出异常
+
+        Returns:
+            形状为(2,)的特征数组
+        """
+        if not self.is_ready():
+            raise ValueError(f"窗口未满: {self._count}/{self.window_size}")
+
+        if self._features is None:
+            if self._pca_is_isometric(self._points.shape[1]):
+                distances = self._distances
+            else:
+                distances = pairwise_distances(pca_project(self._points, self.n_components))
+            self._features = self._entropy_from_distances(distances)
+        return self._features
+
+    def compute(self, window_obs: np.ndarray) -> np.ndarray:
+        """
+        无状态地计算一个完整窗口的特征
+
+        Args:
+            window_obs: 形状为(n_points, n_features)的窗口
+
+        Returns:
+            形状为(2,)的特征数组
+        """
+        window_obs = np.asarray(window_obs, dtype=np.float64)
+        n_points, n_dims = window_obs.shape
+        if n_dims > self.n_components and n_points - 1 > self.n_components:
+            window_obs = pca_project(window_obs, self.n_components)
+        return self._entropy_from_distances(pairwise_distances(window_obs))
+
+    def _entropy_from_distances(self, distances: np.ndarray) -> np.ndarray:
+        h0 = h0_lifetimes(distances)
+        h1 = [death - birth for birth, death in h1_intervals(distances)]
+        return np.array([
+            persistence_entropy(h0, self.nan_fill_value),
+            persistence_entropy(h1, self.nan_fill_value)
+        ])
@@ -5,13 +5,23 @@ import torch
 import torch.nn as nn
 import pickle
 import os
+import io
+import zipfile
 import json
-from typing import Dict, Any, Optional, Tuple
+import warnings
+from typing import Dict, Any, List, Optional, Tuple
 from collections import deque
 from stable_baselines3 import PPO
 import gymnasium as gym
 from gymnasium import spaces
 
+from .isolation_forest_scorer import CompiledIsolationForest
+from .tda_features import SlidingTDAFeatures
+from .model_artifacts import (
+    get_artifact_dir, load_artifacts, check_sources, split_prefix, MANIFEST_FILE,
+    BETTING_PREFIX, DQN_PREFIX, FOREST_PREFIX
+)
+
 
 class BasicDQN(nn.Module):
     """DQN网络定义"""
@@ -58,15 +68,20 @@ class V1ModelService:
     统一的V1模型服务，管理投注和终止决策模型
     """
     
-    def __init__(self, cluster_id: int, base_model_dir: str = None):
+    def __init__(self, cluster_id: int, base_model_dir: str = None,
+                 use_artifacts: bool = True, verify_checksums: bool = True):
         """
         初始化V1模型服务
         
         Args:
             cluster_id: 玩家聚类ID (0, 1, 2)
             base_model_dir: 模型基础目录，默认自动推断
+            use_artifacts: 存在cluster_N/mmap/manifest.json时优先用内存映射工件加载
+            verify_checksums: 加载工件时是否校验sha256
         """
         self.cluster_id = cluster_id
+        self.use_artifacts = use_artifacts
+        self.verify_checksums = verify_checksums
         self.logger = logging.getLogger(f"domain.player.models.v1.cluster_{cluster_id}")
         
         # 推断模型目录
@@ -85,12 +100,22 @@ class V1ModelService:
         
         # 终止模型组件
         self.dqn_model = None
+        self.dqn_hidden_dims = None
         self.isolation_forest = None
         self.tda_scaler = None
+        self.forest_scorer = None
         self.normalization_scaler = None
         
+        # 模型来源："artifacts"（内存映射）或 "checkpoints"（.pth/.pkl）
+        self.model_source = None
+        
         # 滑动窗口用于异常检测
         self.sliding_window = deque(maxlen=10)
+        # 增量TDA特征（窗口滑动时复用距离矩阵）
+        self.tda_features = SlidingTDAFeatures(window_size=5, n_components=4)
+        
+        # 可选的微批推理代理（多个会话线程共享）
+        self.inference_broker = None
         
         # 模型元数据
         self.metadata = {}
@@ -126,11 +151,24 @@ class V1ModelService:
         # 加载元数据
         self._load_metadata()
         
+        # 优先使用内存映射工件（多进程共享同一份物理内存）
+        artifact_dir = get_artifact_dir(self.model_dir)
+        if self.use_artifacts and os.path.exists(os.path.join(artifact_dir, MANIFEST_FILE)):
+            try:
+                self._initialize_from_artifacts(artifact_dir)
+                self.model_source = "artifacts"
+                self.logger.info(f"Cluster {self.cluster_id} 模型初始化完成 (内存映射工件)")
+                return
+            except Exception as e:
+                self.logger.warning(f"内存映射工件加载失败，改用原始模型文件: {e}")
+                self.ppo_model = self.policy = self.dqn_model = self.forest_scorer = None
+        
         # 初始化投注模型
         self._initialize_betting_model()
         
         # 初始化终止模型
         self._initialize_termination_model()
+        self.model_source = "checkpoints"
         
         self.logger.info(f"Cluster {self.cluster_id} 模型初始化完成")
     
@@ -179,11 +217,38 @@ class V1ModelService:
                 
             except Exception as e1:
                 self.logger.debug(f"SB3格式加载失败: {e1}")
+                
+                # GAIL训练产出的打包格式：外层zip中的ppo_agent.zip才是SB3模型
+                try:
+                    self.ppo_model = self._load_gail_bundle(betting_model_path, dummy_env)
+                    self.policy = self.ppo_model.policy
+                    self.policy.eval()
+                    self.logger.info(f"投注模型加载成功 (GAIL打包格式): {betting_model_path}")
+                except Exception as e2:
+                    self.logger.warning(f"投注模型加载失败，使用随机初始化的策略: {e2}")
             
         except Exception as e:
             self.logger.error(f"投注模型初始化失败: {e}")
             raise
     
+    def _load_gail_bundle(self, bundle_path: str, env: gym.Env) -> PPO:
+        """
+        从GAIL打包文件中加载PPO模型
+        
+        Args:
+            bundle_path: 包含ppo_agent.zip的外层zip文件
+            env: 用于恢复观察/动作空间的虚拟环境
+            
+        Returns:
+            加载好的PPO模型
+        """
+        with zipfile.ZipFile(bundle_path) as bundle:
+            agent_bytes = bundle.read("ppo_agent.zip")
+        
+        # 推理不需要训练调度函数，避免跨Python版本反序列化lambda
+        custom_objects = {"learning_rate": 0.0, "lr_schedule": lambda _: 0.0, "clip_range": lambda _: 0.0}
+        return PPO.load(io.BytesIO(agent_bytes), env=env, device=self.device, custom_objects=custom_objects)
+    
     def _initialize_termination_model(self):
         """初始化终止模型"""
         try:
@@ -212,6 +277,7 @@ class V1ModelService:
                     self.logger.warning(f"推断的输入维度({state_dim})与期望的8不匹配，使用推断值")
                 
                 # 创建匹配的网络
+                self.dqn_hidden_dims = hidden_dims
                 self.dqn_model = BasicDQN(state_dim=state_dim, hidden_dims=hidden_dims).to(self.device)
                 self.dqn_model.load_state_dict(state_dict)
                 self.dqn_model.eval()
@@ -233,6 +299,14 @@ class V1ModelService:
                     self.isolation_forest = model_data
                 
                 self.logger.info(f"Isolation Forest加载成功: {if_path}")
+                
+                # 转换为扁平数组打分器，避免每次spin调用sklearn
+                try:
+                    self.forest_scorer = CompiledIsolationForest.from_sklearn(self.isolation_forest, self.tda_scaler)
+                    self.logger.debug(f"Isolation Forest已编译: {len(self.forest_scorer.feature)}个节点, 最大深度{self.forest_scorer.max_depth}")
+                except Exception as e:
+                    self.logger.warning(f"Isolation Forest编译失败，使用sklearn打分: {e}")
+                    self.forest_scorer = None
             else:
                 self.logger.warning(f"Isolation Forest文件不存在: {if_path}")
                 
@@ -240,6 +314,72 @@ class V1ModelService:
             self.logger.error(f"终止模型初始化失败: {e}")
             raise
     
+    def _initialize_from_artifacts(self, artifact_dir: str):
+        """
+        从内存映射工件初始化所有模型
+        
+        Args:
+            artifact_dir: 包含manifest.json和.npy文件的目录
+        """
+        manifest, arrays = load_artifacts(artifact_dir, verify_checksums=self.verify_checksums)
+        check_sources(manifest, self.model_dir, self.cluster_id)
+        
+        # 投注模型：按导出时的MlpPolicy结构创建后绑定参数
+        betting_info = manifest["betting"]
+        policy_kwargs = dict(betting_info.get("policy_kwargs") or {})
+        if "activation_fn" in policy_kwargs:
+            policy_kwargs["activation_fn"] = getattr(nn, policy_kwargs["activation_fn"])
+        self.ppo_model = PPO("MlpPolicy", DummyBettingEnv(), verbose=0, device=self.device, policy_kwargs=policy_kwargs)
+        self.policy = self.ppo_model.policy
+        self._bind_parameters(self.policy, split_prefix(arrays, BETTING_PREFIX))
+        self.policy.eval()
+        
+        # 终止模型
+        dqn_info = manifest["dqn"]
+        self.dqn_hidden_dims = list(dqn_info["hidden_dims"])
+        self.dqn_model = BasicDQN(state_dim=dqn_info["state_dim"], hidden_dims=self.dqn_hidden_dims).to(self.device)
+        self._bind_parameters(self.dqn_model, split_prefix(arrays, DQN_PREFIX))
+        self.dqn_model.eval()
+        
+        # Isolation Forest（只保留扁平数组打分器）
+        forest_arrays = split_prefix(arrays, FOREST_PREFIX)
+        if forest_arrays:
+            self.forest_scorer = CompiledIsolationForest.from_arrays(forest_arrays)
+        
+        if not self.metadata:
+            self.metadata = manifest.get("model_metadata", {})
+        
+        self.logger.info(f"从内存映射工件加载模型: {artifact_dir} ({len(arrays)}个数组)")
+    
+    def _bind_parameters(self, module: nn.Module, arrays: Dict[str, np.ndarray]):
+        """
+        把模块参数直接绑定到只读memmap上（CPU下不复制，页缓存跨进程共享）
+        
+        Args:
+            module: torch模块
+            arrays: 参数名到数组的映射，需与state_dict完全一致
+        """
+        state_dict = module.state_dict()
+        if set(state_dict) != set(arrays):
+            raise ValueError(f"工件参数与模型结构不匹配: {sorted(set(state_dict) ^ set(arrays))}")
+        for name, tensor in state_dict.items():
+            if tuple(tensor.shape) != arrays[name].shape:
+                raise ValueError(f"参数{name}形状不匹配: {tuple(tensor.shape)} vs {arrays[name].shape}")
+        
+        if self.device.type != "cpu":
+            module.load_state_dict({name: torch.from_numpy(np.array(a)) for name, a in arrays.items()})
+            return
+        
+        with warnings.catch_warnings():
+            # memmap是只读的，推理时不会写参数
+            warnings.simplefilter("ignore", UserWarning)
+            parameters = dict(module.named_parameters())
+            for name, array in arrays.items():
+                if name in parameters:
+                    parameters[name].data = torch.from_numpy(array)
+                else:
+                    state_dict[name].copy_(torch.from_numpy(np.array(array)))
+    
     def _infer_network_structure(self, state_dict: dict) -> tuple:
         """
         从state_dict推断网络的完整结构
@@ -294,8 +434,11 @@ class V1ModelService:
             raise ValueError(f"观察向量维度错误: 期望12, 实际{observation.shape}")
         
         self.logger.debug(f"投注预测输入: {observation}")
-        # 预测动作
-        action, _ = self.ppo_model.predict(observation, deterministic=deterministic)
+        # 预测动作（确定性策略可以走微批代理）
+        if self._broker_active() and deterministic:
+            action = self.inference_broker.infer("bet", observation)
+        else:
+            action, _ = self.ppo_model.predict(observation, deterministic=deterministic)
         
         # 映射为投注额
         bet_amount = self.bet_mapping.get(int(action), 1.0)
@@ -319,13 +462,15 @@ class V1ModelService:
         
         # 添加到滑动窗口
         self.sliding_window.append(state_vector.copy())
+        self.tda_features.push(state_vector)
         
         self.logger.debug(f"终止模型预测数据: {state_vector}")
         # DQN预测
         dqn_action, dqn_confidence = self._predict_dqn(state_vector)
         
         # 如果有Isolation Forest且启用集成方法
-        if use_ensemble and self.isolation_forest is not None and len(self.sliding_window) >= 5:
+        has_forest = self.forest_scorer is not None or self.isolation_forest is not None
+        if use_ensemble and has_forest and len(self.sliding_window) >= 5:
             final_action = self._ensemble_predict(dqn_action, dqn_confidence)
             self.logger.debug(f"终止模型预测结果: {final_action}")
             return final_action == 0
@@ -335,17 +480,60 @@ class V1ModelService:
     
     def _predict_dqn(self, state_vector: np.ndarray) -> Tuple[int, float]:
         """DQN预测"""
+        if self._broker_active():
+            return self.inference_broker.infer("termination", state_vector)
+        
+        actions, confidences = self.predict_dqn_batch(np.asarray(state_vector).reshape(1, -1))
+        return actions[0], confidences[0]
+    
+    def predict_dqn_batch(self, states: np.ndarray) -> Tuple[List[int], List[float]]:
+        """
+        批量DQN预测
+        
+        Args:
+            states: 形状为(n, state_dim)的状态矩阵
+            
+        Returns:
+            (动作列表, 置信度列表)
+        """
         self.dqn_model.eval()
         with torch.no_grad():
-            state_tensor = torch.FloatTensor(state_vector).unsqueeze(0).to(self.device)
+            state_tensor = torch.as_tensor(states, dtype=torch.float32).to(self.device)
             q_values = self.dqn_model(state_tensor)
             
             # 获取动作和置信度
             probabilities = torch.softmax(q_values, dim=1)
-            action = torch.argmax(q_values, dim=1).item()
-            confidence = torch.max(probabilities, dim=1)[0].item()
+            actions = torch.argmax(q_values, dim=1).tolist()
+            confidences = torch.max(probabilities, dim=1)[0].tolist()
             
-            return action, confidence
+            return actions, confidences
+    
+    def predict_bet_actions(self, observations: np.ndarray, deterministic: bool = True) -> List[int]:
+        """
+        批量预测投注动作（不做投注额映射）
+        
+        Args:
+            observations: 形状为(n, 12)的观察矩阵
+            deterministic: 是否使用确定性策略
+            
+        Returns:
+            动作编号列表
+        """
+        actions, _ = self.ppo_model.predict(observations, deterministic=deterministic)
+        return [int(a) for a in np.asarray(actions).reshape(-1)]
+    
+    def attach_inference_broker(self, broker):
+        """
+        挂接微批推理代理，之后的投注和DQN前向都经由代理批量执行
+        
+        Args:
+            broker: InferenceBroker实例，传None则恢复逐条推理
+        """
+        self.inference_broker = broker
+
+    def _broker_active(self) -> bool:
+        """挂接的代理是否可用（模拟结束时代理会被关闭，之后逐条推理）"""
+        return self.inference_broker is not None and not self.inference_broker.closed
     
     def _ensemble_predict(self, dqn_action: int, dqn_confidence: float) -> int:
         """集成预测（DQN + Isolation Forest）"""
@@ -354,25 +542,29 @@ class V1ModelService:
             if len(self.sliding_window) < 5:
                 return dqn_action
             
-            window_obs = np.array(list(self.sliding_window)[-5:])
-            
-            # 计算TDA特征
-            tda_features = self._compute_tda_features(window_obs)
+            # 计算TDA特征（增量版本，复用窗口内已算好的距离）
+            try:
+                tda_features = self.tda_features.features()
+            except Exception as e:
+                self.logger.warning(f"TDA特征计算失败: {e}")
+                tda_features = np.zeros(2)
             
             # 获取当前状态
-            current_state = window_obs[-1]
+            current_state = self.sliding_window[-1]
             
             # 组合特征
             combined_features = np.concatenate([current_state, tda_features])
             
-            # 使用TDA scaler缩放
-            if self.tda_scaler is not None:
-                combined_scaled = self.tda_scaler.transform(combined_features.reshape(1, -1))
+            # 获取异常分数（编译后的打分器内含TDA scaler变换）
+            if self.forest_scorer is not None:
+                isolation_score = self.forest_scorer.decision_function(combined_features)[0]
             else:
-                combined_scaled = combined_features.reshape(1, -1)
-            
-            # 获取异常分数
-            isolation_score = self.isolation_forest.decision_function(combined_scaled)[0]
+                # 使用TDA scaler缩放
+                if self.tda_scaler is not None:
+                    combined_scaled = self.tda_scaler.transform(combined_features.reshape(1, -1))
+                else:
+                    combined_scaled = combined_features.reshape(1, -1)
+                isolation_score = self.isolation_forest.decision_function(combined_scaled)[0]
             
             # 集成决策逻辑
             if dqn_action == 0:  # DQN预测终止
@@ -388,32 +580,9 @@ class V1ModelService:
             return dqn_action
     
     def _compute_tda_features(self, window_obs: np.ndarray) -> np.ndarray:
-        """计算TDA特征（简化版本）"""
+        """计算TDA特征（无状态版本，结果与PCA + VietorisRipsPersistence + PersistenceEntropy一致）"""
         try:
-            from sklearn.decomposition import PCA
-            from gtda.homology import VietorisRipsPersistence
-            from gtda.diagrams import PersistenceEntropy
-            
-            window_size, n_features = window_obs.shape
-            
-            # 如果特征太多，使用PCA降维
-            if n_features > 4:
-                pca = PCA(n_components=4)
-                window_obs = pca.fit_transform(window_obs)
-            
-            # 重塑为点云格式
-            point_cloud = window_obs.reshape(1, window_size, -1)
-            
-            # 计算Vietoris-Rips持久性
-            VR = VietorisRipsPersistence(homology_dimensions=[0, 1], collapse_edges=True, n_jobs=1)
-            barcodes = VR.fit_transform(point_cloud)
-            
-            # 计算持久性熵
-            PE = PersistenceEntropy()
-            entropy = PE.fit_transform(barcodes)[0]  # Shape: (2,) for H0 and H1
-            
-            return entropy
-            
+            return self.tda_features.compute(window_obs)
         except Exception as e:
             self.logger.warning(f"TDA特征计算失败: {e}")
             return np.zeros(2)
@@ -421,6 +590,7 @@ class V1ModelService:
     def reset_session(self):
         """重置会话状态"""
         self.sliding_window.clear()
+        self.tda_features.reset()
     
     def get_model_info(self) -> Dict[str, Any]:
         """获取模型信息"""
@@ -429,7 +599,9 @@ class V1ModelService:
             'device': str(self.device),
             'betting_model_loaded': self.ppo_model is not None,
             'termination_dqn_loaded': self.dqn_model is not None,
-            'isolation_forest_loaded': self.isolation_forest is not None,
+            'isolation_forest_loaded': self.isolation_forest is not None or self.forest_scorer is not None,
+            'isolation_forest_compiled': self.forest_scorer is not None,
             'tda_scaler_loaded': self.tda_scaler is not None,
+            'model_source': self.model_source,
             'metadata': self.metadata
         }
\ No newline at end of file
@@ -0,0 +1,215 @@
+# src/domain/session/entities/distribution_stats.py
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, Tuple
+
+from .incremental_stats import IncrementalStats
+from .quantile_sketch import KLLSketch, LogHistogram
+from .session_stats import SessionStats
+
+
+# 逐spin指标：由各会话SessionStats中的累加器合并而来
+SPIN_METRICS = ("bet", "payout", "profit")
+
+# 会话级指标：每个会话贡献一个观测值
+SESSION_METRICS = ("rtp", "session_length", "duration", "final_balance", "net_result")
+
+# 会话级分位数指标：每个指标一个KLL草图和一个对数直方图
+QUANTILE_METRICS = ("session_length", "final_balance", "max_drawdown", "max_win_multiplier")
+
+# 逐spin对数直方图：由各会话SessionStats中的直方图合并而来
+SPIN_HISTOGRAMS = ("win_multiplier",)
+
+
+def _empty_metrics(names) -> Dict[str, IncrementalStats]:
+    return {name: IncrementalStats() for name in names}
+
+
+def _empty_sketches() -> Dict[str, KLLSketch]:
+    return {name: KLLSketch() for name in QUANTILE_METRICS}
+
+
+def _empty_histograms() -> Dict[str, LogHistogram]:
+    return {name: LogHistogram() for name in QUANTILE_METRICS + SPIN_HISTOGRAMS}
+
+
+@dataclass
+class DistributionGroup:
+    """
+    一组会话（一个player-machine对、一台机器或全部）的可合并分布统计。
+
+    只保存计数、总和、Welford矩、KLL分位数草图和对数直方图，不保留会话行；
+    两个组可以任意顺序合并，矩和直方图与把所有会话加入同一个组完全相同，
+    分位数草图保持相同的误差保证。
+    """
+    sessions: int = 0
+    total_spins: int = 0
+    total_bet: float = 0.0
+    total_win: float = 0.0
+    spin: Dict[str, IncrementalStats] = field(default_factory=lambda: _empty_metrics(SPIN_METRICS))
+    session: Dict[str, IncrementalStats] = field(default_factory=lambda: _empty_metrics(SESSION_METRICS))
+    sketches: Dict[str, KLLSketch] = field(default_factory=_empty_sketches)
+    histograms: Dict[str, LogHistogram] = field(default_factory=_empty_histograms)
+
+    def add_session(self, stats: SessionStats) -> None:
+        """
+        加入一个已结束会话的统计
+
+        Args:
+            stats: 会话的SessionStats
+        """
+        self.sessions += 1
+        self.total_spins += stats.total_spins
+        self.total_bet += stats.total_bet
+        self.total_win += stats.total_win
+
+        for name in SPIN_METRICS:
+            self.spin[name] = self.spin[name].merge(getattr(stats, f"{name}_stats"))
+
+        initial_balance = stats.initial_balance or 0.0
+        if stats.total_bet > 0:
+            self.session["rtp"].update(stats.total_win / stats.total_bet)
+        self.session["session_length"].update(stats.total_spins)
+        self.session["duration"].update(stats.duration)
+        self.session["final_balance"].update(stats.final_balance)
+        self.session["net_result"].update(stats.final_balance - initial_balance)
+
+        outcomes = {
+            "session_length": stats.total_spins,
+            "final_balance": stats.final_balance,
+            "max_drawdown": stats.max_drawdown,
+            "max_win_multiplier": stats.max_win_multiplier
+        }
+        for name, value in outcomes.items():
+            self.sketches[name].update(value)
+            self.histograms[name].update(value)
+        self.histograms["win_multiplier"] = self.histograms["win_multiplier"].merge(stats.win_multiplier_hist)
+
+    def merge(self, other: 'DistributionGroup') -> 'DistributionGroup':
+        """
+        合并两个组
+
+        Returns:
+            新的DistributionGroup（不修改任何一方）
+        """
+        return DistributionGroup(
+            sessions=self.sessions + other.sessions,
+            total_spins=self.total_spins + other.total_spins,
+            total_bet=self.total_bet + other.total_bet,
+            total_win=self.total_win + other.total_win,
+            spin={name: self.spin[name].merge(other.spin[name]) for name in SPIN_METRICS},
+            session={name: self.session[name].merge(other.session[name]) for name in SESSION_METRICS},
+            sketches={name: self.sketches[name].merge(other.sketches[name]) for name in QUANTILE_METRICS},
+            histograms={name: self.histograms[name].merge(other.histograms[name]) for name in self.histograms}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "sessions": self.sessions,
+            "total_spins": self.total_spins,
+            "total_bet": self.total_bet,
+            "total_win": self.total_win,
+            "rtp": self.total_win / self.total_bet if self.total_bet > 0 else 0.0,
+            "spin": {name: stats.to_dict() for name, stats in self.spin.items()},
+            "session": {name: stats.to_dict() for name, stats in self.session.items()},
+            "quantiles": {name: sketch.quantiles() for name, sketch in self.sketches.items()},
+            "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()}
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """可JSON序列化的完整状态（用于跨进程/分片合并）"""
+        return {
+            "sessions": self.sessions,
+            "total_spins": self.total_spins,
+            "total_bet": self.total_bet,
+            "total_win": self.total_win,
+            "spin": {name: asdict(stats) for name, stats in self.spin.items()},
+            "session": {name: asdict(stats) for name, stats in self.session.items()},
+            "sketches": {name: sketch.to_state() for name, sketch in self.sketches.items()},
+            "histograms": {name: histogram.to_state() for name, histogram in self.histograms.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'DistributionGroup':
+        """由to_state()的结果恢复"""
+        group = cls(
+            sessions=state["sessions"],
+            total_spins=state["total_spins"],
+            total_bet=state["total_bet"],
+            total_win=state["total_win"],
+            spin={name: IncrementalStats(**values) for name, values in state["spin"].items()},
+            session={name: IncrementalStats(**values) for name, values in state["session"].items()}
+        )
+        group.sketches.update({name: KLLSketch.from_state(values) for name, values in state["sketches"].items()})
+        group.histograms.update({name: LogHistogram.from_state(values)
+                                 for name, values in state["histograms"].items()})
+        return group
+
+
+class DistributionAggregator:
+    """
+    按player-machine对累积会话分布统计。
+
+    每个工作线程持有自己的实例（无锁），模拟结束时用merge()合并；
+    机器级和全局统计由对级组合并得到，不需要重复累积。
+    """
+
+    def __init__(self):
+        self.pairs: Dict[Tuple[str, str], DistributionGroup] = {}
+
+    def add_session(self, stats: SessionStats) -> None:
+        """加入一个已结束会话的统计"""
+        key = (stats.player_id, stats.machine_id)
+        group = self.pairs.get(key)
+        if group is None:
+            group = self.pairs[key] = DistributionGroup()
+        group.add_session(stats)
+
+    def merge(self, other: 'DistributionAggregator') -> 'DistributionAggregator':
+        """
+        合并另一个聚合器
+
+        Returns:
+            新的DistributionAggregator
+        """
+        result = DistributionAggregator()
+        for key in set(self.pairs) | set(other.pairs):
+            result.pairs[key] = self.pairs.get(key, DistributionGroup()).merge(
+                other.pairs.get(key, DistributionGroup()))
+        return result
+
+    def machine_groups(self) -> Dict[str, DistributionGroup]:
+        """按机器合并各对的统计"""
+        machines: Dict[str, DistributionGroup] = {}
+        for (_, machine_id), group in sorted(self.pairs.items()):
+            machines[machine_id] = machines.get(machine_id, DistributionGroup()).merge(group)
+        return machines
+
+    def overall(self) -> DistributionGroup:
+        """全部会话的统计"""
+        result = DistributionGroup()
+        for _, group in sorted(self.pairs.items()):
+            result = result.merge(group)
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（overall / machines / pairs）"""
+        return {
+            "overall": self.overall().to_dict(),
+            "machines": {machine_id: group.to_dict() for machine_id, group in self.machine_groups().items()},
+            "pairs": {f"{player_id}_{machine_id}": group.to_dict()
+                      for (player_id, machine_id), group in sorted(self.pairs.items())}
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """可JSON序列化的完整状态，分片各自保存后可用from_state()恢复并merge()"""
+        return {"pairs": [{"player_id": player_id, "machine_id": machine_id, "group": group.to_state()}
+                          for (player_id, machine_id), group in sorted(self.pairs.items())]}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'DistributionAggregator':
+        """由to_state()的结果恢复"""
+        aggregator = cls()
+        for pair in state.get("pairs", []):
+            aggregator.pairs[(pair["player_id"], pair["machine_id"])] = DistributionGroup.from_state(pair["group"])
+        return aggregator
@@ -51,6 +51,10 @@ class GamingSession:
         if output_manager:
             self.should_record_spins = output_manager.should_record_spins
         
+        # 回放记录：只保存每次spin的实际投注，配合机器RNG种子即可重建全部spin
+        self.should_record_bets = bool(getattr(output_manager, "should_record_bets", False))
+        self.bets = []
+        
         # 初始化统计对象（使用session管理的initial_balance）
         self.stats = SessionStats(
             session_id=session_id,
@@ -60,6 +64,8 @@ class GamingSession:
         
         # Tracking data - 简化为普通list
         self.spins = []
+        # 最近一次spin（不受should_record_spins影响，供streak和模型特征增量更新）
+        self.last_spin = None
         
         # 当前状态
         self.in_free_spins = False
@@ -138,7 +144,8 @@ class GamingSession:
             "currency": self.player.currency,
             "in_free_spins": self.in_free_spins,
             "free_spins_remaining": self.free_spins_remaining,
-            "bonus_triggered": self.stats.bonus_triggered
+            "bonus_triggered": self.stats.bonus_triggered,
+            "last_spin": self.last_spin
         }
         
         # 添加最近的旋转结果 - 转换为字典格式
@@ -239,6 +246,9 @@ class GamingSession:
             # 免费旋转使用基础投注金额
             bet_amount = self.free_spins_base_bet
 
+        if self.should_record_bets:
+            self.bets.append(bet_amount)
+        
         # 执行机器旋转
         result_grid, trigger_free, free_remaining = self.machine.spin(
             in_free=self.in_free_spins,
@@ -274,11 +284,11 @@ class GamingSession:
         is_big_win = win_odds >= self.BIG_WIN_THRESHOLD
         
         streak = 0
-        if len(self.spins) > 0:
-            prev_win = self.spins[-1].get('payout', 0) > 0
+        if self.last_spin is not None:
+            prev_win = self.last_spin.get('payout', 0) > 0
             curr_win = win_amount > 0
             if curr_win == prev_win:
-                streak = self.spins[-1].get('streak', 0)
+                streak = self.last_spin.get('streak', 0)
                 streak = streak + 1 if curr_win else streak - 1
             else:
                 streak = 1 if curr_win else -1
@@ -318,9 +328,12 @@ class GamingSession:
             big_win=is_big_win
         )
         
+        spin_dict = spin_result.to_dict()
+        self.last_spin = spin_dict
+        
         # 记录spin（如果需要）
         if self.should_record_spins:
-            result_dict = spin_result.to_dict()
+            result_dict = dict(spin_dict)
             # result_dict["win_data"] = win_data
             result_dict["session_index"] = (lambda x: x.split("_")[-1] if "_" in x else x)(self.id)
             result_dict["player_id"] = self.player.id
@@ -330,7 +343,7 @@ class GamingSession:
         # 统一使用update_spin方法更新所有统计
         self.stats.update_spin(spin_result)
         
-        return spin_result.to_dict()
+        return spin_dict
 
     def reset(self):
         """重置会话状态以进行新的模拟运行"""
@@ -346,6 +359,8 @@ class GamingSession:
         
         # 清空记录
         self.spins.clear()
+        self.bets.clear()
+        self.last_spin = None
         
         # 重置游戏状态
         self.in_free_spins = False
@@ -1,5 +1,5 @@
 # src/domain/session/entities/incremental_stats.py
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 import math
 from typing import Dict, List, Any, Optional, Tuple
 
@@ -167,11 +167,13 @@ class IncrementalStats:
     def merge(self, other: 'IncrementalStats') -> 'IncrementalStats':
         """
         合并两个增量统计对象
+
+        始终返回新对象，不修改也不共享任何一方，便于在多个聚合层级间复用。
         """
         if other.count == 0:
-            return self
+            return replace(self)
         if self.count == 0:
-            return other
+            return replace(other)
             
         result = IncrementalStats()
         
@@ -179,8 +181,9 @@ class IncrementalStats:
         result.count = self.count + other.count
         
         # 合并最小最大值
-        result.min_value = min(self.min_value, other.min_value) if self.min_value is not None and other.min_value is not None else (self.min_value or other.min_value)
-        result.max_value = max(self.max_value, other.max_value) if self.max_value is not None and other.max_value is not None else (self.max_value or other.max_value)
+        # 两侧count均大于0，极值一定存在（不能用or，0.0是合法值）
+        result.min_value = min(self.min_value, other.min_value)
+        result.max_value = max(self.max_value, other.max_value)
         
         # 合并总和
         result.sum_values = self.sum_values + other.sum_values
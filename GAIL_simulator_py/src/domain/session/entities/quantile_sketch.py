@@ -0,0 +1,284 @@
+# src/domain/session/entities/quantile_sketch.py
+import math
+import random
+from typing import Dict, List, Any, Optional, Sequence
+
+
+DEFAULT_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def _quantile_key(q: float) -> str:
+    """0.01 -> "p1", 0.5 -> "p50", 0.999 -> "p99.9" """
+    return f"p{q * 100:g}"
+
+
+class KLLSketch:
+    """
+    KLL流式分位数草图（Karnin, Lang, Liberty 2016）。
+
+    由若干层压缩器组成，第h层每个元素代表2^h个原始值；某层满时排序并随机保留
+    奇数或偶数位元素推到上一层。内存为O(k·log(n/k))，秩误差约为O(1/k)，
+    两个草图合并后的误差保证与直接流入同一个草图相同，因此可在线程、进程和
+    分片之间任意合并。
+    """
+
+    def __init__(self, k: int = 200, c: float = 2.0 / 3.0, seed: Optional[int] = None):
+        """
+        Args:
+            k: 顶层压缩器容量，越大越精确（k=200时秩误差约1.3%）
+            c: 下层容量的衰减系数
+            seed: 压缩时随机选择的种子
+        """
+        self.k = int(k)
+        self.c = float(c)
+        self.count = 0
+        self.min_value: Optional[float] = None
+        self.max_value: Optional[float] = None
+        self.compactors: List[List[float]] = []
+        self._size = 0
+        self._max_size = 0
+        self._rng = random.Random(seed)
+        self._grow()
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _grow(self) -> None:
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value: float) -> None:
+        """加入一个值"""
+        value = float(value)
+        self.count += 1
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if self.max_value is None or value > self.max_value:
+            self.max_value = value
+        self.compactors[0].append(value)
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def update_many(self, values: Sequence[float]) -> None:
+        """加入一批值"""
+        for value in values:
+            self.update(value)
+
+    def _compress(self) -> None:
+        for height in range(len(self.compactors)):
+            compactor = self.compactors[height]
+            if len(compactor) >= self._capacity(height):
+                if height + 1 >= len(self.compactors):
+                    self._grow()
+                compactor.sort()
+                # 奇数长度时保留最后一个元素在本层
+                leftover = [compactor.pop()] if len(compactor) % 2 else []
+                offset = self._rng.randint(0, 1)
+                self.compactors[height + 1].extend(compactor[offset::2])
+                self.compactors[height] = leftover
+                self._size = sum(len(c) for c in self.compactors)
+                if self._size < self._max_size:
+                    break
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """
+        合并另一个草图
+
+        Returns:
+            新的KLLSketch（不修改任何一方）
+        """
+        result = KLLSketch(max(self.k, other.k), self.c, seed=self.count * 1000003 + other.count)
+        while len(result.compactors) < max(len(self.compactors), len(other.compactors)):
+            result._grow()
+        for sketch in (self, other):
+            for height, compactor in enumerate(sketch.compactors):
+                result.compactors[height].extend(compactor)
+        result.count = self.count + other.count
+        extremes = [v for v in (self.min_value, other.min_value) if v is not None]
+        result.min_value = min(extremes) if extremes else None
+        extremes = [v for v in (self.max_value, other.max_value) if v is not None]
+        result.max_value = max(extremes) if extremes else None
+        result._size = sum(len(c) for c in result.compactors)
+        while result._size >= result._max_size:
+            result._compress()
+        return result
+
+    def _weighted_items(self) -> List[tuple]:
+        items = [(value, 1 << height) for height, compactor in enumerate(self.compactors) for value in compactor]
+        items.sort()
+        return items
+
+    def quantiles(self, qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """
+        估计分位数
+
+        Args:
+            qs: 分位点（0~1）
+
+        Returns:
+            {"p1": ..., "p50": ..., ...}，空草图时为空字典
+        """
+        if self.count == 0:
+            return {}
+        items = self._weighted_items()
+        total = sum(weight for _, weight in items)
+        results = {}
+        for q in qs:
+            if q <= 0:
+                results[_quantile_key(q)] = self.min_value
+                continue
+            if q >= 1:
+                results[_quantile_key(q)] = self.max_value
+                continue
+            target = q * total
+            cumulative = 0
+            value = items[-1][0]
+            for item_value, weight in items:
+                cumulative += weight
+                if cumulative >= target:
+                    value = item_value
+                    break
+            results[_quantile_key(q)] = value
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        """估计单个分位数"""
+        return self.quantiles((q,)).get(_quantile_key(q))
+
+    def to_state(self) -> Dict[str, Any]:
+        """可JSON序列化的状态（用于跨进程/分片合并）"""
+        return {"k": self.k, "c": self.c, "count": self.count,
+                "min": self.min_value, "max": self.max_value, "compactors": [list(c) for c in self.compactors]}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'KLLSketch':
+        """由to_state()的结果恢复"""
+        sketch = cls(state["k"], state.get("c", 2.0 / 3.0))
+        while len(sketch.compactors) < len(state["compactors"]):
+            sketch._grow()
+        sketch.compactors = [list(map(float, c)) for c in state["compactors"]]
+        sketch.count = state["count"]
+        sketch.min_value = state.get("min")
+        sketch.max_value = state.get("max")
+        sketch._size = sum(len(c) for c in sketch.compactors)
+        return sketch
+
+
+class LogHistogram:
+    """
+    固定对数分箱直方图。
+
+    正值按bins_per_decade等比分箱（相对误差约10^(1/bins_per_decade)-1），
+    负值按绝对值镜像分箱，|x| < min_value记入零桶。只保存非空箱（稀疏字典），
+    合并即逐箱相加，结果与分片顺序无关。
+    """
+
+    def __init__(self, bins_per_decade: int = 20, min_value: float = 1e-3):
+        """
+        Args:
+            bins_per_decade: 每10倍的箱数
+            min_value: 最小可分辨的绝对值
+        """
+        self.bins_per_decade = int(bins_per_decade)
+        self.min_value = float(min_value)
+        self.count = 0
+        self.zero_count = 0
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+
+    def _index(self, magnitude: float) -> int:
+        return int(math.floor(math.log10(magnitude / self.min_value) * self.bins_per_decade))
+
+    def _bin_bounds(self, index: int) -> tuple:
+        low = self.min_value * 10 ** (index / self.bins_per_decade)
+        return low, self.min_value * 10 ** ((index + 1) / self.bins_per_decade)
+
+    def update(self, value: float, count: int = 1) -> None:
+        """加入一个值"""
+        self.count += count
+        magnitude = abs(value)
+        if magnitude < self.min_value:
+            self.zero_count += count
+            return
+        bins = self.positive if value > 0 else self.negative
+        index = self._index(magnitude)
+        bins[index] = bins.get(index, 0) + count
+
+    def merge(self, other: 'LogHistogram') -> 'LogHistogram':
+        """
+        合并另一个直方图（分箱参数必须相同）
+
+        Returns:
+            新的LogHistogram
+        """
+        if (self.bins_per_decade, self.min_value) != (other.bins_per_decade, other.min_value):
+            raise ValueError("Cannot merge log histograms with different binning")
+        result = LogHistogram(self.bins_per_decade, self.min_value)
+        result.count = self.count + other.count
+        result.zero_count = self.zero_count + other.zero_count
+        for target, sources in ((result.positive, (self.positive, other.positive)),
+                                (result.negative, (self.negative, other.negative))):
+            for source in sources:
+                for index, count in source.items():
+                    target[index] = target.get(index, 0) + count
+        return result
+
+    def buckets(self) -> List[tuple]:
+        """按值升序返回[(下界, 上界, 计数), ...]"""
+        result = []
+        for index in sorted(self.negative, reverse=True):
+            low, high = self._bin_bounds(index)
+            result.append((-high, -low, self.negative[index]))
+        if self.zero_count:
+            result.append((-self.min_value, self.min_value, self.zero_count))
+        for index in sorted(self.positive):
+            low, high = self._bin_bounds(index)
+            result.append((low, high, self.positive[index]))
+        return result
+
+    def quantiles(self, qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """由分箱估计分位数（箱内取几何中点，零桶取0）"""
+        if self.count == 0:
+            return {}
+        buckets = self.buckets()
+        results = {}
+        for q in qs:
+            target = min(max(q, 0.0), 1.0) * self.count
+            cumulative = 0
+            for low, high, count in buckets:
+                cumulative += count
+                if cumulative >= target:
+                    break
+            if low < 0 < high:
+                value = 0.0
+            else:
+                value = math.copysign(math.sqrt(low * high), high)
+            results[_quantile_key(q)] = value
+        return results
+
+    def to_state(self) -> Dict[str, Any]:
+        """可JSON序列化的状态"""
+        return {"bins_per_decade": self.bins_per_decade, "min_value": self.min_value, "count": self.count,
+                "zero_count": self.zero_count,
+                "positive": {str(i): c for i, c in self.positive.items()},
+                "negative": {str(i): c for i, c in self.negative.items()}}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'LogHistogram':
+        """由to_state()的结果恢复"""
+        histogram = cls(state["bins_per_decade"], state["min_value"])
+        histogram.count = state["count"]
+        histogram.zero_count = state["zero_count"]
+        histogram.positive = {int(i): c for i, c in state["positive"].items()}
+        histogram.negative = {int(i): c for i, c in state["negative"].items()}
+        return histogram
+
+    def to_dict(self) -> Dict[str, Any]:
+        """报告用的摘要（分位数与非空箱）"""
+        return {
+            "count": self.count,
+            "quantiles": self.quantiles(),
+            "buckets": [{"low": low, "high": high, "count": count} for low, high, count in self.buckets()]
+        }
@@ -3,6 +3,9 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from .incremental_stats import IncrementalStats
+from .quantile_sketch import LogHistogram
+
 
 @dataclass
 class SessionStats:
@@ -35,6 +38,17 @@ class SessionStats:
     balance_change: float = 0.0
     # batch_count: int = 0  # 你原来有这个字段
     
+    # 逐spin分布统计（Welford矩，不保留spin数据）：投注只计实际扣款的spin，profit = payout - 实际扣款
+    bet_stats: IncrementalStats = field(default_factory=IncrementalStats, repr=False)
+    payout_stats: IncrementalStats = field(default_factory=IncrementalStats, repr=False)
+    profit_stats: IncrementalStats = field(default_factory=IncrementalStats, repr=False)
+    
+    # 会话内最大回撤（余额峰值减当前余额）和中奖倍数分布
+    peak_balance: Optional[float] = None
+    max_drawdown: float = 0.0
+    max_win_multiplier: float = 0.0
+    win_multiplier_hist: LogHistogram = field(default_factory=LogHistogram, repr=False)
+    
     # 为了兼容性，保留旧字段名的属性访问
     @property
     def start_balance(self) -> Optional[float]:
@@ -74,14 +88,30 @@ class SessionStats:
         self.total_spins += 1
         
         # 只有非免费旋转才计入total_bet
+        charged = 0.0 if is_free_spin else bet_amount
+        self.total_bet += charged
+        
         if not is_free_spin:
-            self.total_bet += bet_amount
+            self.bet_stats.update(bet_amount)
+        self.payout_stats.update(win_amount)
+        self.profit_stats.update(win_amount - charged)
         
         self.total_win += win_amount
         self.total_profit = self.total_win - self.total_bet
         
         if win_amount > 0:
             self.win_count += 1
+            if bet_amount > 0:
+                multiplier = win_amount / bet_amount
+                self.win_multiplier_hist.update(multiplier)
+                self.max_win_multiplier = max(self.max_win_multiplier, multiplier)
+        
+        balance_after = getattr(spin_result, 'balance_after', None)
+        if balance_after is not None:
+            if self.peak_balance is None:
+                self.peak_balance = max(getattr(spin_result, 'balance_before', balance_after), balance_after)
+            self.peak_balance = max(self.peak_balance, balance_after)
+            self.max_drawdown = max(self.max_drawdown, self.peak_balance - balance_after)
         
         # 更新胜率
         if self.total_spins > 0:
@@ -111,7 +141,7 @@ class SessionStats:
         转换为字典格式，完全按照你原来的字段。
         
         Args:
-            include_advanced: 保留为兼容性，但不再支持高级统计
+            include_advanced: 是否附带逐spin分布统计（bet/payout/profit的矩）
             
         Returns:
             统计数据字典
@@ -126,4 +156,12 @@ class SessionStats:
         if 'end_balance' in stats:
             del stats['end_balance']
         
+        # 分布统计对象不直接进入扁平摘要
+        distributions = {name: stats.pop(f"{name}_stats").to_dict() for name in ("bet", "payout", "profit")}
+        win_multipliers = stats.pop("win_multiplier_hist")
+        stats.pop("peak_balance", None)
+        if include_advanced:
+            stats["spin_distributions"] = distributions
+            stats["win_multiplier_distribution"] = win_multipliers.to_dict()
+        
         return stats
\ No newline at end of file
@@ -3,7 +3,7 @@
 
 import logging
 from enum import Enum, auto
-from typing import List, Callable, TypeVar, Any
+from typing import List, Callable, TypeVar, Any, Optional
 
 from src.infrastructure.concurrency.process_pool import ProcessPool
 from src.infrastructure.concurrency.thread_pool import ThreadPool
@@ -87,6 +87,45 @@ class TaskExecutor:
         else:
             return self.pool.submit_tasks(tasks)
 
+    def execute_streaming(self, next_task: Callable[[], Optional[Callable[[], T]]],
+                          on_result: Callable[[T], Any], max_in_flight: Optional[int] = None) -> int:
+        """
+        Stream tasks through the pool: pull a new task whenever a slot frees up.
+
+        Unlike execute(), the task list is not fixed up front. next_task() is asked for work
+        each time a slot is free, so it can decide what to run next based on the results
+        delivered to on_result() so far. When next_task() returns None while tasks are still
+        running, the executor waits for one of them to finish and asks again; the stream ends
+        when next_task() returns None and nothing is in flight.
+
+        Args:
+            next_task: Returns the next callable to run, or None if there is nothing to submit now
+            on_result: Called (in the submitting thread) with each result as it completes
+            max_in_flight: Maximum number of tasks submitted at once (default: 2 x workers)
+
+        Returns:
+            Number of tasks executed
+
+        Raises:
+            ValueError: In MULTIPROCESS mode
+        """
+        if self.mode == ExecutionMode.MULTIPROCESS:
+            # next_task() reads state updated by on_result() in this process, and its tasks are
+            # closures over that state, which cannot be pickled for worker processes
+            raise ValueError("Streaming execution is not supported in MULTIPROCESS mode; "
+                             "use MULTITHREAD or SEQUENTIAL")
+
+        if self.mode == ExecutionMode.SEQUENTIAL:
+            executed = 0
+            while True:
+                task = next_task()
+                if task is None:
+                    return executed
+                on_result(task())
+                executed += 1
+
+        return self.pool.stream_tasks(next_task, on_result, max_in_flight)
+
     def change_mode(self, new_mode: ExecutionMode, max_workers: int = None):
         """
         Change execution mode dynamically.
@@ -1,6 +1,6 @@
 import concurrent.futures
 import logging
-from typing import Callable, List, TypeVar, Any
+from typing import Callable, List, TypeVar, Any, Optional
 
 T = TypeVar("T")
 
@@ -27,4 +27,32 @@ class ThreadPool:
         self.logger.info(f"Submitting {len(tasks)} tasks asynchronously with {self.max_workers} workers")
         executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
         futures = [executor.submit(task) for task in tasks]
-        return futures
\ No newline at end of file
+        return futures
+
+    def stream_tasks(self, next_task: Callable[[], Optional[Callable[[], T]]],
+                     on_result: Callable[[T], Any], max_in_flight: Optional[int] = None) -> int:
+        """
+        Run tasks pulled from next_task() whenever a slot frees up (see TaskExecutor.execute_streaming).
+        Returns the number of tasks executed.
+        """
+        executed = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            limit = max_in_flight or 2 * executor._max_workers
+            self.logger.info(f"Streaming tasks with {executor._max_workers} workers and up to {limit} in flight")
+            in_flight = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < limit:
+                    task = next_task()
+                    if task is None:
+                        exhausted = True
+                        break
+                    in_flight.add(executor.submit(task))
+                if not in_flight:
+                    return executed
+                done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    on_result(future.result())
+                    executed += 1
+                # New results may let next_task() hand out more work
+                exhausted = False
@@ -0,0 +1,178 @@
+# src/infrastructure/output/async_writer.py
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+_STOP = object()
+
+
+class _WriteTask:
+    """队列中的单个写入任务"""
+    __slots__ = ("func", "payload", "rows")
+
+    def __init__(self, func: Callable[[Any], Any], payload: Any, rows: int):
+        self.func = func
+        self.payload = payload
+        self.rows = rows
+
+
+class AsyncWritePipeline:
+    """
+    会话输出的后台写入管线
+
+    会话线程把紧凑的会话载荷放入有界队列后立即返回，由一个或多个写入线程
+    负责序列化、落盘和上传。队列满时submit阻塞（背压），防止模拟速度超过
+    I/O速度时内存无限增长。flush等待队列清空，shutdown在flush后停止写入线程。
+    """
+
+    def __init__(self, name: str = "session_output", num_writers: int = 1, max_queue_size: int = 64):
+        """
+        初始化并启动写入线程
+
+        Args:
+            name: 管线名称（用于日志和线程名）
+            num_writers: 写入线程数
+            max_queue_size: 队列容量（会话数），满时submit阻塞
+        """
+        if num_writers < 1:
+            raise ValueError(f"num_writers必须为正数: {num_writers}")
+        if max_queue_size < 1:
+            raise ValueError(f"max_queue_size必须为正数: {max_queue_size}")
+
+        self.name = name
+        self.num_writers = int(num_writers)
+        self.max_queue_size = int(max_queue_size)
+        self.logger = logging.getLogger(f"infrastructure.output.async_writer.{name}")
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue_size)
+        self._metrics_lock = threading.Lock()
+        self._reset_metrics()
+
+        self._closed = False
+        self._workers: List[threading.Thread] = []
+        for index in range(self.num_writers):
+            worker = threading.Thread(target=self._run, name=f"output-writer-{name}-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self.logger.info(f"写入管线已启动: num_writers={self.num_writers}, max_queue_size={self.max_queue_size}")
+
+    def submit(self, func: Callable[[Any], Any], payload: Any, rows: int = 0):
+        """
+        提交一个写入任务，队列满时阻塞直到有空位
+
+        Args:
+            func: 在写入线程中调用的函数 func(payload)，抛出异常或返回False都记为失败
+            payload: 会话载荷
+            rows: 载荷包含的行数（用于吞吐统计）
+        """
+        if self._closed:
+            raise RuntimeError(f"写入管线已关闭: {self.name}")
+
+        task = _WriteTask(func, payload, rows)
+        try:
+            self._queue.put_nowait(task)
+            blocked = 0.0
+        except queue.Full:
+            started_at = time.perf_counter()
+            self._queue.put(task)
+            blocked = time.perf_counter() - started_at
+
+        with self._metrics_lock:
+            if self._first_submit_at is None:
+                self._first_submit_at = time.perf_counter()
+            self._submitted += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+            if blocked > 0:
+                self._blocked_submits += 1
+                self._blocked_seconds += blocked
+
+    def flush(self):
+        """阻塞直到所有已提交的任务写完"""
+        self._queue.join()
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """写完剩余任务后停止写入线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        self.logger.info(f"写入管线已关闭: {self.get_metrics()}")
+
+    def _run(self):
+        """写入线程主循环"""
+        while True:
+            task = self._queue.get()
+            try:
+                if task is _STOP:
+                    return
+
+                started_at = time.perf_counter()
+                try:
+                    # write_record这类函数自己捕获异常并返回False
+                    failed = task.func(task.payload) is False
+                except Exception as e:
+                    self.logger.error(f"写入任务失败: {e}")
+                    failed = True
+                finished_at = time.perf_counter()
+
+                with self._metrics_lock:
+                    self._write_seconds += finished_at - started_at
+                    self._last_write_at = finished_at
+                    if failed:
+                        self._errors += 1
+                    else:
+                        self._written += 1
+                        self._rows_written += task.rows
+            finally:
+                self._queue.task_done()
+
+    def _reset_metrics(self):
+        self._submitted = 0
+        self._written = 0
+        self._rows_written = 0
+        self._errors = 0
+        self._write_seconds = 0.0
+        self._blocked_submits = 0
+        self._blocked_seconds = 0.0
+        self._max_queue_depth = 0
+        self._first_submit_at = None
+        self._last_write_at = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        获取写入吞吐和背压统计
+
+        Returns:
+            包含提交/写入会话数、写入行数、墙钟吞吐、写入线程忙碌吞吐、
+            背压阻塞次数和时长、最大队列深度的字典
+        """
+        with self._metrics_lock:
+            elapsed = 0.0
+            if self._first_submit_at is not None and self._last_write_at is not None:
+                elapsed = max(self._last_write_at - self._first_submit_at, 0.0)
+            return {
+                "sessions_submitted": self._submitted,
+                "sessions_written": self._written,
+                "rows_written": self._rows_written,
+                "errors": self._errors,
+                "write_seconds": self._write_seconds,
+                "sessions_per_second": self._written / elapsed if elapsed > 0 else 0.0,
+                "rows_per_second": self._rows_written / elapsed if elapsed > 0 else 0.0,
+                "busy_rows_per_second": self._rows_written / self._write_seconds if self._write_seconds > 0 else 0.0,
+                "blocked_submits": self._blocked_submits,
+                "blocked_seconds": self._blocked_seconds,
+                "max_queue_depth": self._max_queue_depth,
+                "queue_depth": self._queue.qsize()
+            }
+
+    def reset_metrics(self):
+        """清空统计"""
+        with self._metrics_lock:
+            self._reset_metrics()
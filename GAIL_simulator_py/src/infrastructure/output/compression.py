@@ -0,0 +1,259 @@
+# src/infrastructure/output/compression.py
+import io
+import csv
+import gzip
+import logging
+from typing import Dict, List, Any, Optional, IO, Union
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 仅在未安装zstandard时触发
+    zstandard = None
+
+
+COMPRESSION_CODECS = ("none", "gzip", "zstd")
+CODEC_EXTENSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+logger = logging.getLogger("infrastructure.output.compression")
+
+
+def is_codec_available(codec: str) -> bool:
+    """压缩算法在当前环境是否可用"""
+    if codec == "zstd":
+        return zstandard is not None
+    return codec in COMPRESSION_CODECS
+
+
+def resolve_codec(codec: Optional[str]) -> str:
+    """
+    规范化压缩算法名称，zstd不可用时退回gzip
+
+    Args:
+        codec: none / gzip / zstd（None视为none）
+
+    Returns:
+        实际使用的算法名称
+    """
+    codec = str(codec or "none").lower()
+    if codec not in COMPRESSION_CODECS:
+        raise ValueError(f"Unsupported compression codec: {codec}")
+    if not is_codec_available(codec):
+        logger.warning("未安装zstandard，压缩算法退回gzip")
+        return "gzip"
+    return codec
+
+
+class CompressionSettings:
+    """
+    输出压缩配置
+
+    对应output.compression配置节：codec / level / block_size。
+    """
+
+    def __init__(self, codec: Optional[str] = "none", level: Optional[int] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Args:
+            codec: none / gzip / zstd
+            level: 压缩级别，None时使用算法默认值
+            block_size: 流式写入时的缓冲块大小（字节）
+        """
+        self.codec = resolve_codec(codec)
+        self.level = DEFAULT_LEVELS.get(self.codec) if level is None else int(level)
+        self.block_size = max(int(block_size), 4096)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'CompressionSettings':
+        """从配置字典创建"""
+        config = config or {}
+        return cls(config.get("codec", "none"), config.get("level"),
+                   config.get("block_size", DEFAULT_BLOCK_SIZE))
+
+    @property
+    def enabled(self) -> bool:
+        return self.codec != "none"
+
+    @property
+    def extension(self) -> str:
+        """压缩文件的附加扩展名（.gz / .zst / 空）"""
+        return CODEC_EXTENSIONS[self.codec]
+
+
+def compress_bytes(data: bytes, settings: CompressionSettings) -> bytes:
+    """
+    压缩一段完整的字节数据
+
+    Args:
+        data: 原始数据
+        settings: 压缩配置
+
+    Returns:
+        压缩后的数据（codec为none时原样返回）
+    """
+    if settings.codec == "gzip":
+        return gzip.compress(data, compresslevel=settings.level, mtime=0)
+    if settings.codec == "zstd":
+        return zstandard.ZstdCompressor(level=settings.level).compress(data)
+    return data
+
+
+def detect_codec(data: bytes) -> str:
+    """根据魔数判断压缩算法"""
+    if data.startswith(_GZIP_MAGIC):
+        return "gzip"
+    if data.startswith(_ZSTD_MAGIC):
+        return "zstd"
+    return "none"
+
+
+def decompress_bytes(data: bytes) -> bytes:
+    """
+    按魔数透明解压（未压缩的数据原样返回）
+
+    Args:
+        data: 可能压缩过的数据
+
+    Returns:
+        原始数据
+    """
+    codec = detect_codec(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("读取zstd压缩数据需要zstandard，请先安装: pip install zstandard")
+        # 追加写入的文件可能包含多个帧
+        with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True) as reader:
+            return reader.read()
+    return data
+
+
+class _GzipWriter(gzip.GzipFile):
+    """关闭时同时关闭底层文件的GzipFile"""
+
+    def __init__(self, raw: IO[bytes], mode: str, level: int):
+        super().__init__(fileobj=raw, mode=mode, compresslevel=level, mtime=0)
+        self._raw = raw
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+class _ZstdWriter(io.RawIOBase):
+    """zstd流式写入（关闭时结束帧并关闭底层文件）"""
+
+    def __init__(self, raw: IO[bytes], level: int, block_size: int):
+        self._raw = raw
+        self._finished = False
+        self._writer = zstandard.ZstdCompressor(level=level).stream_writer(raw, write_size=block_size,
+                                                                            closefd=False)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self._writer.write(data)
+
+    def flush(self):
+        if not self._finished:
+            self._writer.flush(zstandard.FLUSH_BLOCK)
+            self._raw.flush()
+
+    def close(self):
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            self._writer.flush(zstandard.FLUSH_FRAME)
+            self._writer.close()
+            self._raw.close()
+        finally:
+            super().close()
+
+
+def open_compressed_writer(path: str, settings: CompressionSettings, mode: str = "wb") -> IO[bytes]:
+    """
+    打开一个流式压缩写入的二进制文件
+
+    Args:
+        path: 文件路径
+        settings: 压缩配置
+        mode: "wb"（覆盖）或 "ab"（追加一个新的压缩成员/帧，读取时会被连起来）
+
+    Returns:
+        二进制文件对象
+    """
+    raw = open(path, mode, buffering=settings.block_size)
+    if settings.codec == "gzip":
+        return _GzipWriter(raw, mode, settings.level)
+    if settings.codec == "zstd":
+        return _ZstdWriter(raw, settings.level, settings.block_size)
+    return raw
+
+
+def open_text_writer(path: str, settings: CompressionSettings, mode: str = "w") -> IO[str]:
+    """
+    打开一个流式压缩写入的文本文件（utf-8，用于CSV）
+
+    Args:
+        path: 文件路径
+        settings: 压缩配置
+        mode: "w" 或 "a"
+
+    Returns:
+        文本文件对象
+    """
+    binary = open_compressed_writer(path, settings, mode + "b")
+    return io.TextIOWrapper(binary, encoding='utf-8', newline='', write_through=False)
+
+
+def open_reader(path: str) -> IO[bytes]:
+    """
+    打开一个文件用于读取，按魔数透明解压
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        解压后的二进制文件对象
+    """
+    raw = open(path, 'rb')
+    codec = detect_codec(raw.peek(4)[:4])
+    if codec == "gzip":
+        raw.close()
+        return gzip.open(path, 'rb')
+    if codec == "zstd":
+        if zstandard is None:
+            raw.close()
+            raise ImportError("读取zstd压缩文件需要zstandard，请先安装: pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+    return raw
+
+
+def open_text_reader(path: str) -> IO[str]:
+    """以文本方式打开（可能压缩的）文件"""
+    return io.TextIOWrapper(open_reader(path), encoding='utf-8', newline='')
+
+
+def read_csv_rows(source: Union[str, bytes]) -> List[Dict[str, str]]:
+    """
+    读取（可能压缩的）CSV文件或字节内容
+
+    Args:
+        source: 文件路径或字节内容
+
+    Returns:
+        行字典列表
+    """
+    if isinstance(source, bytes):
+        return list(csv.DictReader(io.StringIO(decompress_bytes(source).decode('utf-8'))))
+    with open_text_reader(source) as f:
+        return list(csv.DictReader(f))
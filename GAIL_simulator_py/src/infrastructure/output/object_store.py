@@ -0,0 +1,480 @@
+# src/infrastructure/output/object_store.py
+import os
+import json
+import time
+import random
+import shutil
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Any, Optional, Callable, Tuple, Type, Union
+
+
+try:
+    from botocore.exceptions import ConnectionError as BotoConnectionError, HTTPClientError
+    _BOTO_TRANSIENT_ERRORS = (BotoConnectionError, HTTPClientError)
+except ImportError:  # pragma: no cover - 仅在未安装botocore时触发
+    _BOTO_TRANSIENT_ERRORS = ()
+
+
+OBJECT_STORE_BACKENDS = ("none", "local", "s3")
+
+# 限流和服务端临时故障的错误码（其余4xx如NoSuchKey、AccessDenied重试也不会成功）
+TRANSIENT_ERROR_CODES = frozenset({
+    "SlowDown", "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottled",
+    "RequestLimitExceeded", "TooManyRequestsException", "ProvisionedThroughputExceededException",
+    "RequestTimeout", "RequestTimeoutException", "InternalError", "ServiceUnavailable"
+})
+
+logger = logging.getLogger("infrastructure.output.object_store")
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    判断异常是否为值得重试的临时故障：连接错误、超时、限流和5xx
+
+    包装后的异常（raise ... from e）按其__cause__判断，例如S3Service抛出的RuntimeError。
+
+    Args:
+        error: 调用抛出的异常
+
+    Returns:
+        True表示可以重试
+    """
+    if error.__cause__ is not None and is_transient_error(error.__cause__):
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError) + _BOTO_TRANSIENT_ERRORS):
+        return True
+    # botocore的ClientError带有response（错误码和HTTP状态码）
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = str(response.get("Error", {}).get("Code", ""))
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if code in TRANSIENT_ERROR_CODES or status == 429:
+            return True
+        if code.isdigit():
+            status = status or int(code)
+        return isinstance(status, int) and status >= 500
+    return False
+
+
+class RetryPolicy:
+    """
+    指数退避重试策略（带全抖动）
+
+    第n次重试前等待 random(0, min(max_delay, base_delay * 2^n)) 秒。
+    只重试retry_on中且被is_retryable判定为临时故障的异常，其余异常直接抛出。
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.2, max_delay: float = 10.0,
+                 retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+                 sleep: Callable[[float], None] = time.sleep,
+                 is_retryable: Callable[[BaseException], bool] = is_transient_error):
+        """
+        Args:
+            max_attempts: 最大尝试次数（含第一次）
+            base_delay: 初始退避时间（秒）
+            max_delay: 单次退避上限（秒）
+            retry_on: 需要重试的异常类型
+            sleep: 等待函数（测试时可替换）
+            is_retryable: 判断异常是否可重试（默认is_transient_error）
+        """
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts必须为正数: {max_attempts}")
+        self.max_attempts = int(max_attempts)
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.retry_on = retry_on
+        self.sleep = sleep
+        self.is_retryable = is_retryable
+
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        调用func，临时故障时按退避策略重试，最后一次或不可重试的异常原样抛出
+
+        Returns:
+            func的返回值
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return func(*args, **kwargs)
+            except self.retry_on as e:
+                if attempt == self.max_attempts - 1 or not self.is_retryable(e):
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                with self._lock:
+                    self.retries += 1
+                logger.warning(f"第{attempt + 1}次调用失败，{delay:.2f}秒后重试: {e}")
+                self.sleep(delay)
+
+
+class ObjectStore(ABC):
+    """
+    对象存储接口
+
+    rel_path为相对于存储前缀的路径（通常以task目录名开头）。
+    """
+
+    @abstractmethod
+    def upload_bytes(self, data: Union[bytes, str], rel_path: str) -> None:
+        """上传字节数据"""
+        pass
+
+    @abstractmethod
+    def upload_file(self, local_path: str, rel_path: str) -> None:
+        """上传本地文件"""
+        pass
+
+    @abstractmethod
+    def download_bytes(self, rel_path: str) -> bytes:
+        """下载对象内容，不存在时抛出FileNotFoundError"""
+        pass
+
+    @abstractmethod
+    def list_keys(self, rel_prefix: str = "") -> List[str]:
+        """列出rel_prefix下所有对象的相对路径（排序）"""
+        pass
+
+    def download_range(self, rel_path: str, offset: int, length: int) -> bytes:
+        """下载对象的一段字节（默认实现下载整个对象后截取）"""
+        return self.download_bytes(rel_path)[offset:offset + length]
+
+
+class LocalObjectStore(ObjectStore):
+    """
+    基于本地文件系统的对象存储，用于测试和离线运行
+    """
+
+    def __init__(self, root_dir: str, prefix: str = ""):
+        """
+        Args:
+            root_dir: 存储根目录
+            prefix: 对象前缀（对应S3的prefix）
+        """
+        self.root_dir = root_dir
+        self.prefix = prefix.strip("/")
+        os.makedirs(self._base_dir(), exist_ok=True)
+
+    def _base_dir(self) -> str:
+        return os.path.join(self.root_dir, self.prefix) if self.prefix else self.root_dir
+
+    def _make_path(self, rel_path: str) -> str:
+        path = os.path.normpath(os.path.join(self._base_dir(), rel_path.lstrip("/")))
+        if not path.startswith(os.path.normpath(self._base_dir())):
+            raise ValueError(f"非法的对象路径: {rel_path}")
+        return path
+
+    def upload_bytes(self, data: Union[bytes, str], rel_path: str) -> None:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        path = self._make_path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def upload_file(self, local_path: str, rel_path: str) -> None:
+        path = self._make_path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        shutil.copyfile(local_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def download_bytes(self, rel_path: str) -> bytes:
+        with open(self._make_path(rel_path), 'rb') as f:
+            return f.read()
+
+    def download_range(self, rel_path: str, offset: int, length: int) -> bytes:
+        with open(self._make_path(rel_path), 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def list_keys(self, rel_prefix: str = "") -> List[str]:
+        base_dir = self._base_dir()
+        keys = []
+        for dirpath, _, filenames in os.walk(base_dir):
+            for filename in filenames:
+                if ".tmp." in filename:
+                    continue
+                key = os.path.relpath(os.path.join(dirpath, filename), base_dir).replace("\\", "/")
+                if key.startswith(rel_prefix.lstrip("/")):
+                    keys.append(key)
+        return sorted(keys)
+
+
+class BatchingUploader(ObjectStore):
+    """
+    带批量合并、有界并发和重试的上传器（包装任意ObjectStore）
+
+    小于small_object_bytes的对象先在内存中拼接，攒够max_batch_bytes后作为一个
+    批次对象上传，并附带一个索引（rel_path -> 偏移和长度）；大对象直接上传，
+    由后端决定是否分片上传。上传在有界线程池中进行，同时在途的上传数超过
+    max_pending_uploads时调用方阻塞。close时写出manifest.json，
+    BatchedObjectReader据此读取被合并的对象。
+    """
+
+    def __init__(self, store: ObjectStore, batch_prefix: str, small_object_bytes: int = 1 << 20,
+                 max_batch_bytes: int = 16 << 20, max_workers: int = 4, max_pending_uploads: int = 16,
+                 retry: Optional[RetryPolicy] = None):
+        """
+        Args:
+            store: 实际的对象存储
+            batch_prefix: 批次对象和manifest的相对路径前缀
+            small_object_bytes: 小于该大小的对象参与合并
+            max_batch_bytes: 批次达到该大小时上传
+            max_workers: 上传线程数
+            max_pending_uploads: 最多同时在途的上传数（背压）
+            retry: 重试策略
+        """
+        self.store = store
+        self.batch_prefix = batch_prefix.strip("/")
+        self.small_object_bytes = int(small_object_bytes)
+        self.max_batch_bytes = int(max_batch_bytes)
+        self.retry = retry or RetryPolicy()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="object-upload")
+        self._slots = threading.BoundedSemaphore(max_pending_uploads)
+        self._lock = threading.Lock()
+
+        self._batch_parts: List[bytes] = []
+        self._batch_index: Dict[str, List[int]] = {}
+        self._batch_bytes = 0
+        self._batch_seq = 0
+        self._manifest: Dict[str, List[Any]] = {}
+        self._futures: List[Future] = []
+        self._errors: List[str] = []
+        self.closed = False
+
+        self._metrics = {"objects": 0, "batched_objects": 0, "batches": 0,
+                         "direct_uploads": 0, "bytes_uploaded": 0, "failures": 0}
+
+    def _submit(self, func: Callable[..., Any], *args, nbytes: int = 0) -> Future:
+        """在线程池中带重试执行上传，在途上传数受限"""
+        self._slots.acquire()
+
+        def task():
+            try:
+                self.retry.call(func, *args)
+                with self._lock:
+                    self._metrics["bytes_uploaded"] += nbytes
+            except Exception as e:
+                with self._lock:
+                    self._metrics["failures"] += 1
+                    self._errors.append(str(e))
+                logger.error(f"上传失败（已重试{self.retry.max_attempts}次）: {e}")
+                raise
+            finally:
+                self._slots.release()
+
+        future = self._executor.submit(task)
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def _seal_batch_locked(self):
+        """把当前批次交给上传线程（调用方持有self._lock）"""
+        if not self._batch_parts:
+            return None
+        batch_key = f"{self.batch_prefix}/batch-{self._batch_seq:06d}.bin"
+        self._batch_seq += 1
+        data = b"".join(self._batch_parts)
+        index = self._batch_index
+        for rel_path, (offset, length) in index.items():
+            self._manifest[rel_path] = [batch_key, offset, length]
+
+        self._batch_parts, self._batch_index, self._batch_bytes = [], {}, 0
+        self._metrics["batches"] += 1
+        return batch_key, data, index
+
+    def _upload_batch(self, sealed):
+        if sealed is None:
+            return
+        batch_key, data, index = sealed
+        self._submit(self.store.upload_bytes, data, batch_key, nbytes=len(data))
+        self._submit(self.store.upload_bytes, json.dumps(index).encode('utf-8'),
+                     batch_key[:-len(".bin")] + ".json")
+
+    def upload_bytes(self, data: Union[bytes, str], rel_path: str) -> None:
+        if self.closed:
+            raise RuntimeError("BatchingUploader is closed")
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        if len(data) >= self.small_object_bytes:
+            with self._lock:
+                self._metrics["objects"] += 1
+                self._metrics["direct_uploads"] += 1
+            self._submit(self.store.upload_bytes, data, rel_path, nbytes=len(data))
+            return
+
+        with self._lock:
+            self._metrics["objects"] += 1
+            self._metrics["batched_objects"] += 1
+            self._batch_index[rel_path] = [self._batch_bytes, len(data)]
+            self._batch_parts.append(data)
+            self._batch_bytes += len(data)
+            sealed = self._seal_batch_locked() if self._batch_bytes >= self.max_batch_bytes else None
+        self._upload_batch(sealed)
+
+    def upload_file(self, local_path: str, rel_path: str) -> None:
+        """小文件读入后参与合并；大文件同步上传（调用方之后可能删除本地文件）"""
+        if os.path.getsize(local_path) < self.small_object_bytes:
+            with open(local_path, 'rb') as f:
+                self.upload_bytes(f.read(), rel_path)
+            return
+
+        with self._lock:
+            self._metrics["objects"] += 1
+            self._metrics["direct_uploads"] += 1
+        self._submit(self.store.upload_file, local_path, rel_path,
+                     nbytes=os.path.getsize(local_path)).result()
+
+    def download_bytes(self, rel_path: str) -> bytes:
+        return self.store.download_bytes(rel_path)
+
+    def download_range(self, rel_path: str, offset: int, length: int) -> bytes:
+        return self.store.download_range(rel_path, offset, length)
+
+    def list_keys(self, rel_prefix: str = "") -> List[str]:
+        return self.store.list_keys(rel_prefix)
+
+    def flush(self):
+        """上传当前批次并等待所有在途上传完成"""
+        with self._lock:
+            sealed = self._seal_batch_locked()
+        self._upload_batch(sealed)
+
+        while True:
+            with self._lock:
+                futures, self._futures = self._futures, []
+            if not futures:
+                break
+            for future in futures:
+                try:
+                    future.result()
+                except Exception:
+                    pass  # 已在任务中记录
+
+    def close(self) -> Dict[str, Any]:
+        """
+        上传剩余数据和manifest并关闭线程池
+
+        Returns:
+            上传统计
+        """
+        if self.closed:
+            return self.get_metrics()
+        self.flush()
+        if self._manifest:
+            self._submit(self.store.upload_bytes, json.dumps(self._manifest).encode('utf-8'),
+                         f"{self.batch_prefix}/manifest.json")
+            self.flush()
+        self._executor.shutdown(wait=True)
+        self.closed = True
+        return self.get_metrics()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取上传统计（对象数、批次数、字节数、重试和失败次数）"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["errors"] = list(self._errors[-10:])
+        metrics["retries"] = self.retry.retries
+        return metrics
+
+
+class BatchedObjectReader:
+    """
+    读取经BatchingUploader上传的对象：先按原路径读取，不存在时查manifest
+    """
+
+    def __init__(self, store: ObjectStore, batch_prefix: str):
+        """
+        Args:
+            store: 对象存储
+            batch_prefix: 上传时使用的批次前缀
+        """
+        self.store = store
+        self.batch_prefix = batch_prefix.strip("/")
+        try:
+            self.manifest = json.loads(store.download_bytes(f"{self.batch_prefix}/manifest.json"))
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def read(self, rel_path: str) -> bytes:
+        """读取单个对象的内容"""
+        entry = self.manifest.get(rel_path)
+        if entry is None:
+            return self.store.download_bytes(rel_path)
+        batch_key, offset, length = entry
+        return self.store.download_range(batch_key, offset, length)
+
+    def list_objects(self) -> List[str]:
+        """列出所有逻辑对象（直接上传的对象和合并在批次中的对象）"""
+        direct = [key for key in self.store.list_keys() if not key.startswith(self.batch_prefix + "/")]
+        return sorted(set(direct) | set(self.manifest))
+
+
+def create_object_store(config: Dict[str, Any], base_dir: str, batch_prefix: str) -> Optional[ObjectStore]:
+    """
+    根据输出配置创建对象存储
+
+    Args:
+        config: OutputManager配置（包含s3和object_store）
+        base_dir: 结果根目录（local后端的相对路径以此为基准）
+        batch_prefix: 批量上传时的批次前缀
+
+    Returns:
+        ObjectStore实例，不使用对象存储时返回None
+    """
+    store_config = config.get("object_store", {}) or {}
+    s3_config = config.get("s3", {}) or {}
+
+    backend = store_config.get("backend")
+    if backend is None:
+        backend = "s3" if s3_config.get("use_s3", False) else "none"
+    if backend not in OBJECT_STORE_BACKENDS:
+        raise ValueError(f"Unsupported object store backend: {backend}")
+    if backend == "none":
+        return None
+
+    batching = store_config.get("batching", {}) or {}
+    retry_config = store_config.get("retry", {}) or {}
+    retry = RetryPolicy(
+        max_attempts=retry_config.get("max_attempts", 5),
+        base_delay=retry_config.get("base_delay", 0.2),
+        max_delay=retry_config.get("max_delay", 10.0)
+    )
+
+    if backend == "s3":
+        from .s3_service import S3Service
+        store = S3Service(
+            region=s3_config["region"],
+            bucket=s3_config["bucket"],
+            prefix=s3_config["prefix"],
+            # 启用批量上传时由BatchingUploader负责重试，避免重试次数相乘
+            retry=RetryPolicy(max_attempts=1) if batching.get("enabled", False) else retry
+        )
+    else:
+        local_root = store_config.get("local_root", "object_store")
+        if not os.path.isabs(local_root):
+            local_root = os.path.join(base_dir, local_root)
+        store = LocalObjectStore(local_root)
+
+    if batching.get("enabled", False):
+        store = BatchingUploader(
+            store,
+            batch_prefix=batch_prefix,
+            small_object_bytes=batching.get("small_object_bytes", 1 << 20),
+            max_batch_bytes=batching.get("max_batch_bytes", 16 << 20),
+            max_workers=batching.get("max_workers", 4),
+            max_pending_uploads=batching.get("max_pending_uploads", 16),
+            retry=retry
+        )
+
+    logger.info(f"Object store: {backend}{' (batching)' if isinstance(store, BatchingUploader) else ''}")
+    return store
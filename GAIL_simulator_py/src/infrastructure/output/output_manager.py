@@ -5,10 +5,18 @@ import json
 import time
 import logging
 import csv
+import threading
 from datetime import datetime
 from typing import Dict, List, Any, Optional, IO, Tuple
 
-from .s3_service import S3Service
+from .object_store import BatchingUploader, create_object_store
+from .spin_segments import SpinSegmentStore
+from .spin_binary import BinarySpinLogStore
+from .spin_sampler import SpinSampler
+from .replay_log import ReplayLogStore
+from .summary_aggregator import SummaryAggregator
+from .async_writer import AsyncWritePipeline
+from .compression import CompressionSettings
 
 class OutputManager:
     """
@@ -37,10 +45,49 @@ class OutputManager:
                 "region": "us-west-2",        # Bucket 所在区域
                 "prefix": "gail_simulator_data_raw/results",
             },
+            "object_store": {
+                "backend": None,        # None时按s3.use_s3决定：s3 | local | none
+                "local_root": "object_store",
+                "batching": {
+                    "enabled": False,
+                    "small_object_bytes": 1048576,
+                    "max_batch_bytes": 16777216,
+                    "max_workers": 4,
+                    "max_pending_uploads": 16
+                },
+                "retry": {
+                    "max_attempts": 5,
+                    "base_delay": 0.2,
+                    "max_delay": 10.0
+                }
+            },
             "session_recording": {
                 "enabled": True,
                 "record_spins": True,
                 "file_format": "csv",
+                "layout": "per_session",
+                "async_write": {
+                    "enabled": False,
+                    "num_writers": 1,
+                    "max_queue_size": 64
+                },
+                "sampling": {
+                    "policy": "all",        # all | every_k | bernoulli | reservoir
+                    "every_k": 10,
+                    "fraction": 0.1,
+                    "reservoir_size": 10000,
+                    "seed": 0
+                },
+                "replay": {
+                    "enabled": False,
+                    "seed": None,           # 基础种子，None时随机生成并写入回放日志
+                    "keep_spins": False     # 是否同时保存原始spin
+                }
+            },
+            "compression": {
+                "codec": "none",        # none | gzip | zstd（zstd需要zstandard，缺失时退回gzip）
+                "level": None,          # None时使用算法默认级别
+                "block_size": 1048576   # 流式写入缓冲块大小（字节）
             },
             "json_formatting": {
                 "indent": 2,
@@ -67,6 +114,36 @@ class OutputManager:
         
         self.s3 = None
         
+        # 原始spin和summary输出的压缩配置
+        self.compression = CompressionSettings.from_config(self.config.get("compression"))
+        
+        # 段文件存储（layout为segments时按需创建）
+        self._segment_store = None
+        self._segment_lock = threading.Lock()
+        
+        # 定长记录二进制日志（file_format为binary时按需创建）
+        self._binary_log_store = None
+        self._binary_log_lock = threading.Lock()
+        
+        # spin记录抽样器（sampling.policy不为all时按需创建）
+        self._spin_sampler = None
+        self._sampler_lock = threading.Lock()
+        self.sampling_metrics = {}
+        
+        # 回放日志（replay.enabled时按需创建）
+        self._replay_store = None
+        self._replay_lock = threading.Lock()
+        
+        # 会话summary聚合器（按需创建）
+        self._summary_aggregator = None
+        self._summary_lock = threading.Lock()
+        
+        # 后台写入管线（async_write启用时按需创建）
+        self._write_pipeline = None
+        self._pipeline_lock = threading.Lock()
+        self.write_metrics = {}
+        self.upload_metrics = {}
+        
         # 当前任务目录
         self.task_dir = None
         self.initialized = False
@@ -114,18 +191,16 @@ class OutputManager:
             
             # 创建子目录
             os.makedirs(os.path.join(self.task_dir, "reports"), exist_ok=True)
-            os.makedirs(os.path.join(self.task_dir, "temp_summaries"), exist_ok=True)
             
         else:
             self.task_dir = base_dir
 
-        if self.config["s3"]["use_s3"]:
-            self.logger.info(f"s3 client Initialized")
-            self.s3 = S3Service(
-                region=self.config["s3"]["region"],
-                bucket=self.config["s3"]["bucket"],
-                prefix=self.config["s3"]["prefix"]
-            )
+        # 对象存储后端（s3 / local / none），所有上传都经过self.s3
+        self.s3 = create_object_store(
+            self.config, base_dir, batch_prefix=f"{os.path.basename(self.task_dir)}/_batches"
+        )
+        if self.s3:
+            self.logger.info(f"Object store initialized: {type(self.s3).__name__}")
 
         self.initialized = True
         self.logger.info(f"Output structure initialized at {self.task_dir}")
@@ -186,19 +261,161 @@ class OutputManager:
         self.logger.debug(f"Directory path: {final_dir}")
         return final_dir
         
-    def get_temp_summary_directory(self) -> str:
+    def get_summary_aggregator(self) -> SummaryAggregator:
         """
-        获取临时summary目录路径
+        获取共享的summary聚合器（会话结束时直接写入最终summary CSV）
         
         Returns:
-            临时summary目录路径
+            SummaryAggregator实例
         """
-        if not self.initialized:
-            self.initialize()
-            
-        temp_dir = os.path.join(self.task_dir, "temp_summaries")
-        os.makedirs(temp_dir, exist_ok=True)
-        return temp_dir
+        with self._summary_lock:
+            if self._summary_aggregator is None:
+                if not self.initialized:
+                    self.initialize()
+                self._summary_aggregator = SummaryAggregator(self.task_dir, s3=self.s3,
+                                                             compression=self.compression)
+            return self._summary_aggregator
+        
+    def get_segment_store(self) -> Optional[SpinSegmentStore]:
+        """
+        获取共享的段文件存储
+        
+        session_recording.layout为"segments"时，所有会话的原始spins按player-machine对
+        追加到同一个段文件，否则返回None（每个会话一个文件）。
+        
+        Returns:
+            SpinSegmentStore实例或None
+        """
+        recording_config = self.config["session_recording"]
+        if recording_config.get("layout", "per_session") != "segments":
+            return None
+        
+        with self._segment_lock:
+            if self._segment_store is None:
+                if not self.initialized:
+                    self.initialize()
+                self._segment_store = SpinSegmentStore(
+                    self.task_dir,
+                    file_format=str(recording_config.get("file_format", "csv")).lower(),
+                    s3=self.s3,
+                    compression=self.compression
+                )
+            return self._segment_store
+    
+    def close_segment_store(self) -> List[str]:
+        """
+        关闭段文件（使用S3时同时上传）
+        
+        Returns:
+            段文件路径列表
+        """
+        with self._segment_lock:
+            store, self._segment_store = self._segment_store, None
+        return store.close() if store else []
+        
+    def get_binary_log_store(self) -> Optional[BinarySpinLogStore]:
+        """
+        获取共享的二进制日志存储
+        
+        session_recording.file_format为"binary"时，原始spins以定长记录追加到
+        每个player-machine对的一个二进制日志（记录定长，天然按对聚合，不受layout影响），
+        否则返回None。
+        
+        Returns:
+            BinarySpinLogStore实例或None
+        """
+        recording_config = self.config["session_recording"]
+        if str(recording_config.get("file_format", "csv")).lower() != "binary":
+            return None
+        
+        with self._binary_log_lock:
+            if self._binary_log_store is None:
+                if not self.initialized:
+                    self.initialize()
+                self._binary_log_store = BinarySpinLogStore(self.task_dir, s3=self.s3)
+            return self._binary_log_store
+    
+    def close_binary_log_store(self) -> List[str]:
+        """
+        关闭二进制日志（使用S3时同时上传）
+        
+        Returns:
+            日志文件路径列表
+        """
+        with self._binary_log_lock:
+            store, self._binary_log_store = self._binary_log_store, None
+        return store.close() if store else []
+        
+    def get_spin_sampler(self) -> Optional[SpinSampler]:
+        """
+        获取共享的spin记录抽样器
+        
+        session_recording.sampling.policy为all时返回None（记录全部spin）。
+        
+        Returns:
+            SpinSampler实例或None
+        """
+        sampling_config = self.config["session_recording"].get("sampling") or {}
+        if str(sampling_config.get("policy", "all")).lower() == "all":
+            return None
+        
+        with self._sampler_lock:
+            if self._spin_sampler is None:
+                if not self.initialized:
+                    self.initialize()
+                self._spin_sampler = SpinSampler(sampling_config, self.task_dir, s3=self.s3,
+                                                 compression=self.compression)
+            return self._spin_sampler
+    
+    def close_spin_sampler(self) -> Dict[str, Any]:
+        """
+        写出蓄水池抽样结果（reservoir策略），需在写入管线关闭之后调用
+        
+        Returns:
+            抽样统计
+        """
+        with self._sampler_lock:
+            sampler, self._spin_sampler = self._spin_sampler, None
+        if sampler is None:
+            return {}
+        self.sampling_metrics = sampler.close()
+        self.logger.info(f"Spin sampling ({self.sampling_metrics['policy']}): "
+                         f"{self.sampling_metrics['sessions_recorded']}/{self.sampling_metrics['sessions_seen']} sessions recorded")
+        return self.sampling_metrics
+        
+    def get_replay_store(self) -> Optional[ReplayLogStore]:
+        """
+        获取共享的回放日志存储
+        
+        session_recording.replay.enabled时，每个会话的机器RNG使用由基础种子派生的
+        独立种子，会话只记录种子和投注序列，需要时用replay命令重建spin。
+        
+        Returns:
+            ReplayLogStore实例或None
+        """
+        replay_config = self.config["session_recording"].get("replay") or {}
+        if not replay_config.get("enabled", False):
+            return None
+        
+        with self._replay_lock:
+            if self._replay_store is None:
+                if not self.initialized:
+                    self.initialize()
+                self._replay_store = ReplayLogStore(self.task_dir, base_seed=replay_config.get("seed"),
+                                                    s3=self.s3, compression=self.compression)
+                self.logger.info(f"Replay recording enabled (base seed: {self._replay_store.base_seed})")
+            return self._replay_store
+    
+    def close_replay_store(self) -> Dict[str, int]:
+        """
+        关闭回放日志（使用S3时同时上传），需在写入管线关闭之后调用
+        
+        Returns:
+            {回放日志路径: 会话数}
+        """
+        with self._replay_lock:
+            store, self._replay_store = self._replay_store, None
+        return store.close() if store else {}
         
     def get_reports_directory(self) -> str:
         """获取报告目录路径。"""
@@ -207,180 +424,81 @@ class OutputManager:
             
         return os.path.join(self.task_dir, "reports")
 
-    def finalize_all_summaries(self) -> Dict[str, str]:
+    def get_write_pipeline(self) -> Optional[AsyncWritePipeline]:
         """
-        合并所有player-machine对的临时summary文件到最终CSV
+        获取共享的后台写入管线
         
         Returns:
-            包含所有合并文件路径的字典 {pair_key: file_path}
+            session_recording.async_write启用时返回AsyncWritePipeline，否则None（同步写入）
         """
-        try:
-            # 获取所有临时summary文件
-            temp_dir = self.get_temp_summary_directory()
-            
-            if not os.path.exists(temp_dir):
-                self.logger.warning("Temp summary directory does not exist")
-                return {}
-            
-            # 解析所有文件找到player-machine对
-            pairs = set()
-            for filename in os.listdir(temp_dir):
-                if filename.endswith('_summary.json'):
-                    # 从文件名解析player_id和machine_id
-                    parts = filename.replace('_summary.json', '').split('_')
-                    if len(parts) >= 3:
-                        # 假设格式：player_id_machine_id_session_num
-                        session_num = parts[-1]
-                        machine_id = parts[-2]
-                        player_id = '_'.join(parts[:-2])
-                        pairs.add((player_id, machine_id))
-            
-            self.logger.info(f"Found {len(pairs)} player-machine pairs for summary finalization")
-            
-            # 为每个pair合并summary
-            merged_files = {}
-            for player_id, machine_id in pairs:
-                pair_key = f"{player_id}_{machine_id}"
-                merged_file = self._merge_temp_summaries_for_pair(player_id, machine_id)
-                if merged_file:
-                    merged_files[pair_key] = merged_file
-                    self.logger.debug(f"Merged summaries for {pair_key}: {merged_file}")
-            
-            self.logger.info(f"Successfully merged summaries for {len(merged_files)} pairs")
-            return merged_files
-            
-        except Exception as e:
-            self.logger.error(f"Error finalizing all summaries: {str(e)}")
+        async_config = self.config["session_recording"].get("async_write", {})
+        if not async_config.get("enabled", False):
+            return None
+        
+        with self._pipeline_lock:
+            if self._write_pipeline is None:
+                self._write_pipeline = AsyncWritePipeline(
+                    name="session_output",
+                    num_writers=async_config.get("num_writers", 1),
+                    max_queue_size=async_config.get("max_queue_size", 64)
+                )
+            return self._write_pipeline
+    
+    def close_write_pipeline(self) -> Dict[str, Any]:
+        """
+        写完队列中剩余的会话并停止写入线程
+        
+        Returns:
+            写入吞吐统计（未启用时为空字典）
+        """
+        with self._pipeline_lock:
+            pipeline, self._write_pipeline = self._write_pipeline, None
+        if pipeline is None:
             return {}
-
-    def _merge_temp_summaries_for_pair(self, player_id: str, machine_id: str) -> Optional[str]:
+        
+        pipeline.shutdown()
+        self.write_metrics = pipeline.get_metrics()
+        self.logger.info(
+            f"Async output: {self.write_metrics['sessions_written']} sessions, "
+            f"{self.write_metrics['rows_per_second']:.0f} rows/sec, "
+            f"blocked {self.write_metrics['blocked_seconds']:.2f}s"
+        )
+        return self.write_metrics
+        
+    def close_object_store(self) -> Dict[str, Any]:
         """
-        将特定player-machine对的临时summary文件合并成最终CSV
+        等待批量上传完成并写出manifest
+        
+        Returns:
+            上传统计（未启用批量上传时为空字典）
+        """
+        if isinstance(self.s3, BatchingUploader):
+            self.upload_metrics = self.s3.close()
+            self.logger.info(f"Object store uploads: {self.upload_metrics}")
+        return self.upload_metrics
+        
+    def finalize_all_summaries(self) -> Dict[str, str]:
+        """
+        完成所有player-machine对的summary CSV（关闭文件，使用S3时上传）
         
-        Args:
-            player_id: 玩家ID
-            machine_id: 机器ID
-            
         Returns:
-            合并后的CSV文件路径或S3相对路径
+            包含所有summary文件路径的字典 {pair_key: file_path}
         """
         try:
-            # 找到所有相关的临时summary文件
-            temp_dir = self.get_temp_summary_directory()
-            session_prefix = f"{player_id}_{machine_id}_"
+            with self._summary_lock:
+                aggregator, self._summary_aggregator = self._summary_aggregator, None
             
-            temp_files = []
-            for filename in os.listdir(temp_dir):
-                if filename.startswith(session_prefix) and filename.endswith('_summary.json'):
-                    temp_files.append(os.path.join(temp_dir, filename))
-            
-            if not temp_files:
-                self.logger.warning(f"No temp summary files found for {player_id}_{machine_id}")
-                return None
-            
-            # 按文件名排序确保session顺序
-            temp_files.sort()
-            
-            self.logger.info(f"Found {len(temp_files)} temp summary files for {player_id}_{machine_id}")
-            
-            # 读取所有summary数据
-            all_summaries = []
-            for temp_file in temp_files:
-                try:
-                    with open(temp_file, 'r', encoding='utf-8') as f:
-                        summary_data = json.load(f)
-                        all_summaries.append(summary_data)
-                except Exception as e:
-                    self.logger.error(f"Error reading temp file {temp_file}: {str(e)}")
-                    continue
-            
-            if not all_summaries:
-                self.logger.error(f"No valid summary data found for {player_id}_{machine_id}")
-                return None
-            
-            # 如果使用S3，直接上传而不保存本地文件
-            if self.s3:
-                # 构造S3路径（相对于task_dir）
-                task_dir_name = os.path.basename(self.task_dir)
-                s3_rel_path = f"{task_dir_name}/{player_id}/{machine_id}/summary/{player_id}_{machine_id}_sessions_summary.csv"
-                
-                # 创建CSV内容
-                all_fields = set()
-                for summary in all_summaries:
-                    all_fields.update(summary.keys())
-                
-                csv_fields = sorted(list(all_fields))
-                
-                # 构建CSV内容字符串
-                import io
-                csv_content = io.StringIO()
-                writer = csv.DictWriter(csv_content, fieldnames=csv_fields)
-                writer.writeheader()
-                
-                for summary in all_summaries:
-                    # 处理复杂字段
-                    row_data = {}
-                    for field in csv_fields:
-                        value = summary.get(field, '')
-                        
-                        if isinstance(value, (list, dict)):
-                            row_data[field] = json.dumps(value, ensure_ascii=False)
-                        else:
-                            row_data[field] = value
-                    
-                    writer.writerow(row_data)
-                
-                # 上传到S3
-                csv_bytes = csv_content.getvalue().encode('utf-8')
-                self.s3.upload_bytes(csv_bytes, s3_rel_path)
-                self.logger.info(f"Uploaded merged summary CSV to S3: {s3_rel_path}")
-                
-                return s3_rel_path
+            if aggregator is None:
+                self.logger.warning("No session summaries were recorded")
+                return {}
             
-            else:
-                # 本地存储
-                summary_dir = self.get_cluster_table_directory(player_id, machine_id, "summary")
-                csv_filepath = os.path.join(summary_dir, f"{player_id}_{machine_id}_sessions_summary.csv")
-                
-                # 获取所有字段名
-                all_fields = set()
-                for summary in all_summaries:
-                    all_fields.update(summary.keys())
-                
-                csv_fields = sorted(list(all_fields))
-                
-                with open(csv_filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.DictWriter(csvfile, fieldnames=csv_fields)
-                    writer.writeheader()
-                    
-                    for summary in all_summaries:
-                        # 处理复杂字段
-                        row_data = {}
-                        for field in csv_fields:
-                            value = summary.get(field, '')
-                            
-                            if isinstance(value, (list, dict)):
-                                row_data[field] = json.dumps(value, ensure_ascii=False)
-                            else:
-                                row_data[field] = value
-                        
-                        writer.writerow(row_data)
-                
-                self.logger.info(f"Merged {len(all_summaries)} summaries to {csv_filepath}")
-                return csv_filepath
+            merged_files = aggregator.finalize()
+            self.logger.info(f"Successfully finalized summaries for {len(merged_files)} pairs")
+            return merged_files
             
         except Exception as e:
-            self.logger.error(f"Error merging temp summaries for {player_id}_{machine_id}: {str(e)}")
-            return None
-        finally:
-            # 清理临时文件
-            if self.config.get("auto_cleanup", False):
-                for temp_file in temp_files:
-                    try:
-                        os.remove(temp_file)
-                        self.logger.debug(f"Removed temp file: {temp_file}")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to remove temp file {temp_file}: {str(e)}")
+            self.logger.error(f"Error finalizing all summaries: {str(e)}")
+            return {}
         
     def write_report(self, report_name: str, data: Dict[str, Any]) -> str:
         """写入报告。"""
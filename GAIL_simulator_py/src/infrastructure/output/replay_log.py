@@ -0,0 +1,178 @@
+# src/infrastructure/output/replay_log.py
+import os
+import json
+import random
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Sequence
+
+from .compression import CompressionSettings, open_text_writer, open_text_reader
+
+
+REPLAY_RNG = "mersenne"
+
+logger = logging.getLogger("infrastructure.output.replay")
+
+
+def replay_file_name(player_id: str, machine_id: str, extension: str = "") -> str:
+    """player-machine对的回放日志文件名（extension为压缩扩展名）"""
+    return f"{player_id}_{machine_id}_replay.jsonl{extension}"
+
+
+def session_seed(base_seed: int, session_id: str) -> int:
+    """
+    由基础种子和会话ID派生会话的机器RNG种子（与线程调度顺序无关）
+
+    Args:
+        base_seed: 本次模拟的基础种子
+        session_id: 会话ID
+
+    Returns:
+        63位非负整数种子
+    """
+    digest = hashlib.blake2b(f"{base_seed}:{session_id}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+def encode_runs(values: Sequence[float]) -> List[List[Any]]:
+    """
+    游程编码：[1, 1, 1, 2] -> [[1, 3], [2, 1]]
+
+    Args:
+        values: 投注序列
+
+    Returns:
+        [[值, 重复次数], ...]
+    """
+    runs: List[List[Any]] = []
+    for value in values:
+        if runs and runs[-1][0] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+    return runs
+
+
+def decode_runs(runs: Sequence[Sequence[Any]]) -> List[float]:
+    """encode_runs的逆运算"""
+    values: List[float] = []
+    for value, count in runs:
+        values.extend([value] * int(count))
+    return values
+
+
+def load_replay_entries(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    读取（可能压缩的）回放日志
+
+    Args:
+        path: 回放日志路径
+
+    Returns:
+        {session_id: 回放条目}，按写入顺序
+    """
+    entries = {}
+    with open_text_reader(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"忽略损坏的回放行: {path}")
+                continue
+            entries[entry["session_id"]] = entry
+    return entries
+
+
+class ReplayLogStore:
+    """
+    会话回放日志存储
+
+    机器的出奖结果只由RNG流和投注序列决定，因此每个会话只需记录
+    (机器RNG种子, 投注序列的游程编码, 初始余额等)，需要时再用SessionReplayer
+    逐spin重建。每个player-machine对一个JSON-lines文件，每个会话一行。
+    """
+
+    def __init__(self, task_dir: str, base_seed: Optional[int] = None, s3=None,
+                 compression: Optional[CompressionSettings] = None):
+        """
+        初始化回放日志存储
+
+        Args:
+            task_dir: 模拟任务目录
+            base_seed: 基础种子，None时随机生成（会写入每条回放条目）
+            s3: 可选的对象存储，close时上传回放日志
+            compression: 压缩配置
+        """
+        self.task_dir = task_dir
+        self.base_seed = int(base_seed) if base_seed is not None else random.SystemRandom().getrandbits(63)
+        self.s3 = s3
+        self.compression = compression or CompressionSettings()
+        self._files: Dict[str, Any] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def session_seed(self, session_id: str) -> int:
+        """某个会话的机器RNG种子"""
+        return session_seed(self.base_seed, session_id)
+
+    def replay_path(self, player_id: str, machine_id: str) -> str:
+        """某个对的回放日志路径"""
+        return os.path.join(self.task_dir, player_id, machine_id, "replay",
+                            replay_file_name(player_id, machine_id, self.compression.extension))
+
+    def add_entry(self, entry: Dict[str, Any]) -> str:
+        """
+        追加一个会话的回放条目
+
+        Args:
+            entry: 回放条目（需包含session_id, player_id, machine_id）
+
+        Returns:
+            回放日志路径
+        """
+        path = self.replay_path(entry["player_id"], entry["machine_id"])
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            f = self._files.get(path)
+            if f is None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                f = self._files[path] = open_text_writer(path, self.compression, 'a')
+                self._counts[path] = 0
+            f.write(line)
+            if not self.compression.enabled:
+                f.flush()
+            self._counts[path] += 1
+        return path
+
+    def close(self) -> Dict[str, int]:
+        """
+        关闭所有回放日志，使用S3时上传并删除本地文件
+
+        Returns:
+            {回放日志路径或S3相对路径: 会话数}
+        """
+        with self._lock:
+            files = dict(self._files)
+            counts = dict(self._counts)
+            self._files.clear()
+            self._counts.clear()
+
+        task_dir_name = os.path.basename(self.task_dir)
+        results = {}
+        for path, f in files.items():
+            f.close()
+            if self.s3:
+                rel_path = f"{task_dir_name}/{os.path.relpath(path, self.task_dir)}".replace("\\", "/")
+                self.s3.upload_file(path, rel_path)
+                os.remove(path)
+                results[rel_path] = counts[path]
+            else:
+                results[path] = counts[path]
+
+        if files:
+            logger.info(f"Closed {len(files)} replay logs ({sum(counts.values())} sessions)")
+        return results
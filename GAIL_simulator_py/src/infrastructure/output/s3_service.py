@@ -1,13 +1,23 @@
 # src/infrastructure/output/s3_service.py
+import io
 import os
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
-from typing import Union
+from typing import List, Optional, Union
 
-class S3Service:
-    def __init__(self, bucket: str, region: str, prefix: str):
+from .object_store import ObjectStore, RetryPolicy
+
+# 超过该大小的字节数据走分片上传
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+
+class S3Service(ObjectStore):
+    def __init__(self, bucket: str, region: str, prefix: str, retry: Optional[RetryPolicy] = None):
         self.bucket = bucket
         self.prefix = prefix.strip("/")
+        self.retry = retry or RetryPolicy()
+        self.transfer_config = TransferConfig(multipart_threshold=MULTIPART_THRESHOLD)
 
         # 如果运行在带 IAM Role 的 EC2 上，这里不需要显式传 creds
         self.client = boto3.client("s3", region_name=region)
@@ -23,23 +33,23 @@ class S3Service:
 
     def upload_file(self, local_path: str, rel_path: str) -> None:
         """
-        上传本地文件到S3
-        
+        上传本地文件到S3（大文件自动分片上传）
+
         Args:
             local_path: 本地文件路径
             rel_path: S3中的相对路径（相对于prefix）
         """
         key = self._make_key(rel_path)
         try:
-            self.client.upload_file(local_path, self.bucket, key)
+            self.retry.call(self.client.upload_file, local_path, self.bucket, key, Config=self.transfer_config)
             # 可根据需要打印日志
         except ClientError as e:
-            raise RuntimeError(f"S3 上传失败: {e}")
-    
+            raise RuntimeError(f"S3 上传失败: {e}") from e
+
     def upload_bytes(self, data: Union[bytes, str], rel_path: str) -> None:
         """
         直接上传字节数据到S3，不保存本地文件
-        
+
         Args:
             data: 要上传的数据（bytes或string）
             rel_path: S3中的相对路径（相对于prefix）
@@ -49,11 +59,43 @@ class S3Service:
             # 如果是字符串，转换为bytes
             if isinstance(data, str):
                 data = data.encode('utf-8')
-            
-            self.client.put_object(
-                Bucket=self.bucket,
-                Key=key,
-                Body=data
-            )
+
+            if len(data) >= MULTIPART_THRESHOLD:
+                self.retry.call(
+                    lambda: self.client.upload_fileobj(io.BytesIO(data), self.bucket, key, Config=self.transfer_config)
+                )
+            else:
+                self.retry.call(self.client.put_object, Bucket=self.bucket, Key=key, Body=data)
         except ClientError as e:
-            raise RuntimeError(f"S3 字节上传失败: {e}")
\ No newline at end of file
+            raise RuntimeError(f"S3 字节上传失败: {e}") from e
+
+    def _get_object(self, rel_path: str, **kwargs) -> bytes:
+        key = self._make_key(rel_path)
+        try:
+            response = self.retry.call(self.client.get_object, Bucket=self.bucket, Key=key, **kwargs)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise FileNotFoundError(key) from e
+            raise RuntimeError(f"S3 下载失败: {e}") from e
+        return response["Body"].read()
+
+    def download_bytes(self, rel_path: str) -> bytes:
+        """下载对象内容"""
+        return self._get_object(rel_path)
+
+    def download_range(self, rel_path: str, offset: int, length: int) -> bytes:
+        """用Range请求只下载对象的一段"""
+        if length <= 0:
+            return b""
+        return self._get_object(rel_path, Range=f"bytes={offset}-{offset + length - 1}")
+
+    def list_keys(self, rel_prefix: str = "") -> List[str]:
+        """列出prefix/rel_prefix下的对象（相对路径）"""
+        key_prefix = self._make_key(rel_prefix) if rel_prefix else (self.prefix + "/" if self.prefix else "")
+        base = self.prefix + "/" if self.prefix else ""
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=key_prefix):
+            for item in page.get("Contents", []):
+                keys.append(item["Key"][len(base):])
+        return sorted(keys)
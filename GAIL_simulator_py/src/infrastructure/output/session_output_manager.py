@@ -7,6 +7,32 @@ import uuid
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from .spin_columnar import COLUMNAR_FORMATS, FILE_EXTENSIONS, columnar_compression, write_spins_file
+from .compression import CompressionSettings, compress_bytes, open_text_writer
+from .spin_binary import machine_config_hash
+from .replay_log import REPLAY_RNG, encode_runs
+
+
+class SessionRecord:
+    """
+    会话输出的紧凑载荷
+
+    在会话线程中从GamingSession生成（spins只做浅拷贝，summary在此时计算），
+    之后的序列化和写入可以放到后台写入线程执行，不再引用会话对象。
+    """
+    __slots__ = ("session_id", "player_id", "machine_id", "spins", "summary", "machine_hash", "replay")
+
+    def __init__(self, session_id: str, player_id: str, machine_id: str,
+                 spins: List[Dict[str, Any]], summary: Optional[Dict[str, Any]] = None,
+                 machine_hash: bytes = bytes(32), replay: Optional[Dict[str, Any]] = None):
+        self.session_id = session_id
+        self.player_id = player_id
+        self.machine_id = machine_id
+        self.spins = spins
+        self.summary = summary
+        self.machine_hash = machine_hash
+        self.replay = replay
+
 
 class SessionOutputManager:
     """
@@ -29,6 +55,27 @@ class SessionOutputManager:
         # Session级配置
         self.config = config or {}
         self.should_record_spins = self.config.get("record_spins", True)
+        recording_config = getattr(base_output_manager, "config", {}).get("session_recording", {})
+        
+        # 回放记录：记录种子和投注序列，默认不再保存原始spin
+        get_replay_store = getattr(base_output_manager, "get_replay_store", None)
+        self.replay_store = get_replay_store() if get_replay_store else None
+        self.should_record_bets = self.replay_store is not None
+        if self.replay_store is not None and not (recording_config.get("replay") or {}).get("keep_spins", False):
+            self.should_record_spins = False
+        
+        # spin记录抽样：会话级策略在此决定是否记录，summary始终来自内存计数器
+        get_spin_sampler = getattr(base_output_manager, "get_spin_sampler", None)
+        self.sampler = get_spin_sampler() if get_spin_sampler else None
+        self.sample_weight = 1.0
+        if self.sampler is not None and self.should_record_spins:
+            self.should_record_spins, self.sample_weight = self.sampler.sample_session(session_id)
+        
+        # 原始spin文件格式：csv / parquet / arrow
+        self.file_format = str(self.config.get("file_format", recording_config.get("file_format", "csv"))).lower()
+        
+        # 输出压缩（在写入线程中执行）
+        self.compression = getattr(base_output_manager, "compression", None) or CompressionSettings()
         
         self.logger.debug(f"SessionOutputManager initialized for {session_id}")
     
@@ -36,19 +83,111 @@ class SessionOutputManager:
         """
         保存完整的session数据（raw + summary）
         
+        启用异步写入时只在当前线程生成SessionRecord并放入写入队列，
+        否则同步写入。
+        
         Args:
             session: GamingSession实例
             
+        Returns:
+            是否保存成功（异步时表示是否成功入队）
+        """
+        try:
+            record = self.build_record(session)
+            
+            get_write_pipeline = getattr(self.base_output_manager, "get_write_pipeline", None)
+            pipeline = get_write_pipeline() if get_write_pipeline else None
+            if pipeline is not None:
+                pipeline.submit(self.write_record, record, rows=len(record.spins))
+                self.logger.debug(f"Session data queued for {self.session_id}")
+                return True
+            
+            return self.write_record(record)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to save session data: {e}")
+            return False
+    
+    def build_record(self, session) -> SessionRecord:
+        """
+        从会话生成输出载荷
+        
+        Args:
+            session: GamingSession实例
+            
+        Returns:
+            SessionRecord
+        """
+        # 获取session统计摘要
+        summary_data = session.get_session_summary()
+        
+        # 添加session级别的额外信息
+        summary_data.update({
+            # TODO session id？
+            "session_id": (lambda x: x.split("_")[-1] if "_" in x else x)(self.session_id) if self.session_id else self.session_id,
+            "player_id": session.player.id,
+            "machine_id": session.machine.id,
+            "initial_balance": session.get_initial_balance(),
+            "final_balance": session.get_current_balance(),
+            "first_bet": session.get_first_bet(),
+            "sim_duration": session.get_sim_duration(),
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
+        # 会话级抽样：记录是否保留了spin及其权重，便于对raw数据做加权估计
+        if self.sampler is not None and self.sampler.session_level:
+            summary_data["spins_recorded"] = self.should_record_spins
+            summary_data["sample_weight"] = self.sample_weight if self.should_record_spins else 0.0
+        
+        spins = list(session.spins) if self.should_record_spins and session.spins else []
+        
+        # 二进制日志头部和回放条目记录机器配置摘要
+        machine_hash = bytes(32)
+        if self.file_format == "binary" or self.replay_store is not None:
+            machine_hash = machine_config_hash(getattr(session.machine, "config", None))
+        
+        replay = None
+        if self.replay_store is not None:
+            replay = {
+                "session_id": self.session_id,
+                "player_id": session.player.id,
+                "machine_id": session.machine.id,
+                "rng": REPLAY_RNG,
+                "seed": self.replay_store.session_seed(self.session_id),
+                "machine_hash": machine_hash.hex(),
+                "currency": session.player.currency,
+                "active_lines": session.player.config.get("active_lines", None),
+                "initial_balance": session.get_initial_balance(),
+                "final_balance": session.get_current_balance(),
+                "total_spins": len(session.bets),
+                "bets": encode_runs(session.bets)
+            }
+        
+        return SessionRecord(self.session_id, session.player.id, session.machine.id, spins, summary_data,
+                             machine_hash=machine_hash, replay=replay)
+    
+    def write_record(self, record: SessionRecord) -> bool:
+        """
+        写入一个会话载荷（raw + summary），可在后台写入线程中调用
+        
+        Args:
+            record: SessionRecord
+            
         Returns:
             是否保存成功
         """
         try:
             # 保存原始spin数据到raw_data目录
-            if self.should_record_spins and session.spins:
-                self._save_raw_spins_data(session)
+            if self.should_record_spins and record.spins:
+                self._save_raw_spins_data(record)
+            
+            # 保存回放条目
+            if record.replay is not None and self.replay_store is not None:
+                self.replay_store.add_entry(record.replay)
             
-            # 保存session摘要到temp_summaries目录
-            self._save_session_summary_to_temp(session)
+            # 保存session摘要到summary聚合器
+            if record.summary is not None:
+                self._save_session_summary(record)
             
             self.logger.debug(f"Session data saved for {self.session_id}")
             return True
@@ -57,29 +196,47 @@ class SessionOutputManager:
             self.logger.error(f"Failed to save session data: {e}")
             return False
     
-    def _save_raw_spins_data(self, session) -> Optional[str]:
+    def _save_raw_spins_data(self, record: SessionRecord) -> Optional[str]:
         """
         保存原始spins数据到CSV，直接使用spins中的字典数据
         
         Args:
-            session: GamingSession实例
+            record: SessionRecord
             
         Returns:
             保存的文件路径或S3相对路径
         """
-        if not self.should_record_spins or not session.spins:
+        if not self.should_record_spins or not record.spins:
+            return None
+        
+        # reservoir策略：spin只进入所属对的蓄水池，close时统一写出
+        if self.sampler is not None and self.sampler.uses_reservoir:
+            self.sampler.offer_spins(record.player_id, record.machine_id, record.spins)
             return None
+        
+        get_binary_log_store = getattr(self.base_output_manager, "get_binary_log_store", None)
+        binary_log_store = get_binary_log_store() if get_binary_log_store else None
+        if binary_log_store is not None:
+            return self._save_raw_spins_binary(record, binary_log_store)
+        
+        get_segment_store = getattr(self.base_output_manager, "get_segment_store", None)
+        segment_store = get_segment_store() if get_segment_store else None
+        if segment_store is not None:
+            return self._save_raw_spins_segment(record, segment_store)
+        
+        if self.file_format in COLUMNAR_FORMATS:
+            return self._save_raw_spins_columnar(record)
             
         try:
             # 解析player_id和machine_id
-            player_id = session.player.id
-            machine_id = session.machine.id
+            player_id = record.player_id
+            machine_id = record.machine_id
             
             # 获取所有字段名（从第一个spin获取）
-            if not session.spins:
+            if not record.spins:
                 return None
                 
-            first_spin = session.spins[0]
+            first_spin = record.spins[0]
             if isinstance(first_spin, dict):
                 csv_fields = list(first_spin.keys())
             else:
@@ -90,7 +247,7 @@ class SessionOutputManager:
             if self.base_output_manager.s3:
                 # 构造S3路径（包含task_dir名称）
                 task_dir_name = os.path.basename(self.base_output_manager.task_dir)
-                s3_rel_path = f"{task_dir_name}/{player_id}/{machine_id}/raw_data/{self.session_id}_raw.csv"
+                s3_rel_path = f"{task_dir_name}/{player_id}/{machine_id}/raw_data/{self.session_id}_raw.csv{self.compression.extension}"
                 
                 # 创建CSV内容
                 import io
@@ -98,7 +255,7 @@ class SessionOutputManager:
                 writer = csv.DictWriter(csv_content, fieldnames=csv_fields)
                 writer.writeheader()
                 
-                for spin in session.spins:
+                for spin in record.spins:
                     # 处理数据格式
                     if isinstance(spin, dict):
                         row_data = spin.copy()
@@ -114,7 +271,7 @@ class SessionOutputManager:
                     writer.writerow(row_data)
                 
                 # 上传到S3
-                csv_bytes = csv_content.getvalue().encode('utf-8')
+                csv_bytes = compress_bytes(csv_content.getvalue().encode('utf-8'), self.compression)
                 self.base_output_manager.s3.upload_bytes(csv_bytes, s3_rel_path)
                 self.logger.debug(f"Raw spins data uploaded to S3: {s3_rel_path}")
                 
@@ -128,15 +285,15 @@ class SessionOutputManager:
                 )
                 
                 # 使用session_id作为文件名
-                filename = f"{self.session_id}_raw.csv"
+                filename = f"{self.session_id}_raw.csv{self.compression.extension}"
                 filepath = os.path.join(raw_data_dir, filename)
                 
-                # 写入CSV数据
-                with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+                # 写入CSV数据（启用压缩时流式压缩）
+                with open_text_writer(filepath, self.compression) as csvfile:
                     writer = csv.DictWriter(csvfile, fieldnames=csv_fields)
                     writer.writeheader()
                     
-                    for spin in session.spins:
+                    for spin in record.spins:
                         # 处理数据格式
                         if isinstance(spin, dict):
                             row_data = spin.copy()
@@ -158,45 +315,115 @@ class SessionOutputManager:
             self.logger.error(f"Failed to save raw spins data: {e}")
             return None
     
-    def _save_session_summary_to_temp(self, session) -> Optional[str]:
+    def _save_raw_spins_columnar(self, record: SessionRecord) -> Optional[str]:
         """
-        保存session摘要数据到临时目录
+        以Parquet/Arrow IPC列式格式保存原始spins数据
         
         Args:
-            session: GamingSession实例
+            record: SessionRecord
             
         Returns:
-            保存的文件路径或None
+            保存的文件路径或S3相对路径
         """
         try:
-            # 获取session统计摘要
-            summary_data = session.get_session_summary()
+            player_id = record.player_id
+            machine_id = record.machine_id
+            filename = f"{self.session_id}_raw{FILE_EXTENSIONS[self.file_format]}"
             
-            # 添加session级别的额外信息
-            summary_data.update({
-                # TODO session id？
-                "session_id": (lambda x: x.split("_")[-1] if "_" in x else x)(self.session_id) if self.session_id else self.session_id,
-                "player_id": session.player.id,
-                "machine_id": session.machine.id,
-                "initial_balance": session.get_initial_balance(),
-                "final_balance": session.get_current_balance(),
-                "first_bet": session.get_first_bet(),
-                "sim_duration": session.get_sim_duration(),
-                "timestamp": datetime.utcnow().isoformat()
-            })
+            if self.base_output_manager.s3:
+                import io
+                task_dir_name = os.path.basename(self.base_output_manager.task_dir)
+                s3_rel_path = f"{task_dir_name}/{player_id}/{machine_id}/raw_data/{filename}"
+                
+                buffer = io.BytesIO()
+                write_spins_file(buffer, record.spins, file_format=self.file_format, **self._columnar_options())
+                self.base_output_manager.s3.upload_bytes(buffer.getvalue(), s3_rel_path)
+                self.logger.debug(f"Raw spins data uploaded to S3: {s3_rel_path}")
+                return s3_rel_path
+            
+            raw_data_dir = self.base_output_manager.get_cluster_table_directory(
+                player_id, machine_id, "raw_data"
+            )
+            filepath = os.path.join(raw_data_dir, filename)
+            write_spins_file(filepath, record.spins, file_format=self.file_format, **self._columnar_options())
             
-            # 获取临时目录
-            temp_dir = self.base_output_manager.get_temp_summary_directory()
+            self.logger.debug(f"Raw spins data saved to: {filepath}")
+            return filepath
             
-            # 使用session_id作为文件名
-            filename = f"{self.session_id}_summary.json"
-            filepath = os.path.join(temp_dir, filename)
+        except Exception as e:
+            self.logger.error(f"Failed to save raw spins data ({self.file_format}): {e}")
+            return None
+    
+    def _columnar_options(self) -> Dict[str, Any]:
+        """列式文件使用内部压缩（保留按列读取能力）"""
+        return {
+            "compression": columnar_compression(self.file_format, self.compression.codec),
+            "compression_level": self.compression.level
+        }
+    
+    def _save_raw_spins_segment(self, record: SessionRecord, segment_store) -> Optional[str]:
+        """
+        把原始spins追加到player-machine对的共享段文件
+        
+        Args:
+            record: SessionRecord
+            segment_store: SpinSegmentStore实例
             
-            # 写入JSON数据
-            with open(filepath, 'w', encoding='utf-8') as jsonfile:
-                json.dump(summary_data, jsonfile, indent=2, ensure_ascii=False)
+        Returns:
+            段文件路径
+        """
+        try:
+            entry = segment_store.append_session(
+                record.player_id, record.machine_id, self.session_id, record.spins
+            )
+            self.logger.debug(f"Raw spins appended to segment: {entry['segment_path']} "
+                              f"(offset={entry['offset']}, rows={entry['rows']})")
+            return entry["segment_path"]
+            
+        except Exception as e:
+            self.logger.error(f"Failed to append raw spins to segment: {e}")
+            return None
+    
+    def _save_raw_spins_binary(self, record: SessionRecord, binary_log_store) -> Optional[str]:
+        """
+        把原始spins以定长记录追加到player-machine对的二进制日志
+        
+        Args:
+            record: SessionRecord
+            binary_log_store: BinarySpinLogStore实例
+            
+        Returns:
+            日志文件路径
+        """
+        try:
+            entry = binary_log_store.append_session(
+                record.player_id, record.machine_id, self.session_id, record.spins,
+                machine_hash=record.machine_hash
+            )
+            self.logger.debug(f"Raw spins appended to binary log: {entry['log_path']} "
+                              f"(row_start={entry['row_start']}, rows={entry['rows']})")
+            return entry["log_path"]
+            
+        except Exception as e:
+            self.logger.error(f"Failed to append raw spins to binary log: {e}")
+            return None
+    
+    def _save_session_summary(self, record: SessionRecord) -> Optional[str]:
+        """
+        把session摘要追加到所属player-machine对的summary CSV
+        
+        Args:
+            record: SessionRecord
+            
+        Returns:
+            summary文件路径或None
+        """
+        try:
+            aggregator = self.base_output_manager.get_summary_aggregator()
+            aggregator.add_summary(record.player_id, record.machine_id, record.summary)
             
-            self.logger.debug(f"Session summary saved to temp: {filepath}")
+            filepath = aggregator.summary_path(record.player_id, record.machine_id)
+            self.logger.debug(f"Session summary appended to: {filepath}")
             return filepath
             
         except Exception as e:
@@ -0,0 +1,453 @@
+# src/infrastructure/output/spin_binary.py
+import os
+import json
+import struct
+import hashlib
+import logging
+import threading
+import numpy as np
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+
+BINARY_EXTENSION = ".spinlog"
+SESSIONS_EXTENSION = ".sessions"
+BINARY_MAGIC = b"GSPINLOG"
+BINARY_VERSION = 1
+
+# 固定头部（小端）：magic, version, header_size, record_size, record_count, grid_size, machine_hash, layout_len
+_HEADER_STRUCT = struct.Struct("<8sHIIQH32sI")
+_RECORD_COUNT_OFFSET = 18
+_HEADER_ALIGN = 64
+
+# 标志位
+FLAG_IN_FREE_SPINS = 1
+FLAG_FREE_SPINS_TRIGGERED = 2
+FLAG_BIG_WIN = 4
+
+# 记录字段：(字段名, numpy类型)，8字节字段在前以保持自然对齐
+RECORD_FIELDS = (
+    ("bet", "<f8"),
+    ("payout", "<f8"),
+    ("balance_before", "<f8"),
+    ("balance_after", "<f8"),
+    ("session_seq", "<u4"),
+    ("spin_number", "<u4"),
+    ("streak", "<i4"),
+    ("free_spins_remaining", "<u2"),
+    ("flags", "u1"),
+    ("scatter_count", "u1"),
+)
+
+logger = logging.getLogger("infrastructure.output.binary")
+
+
+def binary_base_name(player_id: str, machine_id: str) -> str:
+    """player-machine对的二进制日志文件名（不含扩展名）"""
+    return f"{player_id}_{machine_id}_spins"
+
+
+def record_dtype(grid_size: int) -> np.dtype:
+    """
+    定长记录的结构化dtype
+
+    Args:
+        grid_size: 结果网格的格子数（行数 x 卷轴数）
+
+    Returns:
+        numpy结构化dtype（小端、无填充）
+    """
+    return np.dtype(list(RECORD_FIELDS) + [("grid", "i1", (grid_size,))])
+
+
+def machine_config_hash(machine_config: Optional[Dict[str, Any]]) -> bytes:
+    """
+    机器配置的SHA-256摘要，用于确认日志对应的卷轴/赔付表版本
+
+    Args:
+        machine_config: 机器配置字典
+
+    Returns:
+        32字节摘要（无配置时为全零）
+    """
+    if not machine_config:
+        return bytes(32)
+    payload = json.dumps(machine_config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).digest()
+
+
+def spins_to_records(spins: Sequence[Dict[str, Any]], dtype: np.dtype, session_seq: int = 0) -> np.ndarray:
+    """
+    把spin字典列表转换为定长记录数组
+
+    Args:
+        spins: SpinResult.to_dict()格式的字典列表
+        dtype: record_dtype()返回的dtype
+        session_seq: 会话在日志中的序号
+
+    Returns:
+        结构化数组
+    """
+    records = np.zeros(len(spins), dtype=dtype)
+    if not len(spins):
+        return records
+
+    for name in ("bet", "payout", "balance_before", "balance_after"):
+        records[name] = [spin.get(name, 0.0) for spin in spins]
+    for name in ("spin_number", "streak", "free_spins_remaining", "scatter_count"):
+        records[name] = [spin.get(name, 0) for spin in spins]
+    records["session_seq"] = session_seq
+    records["flags"] = [
+        (FLAG_IN_FREE_SPINS if spin.get("in_free_spins") else 0)
+        | (FLAG_FREE_SPINS_TRIGGERED if spin.get("free_spins_triggered") else 0)
+        | (FLAG_BIG_WIN if spin.get("big_win") else 0)
+        for spin in spins
+    ]
+
+    grid_size = dtype["grid"].shape[0]
+    for row, spin in enumerate(spins):
+        cells = spin.get("result_grid") or ()
+        if len(cells) != grid_size:
+            raise ValueError(f"网格大小不一致: 期望{grid_size}, 实际{len(cells)}")
+        records["grid"][row] = cells
+    return records
+
+
+def _encode_header(dtype: np.dtype, record_count: int, machine_hash: bytes,
+                   player_id: str, machine_id: str) -> bytes:
+    layout = json.dumps({
+        "fields": [[name, dtype[name].base.str, list(dtype[name].shape)] for name in dtype.names],
+        "flags": {"in_free_spins": FLAG_IN_FREE_SPINS,
+                  "free_spins_triggered": FLAG_FREE_SPINS_TRIGGERED,
+                  "big_win": FLAG_BIG_WIN},
+        "player_id": player_id,
+        "machine_id": machine_id
+    }, ensure_ascii=False).encode('utf-8')
+
+    # 头部补齐到64字节，使记录区起点对齐
+    raw_size = _HEADER_STRUCT.size + len(layout)
+    header_size = -(-raw_size // _HEADER_ALIGN) * _HEADER_ALIGN
+    fixed = _HEADER_STRUCT.pack(BINARY_MAGIC, BINARY_VERSION, header_size, dtype.itemsize,
+                                record_count, dtype["grid"].shape[0], machine_hash, len(layout))
+    return fixed + layout + bytes(header_size - raw_size)
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """
+    读取二进制日志头部
+
+    Args:
+        path: 日志文件路径
+
+    Returns:
+        头部字典：header_size, record_size, record_count, grid_size, machine_hash, dtype, layout
+    """
+    with open(path, 'rb') as f:
+        fixed = f.read(_HEADER_STRUCT.size)
+        if len(fixed) < _HEADER_STRUCT.size:
+            raise ValueError(f"不是有效的spin二进制日志: {path}")
+        magic, version, header_size, record_size, record_count, grid_size, machine_hash, layout_len = \
+            _HEADER_STRUCT.unpack(fixed)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"不是有效的spin二进制日志: {path}")
+        if version > BINARY_VERSION:
+            raise ValueError(f"不支持的spin二进制日志版本: {version}")
+        layout = json.loads(f.read(layout_len).decode('utf-8'))
+
+    dtype = np.dtype([(name, type_str, tuple(shape)) if shape else (name, type_str)
+                      for name, type_str, shape in layout["fields"]])
+    if dtype.itemsize != record_size:
+        raise ValueError(f"记录大小与字段布局不一致: {record_size} != {dtype.itemsize}")
+
+    # 记录数以头部为准，但不超过文件中完整记录的数量（防止写入中途退出）
+    complete = (os.path.getsize(path) - header_size) // record_size
+    return {
+        "version": version,
+        "header_size": header_size,
+        "record_size": record_size,
+        "record_count": min(record_count, max(complete, 0)),
+        "grid_size": grid_size,
+        "machine_hash": machine_hash.hex(),
+        "dtype": dtype,
+        "layout": layout
+    }
+
+
+class BinarySpinLogWriter:
+    """
+    单个player-machine对的定长记录二进制日志写入器
+
+    文件由头部（机器配置哈希、字段布局、记录数）和连续的小端定长记录组成。
+    每个会话的记录追加到文件末尾后再原地更新头部记录数，进程中途退出时
+    最多留下未计入记录数的尾部字节。会话ID按序号写入同名的.sessions文件。
+    """
+
+    def __init__(self, log_path: str, grid_size: int, machine_hash: bytes = bytes(32),
+                 player_id: str = "", machine_id: str = ""):
+        """
+        打开（或续写）二进制日志
+
+        Args:
+            log_path: 日志文件路径
+            grid_size: 结果网格的格子数
+            machine_hash: 机器配置摘要（32字节）
+            player_id: 玩家ID（写入头部布局）
+            machine_id: 机器ID（写入头部布局）
+        """
+        self.log_path = log_path
+        self.sessions_path = os.path.splitext(log_path)[0] + SESSIONS_EXTENSION
+        self.dtype = record_dtype(grid_size)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
+            header = read_header(log_path)
+            if header["dtype"] != self.dtype:
+                raise ValueError(f"已有日志的字段布局不一致: {log_path}")
+            if header["machine_hash"] != machine_hash.hex():
+                logger.warning(f"机器配置哈希与已有日志不一致: {log_path}")
+            self.header_size = header["header_size"]
+            self.sessions = self._load_sessions()
+            self.record_count = self._committed_records(header)
+            self._file = open(log_path, 'r+b')
+            # 丢弃未登记会话ID或未计入记录数的尾部记录
+            self._file.truncate(self.header_size + self.record_count * self.dtype.itemsize)
+            self._file.seek(_RECORD_COUNT_OFFSET)
+            self._file.write(struct.pack("<Q", self.record_count))
+            self._file.flush()
+        else:
+            header_bytes = _encode_header(self.dtype, 0, machine_hash, player_id, machine_id)
+            self.header_size = len(header_bytes)
+            self.record_count = 0
+            self.sessions = 0
+            self._file = open(log_path, 'w+b')
+            self._file.write(header_bytes)
+            self._file.flush()
+            open(self.sessions_path, 'w').close()
+
+        self._sessions_file = open(self.sessions_path, 'a', encoding='utf-8')
+        self.closed = False
+
+    def _load_sessions(self) -> int:
+        if not os.path.exists(self.sessions_path):
+            return 0
+        with open(self.sessions_path, 'r', encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    def _committed_records(self, header: Dict[str, Any]) -> int:
+        """已登记会话ID的记录数（会话ID在记录之后写入）"""
+        count = header["record_count"]
+        if not count:
+            return 0
+        session_seq = np.memmap(self.log_path, dtype=self.dtype, mode='r',
+                                offset=self.header_size, shape=(count,))["session_seq"]
+        return int(np.searchsorted(session_seq, self.sessions))
+
+    def append_session(self, session_id: str, spins: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        追加一个会话的spins
+
+        Args:
+            session_id: 会话ID
+            spins: spin字典列表
+
+        Returns:
+            {session_id, session_seq, row_start, rows}
+        """
+        with self._lock:
+            if self.closed:
+                raise ValueError(f"Binary log writer is closed: {self.log_path}")
+
+            session_seq = self.sessions
+            records = spins_to_records(spins, self.dtype, session_seq)
+            row_start = self.record_count
+
+            self._file.seek(self.header_size + row_start * self.dtype.itemsize)
+            self._file.write(records.tobytes())
+            self.record_count += len(records)
+            self._file.seek(_RECORD_COUNT_OFFSET)
+            self._file.write(struct.pack("<Q", self.record_count))
+            self._file.flush()
+
+            self._sessions_file.write(session_id + "\n")
+            self._sessions_file.flush()
+            self.sessions += 1
+
+            return {"session_id": session_id, "session_seq": session_seq,
+                    "row_start": row_start, "rows": len(records)}
+
+    def close(self):
+        """关闭日志文件"""
+        with self._lock:
+            if self.closed:
+                return
+            self._file.close()
+            self._sessions_file.close()
+            self.closed = True
+
+
+class BinarySpinLogStore:
+    """
+    按player-machine对管理二进制日志写入器
+
+    所有会话线程共享一个实例，网格大小从每个对的第一个非空会话推断。
+    在此之前到达的空会话先暂存会话ID，创建写入器时按顺序补登记。
+    """
+
+    def __init__(self, task_dir: str, s3=None):
+        """
+        初始化二进制日志存储
+
+        Args:
+            task_dir: 模拟任务目录
+            s3: 可选的对象存储，close时上传日志和会话列表
+        """
+        self.task_dir = task_dir
+        self.s3 = s3
+        self._writers: Dict[str, BinarySpinLogWriter] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def log_path(self, player_id: str, machine_id: str) -> str:
+        """某个对的日志文件路径"""
+        return os.path.join(self.task_dir, player_id, machine_id, "raw_data",
+                            binary_base_name(player_id, machine_id) + BINARY_EXTENSION)
+
+    def append_session(self, player_id: str, machine_id: str, session_id: str,
+                       spins: Sequence[Dict[str, Any]], machine_hash: bytes = bytes(32)) -> Dict[str, Any]:
+        """
+        把一个会话追加到所属对的二进制日志
+
+        Returns:
+            该会话的位置信息（附带log_path）
+        """
+        path = self.log_path(player_id, machine_id)
+        with self._lock:
+            writer = self._writers.get(path)
+            if writer is None:
+                pending = self._pending.setdefault(path, [])
+                if not spins:
+                    # 空会话无法确定网格大小，等第一个非空会话再创建日志
+                    pending.append(session_id)
+                    return {"session_id": session_id, "session_seq": len(pending) - 1,
+                            "row_start": 0, "rows": 0, "log_path": path}
+                grid_size = len(spins[0].get("result_grid") or ())
+                writer = BinarySpinLogWriter(path, grid_size, machine_hash, player_id, machine_id)
+                for pending_id in self._pending.pop(path):
+                    writer.append_session(pending_id, ())
+                self._writers[path] = writer
+        entry = writer.append_session(session_id, spins)
+        return dict(entry, log_path=writer.log_path)
+
+    def close(self) -> List[str]:
+        """
+        关闭所有日志，使用S3时上传日志和会话列表
+
+        Returns:
+            已关闭的日志文件路径列表
+        """
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+            pending = self._pending
+            self._pending = {}
+
+        for path, session_ids in pending.items():
+            logger.warning(f"No spins recorded for {len(session_ids)} sessions, binary log not created: {path}")
+
+        task_dir_name = os.path.basename(self.task_dir)
+        for writer in writers:
+            writer.close()
+            if self.s3:
+                for path in (writer.log_path, writer.sessions_path):
+                    rel_path = f"{task_dir_name}/{os.path.relpath(path, self.task_dir)}".replace("\\", "/")
+                    self.s3.upload_file(path, rel_path)
+                    logger.debug(f"Binary log uploaded to S3: {rel_path}")
+
+        if writers:
+            logger.info(f"Closed {len(writers)} binary spin logs")
+        return [writer.log_path for writer in writers]
+
+
+class BinarySpinLogReader:
+    """
+    二进制日志读取器：以np.memmap映射为结构化数组，无需解析
+
+    records[column]直接得到某列的视图，session(session_id)按行范围切片。
+    """
+
+    def __init__(self, log_path: str):
+        """
+        Args:
+            log_path: 日志文件路径
+        """
+        self.log_path = log_path
+        self.sessions_path = os.path.splitext(log_path)[0] + SESSIONS_EXTENSION
+        self.header = read_header(log_path)
+        self.dtype = self.header["dtype"]
+        self.machine_hash = self.header["machine_hash"]
+
+        count = self.header["record_count"]
+        if count:
+            self.records = np.memmap(log_path, dtype=self.dtype, mode='r',
+                                     offset=self.header["header_size"], shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+        self._session_ids = self._load_session_ids()
+        self._session_index: Dict[str, int] = {}
+        for seq, session_id in enumerate(self._session_ids):
+            self._session_index.setdefault(session_id, seq)
+        self._bounds = None
+
+    @classmethod
+    def for_pair(cls, task_dir: str, player_id: str, machine_id: str) -> 'BinarySpinLogReader':
+        """打开某个player-machine对的二进制日志"""
+        return cls(BinarySpinLogStore(task_dir).log_path(player_id, machine_id))
+
+    def _load_session_ids(self) -> List[str]:
+        if not os.path.exists(self.sessions_path):
+            return []
+        with open(self.sessions_path, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def session_ids(self) -> List[str]:
+        """按写入顺序返回所有会话ID"""
+        return list(self._session_ids)
+
+    def session_bounds(self) -> np.ndarray:
+        """
+        每个会话序号对应的行范围
+
+        Returns:
+            形如(会话数+1,)的行偏移数组，会话k占[bounds[k], bounds[k+1])
+        """
+        if self._bounds is None:
+            num_sessions = max(len(self._session_ids),
+                               int(self.records["session_seq"][-1]) + 1 if len(self.records) else 0)
+            # session_seq单调递增，二分查找即可得到边界
+            self._bounds = np.searchsorted(self.records["session_seq"], np.arange(num_sessions + 1))
+        return self._bounds
+
+    def session_range(self, session_id: str) -> Tuple[int, int]:
+        """某个会话的[起始行, 结束行)"""
+        seq = self._session_index.get(session_id)
+        if seq is None:
+            raise KeyError(f"Session not found in binary log: {session_id}")
+        bounds = self.session_bounds()
+        return int(bounds[seq]), int(bounds[seq + 1])
+
+    def session(self, session_id: str) -> np.ndarray:
+        """单个会话的记录（memmap切片，零拷贝）"""
+        start, end = self.session_range(session_id)
+        return self.records[start:end]
+
+    def column(self, name: str) -> np.ndarray:
+        """整列视图（零拷贝）"""
+        return self.records[name]
+
+    def flag(self, flag: int) -> np.ndarray:
+        """按标志位取布尔列"""
+        return (self.records["flags"] & flag) != 0
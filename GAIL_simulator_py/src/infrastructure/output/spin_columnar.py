@@ -0,0 +1,368 @@
+# src/infrastructure/output/spin_columnar.py
+import os
+import logging
+import numpy as np
+from typing import Dict, List, Any, Optional, Sequence, Union, IO
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.ipc as ipc
+    import pyarrow.dataset as ds
+except ImportError:  # pragma: no cover - 仅在未安装pyarrow时触发
+    pa = pq = ipc = ds = None
+
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+FILE_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# 字典编码的ID列
+DICTIONARY_COLUMNS = ("session_id", "player_id", "machine_id", "session_index")
+
+# 数值列：(列名, pyarrow类型名, 缺省值)
+NUMERIC_COLUMNS = (
+    ("spin_number", "int32", 0),
+    ("timestamp", "float64", 0.0),
+    ("bet", "float64", 0.0),
+    ("payout", "float64", 0.0),
+    ("profit", "float64", 0.0),
+    ("odds", "float64", 0.0),
+    ("balance_before", "float64", 0.0),
+    ("balance_after", "float64", 0.0),
+    ("in_free_spins", "bool", False),
+    ("free_spins_triggered", "bool", False),
+    ("free_spins_remaining", "int32", 0),
+    ("free_spins_base_bet", "float64", 0.0),
+    ("scatter_count", "int16", 0),
+    ("scatter_win", "float64", 0.0),
+    ("streak", "int32", 0),
+    ("big_win", "bool", False),
+)
+
+# line_wins_info中每条中奖线的字段
+LINE_INFO_FIELDS = (
+    ("line_index", "int16"),
+    ("win_amount", "float64"),
+    ("match_count", "int8"),
+    ("symbol", "int16"),
+    ("multiplier", "float64"),
+)
+
+logger = logging.getLogger("infrastructure.output.columnar")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("列式输出需要pyarrow，请先安装: pip install pyarrow")
+
+
+def spin_schema(grid_size: int) -> 'pa.Schema':
+    """
+    原始spin数据的固定类型schema
+
+    Args:
+        grid_size: 结果网格的格子数（行数 x 卷轴数）
+
+    Returns:
+        pyarrow Schema
+    """
+    _require_pyarrow()
+    fields = [pa.field(name, pa.dictionary(pa.int32(), pa.string())) for name in DICTIONARY_COLUMNS]
+    fields += [pa.field(name, pa.type_for_alias(type_name)) for name, type_name, _ in NUMERIC_COLUMNS]
+    fields += [
+        pa.field("result_grid", pa.list_(pa.int8(), grid_size)),
+        pa.field("line_wins", pa.list_(pa.float64())),
+        pa.field("line_wins_info", pa.list_(pa.struct(
+            [pa.field(name, pa.type_for_alias(type_name)) for name, type_name in LINE_INFO_FIELDS]
+        ))),
+    ]
+    return pa.schema(fields, metadata={b"grid_size": str(grid_size).encode()})
+
+
+def _list_offsets(lengths: List[int]) -> 'pa.Array':
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+    return pa.array(offsets, type=pa.int32())
+
+
+def spins_to_record_batch(spins: Sequence[Dict[str, Any]], schema: 'pa.Schema',
+                          dictionaries: Optional[Dict[str, Dict[str, int]]] = None) -> 'pa.RecordBatch':
+    """
+    把spin字典列表按列转换为RecordBatch（不做逐行JSON序列化）
+
+    Args:
+        spins: SpinResult.to_dict()格式的字典列表
+        schema: spin_schema()返回的schema
+        dictionaries: 可选的跨batch累积字典（值 -> 编码），只追加不重排，
+                      使Arrow IPC文件中的字典只以delta方式增长
+
+    Returns:
+        RecordBatch
+    """
+    _require_pyarrow()
+    columns = []
+
+    for name in DICTIONARY_COLUMNS:
+        mapping = dictionaries.setdefault(name, {}) if dictionaries is not None else {}
+        indices = np.empty(len(spins), dtype=np.int32)
+        for row, spin in enumerate(spins):
+            value = str(spin.get(name, ""))
+            code = mapping.get(value)
+            if code is None:
+                code = mapping[value] = len(mapping)
+            indices[row] = code
+        columns.append(pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), pa.array(list(mapping), type=pa.string())
+        ))
+
+    for name, type_name, default in NUMERIC_COLUMNS:
+        columns.append(pa.array([spin.get(name, default) for spin in spins], type=pa.type_for_alias(type_name)))
+
+    # 网格：int8定长列表
+    grid_type = schema.field("result_grid").type
+    grid_size = grid_type.list_size
+    grid = np.zeros((len(spins), grid_size), dtype=np.int8)
+    for row, spin in enumerate(spins):
+        cells = spin.get("result_grid") or ()
+        if len(cells) != grid_size:
+            raise ValueError(f"网格大小不一致: 期望{grid_size}, 实际{len(cells)}")
+        grid[row] = cells
+    columns.append(pa.FixedSizeListArray.from_arrays(pa.array(grid.reshape(-1), type=pa.int8()), grid_size))
+
+    # 每条线的赢额：变长float64列表
+    line_wins = [spin.get("line_wins") or () for spin in spins]
+    flat_wins = [value for row in line_wins for value in row]
+    columns.append(pa.ListArray.from_arrays(
+        _list_offsets([len(row) for row in line_wins]), pa.array(flat_wins, type=pa.float64())
+    ))
+
+    # 中奖线详情：结构体列表
+    line_infos = [spin.get("line_wins_info") or () for spin in spins]
+    flat_infos = [info for row in line_infos for info in row]
+    struct_type = schema.field("line_wins_info").type.value_type
+    children = [
+        pa.array([info.get(name, 0) for info in flat_infos], type=struct_type.field(name).type)
+        for name, _ in LINE_INFO_FIELDS
+    ]
+    columns.append(pa.ListArray.from_arrays(
+        _list_offsets([len(row) for row in line_infos]),
+        pa.StructArray.from_arrays(children, fields=list(struct_type))
+    ))
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class ColumnarSpinWriter:
+    """
+    原始spin数据的列式写入器（Parquet或Arrow IPC）
+
+    按列缓冲spin，每累积row_group_size行写出一个row group / record batch。
+    sink可以是本地路径或可写的文件对象（上传S3时使用BytesIO）。
+    """
+
+    def __init__(self, sink: Union[str, IO[bytes]], file_format: str = "parquet",
+                 grid_size: Optional[int] = None, row_group_size: int = 65536,
+                 compression: Optional[str] = "snappy", compression_level: Optional[int] = None):
+        """
+        初始化列式写入器
+
+        Args:
+            sink: 输出路径或文件对象
+            file_format: "parquet" 或 "arrow"
+            grid_size: 网格格子数，None时从第一条spin推断
+            row_group_size: 每个row group的行数
+            compression: 压缩算法（parquet为列压缩，arrow为IPC body压缩，None表示不压缩）
+            compression_level: 压缩级别，None时使用默认值
+        """
+        _require_pyarrow()
+        if file_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported columnar format: {file_format}")
+
+        self.sink = sink
+        self.file_format = file_format
+        self.grid_size = grid_size
+        self.row_group_size = max(int(row_group_size), 1)
+        self.compression = compression
+        self.compression_level = compression_level
+
+        self.schema = None
+        self._writer = None
+        self._dictionaries: Dict[str, Dict[str, int]] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self.rows_written = 0
+        self.closed = False
+
+    def _open(self):
+        self.schema = spin_schema(self.grid_size)
+        if self.file_format == "parquet":
+            self._writer = pq.ParquetWriter(self.sink, self.schema, compression=self.compression or "none",
+                                            compression_level=self.compression_level)
+        else:
+            codec = None
+            if self.compression in ("lz4", "zstd"):
+                codec = pa.Codec(self.compression, self.compression_level) if self.compression_level is not None \
+                    else self.compression
+            options = ipc.IpcWriteOptions(compression=codec, emit_dictionary_deltas=True)
+            self._writer = ipc.new_file(self.sink, self.schema, options=options)
+
+    def write_spins(self, spins: Sequence[Dict[str, Any]]):
+        """
+        追加一批spin（可以来自多个会话）
+
+        Args:
+            spins: spin字典列表
+        """
+        if self.closed:
+            raise ValueError("Writer is closed")
+        if not spins:
+            return
+
+        if self.grid_size is None:
+            self.grid_size = len(spins[0].get("result_grid") or ())
+
+        self._pending.extend(spins)
+        while len(self._pending) >= self.row_group_size:
+            self._flush_rows(self._pending[:self.row_group_size])
+            del self._pending[:self.row_group_size]
+
+    def _flush_rows(self, rows: Sequence[Dict[str, Any]]):
+        if self._writer is None:
+            self._open()
+        batch = spins_to_record_batch(rows, self.schema, self._dictionaries)
+        if self.file_format == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=len(rows))
+        else:
+            self._writer.write_batch(batch)
+        self.rows_written += len(rows)
+
+    def flush(self):
+        """把缓冲的行写成一个row group"""
+        if self._pending:
+            self._flush_rows(self._pending)
+            self._pending = []
+
+    def close(self):
+        """写出剩余数据并关闭文件"""
+        if self.closed:
+            return
+        self.flush()
+        if self._writer is None and self.grid_size is not None:
+            # 没有任何行时也写出带schema的空文件
+            self._open()
+        if self._writer is not None:
+            self._writer.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def columnar_compression(file_format: str, codec: str = "none") -> Optional[str]:
+    """
+    把输出压缩配置（none / gzip / zstd）映射为列式格式的内部压缩
+
+    列式文件只做内部压缩（不在外层再包一层流压缩），以保留按列/按row group读取的能力。
+    Arrow IPC只支持lz4/zstd，gzip时也使用zstd。
+
+    Args:
+        file_format: "parquet"或"arrow"
+        codec: 输出压缩算法
+
+    Returns:
+        传给ColumnarSpinWriter的compression参数
+    """
+    if file_format == "parquet":
+        return "snappy" if codec == "none" else codec
+    return None if codec == "none" else "zstd"
+
+
+def write_spins_file(sink: Union[str, IO[bytes]], spins: Sequence[Dict[str, Any]], file_format: str = "parquet",
+                     row_group_size: int = 65536, compression: Optional[str] = "snappy",
+                     compression_level: Optional[int] = None) -> int:
+    """
+    一次性写出一个会话的spin文件
+
+    Returns:
+        写入的行数
+    """
+    with ColumnarSpinWriter(sink, file_format, row_group_size=row_group_size, compression=compression,
+                            compression_level=compression_level) as writer:
+        writer.write_spins(spins)
+    return writer.rows_written
+
+
+def read_spin_files(paths: Union[str, Sequence[str]], columns: Optional[List[str]] = None,
+                    file_format: Optional[str] = None) -> 'pa.Table':
+    """
+    读取一个或多个列式spin文件（或目录）的指定列
+
+    Args:
+        paths: 文件路径、目录或路径列表
+        columns: 需要的列，None表示全部
+        file_format: "parquet"或"arrow"，None时按扩展名推断
+
+    Returns:
+        合并后的pyarrow Table
+    """
+    _require_pyarrow()
+    if isinstance(paths, str):
+        paths = [paths]
+    paths = list(paths)
+
+    if file_format is None:
+        sample = paths[0] if paths else ""
+        file_format = "arrow" if sample.endswith(FILE_EXTENSIONS["arrow"]) else "parquet"
+
+    dataset = ds.dataset(paths if len(paths) > 1 else paths[0],
+                         format="ipc" if file_format == "arrow" else "parquet")
+    return dataset.to_table(columns=columns)
+
+
+def read_pair_spins(task_dir: str, player_id: str, machine_id: str, columns: Optional[List[str]] = None,
+                    file_format: str = "parquet") -> 'pa.Table':
+    """
+    一次读取某个player-machine对所有会话的指定列
+
+    Args:
+        task_dir: 模拟任务目录
+        player_id: 玩家ID
+        machine_id: 机器ID
+        columns: 需要的列，None表示全部
+        file_format: "parquet"或"arrow"
+
+    Returns:
+        pyarrow Table（没有文件时返回空表）
+    """
+    _require_pyarrow()
+    raw_dir = os.path.join(task_dir, player_id, machine_id, "raw_data")
+    extension = FILE_EXTENSIONS[file_format]
+    paths = sorted(
+        os.path.join(raw_dir, name) for name in os.listdir(raw_dir) if name.endswith(extension)
+    ) if os.path.isdir(raw_dir) else []
+
+    if not paths:
+        return pa.table({name: pa.array([], type=pa.string()) for name in (columns or [])})
+    return read_spin_files(paths, columns=columns, file_format=file_format)
+
+
+def read_spin_bytes(data: bytes, file_format: str = "parquet", columns: Optional[List[str]] = None) -> 'pa.Table':
+    """
+    从内存中的完整Parquet/Arrow文件内容读取spin表
+
+    Args:
+        data: 文件字节内容
+        file_format: "parquet"或"arrow"
+        columns: 需要的列，None表示全部
+
+    Returns:
+        pyarrow Table
+    """
+    _require_pyarrow()
+    buffer = pa.BufferReader(data)
+    if file_format == "parquet":
+        return pq.read_table(buffer, columns=columns)
+    table = ipc.open_file(buffer).read_all()
+    return table.select(columns) if columns is not None else table
@@ -0,0 +1,263 @@
+# src/infrastructure/output/spin_sampler.py
+import io
+import os
+import csv
+import json
+import math
+import random
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+from .compression import CompressionSettings, compress_bytes, open_text_writer
+
+
+SAMPLING_POLICIES = ("all", "every_k", "bernoulli", "reservoir")
+SESSION_POLICIES = ("every_k", "bernoulli")
+
+logger = logging.getLogger("infrastructure.output.sampler")
+
+
+def sampled_spins_file_name(player_id: str, machine_id: str, extension: str = "") -> str:
+    """player-machine对的蓄水池抽样spin文件名（extension为压缩扩展名）"""
+    return f"{player_id}_{machine_id}_sampled_spins.csv{extension}"
+
+
+def _session_number(session_id: str) -> Optional[int]:
+    """会话ID末尾的序号（player_machine_N），无法解析时返回None"""
+    tail = str(session_id).rsplit("_", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def _hash_uniform(seed: int, key: str) -> float:
+    """由(seed, key)确定的[0, 1)均匀数，与线程调度顺序无关"""
+    digest = hashlib.blake2b(f"{seed}:{key}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, "little") / float(1 << 64)
+
+
+class SpinReservoir:
+    """
+    单个player-machine对的spin蓄水池（Algorithm L）
+
+    逐会话批量提交spin，只在被选中的位置抽随机数，
+    总开销为O(k·log(N/k))次随机数而不是每条spin一次。
+    """
+
+    def __init__(self, size: int, rng: random.Random):
+        """
+        Args:
+            size: 蓄水池容量
+            rng: 随机数生成器
+        """
+        self.size = max(int(size), 1)
+        self.rng = rng
+        self.items: List[Dict[str, Any]] = []
+        self.seen = 0
+        self._w = 1.0
+        self._next = 0
+
+    def _advance(self):
+        """Algorithm L：更新阈值并计算下一个被替换的全局位置"""
+        self._w *= math.exp(math.log(1.0 - self.rng.random()) / self.size)
+        skip = math.floor(math.log(1.0 - self.rng.random()) / math.log1p(-self._w)) if self._w < 1.0 else 0
+        self._next += skip + 1
+
+    def offer_many(self, spins: Sequence[Dict[str, Any]]):
+        """
+        提交一个会话的spins
+
+        Args:
+            spins: spin字典列表
+        """
+        start = self.seen
+        index = 0
+        while len(self.items) < self.size and index < len(spins):
+            self.items.append(spins[index])
+            index += 1
+            if len(self.items) == self.size:
+                self._next = start + index - 1
+                self._advance()
+
+        end = start + len(spins)
+        while len(self.items) == self.size and self._next < end:
+            self.items[self.rng.randrange(self.size)] = spins[self._next - start]
+            self._advance()
+
+        self.seen = end
+
+    @property
+    def weight(self) -> float:
+        """每条入选spin代表的总体spin数（包含概率的倒数）"""
+        return self.seen / len(self.items) if self.items else 0.0
+
+
+class SpinSampler:
+    """
+    原始spin记录抽样器
+
+    对应session_recording.sampling配置节：
+    - all: 记录全部会话（默认，不创建抽样器）
+    - every_k: 每k个会话记录一个，权重为k
+    - bernoulli: 每个会话以fraction的概率记录，权重为1/fraction
+    - reservoir: 每个player-machine对保留reservoir_size条均匀抽样的spin，close时写出
+
+    会话级策略在会话开始前决定，未入选的会话不在内存中保留spin。
+    summary仍由SessionStats的内存计数器给出，不受抽样影响。
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, task_dir: Optional[str] = None,
+                 s3=None, compression: Optional[CompressionSettings] = None):
+        """
+        初始化抽样器
+
+        Args:
+            config: sampling配置：policy / every_k / fraction / reservoir_size / seed
+            task_dir: 模拟任务目录（reservoir输出位置）
+            s3: 可选的对象存储，close时上传蓄水池文件
+            compression: 蓄水池文件的压缩配置
+        """
+        config = config or {}
+        self.policy = str(config.get("policy", "all")).lower()
+        if self.policy not in SAMPLING_POLICIES:
+            raise ValueError(f"Unsupported sampling policy: {self.policy}")
+
+        self.every_k = max(int(config.get("every_k", 10)), 1)
+        self.fraction = float(config.get("fraction", 0.1))
+        if not 0.0 < self.fraction <= 1.0:
+            raise ValueError(f"sampling.fraction must be in (0, 1]: {self.fraction}")
+        self.reservoir_size = max(int(config.get("reservoir_size", 10000)), 1)
+        self.seed = int(config.get("seed", 0) or 0)
+
+        self.task_dir = task_dir
+        self.s3 = s3
+        self.compression = compression or CompressionSettings()
+
+        self._reservoirs: Dict[Tuple[str, str], SpinReservoir] = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+        self.sessions_seen = 0
+        self.sessions_recorded = 0
+
+    @property
+    def session_level(self) -> bool:
+        """是否为会话级策略（every_k / bernoulli）"""
+        return self.policy in SESSION_POLICIES
+
+    @property
+    def uses_reservoir(self) -> bool:
+        return self.policy == "reservoir"
+
+    def sample_session(self, session_id: str) -> Tuple[bool, float]:
+        """
+        决定某个会话是否记录spin
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            (是否记录, 抽样权重)
+        """
+        with self._lock:
+            self.sessions_seen += 1
+            if self.policy == "every_k":
+                number = _session_number(session_id)
+                if number is None:
+                    number = self._counter + 1
+                    self._counter += 1
+                selected, weight = (number - 1) % self.every_k == 0, float(self.every_k)
+            elif self.policy == "bernoulli":
+                selected = _hash_uniform(self.seed, session_id) < self.fraction
+                weight = 1.0 / self.fraction
+            else:
+                selected, weight = True, 1.0
+            if selected:
+                self.sessions_recorded += 1
+        return selected, weight
+
+    def offer_spins(self, player_id: str, machine_id: str, spins: Sequence[Dict[str, Any]]):
+        """
+        把一个会话的spins提交给所属对的蓄水池
+
+        Args:
+            player_id: 玩家ID
+            machine_id: 机器ID
+            spins: spin字典列表
+        """
+        key = (player_id, machine_id)
+        with self._lock:
+            reservoir = self._reservoirs.get(key)
+            if reservoir is None:
+                pair_seed = f"{self.seed}:{player_id}:{machine_id}"
+                reservoir = SpinReservoir(self.reservoir_size, random.Random(pair_seed))
+                self._reservoirs[key] = reservoir
+            reservoir.offer_many(spins)
+
+    def reservoir_path(self, player_id: str, machine_id: str) -> str:
+        """某个对的蓄水池spin文件路径"""
+        return os.path.join(self.task_dir, player_id, machine_id, "raw_data",
+                            sampled_spins_file_name(player_id, machine_id, self.compression.extension))
+
+    def _write_reservoir(self, player_id: str, machine_id: str, reservoir: SpinReservoir) -> str:
+        """把蓄水池写为CSV（每行附带sample_weight）"""
+        spins = reservoir.items
+        fields = list(spins[0].keys()) + ["sample_weight"]
+        weight = reservoir.weight
+
+        def write_rows(f):
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for spin in spins:
+                row = {
+                    field: json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+                    for field, value in spin.items()
+                }
+                row["sample_weight"] = weight
+                writer.writerow(row)
+
+        filepath = self.reservoir_path(player_id, machine_id)
+        if self.s3:
+            content = io.StringIO()
+            write_rows(content)
+            rel_path = f"{os.path.basename(self.task_dir)}/{player_id}/{machine_id}/raw_data/{os.path.basename(filepath)}"
+            self.s3.upload_bytes(compress_bytes(content.getvalue().encode('utf-8'), self.compression), rel_path)
+            logger.info(f"Uploaded {len(spins)} reservoir spins to S3: {rel_path}")
+            return rel_path
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open_text_writer(filepath, self.compression) as f:
+            write_rows(f)
+        logger.info(f"Wrote {len(spins)} of {reservoir.seen} spins to {filepath}")
+        return filepath
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """抽样统计"""
+        with self._lock:
+            metrics = {
+                "policy": self.policy,
+                "sessions_seen": self.sessions_seen,
+                "sessions_recorded": self.sessions_recorded
+            }
+            if self.uses_reservoir:
+                metrics["spins_seen"] = sum(r.seen for r in self._reservoirs.values())
+                metrics["spins_kept"] = sum(len(r.items) for r in self._reservoirs.values())
+        return metrics
+
+    def close(self) -> Dict[str, Any]:
+        """
+        写出所有蓄水池（reservoir策略），返回抽样统计
+
+        Returns:
+            抽样统计（reservoir策略附带files: {pair_key: 路径}）
+        """
+        metrics = self.get_metrics()
+        with self._lock:
+            reservoirs = dict(self._reservoirs)
+            self._reservoirs.clear()
+
+        if reservoirs:
+            metrics["files"] = {
+                f"{player_id}_{machine_id}": self._write_reservoir(player_id, machine_id, reservoir)
+                for (player_id, machine_id), reservoir in reservoirs.items() if reservoir.items
+            }
+        return metrics
@@ -0,0 +1,316 @@
+# src/infrastructure/output/spin_segments.py
+import os
+import io
+import csv
+import json
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Sequence, Iterator
+
+from .spin_columnar import COLUMNAR_FORMATS, columnar_compression, write_spins_file, read_spin_bytes
+from .compression import CompressionSettings, compress_bytes, decompress_bytes
+
+
+SEGMENT_EXTENSION = ".seg"
+INDEX_EXTENSION = ".idx"
+SEGMENT_FORMATS = ("csv",) + COLUMNAR_FORMATS
+
+logger = logging.getLogger("infrastructure.output.segments")
+
+
+def segment_base_name(player_id: str, machine_id: str) -> str:
+    """player-machine对的段文件名（不含扩展名）"""
+    return f"{player_id}_{machine_id}_spins"
+
+
+def encode_spins(spins: Sequence[Dict[str, Any]], file_format: str = "csv",
+                 compression: Optional[CompressionSettings] = None) -> bytes:
+    """
+    把一个会话的spins编码为自包含的字节块
+
+    Args:
+        spins: spin字典列表
+        file_format: csv / parquet / arrow
+        compression: 压缩配置（csv整块压缩，列式格式使用内部压缩）
+
+    Returns:
+        可单独解码的字节块（csv带表头，列式格式为完整文件）
+    """
+    compression = compression or CompressionSettings()
+    if file_format in COLUMNAR_FORMATS:
+        buffer = io.BytesIO()
+        write_spins_file(buffer, spins, file_format=file_format,
+                         compression=columnar_compression(file_format, compression.codec),
+                         compression_level=compression.level)
+        return buffer.getvalue()
+
+    if file_format != "csv":
+        raise ValueError(f"Unsupported segment format: {file_format}")
+
+    fields = list(spins[0].keys()) if spins else []
+    content = io.StringIO()
+    writer = csv.DictWriter(content, fieldnames=fields)
+    writer.writeheader()
+    for spin in spins:
+        # 列表、字典字段转为JSON字符串，与单文件CSV保持一致
+        writer.writerow({
+            field: json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+            for field, value in spin.items()
+        })
+    return compress_bytes(content.getvalue().encode('utf-8'), compression)
+
+
+def decode_spins(data: bytes, file_format: str = "csv", columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    解码encode_spins生成的字节块（压缩过的块透明解压）
+
+    Args:
+        data: 字节块
+        file_format: csv / parquet / arrow
+        columns: 需要的列，None表示全部
+
+    Returns:
+        spin字典列表（csv格式的值为字符串）
+    """
+    if file_format in COLUMNAR_FORMATS:
+        return read_spin_bytes(data, file_format, columns=columns).to_pylist()
+
+    rows = list(csv.DictReader(io.StringIO(decompress_bytes(data).decode('utf-8'))))
+    if columns is not None:
+        rows = [{name: row.get(name) for name in columns} for row in rows]
+    return rows
+
+
+def _load_index(index_path: str) -> List[Dict[str, Any]]:
+    """读取索引文件，忽略写了一半的末行"""
+    entries = []
+    if not os.path.exists(index_path):
+        return entries
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"忽略损坏的索引行: {index_path}")
+    return entries
+
+
+class SpinSegmentWriter:
+    """
+    单个player-machine对的可追加段文件写入器
+
+    每个会话的spins编码为一个自包含的块追加到段文件末尾，随后在索引文件中追加一行
+    JSON（session_id -> 字节范围和行范围）。先写数据再写索引，进程中途退出时最多
+    在段文件末尾留下没有索引的字节，读取时会被忽略；重新打开时从文件末尾继续追加。
+    """
+
+    def __init__(self, segment_path: str, file_format: str = "csv",
+                 compression: Optional[CompressionSettings] = None):
+        """
+        打开（或续写）段文件
+
+        Args:
+            segment_path: 段文件路径，索引文件为同名的.idx
+            file_format: 块编码格式 csv / parquet / arrow
+            compression: 压缩配置，每个块单独压缩以保留按会话seek的能力
+        """
+        if file_format not in SEGMENT_FORMATS:
+            raise ValueError(f"Unsupported segment format: {file_format}")
+
+        self.segment_path = segment_path
+        self.index_path = os.path.splitext(segment_path)[0] + INDEX_EXTENSION
+        self.file_format = file_format
+        self.compression = compression or CompressionSettings()
+        self._lock = threading.Lock()
+
+        entries = _load_index(self.index_path)
+        self.next_row = sum(entry["rows"] for entry in entries)
+        self.sessions = len(entries)
+
+        os.makedirs(os.path.dirname(segment_path) or ".", exist_ok=True)
+        self._segment = open(segment_path, 'ab')
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+        self.closed = False
+
+    def append_session(self, session_id: str, spins: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        追加一个会话的spins
+
+        Args:
+            session_id: 会话ID
+            spins: spin字典列表
+
+        Returns:
+            该会话的索引项
+        """
+        data = encode_spins(spins, self.file_format, self.compression)
+
+        with self._lock:
+            if self.closed:
+                raise ValueError(f"Segment writer is closed: {self.segment_path}")
+
+            self._segment.seek(0, os.SEEK_END)
+            offset = self._segment.tell()
+            self._segment.write(data)
+            self._segment.flush()
+
+            entry = {
+                "session_id": session_id,
+                "offset": offset,
+                "length": len(data),
+                "row_start": self.next_row,
+                "rows": len(spins),
+                "format": self.file_format,
+                "compression": self.compression.codec
+            }
+            self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index.flush()
+
+            self.next_row += len(spins)
+            self.sessions += 1
+            return entry
+
+    def close(self):
+        """关闭段文件和索引文件"""
+        with self._lock:
+            if self.closed:
+                return
+            self._segment.close()
+            self._index.close()
+            self.closed = True
+
+
+class SpinSegmentStore:
+    """
+    按player-machine对管理段文件写入器
+
+    所有会话线程共享一个实例，每个对只打开一个段文件，目录中的文件数为O(对数)。
+    """
+
+    def __init__(self, task_dir: str, file_format: str = "csv", s3=None,
+                 compression: Optional[CompressionSettings] = None):
+        """
+        初始化段文件存储
+
+        Args:
+            task_dir: 模拟任务目录
+            file_format: 块编码格式
+            s3: 可选的对象存储，close时上传段文件和索引
+            compression: 块压缩配置
+        """
+        self.task_dir = task_dir
+        self.file_format = file_format
+        self.s3 = s3
+        self.compression = compression or CompressionSettings()
+        self._writers: Dict[str, SpinSegmentWriter] = {}
+        self._lock = threading.Lock()
+
+    def segment_path(self, player_id: str, machine_id: str) -> str:
+        """某个对的段文件路径"""
+        return os.path.join(self.task_dir, player_id, machine_id, "raw_data",
+                            segment_base_name(player_id, machine_id) + SEGMENT_EXTENSION)
+
+    def _get_writer(self, player_id: str, machine_id: str) -> SpinSegmentWriter:
+        path = self.segment_path(player_id, machine_id)
+        with self._lock:
+            writer = self._writers.get(path)
+            if writer is None:
+                writer = SpinSegmentWriter(path, self.file_format, self.compression)
+                self._writers[path] = writer
+            return writer
+
+    def append_session(self, player_id: str, machine_id: str, session_id: str,
+                       spins: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        把一个会话追加到所属对的段文件
+
+        Returns:
+            该会话的索引项（附带segment_path）
+        """
+        writer = self._get_writer(player_id, machine_id)
+        entry = writer.append_session(session_id, spins)
+        return dict(entry, segment_path=writer.segment_path)
+
+    def close(self) -> List[str]:
+        """
+        关闭所有段文件，使用S3时上传段文件和索引
+
+        Returns:
+            已关闭的段文件路径列表
+        """
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+
+        task_dir_name = os.path.basename(self.task_dir)
+        for writer in writers:
+            writer.close()
+            if self.s3:
+                for path in (writer.segment_path, writer.index_path):
+                    rel_path = f"{task_dir_name}/{os.path.relpath(path, self.task_dir)}".replace("\\", "/")
+                    self.s3.upload_file(path, rel_path)
+                    logger.debug(f"Segment uploaded to S3: {rel_path}")
+
+        if writers:
+            logger.info(f"Closed {len(writers)} spin segment files")
+        return [writer.segment_path for writer in writers]
+
+
+class SpinSegmentReader:
+    """
+    段文件读取器：按索引直接seek到单个会话，无需扫描整个文件
+    """
+
+    def __init__(self, segment_path: str):
+        """
+        Args:
+            segment_path: 段文件路径
+        """
+        self.segment_path = segment_path
+        self.index_path = os.path.splitext(segment_path)[0] + INDEX_EXTENSION
+        self.entries = {entry["session_id"]: entry for entry in _load_index(self.index_path)}
+
+    @classmethod
+    def for_pair(cls, task_dir: str, player_id: str, machine_id: str) -> 'SpinSegmentReader':
+        """打开某个player-machine对的段文件"""
+        return cls(SpinSegmentStore(task_dir).segment_path(player_id, machine_id))
+
+    def session_ids(self) -> List[str]:
+        """按写入顺序返回所有会话ID"""
+        return list(self.entries)
+
+    def read_session_bytes(self, session_id: str) -> bytes:
+        """读取单个会话的原始字节块"""
+        entry = self.entries.get(session_id)
+        if entry is None:
+            raise KeyError(f"Session not found in segment: {session_id}")
+        with open(self.segment_path, 'rb') as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        if len(data) != entry["length"]:
+            raise IOError(f"段文件被截断: {self.segment_path} ({session_id})")
+        return data
+
+    def read_session(self, session_id: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        读取单个会话的spins
+
+        Args:
+            session_id: 会话ID
+            columns: 需要的列，None表示全部
+
+        Returns:
+            spin字典列表
+        """
+        entry = self.entries.get(session_id)
+        if entry is None:
+            raise KeyError(f"Session not found in segment: {session_id}")
+        return decode_spins(self.read_session_bytes(session_id), entry["format"], columns=columns)
+
+    def iter_sessions(self, columns: Optional[List[str]] = None) -> Iterator[tuple]:
+        """按写入顺序逐个产出(session_id, spins)"""
+        for session_id in self.entries:
+            yield session_id, self.read_session(session_id, columns=columns)
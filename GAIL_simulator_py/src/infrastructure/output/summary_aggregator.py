@@ -0,0 +1,180 @@
+# src/infrastructure/output/summary_aggregator.py
+import os
+import csv
+import json
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+
+from .compression import CompressionSettings, open_text_writer, open_text_reader
+
+logger = logging.getLogger("infrastructure.output.summary_aggregator")
+
+
+def summary_file_name(player_id: str, machine_id: str, extension: str = "") -> str:
+    """player-machine对的最终summary CSV文件名（extension为压缩扩展名）"""
+    return f"{player_id}_{machine_id}_sessions_summary.csv{extension}"
+
+
+def _format_value(value: Any) -> Any:
+    """列表、字典字段转为JSON字符串"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class PairSummaryWriter:
+    """
+    单个player-machine对的summary CSV流式写入器
+
+    会话结束时直接把一行追加到最终CSV，表头取第一行的字段（排序）。
+    出现新字段时（很少见）把已写的行读回并以合并后的表头重写一次。
+    启用压缩时以流式压缩写入，不逐行flush以免破坏压缩率。
+    """
+
+    def __init__(self, filepath: str, compression: Optional[CompressionSettings] = None):
+        """
+        Args:
+            filepath: 最终summary CSV路径
+            compression: 压缩配置
+        """
+        self.filepath = filepath
+        self.compression = compression or CompressionSettings()
+        self.fields: Optional[List[str]] = None
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _open(self, mode: str):
+        self._file = open_text_writer(self.filepath, self.compression, mode)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields)
+
+    def _rewrite_with_fields(self, fields: List[str]):
+        """以新表头重写已写入的行"""
+        self._file.close()
+        with open_text_reader(self.filepath) as f:
+            existing = list(csv.DictReader(f))
+
+        self.fields = fields
+        self._open('w')
+        self._writer.writeheader()
+        self._writer.writerows(existing)
+        logger.debug(f"Summary header extended, rewrote {len(existing)} rows: {self.filepath}")
+
+    def add(self, summary: Dict[str, Any]):
+        """
+        追加一行summary
+
+        Args:
+            summary: 会话摘要字典
+        """
+        row = {field: _format_value(value) for field, value in summary.items()}
+
+        with self._lock:
+            if self.fields is None:
+                os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+                self.fields = sorted(row)
+                self._open('w')
+                self._writer.writeheader()
+            else:
+                new_fields = set(row) - set(self.fields)
+                if new_fields:
+                    self._rewrite_with_fields(sorted(set(self.fields) | new_fields))
+
+            self._writer.writerow(row)
+            if not self.compression.enabled:
+                self._file.flush()
+            self.rows += 1
+
+    def close(self):
+        """关闭文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writer = None
+
+
+class SummaryAggregator:
+    """
+    进程内的会话summary聚合器
+
+    所有会话线程共享一个实例，每个player-machine对一个PairSummaryWriter，
+    summary在会话结束时直接追加到最终CSV，不再写临时JSON文件。
+    finalize只需关闭文件（使用S3时上传），不再扫描目录或重新解析。
+    """
+
+    def __init__(self, task_dir: str, s3=None, compression: Optional[CompressionSettings] = None):
+        """
+        初始化聚合器
+
+        Args:
+            task_dir: 模拟任务目录
+            s3: 可选的对象存储，finalize时上传最终CSV
+            compression: 压缩配置
+        """
+        self.task_dir = task_dir
+        self.s3 = s3
+        self.compression = compression or CompressionSettings()
+        self._writers: Dict[str, PairSummaryWriter] = {}
+        self._pairs: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def summary_path(self, player_id: str, machine_id: str) -> str:
+        """某个对的最终summary CSV路径"""
+        return os.path.join(self.task_dir, player_id, machine_id, "summary",
+                            summary_file_name(player_id, machine_id, self.compression.extension))
+
+    def add_summary(self, player_id: str, machine_id: str, summary: Dict[str, Any]):
+        """
+        记录一个会话的summary
+
+        Args:
+            player_id: 玩家ID
+            machine_id: 机器ID
+            summary: 会话摘要字典
+        """
+        pair_key = f"{player_id}_{machine_id}"
+        with self._lock:
+            writer = self._writers.get(pair_key)
+            if writer is None:
+                writer = PairSummaryWriter(self.summary_path(player_id, machine_id), self.compression)
+                self._writers[pair_key] = writer
+                self._pairs[pair_key] = (player_id, machine_id)
+        writer.add(summary)
+
+    def get_row_counts(self) -> Dict[str, int]:
+        """各对已写入的summary行数"""
+        with self._lock:
+            return {pair_key: writer.rows for pair_key, writer in self._writers.items()}
+
+    def finalize(self) -> Dict[str, str]:
+        """
+        关闭所有summary文件，使用S3时上传并删除本地文件
+
+        Returns:
+            {pair_key: 文件路径或S3相对路径}
+        """
+        with self._lock:
+            writers = dict(self._writers)
+            pairs = dict(self._pairs)
+            self._writers.clear()
+            self._pairs.clear()
+
+        task_dir_name = os.path.basename(self.task_dir)
+        results = {}
+        for pair_key, writer in writers.items():
+            writer.close()
+            if self.s3:
+                player_id, machine_id = pairs[pair_key]
+                s3_rel_path = f"{task_dir_name}/{player_id}/{machine_id}/summary/{os.path.basename(writer.filepath)}"
+                self.s3.upload_file(writer.filepath, s3_rel_path)
+                os.remove(writer.filepath)
+                logger.info(f"Uploaded summary CSV to S3: {s3_rel_path}")
+                results[pair_key] = s3_rel_path
+            else:
+                logger.info(f"Wrote {writer.rows} summaries to {writer.filepath}")
+                results[pair_key] = writer.filepath
+
+        return results
@@ -0,0 +1,110 @@
+# src/interfaces/cli/commands/analyze_results.py
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.infrastructure.concurrency.task_executor import ExecutionMode
+from src.application.analysis.spin_stream_analyzer import analyze_task_dir, DEFAULT_CHUNK_ROWS
+
+
+EXECUTION_MODES = {
+    "sequential": ExecutionMode.SEQUENTIAL,
+    "thread": ExecutionMode.MULTITHREAD,
+    "process": ExecutionMode.MULTIPROCESS
+}
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Stream raw spin data of a simulation run from disk and compute "
+                    "drawdown, volatility, win-multiplier and bet-progression metrics"
+    )
+
+    parser.add_argument(
+        "task_dir",
+        help="Simulation task directory (results/sim_...) containing <player>/<machine>/raw_data"
+    )
+
+    parser.add_argument(
+        "--mode",
+        choices=list(EXECUTION_MODES),
+        default="process",
+        help="How player-machine pairs are analyzed in parallel"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Maximum number of parallel workers"
+    )
+
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="Maximum number of spins held in memory per chunk"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Write the report as JSON (default: <task_dir>/reports/stream_analysis.json)"
+    )
+
+    parser.add_argument(
+        "--per-session-dir",
+        default=None,
+        help="Also write one per-session metrics CSV per pair into this directory"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Analyze a simulation task directory and write the JSON report."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if not os.path.isdir(args.task_dir):
+        print(f"Task directory not found: {args.task_dir}")
+        return 1
+    if args.chunk_rows <= 0:
+        print("--chunk-rows must be positive")
+        return 1
+
+    report = analyze_task_dir(args.task_dir, EXECUTION_MODES[args.mode], args.workers,
+                              args.chunk_rows, args.per_session_dir)
+    if not report["pairs"]:
+        print(f"No raw spin data found under {args.task_dir}")
+        return 1
+
+    output_path = args.output or os.path.join(args.task_dir, "reports", "stream_analysis.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    overall = report["overall"]
+    print(f"{len(report['pairs'])} pairs, {overall['sessions']} sessions, {overall['spins']} spins")
+    print(f"RTP {overall['rtp']:.4f}, hit rate {overall['hit_rate']:.4f}, "
+          f"max win x{overall['max_win_multiplier']:.1f}, "
+          f"mean session drawdown {overall['session_max_drawdown']['mean']:.2f}")
+    print(f"Report written to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# src/interfaces/cli/commands/convert_model_artifacts.py
+import os
+import sys
+import logging
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.domain.player.models.v1.services.v1_model_service import V1ModelService
+from src.domain.player.models.v1.services.model_artifacts import (
+    export_cluster_artifacts, load_artifacts, check_sources, get_artifact_dir, default_weights_dir
+)
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Convert V1 .pth/.pkl model files into memory-mapped .npy artifacts"
+    )
+
+    parser.add_argument(
+        "--clusters",
+        type=int,
+        nargs="+",
+        default=[0, 1, 2],
+        help="Cluster ids to convert"
+    )
+
+    parser.add_argument(
+        "--base-model-dir",
+        default=None,
+        help="Directory containing cluster_N subdirectories (defaults to models/v1/weights)"
+    )
+
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Only verify checksums of existing artifacts and of the checkpoints they were converted from"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Convert (or verify) the artifacts of each requested cluster."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    failures = 0
+    for cluster_id in args.clusters:
+        try:
+            if args.verify:
+                model_dir = os.path.join(args.base_model_dir or default_weights_dir(), f"cluster_{cluster_id}")
+                manifest, arrays = load_artifacts(get_artifact_dir(model_dir), verify_checksums=True)
+                check_sources(manifest, model_dir, cluster_id)
+                print(f"Cluster {cluster_id}: {len(arrays)} arrays OK")
+            else:
+                # 强制从原始.pth/.pkl加载，避免用旧工件再导出
+                service = V1ModelService(cluster_id, base_model_dir=args.base_model_dir, use_artifacts=False)
+                manifest_path = export_cluster_artifacts(service)
+                print(f"Cluster {cluster_id}: wrote {manifest_path}")
+        except Exception as e:
+            failures += 1
+            print(f"Cluster {cluster_id}: failed - {e}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# src/interfaces/cli/commands/estimate_rtp.py
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.domain.machine.factories.machine_factory import MachineFactory
+from src.domain.machine.services.rtp_estimator import RTPEstimator, CONTROL_VARIATES
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Estimate a machine's free-spin-inclusive RTP with variance-reduced batched Monte Carlo"
+    )
+
+    parser.add_argument(
+        "machine_config",
+        help="Path to a machine YAML file (e.g. src/application/config/machines/newBee.yaml)"
+    )
+
+    parser.add_argument(
+        "-n", "--spins",
+        type=int,
+        default=1000000,
+        help="Number of base spins"
+    )
+
+    parser.add_argument(
+        "--strata-blocks",
+        type=int,
+        default=1,
+        help="Stop blocks per reel for stratified sampling (strata = blocks ** reels)"
+    )
+
+    parser.add_argument(
+        "--antithetic",
+        action="store_true",
+        help="Sample antithetic (mirrored) stop pairs"
+    )
+
+    parser.add_argument(
+        "--controls",
+        nargs="*",
+        choices=CONTROL_VARIATES,
+        default=list(CONTROL_VARIATES),
+        help="Base-game control variates with exact means (pass no values to disable)"
+    )
+
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of the reported interval"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Write the estimate as JSON"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the estimator and print the result."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    config = YamlConfigLoader(SchemaValidator()).load_file(args.machine_config)
+    machine_id = config.get("machine_id") or os.path.splitext(os.path.basename(args.machine_config))[0]
+    machine = MachineFactory(RNGProvider()).create_machine(machine_id, config)
+
+    estimator = RTPEstimator(machine, seed=args.seed)
+    result = estimator.estimate(args.spins, strata_blocks=args.strata_blocks, antithetic=args.antithetic,
+                                control_variates=args.controls, confidence=args.confidence)
+
+    print(f"Machine: {machine_id}")
+    print(f"RTP: {result.rtp:.6f} ± {result.half_width:.6f} ({result.confidence:.0%} CI)")
+    print(f"  Exact base-game RTP: {result.exact['base_win']:.6f}, free spins (estimated): {result.free_rtp:.6f}")
+    print(f"  Exact free-spin trigger rate: {result.exact['trigger']:.6f}")
+    print(f"Spins: {result.spins:,} in {result.strata} strata"
+          f"{', antithetic pairs' if result.antithetic else ''}"
+          f"{', controls: ' + ', '.join(result.control_variates) if result.control_variates else ''}")
+    print(f"Effective sample size: {result.effective_spins:,.0f} ({result.ess_gain:.2f}x plain Monte Carlo)")
+    if result.antithetic_correlation is not None:
+        print(f"  Antithetic pair correlation: {result.antithetic_correlation:.4f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(dict(result.to_dict(), machine_id=machine_id), f, indent=2)
+        print(f"Estimate written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
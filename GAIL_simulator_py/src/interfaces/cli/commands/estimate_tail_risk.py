@@ -0,0 +1,150 @@
+# src/interfaces/cli/commands/estimate_tail_risk.py
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.domain.machine.factories.machine_factory import MachineFactory
+from src.domain.machine.services.tail_estimator import TailRiskEstimator
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Estimate big-win and max-win probabilities with importance sampling"
+    )
+
+    parser.add_argument(
+        "machine_config",
+        help="Path to a machine YAML file (e.g. src/application/config/machines/newBee.yaml)"
+    )
+
+    parser.add_argument(
+        "-t", "--thresholds",
+        type=float,
+        nargs="+",
+        default=[100.0, 500.0, 1000.0],
+        help="Round win thresholds in multiples of the bet"
+    )
+
+    parser.add_argument(
+        "-n", "--rounds",
+        type=int,
+        default=1000000,
+        help="Rounds sampled from the fitted proposal"
+    )
+
+    parser.add_argument(
+        "--fit-spins",
+        type=int,
+        default=50000,
+        help="Base spins and bonus spins per cross-entropy iteration"
+    )
+
+    parser.add_argument(
+        "--fit-iterations",
+        type=int,
+        default=30,
+        help="Maximum number of cross-entropy iterations"
+    )
+
+    parser.add_argument(
+        "--components",
+        type=int,
+        default=4,
+        help="Tilted mixture components per reel set"
+    )
+
+    parser.add_argument(
+        "--min-ess",
+        type=float,
+        default=200,
+        help="Smallest effective sample size allowed when choosing the tilt"
+    )
+
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of the reported intervals"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Write the report as JSON"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Fit the proposal, run the estimator and print the result."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    config = YamlConfigLoader(SchemaValidator()).load_file(args.machine_config)
+    machine_id = config.get("machine_id") or os.path.splitext(os.path.basename(args.machine_config))[0]
+    machine = MachineFactory(RNGProvider()).create_machine(machine_id, config)
+
+    estimator = TailRiskEstimator(machine, seed=args.seed)
+    print(f"Machine: {machine_id}")
+
+    # One proposal per threshold: a proposal tilted towards 1000x wins is a poor sampler for 100x wins
+    max_win = estimator.max_win()
+    reports = []
+    for threshold in sorted(args.thresholds):
+        if threshold > max_win["round"]:
+            # Nothing to fit: the win is not attainable, so the probability is exactly zero
+            report = estimator.estimate([threshold], 1, confidence=args.confidence)
+            reports.append(report)
+            print(f"P(win >= {threshold:g}x) = 0 (above the largest possible win)")
+            continue
+        estimator.fit(threshold, spins_per_iteration=args.fit_spins, max_iterations=args.fit_iterations,
+                      components=args.components, min_ess=args.min_ess)
+        report = estimator.estimate([threshold], args.rounds, confidence=args.confidence)
+        estimate = report.estimates[0]
+        reports.append(report)
+        print(f"P(win >= {threshold:g}x) = {estimate.probability:.3e} "
+              f"[{estimate.ci_low:.3e}, {estimate.ci_high:.3e}] ({estimate.confidence:.0%} CI)")
+        if estimate.hits:
+            print(f"  {estimate.hits:,} hits in {report.rounds:,} rounds, relative error "
+                  f"{estimate.relative_error:.2%}, {estimate.variance_reduction:,.0f}x fewer rounds than brute force")
+        else:
+            print(f"  No hits in {report.rounds:,} rounds; the interval is a one-sided upper bound")
+        print(f"  Cross-entropy levels: {', '.join(f'{level:.1f}' for level in report.fit_levels)}")
+
+    observed = max(report.observed_max_win for report in reports)
+    print(f"Max win observed: {observed:,.1f}x; largest possible {max_win['round']:,.1f}x "
+          f"(base spin {max_win['base_spin']:,.1f}x, free round {max_win['free_round']:,.1f}x)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"machine_id": machine_id, "reports": [report.to_dict() for report in reports]}, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# src/interfaces/cli/commands/optimize_reels.py
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.domain.machine.factories.machine_factory import MachineFactory
+from src.domain.machine.services.reel_optimizer import ReelStripOptimizer, reel_strips_yaml
+
+
+def parse_weight(text):
+    """Parse a metric=weight pair."""
+    name, _, value = text.partition("=")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected metric=weight, got '{text}'")
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Optimize a machine's reel strips towards a target RTP, hit rate and bonus frequency"
+    )
+
+    parser.add_argument(
+        "machine_config",
+        help="Path to a machine YAML file (e.g. src/application/config/machines/newBee.yaml)"
+    )
+
+    parser.add_argument(
+        "--target-rtp",
+        type=float,
+        required=True,
+        help="Target round RTP (e.g. 0.96)"
+    )
+
+    parser.add_argument(
+        "--target-hit-rate",
+        type=float,
+        default=None,
+        help="Target base-game hit rate (probability that a spin pays)"
+    )
+
+    parser.add_argument(
+        "--target-trigger",
+        type=float,
+        default=None,
+        help="Target free-spin trigger probability (e.g. 0.0067 for 1 in 150)"
+    )
+
+    parser.add_argument(
+        "--weights",
+        type=parse_weight,
+        nargs="+",
+        default=[],
+        help="Score weights as metric=weight (metrics: rtp, hit_rate, trigger)"
+    )
+
+    parser.add_argument(
+        "--reel-sets",
+        nargs="+",
+        default=["normal"],
+        help="Reel sets whose strips may change"
+    )
+
+    parser.add_argument(
+        "--fixed-reels",
+        nargs="+",
+        default=[],
+        help="Reels that never change, as reel_set/reel (e.g. bonus/reel3)"
+    )
+
+    parser.add_argument(
+        "--palette",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Symbols that insertions may place (default: the symbols already on each reel set)"
+    )
+
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=5000,
+        help="Number of candidate moves"
+    )
+
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="Stop after this many seconds"
+    )
+
+    parser.add_argument(
+        "--swap-probability",
+        type=float,
+        default=0.5,
+        help="Share of swaps among the moves (the rest are insertions)"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for the search"
+    )
+
+    parser.add_argument(
+        "--machine-id",
+        default=None,
+        help="machine_id of the optimized machine file"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Write the optimized machine YAML to this path"
+    )
+
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="Write the optimization report as JSON"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Optimize the strips and print the old and new statistics."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    config = YamlConfigLoader(SchemaValidator()).load_file(args.machine_config)
+    machine_id = config.get("machine_id") or os.path.splitext(os.path.basename(args.machine_config))[0]
+    machine = MachineFactory(RNGProvider()).create_machine(machine_id, config)
+
+    palette = {name: args.palette for name in args.reel_sets} if args.palette else None
+    optimizer = ReelStripOptimizer(machine, reel_sets=args.reel_sets, palette=palette,
+                                   fixed_reels=args.fixed_reels)
+    result = optimizer.optimize(args.target_rtp, args.target_hit_rate, args.target_trigger,
+                                weights=dict(args.weights), iterations=args.iterations,
+                                swap_probability=args.swap_probability, seed=args.seed,
+                                max_seconds=args.max_seconds)
+
+    print(f"Machine: {machine_id}")
+    print(f"{'':<10}{'RTP':>10}{'hit rate':>10}{'trigger':>12}{'score':>12}")
+    for label, metrics, score in (("current", result.original, result.original_score),
+                                  ("optimized", result.metrics, result.score)):
+        print(f"{label:<10}{metrics.rtp:>10.6f}{metrics.hit_rate:>10.4f}{metrics.trigger:>12.6f}{score:>12.3e}")
+    print(f"Targets: {', '.join(f'{name} {value:g}' for name, value in result.targets.items())}")
+    print(f"{result.iterations} moves, {result.accepted} accepted, "
+          f"{result.evaluations_per_minute:,.0f} evaluations per minute")
+    for name, reels in result.composition.items():
+        for reel, changes in reels.items():
+            print(f"  {name}/{reel}: " + ", ".join(f"{symbol}: {delta:+d}" for symbol, delta in changes.items()))
+
+    if args.output:
+        with open(args.machine_config, "r", encoding="utf-8") as f:
+            source = f.read()
+        strips = {name: result.strips[name] for name in args.reel_sets}
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(reel_strips_yaml(source, strips, args.machine_id))
+        print(f"Optimized machine written to {args.output}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(dict(result.to_dict(), machine_id=machine_id), f, indent=2)
+        print(f"Optimization report written to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
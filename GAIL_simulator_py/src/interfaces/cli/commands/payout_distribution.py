@@ -0,0 +1,108 @@
+# src/interfaces/cli/commands/payout_distribution.py
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.domain.machine.factories.machine_factory import MachineFactory
+from src.domain.machine.services.batch_evaluation import BatchWinEvaluator
+from src.domain.machine.services.payout_distribution import game_distributions, DEFAULT_BANDS
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compute a machine's exact per-spin and per-round payout distributions"
+    )
+
+    parser.add_argument(
+        "machine_config",
+        help="Path to a machine YAML file (e.g. src/application/config/machines/newBee.yaml)"
+    )
+
+    parser.add_argument(
+        "--bands",
+        type=float,
+        nargs="+",
+        default=list(DEFAULT_BANDS),
+        help="Win band edges (multiples of the bet) of the hit-frequency table"
+    )
+
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.9,
+        help="Confidence level of the volatility index"
+    )
+
+    parser.add_argument(
+        "--pmf",
+        action="store_true",
+        help="Include the full round-win distribution in the JSON output"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Write the distributions as JSON"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Compute the distributions and print the summary tables."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    config = YamlConfigLoader(SchemaValidator()).load_file(args.machine_config)
+    machine_id = config.get("machine_id") or os.path.splitext(os.path.basename(args.machine_config))[0]
+    machine = MachineFactory(RNGProvider()).create_machine(machine_id, config)
+    distributions = game_distributions(BatchWinEvaluator(machine))
+
+    print(f"Machine: {machine_id}")
+    print(f"Free-spin trigger probability: {distributions['trigger']:.6f}")
+    print(f"{'':<12}{'mean':>10}{'std':>10}{'hit freq':>10}{'VI':>10}{'max win':>10}")
+    summaries = {}
+    for name in ("base_spin", "bonus_spin", "free_round", "round"):
+        summary = distributions[name].summary(args.confidence)
+        summaries[name] = summary
+        print(f"{name:<12}{summary['mean']:>10.4f}{summary['std']:>10.4f}{summary['hit_frequency']:>10.4f}"
+              f"{summary['volatility_index']:>10.4f}{summary['max_win']:>10.1f}")
+
+    bands = distributions["round"].bands(args.bands)
+    print("Round wins by band (x bet):")
+    for band in bands:
+        label = "no win" if band["low"] == band["high"] else f"({band['low']:g}, {band['high']:g}]"
+        rtp_share = f", RTP {band['rtp_share']:.4f}" if "rtp_share" in band else ""
+        one_in = f"1 in {1 / band['probability']:,.0f}" if band["probability"] > 0 else "never"
+        print(f"  {label:<16}{band['probability']:.6e} ({one_in}{rtp_share})")
+
+    if args.output:
+        result = {"machine_id": machine_id, "trigger": distributions["trigger"],
+                  "summaries": summaries, "round_bands": bands}
+        if args.pmf:
+            result["round_pmf"] = {"values": distributions["round"].values.tolist(),
+                                   "probabilities": distributions["round"].probabilities.tolist()}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Distributions written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# src/interfaces/cli/commands/replay_session.py
+import os
+import sys
+import logging
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.infrastructure.output.replay_log import load_replay_entries
+from src.infrastructure.output.spin_segments import encode_spins
+from src.infrastructure.output.spin_columnar import FILE_EXTENSIONS
+from src.application.registry.registry_service import RegistryService
+from src.application.simulation.session_replayer import SessionReplayer
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Regenerate spin-by-spin logs from a replay log (seed + bet sequence)"
+    )
+
+    parser.add_argument(
+        "replay_log",
+        help="Path to a <player>_<machine>_replay.jsonl[.gz|.zst] file"
+    )
+
+    parser.add_argument(
+        "-c", "--config",
+        default="src/application/config/simulation/default_simulation.yaml",
+        help="Simulation config used for the original run (to load machine definitions)"
+    )
+
+    parser.add_argument(
+        "-s", "--session",
+        nargs="+",
+        default=None,
+        help="Session ids to replay (default: all sessions in the log)"
+    )
+
+    parser.add_argument(
+        "-o", "--output-dir",
+        default="replayed",
+        help="Directory for the regenerated <session_id>_raw files"
+    )
+
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet", "arrow"],
+        default="csv",
+        help="Output file format"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Replay the requested sessions and write one raw spin file per session."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    entries = load_replay_entries(args.replay_log)
+    session_ids = args.session or list(entries)
+    missing = [session_id for session_id in session_ids if session_id not in entries]
+    if missing:
+        print(f"Sessions not found in replay log: {', '.join(missing)}")
+        return 1
+    if not session_ids:
+        print("Replay log is empty")
+        return 0
+
+    config_loader = YamlConfigLoader(SchemaValidator())
+    config = config_loader.load_file(args.config)
+    machine_config = config.get("file_configs", {}).get("machines", {})
+
+    rng_provider = RNGProvider()
+    registry_service = RegistryService(config_loader, rng_provider)
+    registry_service.load_all_machines(machine_config.get("dir", "src/application/config/machines"),
+                                       machine_config.get("selection"))
+
+    replayers = {}
+    extension = ".csv" if args.format == "csv" else FILE_EXTENSIONS[args.format]
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    failures = 0
+    for session_id in session_ids:
+        entry = entries[session_id]
+        machine_id = entry["machine_id"]
+        try:
+            if machine_id not in replayers:
+                machine = registry_service.machine_registry.create_instance(machine_id)
+                if machine is None:
+                    raise ValueError(f"Machine not found in config: {machine_id}")
+                replayers[machine_id] = SessionReplayer(machine, rng_provider)
+
+            spins = replayers[machine_id].replay(entry)
+            output_path = os.path.join(args.output_dir, f"{session_id}_raw{extension}")
+            with open(output_path, "wb") as f:
+                f.write(encode_spins(spins, args.format))
+            print(f"{session_id}: {len(spins)} spins -> {output_path}")
+        except Exception as e:
+            failures += 1
+            print(f"{session_id}: failed - {e}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# src/interfaces/cli/commands/ruin_analysis.py
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.domain.machine.factories.machine_factory import MachineFactory
+from src.application.analysis.ruin_model import RuinModel
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compute bust probability, session length and final balance of fixed-bet sessions "
+                    "with a Markov chain instead of simulation"
+    )
+
+    parser.add_argument(
+        "machine_config",
+        help="Path to a machine YAML file (e.g. src/application/config/machines/newBee.yaml)"
+    )
+
+    parser.add_argument(
+        "player_config",
+        nargs="?",
+        default=None,
+        help="Player YAML file providing initial_balance, end_probability and max_spins_per_session"
+    )
+
+    parser.add_argument(
+        "--bet",
+        type=float,
+        default=1.0,
+        help="Fixed bet per base spin"
+    )
+
+    parser.add_argument(
+        "--initial-balance",
+        type=float,
+        default=None,
+        help="Initial balance (overrides the player config)"
+    )
+
+    parser.add_argument(
+        "--end-probability",
+        type=float,
+        default=None,
+        help="Probability of ending the session after each spin (overrides the player config)"
+    )
+
+    parser.add_argument(
+        "--max-spins",
+        type=int,
+        default=None,
+        help="Maximum spins per session (overrides the player config)"
+    )
+
+    parser.add_argument(
+        "--balance-cap",
+        type=float,
+        default=None,
+        help="Upper end of the balance grid (default: largest initial balance + 1000 bets)"
+    )
+
+    parser.add_argument(
+        "--resolution",
+        type=float,
+        default=None,
+        help="Balance grid step (default: exact win lattice, coarsened for large grids)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Write the result (including distributions) as JSON"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Solve the session chain and print the result."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    loader = YamlConfigLoader(SchemaValidator())
+    config = loader.load_file(args.machine_config)
+    machine_id = config.get("machine_id") or os.path.splitext(os.path.basename(args.machine_config))[0]
+    machine = MachineFactory(RNGProvider()).create_machine(machine_id, config)
+
+    player_config = loader.load_file(args.player_config) if args.player_config else {}
+    overrides = {"bet": args.bet, "balance_cap": args.balance_cap, "resolution": args.resolution}
+    if args.end_probability is not None:
+        overrides["end_probability"] = args.end_probability
+    if args.max_spins is not None:
+        overrides["max_spins"] = args.max_spins
+    model = RuinModel.from_player_config(machine, player_config, **overrides)
+
+    initial_balance = args.initial_balance
+    if initial_balance is None:
+        initial_balance = player_config.get("initial_balance", 1000.0)
+    result = model.solve(initial_balance)
+
+    print(f"Machine: {machine_id}, bet {result.bet:g}, end probability {result.end_probability:g}, "
+          f"max spins {result.max_spins if result.max_spins is not None else 'unlimited'}")
+    print(f"Initial balance: {initial_balance} (mean {result.expected_initial_balance:,.2f})")
+    print(f"Bust probability: {result.bust_probability:.6f}")
+    print(f"Player stop probability: {result.stop_probability:.6f}, spin limit: {result.limit_probability:.6f}")
+    print(f"Expected spins: {result.expected_spins:,.2f} (std {result.spins_std:,.2f}, "
+          f"median {result.spins_quantile(0.5)})")
+    print(f"Expected final balance: {result.expected_final_balance:,.2f} "
+          f"(loss {result.expected_initial_balance - result.expected_final_balance:,.2f})")
+    quantiles = ", ".join(f"{q:.0%}: {result.final_balance_quantile(q):,.2f}" for q in (0.05, 0.25, 0.5, 0.75, 0.95))
+    print(f"Final balance quantiles: {quantiles}")
+    print(f"Grid: step {result.resolution:g}, cap {result.balance_cap:,.2f}, "
+          f"capped mass {result.capped_probability:.2e}, unresolved {result.unresolved_probability:.2e}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(dict(result.to_dict(include_distributions=True), machine_id=machine_id), f, indent=2)
+        print(f"Result written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
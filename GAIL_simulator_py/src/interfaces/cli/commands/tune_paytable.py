@@ -0,0 +1,168 @@
+# src/interfaces/cli/commands/tune_paytable.py
+import os
+import sys
+import json
+import logging
+import argparse
+from statistics import NormalDist
+
+# Add src directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.domain.machine.factories.machine_factory import MachineFactory
+from src.domain.machine.services.paytable_tuner import PayTableTuner, pay_table_yaml
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Tune a machine's pay table to a target RTP and volatility"
+    )
+
+    parser.add_argument(
+        "machine_config",
+        help="Path to a machine YAML file (e.g. src/application/config/machines/newBee.yaml)"
+    )
+
+    parser.add_argument(
+        "--target-rtp",
+        type=float,
+        required=True,
+        help="Target round RTP (e.g. 0.96)"
+    )
+
+    volatility = parser.add_mutually_exclusive_group()
+    volatility.add_argument(
+        "--target-std",
+        type=float,
+        default=None,
+        help="Target standard deviation of the round win (multiples of the bet)"
+    )
+    volatility.add_argument(
+        "--target-vi",
+        type=float,
+        default=None,
+        help="Target volatility index at 90%% confidence (z * std)"
+    )
+
+    parser.add_argument(
+        "--spins",
+        type=int,
+        default=1000000,
+        help="Spins per reel set for the second moments when the stops are not enumerated"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for the moment simulation"
+    )
+
+    parser.add_argument(
+        "--fixed-symbols",
+        nargs="+",
+        default=[],
+        help="Pay table symbols whose payouts are kept"
+    )
+
+    parser.add_argument(
+        "--no-monotonic",
+        action="store_true",
+        help="Allow longer matches to pay less than shorter ones"
+    )
+
+    parser.add_argument(
+        "--no-ranking",
+        action="store_true",
+        help="Allow symbols to change their payout ranking"
+    )
+
+    parser.add_argument(
+        "--machine-id",
+        default=None,
+        help="machine_id of the tuned machine file"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Write the tuned machine YAML to this path"
+    )
+
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="Write the tuning result as JSON"
+    )
+
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check the tuned pay table against its exact payout distribution"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose output"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Tune the pay table and print the old and new statistics."""
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    factory = MachineFactory(RNGProvider())
+    config = YamlConfigLoader(SchemaValidator()).load_file(args.machine_config)
+    machine_id = config.get("machine_id") or os.path.splitext(os.path.basename(args.machine_config))[0]
+    machine = factory.create_machine(machine_id, config)
+
+    tuner = PayTableTuner(machine, moment_spins=args.spins, seed=args.seed)
+    target_std = args.target_std
+    if args.target_vi is not None:
+        target_std = args.target_vi / NormalDist().inv_cdf(0.95)
+    result = tuner.solve(args.target_rtp, target_std, monotonic=not args.no_monotonic,
+                         keep_ranking=not args.no_ranking, fixed_symbols=args.fixed_symbols)
+
+    print(f"Machine: {machine_id} (moments {result.moments})")
+    print(f"{'':<10}{'RTP':>10}{'std':>10}{'VI':>10}")
+    z = NormalDist().inv_cdf(0.95)
+    print(f"{'current':<10}{result.original_rtp:>10.6f}{result.original_std:>10.4f}{z * result.original_std:>10.4f}")
+    print(f"{'tuned':<10}{result.rtp:>10.6f}{result.std:>10.4f}{result.volatility_index():>10.4f}")
+    if result.changes:
+        print("Pay table changes:")
+        for symbol, (old, new) in result.changes.items():
+            print(f"  {symbol:<6}{str(old):<24} -> {new}")
+    else:
+        print("Pay table unchanged")
+
+    if args.verify:
+        from src.domain.machine.services.batch_evaluation import BatchWinEvaluator
+        from src.domain.machine.services.payout_distribution import game_distributions
+        tuned_config = dict(config, pay_table=result.pay_table)
+        round_win = game_distributions(BatchWinEvaluator(factory.create_machine(machine_id, tuned_config)))["round"]
+        print(f"Exact check: RTP {round_win.mean():.6f}, std {round_win.std():.4f}")
+
+    if args.output:
+        with open(args.machine_config, "r", encoding="utf-8") as f:
+            source = f.read()
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(pay_table_yaml(source, result.pay_table, args.machine_id))
+        print(f"Tuned machine written to {args.output}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(dict(result.to_dict(), machine_id=machine_id), f, indent=2)
+        print(f"Tuning result written to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -193,14 +193,14 @@ def main():
         logger.info(f"Simulation completed in {simulation_time:.2f} seconds")
 
         # Display results summary
-        total_sessions = len(simulation_results["sessions"])
+        total_sessions = simulation_results["session_count"]
         total_pairs = len(simulation_results["player_machine_pairs"])
         sessions_per_second = total_sessions / simulation_time if simulation_time > 0 else 0
         
         logger.info("="*60)
         logger.info("SIMULATION COMPLETED")
         logger.info("="*60)
-        logger.info(f"Total sessions executed: {total_sessions}")
+        logger.info(f"Total sessions executed: {total_sessions} ({simulation_results['failed_sessions']} failed)")
         logger.info(f"Player-machine pairs: {total_pairs}")
         logger.info(f"Simulation time: {simulation_time:.2f} seconds")
         logger.info(f"Performance: {sessions_per_second:.2f} sessions/second")
@@ -214,10 +214,11 @@ def main():
             logger.info(f"  - Machine instances: {final_pool_stats['machines']['borrowed']} borrowed, {final_pool_stats['machines']['returned']} returned")
         
         # Calculate and display simulation statistics
-        if simulation_results["sessions"]:
-            total_spins = sum(s.get("total_spins", 0) for s in simulation_results["sessions"])
-            total_bet = sum(s.get("total_bet", 0.0) for s in simulation_results["sessions"])
-            total_win = sum(s.get("total_win", 0.0) for s in simulation_results["sessions"])
+        overall = simulation_results.get("distribution_stats", {}).get("overall", {})
+        if overall.get("sessions"):
+            total_spins = overall["total_spins"]
+            total_bet = overall["total_bet"]
+            total_win = overall["total_win"]
             overall_rtp = total_win / total_bet if total_bet > 0 else 0.0
             
             logger.info("="*60)
@@ -231,8 +232,36 @@ def main():
         else:
             logger.warning("No sessions completed successfully")
         
+        convergence = simulation_results.get("convergence")
+        if convergence:
+            logger.info("="*60)
+            logger.info("CONVERGENCE")
+            logger.info("="*60)
+            logger.info(f"Converged pairs: {convergence['converged_pairs']}/{total_pairs} "
+                        f"after {convergence['rounds']} rounds")
+            for pair_key, info in convergence["pairs"].items():
+                metrics = ", ".join(
+                    f"{name}={m['estimate']:.4f}±{m['half_width']:.4f}" if m["half_width"] is not None
+                    else f"{name}={m['estimate']:.4f}"
+                    for name, m in info["metrics"].items())
+                status = "converged" if info["converged"] else "budget exhausted"
+                logger.info(f"  - {pair_key}: {info['sessions']} sessions, {status} ({metrics})")
+        
+        allocation = simulation_results.get("allocation")
+        if allocation:
+            logger.info("="*60)
+            logger.info("ALLOCATION")
+            logger.info("="*60)
+            logger.info(f"Allocated {allocation['total_sessions']}/{allocation['budget']} sessions "
+                        f"by {allocation['metric']} variance")
+            for pair_key, info in allocation["pairs"].items():
+                error = f"±{info['standard_error']:.4f}" if info["standard_error"] is not None else ""
+                logger.info(f"  - {pair_key}: {info['sessions']} sessions "
+                            f"(Neyman share {info['neyman_share']:.1%}), "
+                            f"{allocation['metric']}={info['estimate']:.4f}{error}")
+        
         # Analyze results (if we have data to analyze)
-        if simulation_results["sessions"]:
+        if total_sessions:
             logger.info("Analyzing simulation results")
             preference_analyzer = PreferenceAnalyzer()
             preference_analysis = preference_analyzer.analyze_preferences(simulation_results)
@@ -0,0 +1,126 @@
+# tests/test_allocation.py
+import unittest
+import sys
+import os
+import random
+import threading
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.application.simulation.allocation import NeymanAllocator
+from src.infrastructure.concurrency.task_executor import TaskExecutor, ExecutionMode
+
+
+VOLATILITY = {"calm": 0.05, "mid": 0.2, "wild": 0.6}
+
+
+def fake_result(player_id, machine_id, rng):
+    """A session result shaped like SessionRunner.run() output."""
+    total_bet = 30.0
+    total_win = max(total_bet * (0.95 + rng.gauss(0.0, VOLATILITY[machine_id])), 0.0)
+    return {"player_id": player_id, "machine_id": machine_id, "total_spins": 30,
+            "total_bet": total_bet, "total_win": total_win,
+            "initial_balance": 100.0, "final_balance": 100.0 + total_win - total_bet}
+
+
+class TestNeymanAllocator(unittest.TestCase):
+    """Test cases for variance-driven session allocation."""
+
+    def setUp(self):
+        self.pairs = [("p1", machine_id) for machine_id in VOLATILITY]
+
+    def test_allocation_is_proportional_to_std(self):
+        """Sessions end up roughly proportional to each pair's per-session standard deviation."""
+        allocator = NeymanAllocator({"total_sessions": 3000, "pilot_sessions": 20}, self.pairs, 0)
+        rng = random.Random(3)
+        while True:
+            batch = allocator.next_round(25)
+            if not batch:
+                break
+            for player_id, machine_id, _ in batch:
+                allocator.add_result(fake_result(player_id, machine_id, rng))
+
+        report = allocator.report()
+        self.assertEqual(report["total_sessions"], 3000)
+        total_std = sum(VOLATILITY.values())
+        for machine_id, volatility in VOLATILITY.items():
+            info = report["pairs"][f"p1_{machine_id}"]
+            self.assertAlmostEqual(info["sessions"] / 3000, volatility / total_std, delta=0.03, msg=machine_id)
+            self.assertAlmostEqual(info["neyman_share"], volatility / total_std, delta=0.03, msg=machine_id)
+        self.assertGreater(report["pairs"]["p1_wild"]["sessions"], 5 * report["pairs"]["p1_calm"]["sessions"])
+
+    def test_pilot_sessions_come_first(self):
+        """Every pair gets its pilot sessions before any variance-based allocation."""
+        allocator = NeymanAllocator({"pilot_sessions": 4}, self.pairs, default_budget=30)
+        batch = allocator.next_round(12)
+        self.assertEqual(sorted(allocator.scheduled.values()), [4, 4, 4])
+        self.assertEqual(sorted(n for _, m, n in batch if m == "wild"), [1, 2, 3, 4])
+        self.assertEqual(len(allocator.next_round(100)), 18)
+        self.assertIsNone(allocator.next_pair())
+
+    def test_waits_for_pilot_results_before_allocating(self):
+        """After the pilot phase, allocation waits until each pair's variance can be estimated."""
+        allocator = NeymanAllocator({"pilot_sessions": 2, "total_sessions": 10}, self.pairs, 0)
+        allocator.next_round(6)
+        self.assertFalse(allocator.ready())
+        rng = random.Random(1)
+        for player_id, machine_id in self.pairs:
+            allocator.add_result(fake_result(player_id, machine_id, rng))
+            allocator.add_result({"player_id": player_id, "machine_id": machine_id, "error": "failed"})
+        # 出错的会话不计入方差估计，但也不会让分配一直等待
+        self.assertTrue(allocator.ready())
+
+    def test_rejects_unknown_metric(self):
+        """Unknown metrics are reported at construction."""
+        with self.assertRaises(ValueError):
+            NeymanAllocator({"metric": "volatility_index"}, self.pairs, 10)
+
+
+class TestStreamingExecution(unittest.TestCase):
+    """Test cases for TaskExecutor.execute_streaming."""
+
+    def run_stream(self, mode):
+        executor = TaskExecutor(mode=mode, max_workers=4)
+        allocator = NeymanAllocator({"total_sessions": 400, "pilot_sessions": 10}, [("p1", "calm"), ("p1", "wild")], 0)
+        lock = threading.Lock()
+        rng = random.Random(9)
+        results = []
+
+        def next_task():
+            if not allocator.ready():
+                return None
+            item = allocator.next_pair()
+            if item is None:
+                return None
+            player_id, machine_id, _ = item
+
+            def task():
+                with lock:
+                    return fake_result(player_id, machine_id, rng)
+            return task
+
+        def on_result(result):
+            allocator.add_result(result)
+            results.append(result)
+
+        executed = executor.execute_streaming(next_task, on_result, max_in_flight=8)
+        return executed, results, allocator.report()
+
+    def test_sequential_and_threaded_streams(self):
+        """Both modes run the whole budget and favour the volatile pair."""
+        for mode in (ExecutionMode.SEQUENTIAL, ExecutionMode.MULTITHREAD):
+            executed, results, report = self.run_stream(mode)
+            self.assertEqual(executed, 400, mode)
+            self.assertEqual(len(results), 400, mode)
+            self.assertGreater(report["pairs"]["p1_wild"]["sessions"], 5 * report["pairs"]["p1_calm"]["sessions"])
+
+    def test_process_mode_is_rejected(self):
+        """Streaming tasks are closures over in-process state, so process pools are refused up front."""
+        executor = TaskExecutor(mode=ExecutionMode.MULTIPROCESS, max_workers=2)
+        with self.assertRaises(ValueError):
+            executor.execute_streaming(lambda: None, lambda result: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
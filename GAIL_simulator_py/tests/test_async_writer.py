@@ -0,0 +1,148 @@
+# tests/test_async_writer.py
+import unittest
+import sys
+import os
+import csv
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.output.async_writer import AsyncWritePipeline
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager
+from tests.test_spin_columnar import make_spins
+
+
+class StubSession:
+    """Just enough of GamingSession for SessionOutputManager."""
+    player = type("Player", (), {"id": "p1"})()
+    machine = type("Machine", (), {"id": "m1"})()
+
+    def __init__(self, session_id):
+        self.spins = make_spins(session_id, 10)
+
+    def get_session_summary(self):
+        return {"total_spins": len(self.spins)}
+
+    def get_initial_balance(self):
+        return 100.0
+
+    get_current_balance = get_first_bet = get_sim_duration = get_initial_balance
+
+
+class TestAsyncWritePipeline(unittest.TestCase):
+    """Test cases for the background output pipeline."""
+
+    def test_backpressure(self):
+        """Submitting to a full queue blocks until a writer frees a slot."""
+        started = threading.Event()
+        release = threading.Event()
+        written = []
+
+        def slow_write(payload):
+            started.set()
+            release.wait()
+            written.append(payload)
+
+        pipeline = AsyncWritePipeline("test", num_writers=1, max_queue_size=2)
+        pipeline.submit(slow_write, 0, rows=10)
+        started.wait(5)
+        for i in (1, 2):  # the writer holds 0, the queue holds 1 and 2
+            pipeline.submit(slow_write, i, rows=10)
+
+        submitted = threading.Event()
+        producer = threading.Thread(target=lambda: (pipeline.submit(slow_write, 3, rows=10), submitted.set()))
+        producer.start()
+        self.assertFalse(submitted.wait(0.1))
+
+        release.set()
+        producer.join(timeout=5)
+        pipeline.shutdown()
+
+        self.assertEqual(written, [0, 1, 2, 3])
+        metrics = pipeline.get_metrics()
+        self.assertEqual(metrics["sessions_written"], 4)
+        self.assertEqual(metrics["rows_written"], 40)
+        self.assertEqual(metrics["blocked_submits"], 1)
+        self.assertGreater(metrics["blocked_seconds"], 0.05)
+        self.assertGreater(metrics["rows_per_second"], 0)
+
+    def test_flush_and_errors(self):
+        """flush waits for every task; exceptions and False returns are counted as errors, not raised."""
+        results = []
+
+        def write(payload):
+            if payload % 5 == 0:
+                raise IOError("disk full")
+            if payload % 7 == 0:
+                return False  # failure reported the way SessionOutputManager.write_record does
+            time.sleep(0.001)
+            results.append(payload)
+
+        pipeline = AsyncWritePipeline("test", num_writers=3, max_queue_size=4)
+        for i in range(1, 21):
+            pipeline.submit(write, i, rows=1)
+        pipeline.flush()
+
+        self.assertEqual(sorted(results), [i for i in range(1, 21) if i % 5 and i % 7])
+        metrics = pipeline.get_metrics()
+        self.assertEqual((metrics["sessions_written"], metrics["errors"]), (14, 6))
+
+        pipeline.shutdown()
+        with self.assertRaises(RuntimeError):
+            pipeline.submit(write, 1)
+
+
+class TestAsyncSessionOutput(unittest.TestCase):
+    """Test cases for async_write through the output managers."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_sessions_written_after_close(self):
+        """Queued sessions are persisted by the time the pipeline is closed."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"async_write": {"enabled": True, "max_queue_size": 2}}
+        })
+        output_manager.initialize()
+
+        for index in range(1, 6):
+            session = StubSession(f"p1_m1_{index}")
+            self.assertTrue(SessionOutputManager(f"p1_m1_{index}", output_manager).save_session_data(session))
+            session.spins.clear()  # the queued record must not depend on the live session
+
+        metrics = output_manager.close_write_pipeline()
+        self.assertEqual(metrics["sessions_written"], 5)
+        self.assertEqual(metrics["rows_written"], 50)
+
+        raw_dir = os.path.join(output_manager.task_dir, "p1", "m1", "raw_data")
+        self.assertEqual(len(os.listdir(raw_dir)), 5)
+        with open(output_manager.finalize_all_summaries()["p1_m1"], newline='') as f:
+            self.assertEqual(sorted(r["session_id"] for r in csv.DictReader(f)), ["1", "2", "3", "4", "5"])
+
+    def test_failed_session_writes_are_counted(self):
+        """write_record swallows write errors, but the pipeline still reports them."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"async_write": {"enabled": True}}
+        })
+        output_manager.initialize()
+
+        with mock.patch.object(SessionOutputManager, "_save_raw_spins_data", side_effect=IOError("disk full")):
+            for index in range(1, 4):
+                SessionOutputManager(f"p1_m1_{index}", output_manager).save_session_data(StubSession(f"p1_m1_{index}"))
+            metrics = output_manager.close_write_pipeline()
+        self.assertEqual((metrics["sessions_written"], metrics["errors"]), (0, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# tests/test_compression.py
+import unittest
+import sys
+import os
+import gzip
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.output.compression import (
+    CompressionSettings, compress_bytes, decompress_bytes, detect_codec,
+    open_text_writer, read_csv_rows
+)
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager, SessionRecord
+from src.infrastructure.output.spin_segments import SpinSegmentReader
+from src.infrastructure.output.spin_columnar import read_spin_files
+from tests.test_spin_columnar import make_spins
+
+
+class TestCompression(unittest.TestCase):
+    """Test cases for output compression helpers."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_bytes_round_trip(self):
+        """Compressed bytes are detected and decompressed transparently."""
+        data = b"spin_number,bet\n" + b"1,1.0\n" * 1000
+        for codec in ("none", "gzip", "zstd"):
+            compressed = compress_bytes(data, CompressionSettings(codec, level=1))
+            self.assertEqual(detect_codec(compressed), codec)
+            self.assertEqual(decompress_bytes(compressed), data)
+            if codec != "none":
+                self.assertLess(len(compressed), len(data) // 10)
+
+    def test_streaming_append(self):
+        """Appending to a compressed CSV adds a member/frame that reads back as one stream."""
+        for codec in ("gzip", "zstd"):
+            settings = CompressionSettings(codec, block_size=4096)
+            path = os.path.join(self.temp_dir, "rows.csv" + settings.extension)
+            with open_text_writer(path, settings) as f:
+                f.write("a,b\n1,2\n")
+            with open_text_writer(path, settings, "a") as f:
+                f.write("3,4\n")
+            self.assertEqual(read_csv_rows(path), [{"a": "1", "b": "2"}, {"a": "3", "b": "4"}])
+
+        with self.assertRaises(ValueError):
+            CompressionSettings("lzma")
+
+
+class TestCompressedOutput(unittest.TestCase):
+    """Test cases for compressed raw and summary output."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_sessions(self, output_config, count=3):
+        output_manager = OutputManager(dict(output_config, directories={"base_dir": self.temp_dir}))
+        output_manager.initialize()
+        for index in range(count):
+            session_id = f"p1_m1_{index}"
+            record = SessionRecord(session_id, "p1", "m1", make_spins(session_id, 20, seed=index),
+                                   {"session_id": str(index), "total_spins": 20})
+            self.assertTrue(SessionOutputManager(session_id, output_manager).write_record(record))
+        output_manager.close_segment_store()
+        return output_manager, output_manager.finalize_all_summaries()
+
+    def test_gzip_csv_and_summary(self):
+        """Raw CSVs and the summary CSV are gzip files that read back transparently."""
+        output_manager, summaries = self.write_sessions({"compression": {"codec": "gzip"}})
+        raw_path = os.path.join(output_manager.task_dir, "p1", "m1", "raw_data", "p1_m1_1_raw.csv.gz")
+        with gzip.open(raw_path, "rt") as f:
+            self.assertTrue(f.readline().startswith("session_id,"))
+        rows = read_csv_rows(raw_path)
+        self.assertEqual([int(r["spin_number"]) for r in rows], list(range(1, 21)))
+
+        self.assertTrue(summaries["p1_m1"].endswith("_sessions_summary.csv.gz"))
+        self.assertEqual(sorted(r["session_id"] for r in read_csv_rows(summaries["p1_m1"])), ["0", "1", "2"])
+
+    def test_zstd_segments(self):
+        """Segment blocks are compressed one by one and stay seekable."""
+        output_manager, _ = self.write_sessions({
+            "compression": {"codec": "zstd"},
+            "session_recording": {"layout": "segments"}
+        })
+        reader = SpinSegmentReader.for_pair(output_manager.task_dir, "p1", "m1")
+        self.assertEqual(reader.entries["p1_m1_2"]["compression"], "zstd")
+        self.assertEqual(detect_codec(reader.read_session_bytes("p1_m1_2")), "zstd")
+        self.assertEqual(len(reader.read_session("p1_m1_2")), 20)
+
+    def test_columnar_internal_compression(self):
+        """Columnar files use the codec internally and stay directly readable."""
+        output_manager, _ = self.write_sessions({
+            "compression": {"codec": "zstd"},
+            "session_recording": {"file_format": "parquet"}
+        })
+        path = os.path.join(output_manager.task_dir, "p1", "m1", "raw_data", "p1_m1_0_raw.parquet")
+        import pyarrow.parquet as pq
+        self.assertEqual(pq.ParquetFile(path).metadata.row_group(0).column(0).compression, "ZSTD")
+        self.assertEqual(read_spin_files(path).num_rows, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
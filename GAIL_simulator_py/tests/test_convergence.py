@@ -0,0 +1,106 @@
+# tests/test_convergence.py
+import unittest
+import sys
+import os
+import math
+import random
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.application.simulation.convergence import RatioStats, ConvergenceController
+
+
+def fake_result(player_id, machine_id, rng, volatility):
+    """A session result shaped like SessionRunner.run() output."""
+    spins = rng.randint(20, 40)
+    total_bet = float(spins)
+    total_win = max(total_bet * (0.95 + rng.gauss(0.0, volatility)), 0.0)
+    return {"player_id": player_id, "machine_id": machine_id, "total_spins": spins,
+            "total_bet": total_bet, "total_win": total_win,
+            "initial_balance": 100.0, "final_balance": 100.0 + total_win - total_bet}
+
+
+class TestRatioStats(unittest.TestCase):
+    """Test cases for the mergeable ratio estimator."""
+
+    def test_standard_error_matches_delta_method(self):
+        """The running standard error equals the delta-method formula on the raw data."""
+        rng = np.random.default_rng(2)
+        bets = rng.uniform(10, 50, 300)
+        wins = bets * rng.gamma(2.0, 0.48, 300)
+        stats, left, right = RatioStats(), RatioStats(), RatioStats()
+        for i, (w, b) in enumerate(zip(wins, bets)):
+            stats.update(w, b)
+            (left if i < 120 else right).update(w, b)
+
+        r = wins.sum() / bets.sum()
+        expected = math.sqrt(((wins - r * bets) ** 2).sum() / (300 * 299)) / bets.mean()
+        self.assertAlmostEqual(stats.ratio, r, places=12)
+        self.assertAlmostEqual(stats.standard_error(), expected, places=10)
+        self.assertAlmostEqual(left.merge(right).standard_error(), expected, places=10)
+        self.assertEqual(RatioStats().standard_error(), math.inf)
+
+
+class TestConvergenceController(unittest.TestCase):
+    """Test cases for convergence-driven session scheduling."""
+
+    def run_controller(self, controller, volatility):
+        rng = random.Random(4)
+        while True:
+            batch = controller.next_round()
+            if not batch:
+                return
+            for player_id, machine_id, _ in batch:
+                controller.add_result(fake_result(player_id, machine_id, rng, volatility[machine_id]))
+
+    def test_stops_converged_pairs_early(self):
+        """A low-volatility pair stops long before a high-volatility one."""
+        pairs = [("p1", "calm"), ("p1", "wild")]
+        controller = ConvergenceController({
+            "min_sessions": 20, "max_sessions": 5000, "batch_size": 10,
+            "targets": {"rtp": {"tolerance": 0.02}}
+        }, pairs)
+        self.run_controller(controller, {"calm": 0.05, "wild": 0.5})
+
+        report = controller.report()
+        calm = report["pairs"]["p1_calm"]
+        wild = report["pairs"]["p1_wild"]
+        self.assertTrue(calm["converged"] and wild["converged"])
+        self.assertLess(calm["sessions"], wild["sessions"] / 10)
+        self.assertLessEqual(wild["metrics"]["rtp"]["half_width"], 0.02)
+        self.assertGreaterEqual(calm["sessions"], 20)
+        self.assertEqual(report["total_sessions"], calm["scheduled"] + wild["scheduled"])
+
+    def test_budget_cap_and_session_numbering(self):
+        """The per-pair budget caps scheduling and session numbers continue across rounds."""
+        controller = ConvergenceController({
+            "max_sessions": 25, "batch_size": 10, "min_sessions": 5,
+            "targets": {"rtp": {"tolerance": 1e-6}, "session_length": {"tolerance": 0.01, "relative": True}}
+        }, [("p1", "m1")])
+        numbers = []
+        rng = random.Random(1)
+        while True:
+            batch = controller.next_round()
+            if not batch:
+                break
+            numbers.extend(n for _, _, n in batch)
+            for player_id, machine_id, _ in batch:
+                controller.add_result(fake_result(player_id, machine_id, rng, 0.3))
+
+        self.assertEqual(numbers, list(range(1, 26)))
+        info = controller.report()["pairs"]["p1_m1"]
+        self.assertFalse(info["converged"])
+        self.assertTrue(info["budget_exhausted"])
+        self.assertEqual(controller.rounds, 3)
+
+    def test_rejects_unknown_targets(self):
+        """Unknown target metrics are reported at construction."""
+        with self.assertRaises(ValueError):
+            ConvergenceController({"targets": {"volatility_index": {"tolerance": 0.1}}}, [("p1", "m1")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# tests/test_coordinator.py
+import unittest
+import sys
+import os
+import glob
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.infrastructure.concurrency.task_executor import TaskExecutor, ExecutionMode
+from src.application.registry.registry_service import RegistryService
+from src.application.simulation.coordinator import SimulationCoordinator
+from src.application.analysis.spin_stream_analyzer import analyze_task_dir
+from src.domain.player.models.v1.services.inference_broker import get_cluster_broker
+
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'application', 'config')
+
+
+def simulation_registry():
+    """Registry with newBee and the random player."""
+    registry = RegistryService(YamlConfigLoader(SchemaValidator()), RNGProvider())
+    registry.load_all_machines(os.path.join(CONFIG_DIR, 'machines'), {"include": ["newBee"]})
+    registry.load_all_players(os.path.join(CONFIG_DIR, 'players'), selection={"include": ["random_player"]})
+    return registry
+
+
+class TestSimulationCoordinator(unittest.TestCase):
+    """Test cases for end-to-end coordinator runs."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output = {"directories": {"base_dir": self.temp_dir}}
+        self.coordinator = SimulationCoordinator(simulation_registry(), output_config=self.output)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_simulation(self, **overrides):
+        config = {"sessions_per_pair": 4, "max_concurrent_sessions": 2, "use_concurrency": False,
+                  "max_spins": 200, "output": self.output}
+        config.update(overrides)
+        return self.coordinator.run_simulation(config)
+
+    def test_reports_include_spin_metrics(self):
+        """Drawdown and volatility reach the session analyses and match the streaming analysis of the raw files."""
+        results = self.run_simulation(keep_session_results=True)
+        self.assertEqual(len(results["sessions"]), 4)
+        for session in results["sessions"]:
+            self.assertEqual(session["spin_metrics"]["spins"], session["total_spins"])
+            analysis = self.coordinator.session_analyzer.analyze_session(session)
+            self.assertIn("max_drawdown", analysis["volatility"])
+            self.assertIn("bet_change_count", analysis["player_behavior"]["bet_progression"])
+
+        overall = results["spin_metrics"]["overall"]
+        streamed = analyze_task_dir(results["simulation_dir"], mode=ExecutionMode.SEQUENTIAL)["overall"]
+        self.assertEqual(overall["sessions"], 4)
+        self.assertEqual(overall["spins"], results["distribution_stats"]["overall"]["total_spins"])
+        for key in ("spins", "hit_rate", "total_payout", "max_win_multiplier"):
+            self.assertAlmostEqual(overall[key], streamed[key], places=6, msg=key)
+        self.assertAlmostEqual(overall["session_max_drawdown"]["mean"], streamed["session_max_drawdown"]["mean"],
+                               places=6)
+
+        reports = glob.glob(os.path.join(results["simulation_dir"], "reports", "spin_metrics_report_*.json"))
+        self.assertEqual(len(reports), 1)
+        with open(reports[0], encoding="utf-8") as f:
+            self.assertIn("random_player_newBee", json.load(f)["pairs"])
+
+    def test_session_results_are_not_retained_by_default(self):
+        """Sessions are only counted once written; the summary report comes from the streamed stats."""
+        results = self.run_simulation()
+        self.assertEqual(results["sessions"], [])
+        self.assertEqual((results["session_count"], results["failed_sessions"]), (4, 0))
+
+        reports = glob.glob(os.path.join(results["simulation_dir"], "reports", "simulation_report_*.json"))
+        self.assertEqual(len(reports), 1)
+        with open(reports[0], encoding="utf-8") as f:
+            summary = json.load(f)["simulation_summary"]
+        overall = results["distribution_stats"]["overall"]
+        self.assertEqual(summary["total_sessions"], 4)
+        self.assertEqual(summary["total_spins"], overall["total_spins"])
+        self.assertGreater(summary["total_spins"], 0)
+
+    def test_detailed_report_keeps_session_results(self):
+        """Requesting the detailed session report turns retention on, so the report is not empty."""
+        results = self.run_simulation(analysis={"include": {"detailed_session_report": True}})
+        self.assertEqual(len(results["sessions"]), 4)
+        self.assertEqual(results["session_count"], 4)
+
+    def test_allocation_spends_budget_despite_failed_sessions(self):
+        """A session that returns no result still counts as finished, so allocation does not stall."""
+        coordinator = SimulationCoordinator(simulation_registry(),
+                                            task_executor=TaskExecutor(ExecutionMode.MULTITHREAD, 2),
+                                            output_config=self.output)
+        run_single_session = coordinator._run_single_session
+
+        def flaky(player_id, machine_id, session_id, session_config):
+            if session_id.endswith("_2"):
+                return None
+            return run_single_session(player_id, machine_id, session_id, session_config)
+
+        with mock.patch.object(coordinator, "_run_single_session", side_effect=flaky):
+            results = coordinator.run_simulation({
+                "max_concurrent_sessions": 2, "max_spins": 50, "output": self.output,
+                "allocation": {"enabled": True, "total_sessions": 8, "pilot_sessions": 2}
+            })
+        info = results["allocation"]["pairs"]["random_player_newBee"]
+        self.assertEqual(results["allocation"]["total_sessions"], 8)
+        self.assertEqual(info["failed"], 1)
+        self.assertEqual((results["session_count"], results["failed_sessions"]), (8, 1))
+
+    def test_allocation_and_convergence_are_exclusive(self):
+        """Enabling both session-count strategies is a configuration error."""
+        with self.assertRaises(ValueError):
+            self.run_simulation(allocation={"enabled": True}, convergence={"enabled": True})
+
+    def test_inference_brokers_are_closed_after_the_run(self):
+        """Cluster brokers are shut down at the end of the run and their metrics reported."""
+        class Service:
+            model_dir = "fake"
+
+            def predict_bet_actions(self, batch, deterministic=True):
+                return [1] * len(batch)
+
+        broker = get_cluster_broker(9, Service())
+        broker.infer("bet", [0.0] * 12)
+        results = self.run_simulation(sessions_per_pair=1)
+        self.assertTrue(broker.closed)
+        self.assertEqual(results["inference_brokers"]["cluster_9"]["requests"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
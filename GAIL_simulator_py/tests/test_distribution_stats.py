@@ -0,0 +1,128 @@
+# tests/test_distribution_stats.py
+import unittest
+import sys
+import os
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.session.entities.incremental_stats import IncrementalStats
+from src.domain.session.entities.session_stats import SessionStats
+from src.domain.session.entities.distribution_stats import DistributionAggregator, DistributionGroup
+
+
+def make_stats(session_id, player_id, machine_id, spins, seed=0):
+    """SessionStats fed with a random spin sequence (every 7th spin is free)."""
+    rng = random.Random(seed)
+    stats = SessionStats(session_id=session_id, player_id=player_id, machine_id=machine_id)
+    stats.initial_balance = 100.0
+    balance = 100.0
+    for n in range(spins):
+        free = n % 7 == 6
+        bet = rng.choice([1.0, 2.0, 5.0])
+        payout = rng.choice([0.0, 0.0, 0.0, 1.0, 3.0, 50.0]) * bet
+        balance += payout - (0.0 if free else bet)
+        stats.update_spin(SimpleNamespace(bet=bet, payout=payout, in_free_spins=free, free_spins_triggered=False))
+    stats.final_balance = balance
+    stats.duration = float(spins)
+    return stats
+
+
+def sample_skewness(values):
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    m2 = ((values - values.mean()) ** 2).mean()
+    m3 = ((values - values.mean()) ** 3).mean()
+    return n * n / ((n - 1) * (n - 2)) * m3 / m2 ** 1.5
+
+
+class TestIncrementalStatsMerge(unittest.TestCase):
+    """Test cases for merging IncrementalStats."""
+
+    def test_merge_matches_single_pass(self):
+        """Merged moments equal the moments of the concatenated data."""
+        rng = random.Random(1)
+        values = [rng.expovariate(0.5) for _ in range(400)]
+        whole = IncrementalStats()
+        parts = [IncrementalStats() for _ in range(3)]
+        for i, value in enumerate(values):
+            whole.update(value)
+            parts[i % 3].update(value)
+        merged = parts[0].merge(parts[1]).merge(parts[2])
+
+        for key in ("count", "mean", "variance", "skewness", "kurtosis", "min", "max", "sum"):
+            self.assertAlmostEqual(merged.to_dict()[key], whole.to_dict()[key], places=8, msg=key)
+        self.assertAlmostEqual(whole.get_variance(), np.var(values, ddof=1), places=8)
+        self.assertAlmostEqual(whole.get_skewness(), sample_skewness(values), places=8)
+
+    def test_merge_keeps_zero_extremes_and_does_not_alias(self):
+        """A 0.0 minimum survives merging, and merge never returns one of its inputs."""
+        zeros = IncrementalStats()
+        zeros.update(0.0)
+        positives = IncrementalStats()
+        positives.update(2.0)
+        self.assertEqual(positives.merge(zeros).min_value, 0.0)
+
+        empty = IncrementalStats()
+        merged = empty.merge(zeros)
+        self.assertIsNot(merged, zeros)
+        merged.update(5.0)
+        self.assertEqual(zeros.count, 1)
+
+
+class TestDistributionStats(unittest.TestCase):
+    """Test cases for per-session, per-pair and per-machine distribution statistics."""
+
+    def test_session_stats_track_spin_moments(self):
+        """SessionStats accumulates bet/payout/profit moments alongside its sums."""
+        stats = make_stats("p1_m1_1", "p1", "m1", 50)
+        self.assertEqual(stats.payout_stats.count, 50)
+        self.assertEqual(stats.bet_stats.count, 50 - 7)
+        self.assertAlmostEqual(stats.profit_stats.sum_values, stats.total_win - stats.total_bet, places=9)
+        self.assertAlmostEqual(stats.bet_stats.sum_values, stats.total_bet, places=9)
+
+        flat = stats.to_dict()
+        self.assertNotIn("profit_stats", flat)
+        self.assertNotIn("spin_distributions", flat)
+        self.assertIn("profit", stats.to_dict(include_advanced=True)["spin_distributions"])
+
+    def test_worker_local_merge_equals_single_aggregator(self):
+        """Aggregators filled on separate workers merge to the same result as one aggregator."""
+        all_stats = [make_stats(f"p{p}_m{m}_{n}", f"p{p}", f"m{m}", 20 + n * 3, seed=p * 100 + m * 10 + n)
+                     for p in range(2) for m in range(2) for n in range(5)]
+        single = DistributionAggregator()
+        workers = [DistributionAggregator() for _ in range(3)]
+        for i, stats in enumerate(all_stats):
+            single.add_session(stats)
+            workers[i % 3].add_session(stats)
+        merged = workers[0].merge(workers[1]).merge(workers[2])
+
+        expected = single.to_dict()
+        actual = merged.to_dict()
+        self.assertEqual(set(actual["pairs"]), {"p0_m0", "p0_m1", "p1_m0", "p1_m1"})
+        self.assertEqual(actual["overall"]["sessions"], 20)
+        self.assertEqual(actual["machines"]["m1"]["sessions"], 10)
+        for metric in ("profit", "payout"):
+            for key in ("mean", "variance", "skewness", "kurtosis"):
+                self.assertAlmostEqual(actual["overall"]["spin"][metric][key],
+                                       expected["overall"]["spin"][metric][key], places=8)
+        self.assertAlmostEqual(actual["overall"]["session"]["rtp"]["mean"],
+                               np.mean([s.total_win / s.total_bet for s in all_stats]), places=9)
+        self.assertEqual(actual["overall"]["total_spins"], sum(s.total_spins for s in all_stats))
+
+    def test_group_merge_is_non_destructive(self):
+        """Merging groups leaves the inputs unchanged."""
+        group = DistributionGroup()
+        group.add_session(make_stats("p1_m1_1", "p1", "m1", 10))
+        merged = DistributionGroup().merge(group)
+        merged.add_session(make_stats("p1_m1_2", "p1", "m1", 10, seed=2))
+        self.assertEqual(group.sessions, 1)
+        self.assertEqual(group.session["session_length"].count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# tests/test_feature_store.py
+import unittest
+import sys
+import os
+import random
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.player.models.v1.services.feature_store import SessionFeatureStore
+from src.domain.player.models.v1.services.data_processor_service import DataProcessorService
+
+
+def simulate_session(session_id, n_spins, seed, initial_balance=500.0):
+    """Yield session_data dicts shaped like GamingSession.get_session_data()."""
+    rng = random.Random(seed)
+    balance = initial_balance
+    total_profit = 0.0
+    spins = []
+    streak = 0
+    for n in range(1, n_spins + 1):
+        bet = rng.choice([0.5, 1.0, 2.5, 5.0])
+        payout = rng.choice([0.0, 0.0, 0.0, bet * 0.5, bet * 3.0])
+        before = balance
+        balance += payout - bet
+        total_profit += payout - bet
+        win = payout > 0
+        if spins and (spins[-1]["payout"] > 0) == win:
+            streak = streak + 1 if win else streak - 1
+        else:
+            streak = 1 if win else -1
+        spin = {
+            "spin_number": n, "bet": bet, "payout": payout, "profit": payout - bet,
+            "balance_before": before, "balance_after": balance, "streak": streak,
+            "in_free_spins": rng.random() < 0.1
+        }
+        spins.append(spin)
+        yield {
+            "session_id": session_id,
+            "initial_balance": initial_balance,
+            "current_balance": balance,
+            "total_profit": total_profit,
+            "currency": "USD",
+            "delta_t": rng.uniform(2.0, 3.0),
+            "last_spin": spin,
+            "results": spins[-10:]
+        }
+
+
+class TestSessionFeatureStore(unittest.TestCase):
+    """Test cases for the incremental V1 feature store."""
+
+    def setUp(self):
+        self.store = SessionFeatureStore()
+        self.processor = DataProcessorService()
+
+    def test_matches_data_processor(self):
+        """Incremental features equal the dict-based reference after every spin."""
+        for session_data in simulate_session("s1", 50, seed=1):
+            self.store.sync(session_data)
+            np.testing.assert_allclose(
+                self.store.betting_input, self.processor.prepare_betting_input(session_data), rtol=1e-6)
+            np.testing.assert_allclose(
+                self.store.termination_input(8), self.processor.prepare_termination_input(session_data), rtol=1e-6)
+
+    def test_repeated_sync_is_idempotent(self):
+        """Syncing the same spin twice (bet and termination decisions) changes nothing."""
+        for session_data in simulate_session("s1", 5, seed=2):
+            self.store.sync(session_data)
+            before = self.store.betting_input.copy()
+            self.store.sync(session_data)
+            np.testing.assert_array_equal(self.store.betting_input, before)
+
+    def test_without_results_history(self):
+        """Only last_spin is needed when spins are not recorded."""
+        for session_data in simulate_session("s1", 20, seed=3):
+            reference = self.processor.prepare_termination_input(session_data)
+            session_data = dict(session_data, results=[])
+            self.store.sync(session_data)
+        np.testing.assert_allclose(self.store.termination_input(8), reference, rtol=1e-6)
+
+    def test_views_share_buffer(self):
+        """Inputs are views into one preallocated buffer."""
+        betting = self.store.betting_input
+        termination = self.store.termination_input(8)
+        self.assertEqual(betting.dtype, np.float32)
+        self.assertTrue(np.shares_memory(betting, self.store._buffer))
+        self.assertTrue(np.shares_memory(termination, self.store._buffer))
+        self.assertEqual(self.store.termination_input(6).shape, (6,))
+        with self.assertRaises(ValueError):
+            self.store.termination_input(9)
+
+    def test_new_session_resets(self):
+        """A different session_id resets the features."""
+        for session_data in simulate_session("s1", 10, seed=4):
+            self.store.sync(session_data)
+
+        first = next(simulate_session("s2", 1, seed=5, initial_balance=200.0))
+        self.store.sync(first)
+        np.testing.assert_allclose(self.store.betting_input, self.processor.prepare_betting_input(first), rtol=1e-6)
+        self.assertEqual(self.store.termination_input()[6], 200.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
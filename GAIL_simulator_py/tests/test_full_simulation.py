@@ -53,6 +53,7 @@ def _create_test_config() -> Dict[str, Any]:
         "max_spins": 1000,
         "max_sim_duration": 60,  # 1分钟
         "max_player_duration": 3600,  # 1小时
+        "keep_session_results": True,  # 下面的检查逐会话读取结果
         "analysis": {
             "generate_reports": True,
             "output_dir": "tests/outputs/reports"
@@ -0,0 +1,167 @@
+# tests/test_inference_broker.py
+import unittest
+import sys
+import os
+import threading
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.player.models.v1.services.inference_broker import (
+    InferenceBroker, get_cluster_broker, get_all_broker_metrics, shutdown_all_brokers
+)
+from src.domain.player.models.v1.services.v1_model_service import V1ModelService
+
+
+class TestInferenceBroker(unittest.TestCase):
+    """Test cases for the micro-batching inference broker."""
+
+    def setUp(self):
+        self.batch_sizes = []
+
+        def sum_handler(batch):
+            self.batch_sizes.append(len(batch))
+            return [float(row.sum()) for row in batch]
+
+        def fail_handler(batch):
+            raise RuntimeError("boom")
+
+        self.broker = InferenceBroker(
+            "test",
+            {"sum": sum_handler, "max": lambda batch: batch.max(axis=1).tolist(), "fail": fail_handler},
+            max_batch_size=16,
+            max_wait_us=2000
+        )
+
+    def tearDown(self):
+        self.broker.shutdown()
+
+    def test_single_request(self):
+        """A lone request is answered after the wait window."""
+        self.assertAlmostEqual(self.broker.infer("sum", np.array([1.0, 2.0, 3.0])), 6.0)
+
+    def test_concurrent_requests_are_batched(self):
+        """Requests from many threads share batches and get their own results."""
+        results = {}
+
+        def worker(k):
+            results[k] = [self.broker.infer("sum", np.full(4, k + i)) for i in range(20)]
+
+        threads = [threading.Thread(target=worker, args=(k,)) for k in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for k in range(8):
+            self.assertEqual(results[k], [4.0 * (k + i) for i in range(20)])
+
+        metrics = self.broker.get_metrics()
+        self.assertEqual(metrics["requests"], 160)
+        self.assertEqual(sum(self.batch_sizes), 160)
+        self.assertLessEqual(max(self.batch_sizes), 16)
+        self.assertGreater(metrics["avg_batch_size"], 1.0)
+        self.assertGreaterEqual(metrics["max_queue_latency_us"], metrics["avg_queue_latency_us"])
+
+    def test_mixed_kinds(self):
+        """Different request kinds in one batch go to their own handler."""
+        f_sum = self.broker.submit("sum", np.array([1.0, 5.0]))
+        f_max = self.broker.submit("max", np.array([1.0, 5.0]))
+        self.assertAlmostEqual(f_sum.result(timeout=5), 6.0)
+        self.assertAlmostEqual(f_max.result(timeout=5), 5.0)
+        self.assertEqual(self.broker.get_metrics()["requests_by_kind"], {"sum": 1, "max": 1})
+
+    def test_handler_error_propagates(self):
+        """Handler exceptions are raised from the future."""
+        with self.assertRaises(RuntimeError):
+            self.broker.infer("fail", np.zeros(2), timeout=5)
+        # The broker keeps serving after a failed batch
+        self.assertAlmostEqual(self.broker.infer("sum", np.ones(2)), 2.0)
+
+    def test_unknown_kind(self):
+        """Unregistered request kinds are rejected."""
+        with self.assertRaises(ValueError):
+            self.broker.submit("unknown", np.zeros(2))
+
+    def test_submit_after_shutdown(self):
+        """A closed broker refuses new requests."""
+        self.broker.shutdown()
+        with self.assertRaises(RuntimeError):
+            self.broker.submit("sum", np.zeros(2))
+
+    def test_infer_timeout(self):
+        """A stalled batch raises TimeoutError instead of blocking the session thread forever."""
+        release = threading.Event()
+        broker = InferenceBroker("slow", {"wait": lambda batch: [release.wait(5)] * len(batch)},
+                                 max_batch_size=1, max_wait_us=0, timeout=0.05)
+        try:
+            stalled = broker.submit("wait", np.zeros(2))
+            with self.assertRaises(TimeoutError):
+                broker.infer("wait", np.zeros(2))
+            release.set()
+            self.assertTrue(stalled.result(timeout=5))
+            self.assertTrue(broker.infer("wait", np.zeros(2), timeout=5))
+            self.assertEqual(broker.get_metrics()["timeouts"], 1)
+        finally:
+            release.set()
+            broker.shutdown()
+
+
+class TestModelServiceParity(unittest.TestCase):
+    """V1ModelService decisions are the same with and without the broker."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.direct = V1ModelService(cluster_id=0)
+        cls.batched = V1ModelService(cluster_id=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_all_brokers()
+
+    def setUp(self):
+        self.rng = np.random.default_rng(11)
+        self.direct.reset_session()
+        self.batched.reset_session()
+        self.broker = get_cluster_broker(0, self.batched, max_batch_size=16, max_wait_us=2000)
+        self.batched.attach_inference_broker(self.broker)
+
+    def test_bet_amounts_match_from_many_threads(self):
+        """Concurrent sessions sharing the broker get the bets they would get alone."""
+        observations = self.rng.uniform(0.0, 5.0, size=(8, 25, 12)).astype(np.float32)
+        expected = [[self.direct.predict_bet_amount(o) for o in session] for session in observations]
+        results = {}
+
+        def worker(k):
+            results[k] = [self.batched.predict_bet_amount(o) for o in observations[k]]
+
+        threads = [threading.Thread(target=worker, args=(k,)) for k in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual([results[k] for k in range(8)], expected)
+        self.assertGreater(self.broker.get_metrics()["requests_by_kind"]["bet"], 0)
+
+    def test_termination_decisions_match(self):
+        """The termination ensemble sees identical DQN outputs through the broker."""
+        states = self.rng.uniform(0.0, 3.0, size=(40, 8)).astype(np.float32)
+        expected = [self.direct.predict_termination(state) for state in states]
+        self.assertEqual([self.batched.predict_termination(state) for state in states], expected)
+        self.assertEqual(self.broker.get_metrics()["requests_by_kind"]["termination"], len(states))
+
+    def test_closed_broker_falls_back_to_direct_inference(self):
+        """After shutdown_all_brokers() the service keeps working without the broker."""
+        service = V1ModelService(cluster_id=0)
+        service.attach_inference_broker(get_cluster_broker(0, service))
+        self.assertIn("cluster_0", get_all_broker_metrics())
+        shutdown_all_brokers()
+        self.assertEqual(get_all_broker_metrics(), {})
+        observation = self.rng.uniform(0.0, 5.0, size=12).astype(np.float32)
+        self.assertEqual(service.predict_bet_amount(observation), self.direct.predict_bet_amount(observation))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# tests/test_isolation_forest_scorer.py
+import unittest
+import sys
+import os
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler, MinMaxScaler
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.player.models.v1.services.isolation_forest_scorer import CompiledIsolationForest
+
+
+class TestCompiledIsolationForest(unittest.TestCase):
+    """Test cases for the flattened Isolation Forest scorer."""
+
+    def setUp(self):
+        """Fit a small forest and scaler on random data."""
+        rng = np.random.RandomState(42)
+        self.X_train = rng.normal(loc=3.0, scale=5.0, size=(500, 10))
+        self.X_test = rng.normal(loc=3.0, scale=8.0, size=(200, 10))
+
+        self.scaler = StandardScaler().fit(self.X_train)
+        self.forest = IsolationForest(n_estimators=50, contamination=0.1, random_state=0)
+        self.forest.fit(self.scaler.transform(self.X_train))
+
+    def test_matches_sklearn_decision_function(self):
+        """Batch scores match sklearn decision_function."""
+        compiled = CompiledIsolationForest.from_sklearn(self.forest, self.scaler)
+
+        expected = self.forest.decision_function(self.scaler.transform(self.X_test))
+        np.testing.assert_allclose(compiled.decision_function(self.X_test), expected, atol=1e-12)
+
+    def test_single_row(self):
+        """A single 1-D row is scored like a batch of one."""
+        compiled = CompiledIsolationForest.from_sklearn(self.forest, self.scaler)
+
+        row = self.X_test[7]
+        expected = self.forest.decision_function(self.scaler.transform(row.reshape(1, -1)))
+        result = compiled.decision_function(row)
+
+        self.assertEqual(result.shape, (1,))
+        self.assertAlmostEqual(result[0], expected[0], places=12)
+
+    def test_feature_subsampling(self):
+        """Trees trained on feature subsets map back to the original columns."""
+        forest = IsolationForest(n_estimators=30, max_features=0.5, random_state=3).fit(self.X_train)
+        compiled = CompiledIsolationForest.from_sklearn(forest)
+
+        np.testing.assert_allclose(compiled.score_samples(self.X_test), forest.score_samples(self.X_test), atol=1e-12)
+
+    def test_array_round_trip(self):
+        """Exported arrays rebuild an identical scorer."""
+        compiled = CompiledIsolationForest.from_sklearn(self.forest, self.scaler)
+        restored = CompiledIsolationForest.from_arrays(compiled.to_arrays())
+
+        np.testing.assert_array_equal(restored.decision_function(self.X_test), compiled.decision_function(self.X_test))
+
+    def test_scaler_flags(self):
+        """with_mean/with_std are honoured exactly like StandardScaler.transform."""
+        for with_mean, with_std in ((False, True), (True, False), (False, False)):
+            scaler = StandardScaler(with_mean=with_mean, with_std=with_std).fit(self.X_train)
+            compiled = CompiledIsolationForest.from_sklearn(self.forest, scaler)
+            np.testing.assert_allclose(compiled.transform(self.X_test), scaler.transform(self.X_test), atol=1e-12)
+            expected = self.forest.decision_function(scaler.transform(self.X_test))
+            np.testing.assert_allclose(compiled.decision_function(self.X_test), expected, atol=1e-12)
+
+    def test_other_scalers_are_rejected(self):
+        """Only StandardScaler can be compiled; other scalers keep the sklearn path."""
+        with self.assertRaises(ValueError):
+            CompiledIsolationForest.from_sklearn(self.forest, MinMaxScaler().fit(self.X_train))
+
+    def test_wrong_dimension(self):
+        """Inputs with the wrong feature count are rejected."""
+        compiled = CompiledIsolationForest.from_sklearn(self.forest, self.scaler)
+
+        with self.assertRaises(ValueError):
+            compiled.decision_function(np.zeros(8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+# tests/test_model_artifacts.py
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+import torch
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.player.models.v1.services.model_artifacts import (
+    write_artifacts, load_artifacts, export_cluster_artifacts, get_artifact_dir,
+    default_weights_dir, check_sources, ArtifactChecksumError
+)
+from src.domain.player.models.v1.services.v1_model_service import V1ModelService
+
+
+class TestArtifactFormat(unittest.TestCase):
+    """Test cases for the .npy + manifest artifact format."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.arrays = {
+            "a.weight": np.arange(12, dtype=np.float32).reshape(3, 4),
+            "b.index": np.array([3, 1, 2], dtype=np.int64)
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip_is_memory_mapped(self):
+        """Arrays come back equal, read-only and memory-mapped."""
+        write_artifacts(self.temp_dir, self.arrays, {"cluster_id": 7})
+        manifest, arrays = load_artifacts(self.temp_dir)
+
+        self.assertEqual(manifest["cluster_id"], 7)
+        for name, expected in self.arrays.items():
+            np.testing.assert_array_equal(arrays[name], expected)
+            self.assertIsInstance(arrays[name], np.memmap)
+            self.assertFalse(arrays[name].flags.writeable)
+
+    def test_checksum_mismatch(self):
+        """A modified blob is rejected at load time."""
+        write_artifacts(self.temp_dir, self.arrays, {})
+        path = os.path.join(self.temp_dir, "a.weight.npy")
+        data = bytearray(open(path, 'rb').read())
+        data[-1] ^= 0xFF
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        with self.assertRaises(ArtifactChecksumError):
+            load_artifacts(self.temp_dir)
+        # Loading still works when verification is skipped
+        _, arrays = load_artifacts(self.temp_dir, verify_checksums=False)
+        self.assertEqual(arrays["a.weight"].shape, (3, 4))
+
+
+class TestModelServiceArtifacts(unittest.TestCase):
+    """Test cases for loading V1 models from artifacts."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        shutil.copytree(os.path.join(default_weights_dir(), "cluster_2"), os.path.join(cls.temp_dir, "cluster_2"),
+                        ignore=shutil.ignore_patterns("mmap"))
+        cls.checkpoint_service = V1ModelService(2, base_model_dir=cls.temp_dir, use_artifacts=False)
+        export_cluster_artifacts(cls.checkpoint_service)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir)
+
+    def test_predictions_match_checkpoints(self):
+        """Artifact-backed models predict exactly like the checkpoint models."""
+        service = V1ModelService(2, base_model_dir=self.temp_dir)
+        self.assertEqual(service.model_source, "artifacts")
+        self.assertIsNotNone(service.forest_scorer)
+
+        rng = np.random.RandomState(0)
+        observations = (rng.rand(200, 12) * 50).astype(np.float32)
+        states = rng.rand(50, 8).astype(np.float32)
+
+        self.assertEqual(service.predict_bet_actions(observations),
+                         self.checkpoint_service.predict_bet_actions(observations))
+        np.testing.assert_allclose(service.predict_dqn_batch(states)[1],
+                                   self.checkpoint_service.predict_dqn_batch(states)[1], rtol=1e-6)
+
+        self.checkpoint_service.reset_session()
+        self.assertEqual([service.predict_termination(s) for s in states],
+                         [self.checkpoint_service.predict_termination(s) for s in states])
+
+    def test_corrupt_artifacts_fall_back(self):
+        """A failed checksum falls back to the original model files."""
+        broken_dir = tempfile.mkdtemp()
+        try:
+            shutil.copytree(os.path.join(self.temp_dir, "cluster_2"), os.path.join(broken_dir, "cluster_2"))
+            blob = os.path.join(get_artifact_dir(os.path.join(broken_dir, "cluster_2")), "dqn.network.0.bias.npy")
+            with open(blob, 'ab') as f:
+                f.write(b"\0")
+
+            service = V1ModelService(2, base_model_dir=broken_dir)
+            self.assertEqual(service.model_source, "checkpoints")
+        finally:
+            shutil.rmtree(broken_dir)
+
+    def test_retrained_checkpoints_invalidate_artifacts(self):
+        """Artifacts converted from older checkpoints are ignored in favour of the current checkpoints."""
+        stale_dir = tempfile.mkdtemp()
+        try:
+            model_dir = os.path.join(stale_dir, "cluster_2")
+            shutil.copytree(os.path.join(self.temp_dir, "cluster_2"), model_dir)
+            manifest = load_artifacts(get_artifact_dir(model_dir))[0]
+            self.assertEqual(set(manifest["sources"]), {"betting_cluster_2.pth", "termination_25_model_02.pth",
+                                                        "termination_25_model_02_isolation_forest.pkl"})
+
+            # Simulate a retrain of the termination model
+            dqn_path = os.path.join(model_dir, "termination_25_model_02.pth")
+            checkpoint = torch.load(dqn_path, map_location="cpu")
+            state_dict = checkpoint.get("model_state_dict", checkpoint)
+            state_dict["network.0.bias"] += 1.0
+            torch.save(checkpoint, dqn_path)
+            with self.assertRaises(ArtifactChecksumError):
+                check_sources(load_artifacts(get_artifact_dir(model_dir))[0], model_dir, 2)
+            service = V1ModelService(2, base_model_dir=stale_dir)
+            self.assertEqual(service.model_source, "checkpoints")
+            states = np.random.RandomState(1).rand(20, 8).astype(np.float32)
+            self.assertFalse(np.allclose(service.predict_dqn_batch(states)[1],
+                                         self.checkpoint_service.predict_dqn_batch(states)[1]))
+        finally:
+            shutil.rmtree(stale_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+# tests/test_object_store.py
+import unittest
+import sys
+import os
+import io
+import shutil
+import tempfile
+import threading
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.output.object_store import (
+    RetryPolicy, LocalObjectStore, BatchingUploader, BatchedObjectReader, is_transient_error
+)
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager, SessionRecord
+from tests.test_spin_columnar import make_spins
+
+
+class FlakyStore(LocalObjectStore):
+    """Local store whose uploads fail a fixed number of times first."""
+
+    def __init__(self, root_dir, failures):
+        super().__init__(root_dir)
+        self.failures = failures
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def upload_bytes(self, data, rel_path):
+        with self.lock:
+            self.calls += 1
+            if self.failures > 0:
+                self.failures -= 1
+                raise ConnectionResetError("connection reset")
+        super().upload_bytes(data, rel_path)
+
+
+class TestObjectStore(unittest.TestCase):
+    """Test cases for object store backends and the batching uploader."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.no_wait = RetryPolicy(max_attempts=3, sleep=lambda delay: None)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_local_store(self):
+        """The filesystem backend behaves like a flat key-value store."""
+        store = LocalObjectStore(self.temp_dir, prefix="results")
+        store.upload_bytes("hello", "sim/a/x.csv")
+        source = os.path.join(self.temp_dir, "source.bin")
+        with open(source, "wb") as f:
+            f.write(b"0123456789")
+        store.upload_file(source, "sim/b/y.bin")
+
+        self.assertEqual(store.download_bytes("sim/a/x.csv"), b"hello")
+        self.assertEqual(store.download_range("sim/b/y.bin", 3, 4), b"3456")
+        self.assertEqual(store.list_keys("sim/"), ["sim/a/x.csv", "sim/b/y.bin"])
+        with self.assertRaises(FileNotFoundError):
+            store.download_bytes("sim/missing")
+        with self.assertRaises(ValueError):
+            store.upload_bytes(b"", "../escape")
+
+    def test_retry_policy(self):
+        """Transient errors are retried; the last error propagates."""
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise TimeoutError("timeout")
+            return "ok"
+
+        self.assertEqual(self.no_wait.call(flaky), "ok")
+        self.assertEqual(self.no_wait.retries, 2)
+
+        with self.assertRaises(ConnectionError):
+            RetryPolicy(max_attempts=2, sleep=lambda delay: None).call(
+                lambda: (_ for _ in ()).throw(ConnectionError("down")))
+
+    def test_permanent_errors_are_not_retried(self):
+        """Missing keys, denied access and other client errors fail on the first attempt."""
+        from botocore.exceptions import ClientError, EndpointConnectionError
+
+        def client_error(code, status):
+            return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "GetObject")
+
+        for error in (client_error("SlowDown", 503), client_error("InternalError", 500), client_error("503", None),
+                      client_error("TooManyRequestsException", 429), EndpointConnectionError(endpoint_url="x")):
+            self.assertTrue(is_transient_error(error), error)
+        for error in (client_error("NoSuchKey", 404), client_error("AccessDenied", 403),
+                      FileNotFoundError("x"), PermissionError("x"), ValueError("x")):
+            self.assertFalse(is_transient_error(error), error)
+
+        attempts = []
+
+        def missing():
+            attempts.append(1)
+            raise client_error("NoSuchKey", 404)
+
+        with self.assertRaises(ClientError):
+            self.no_wait.call(missing)
+        self.assertEqual((len(attempts), self.no_wait.retries), (1, 0))
+
+    def test_batching(self):
+        """Small objects are coalesced, large ones go direct, all are readable."""
+        store = LocalObjectStore(self.temp_dir)
+        uploader = BatchingUploader(store, "sim/_batches", small_object_bytes=100, max_batch_bytes=250,
+                                    max_workers=2, max_pending_uploads=2, retry=self.no_wait)
+        objects = {f"sim/p/m/raw_data/s{i}.csv": bytes([65 + i]) * 60 for i in range(10)}
+        objects["sim/p/m/summary/big.csv"] = b"z" * 500
+        for rel_path, data in objects.items():
+            uploader.upload_bytes(data, rel_path)
+        metrics = uploader.close()
+
+        self.assertEqual(metrics["objects"], 11)
+        self.assertEqual(metrics["direct_uploads"], 1)
+        self.assertEqual(metrics["batches"], 2)  # a batch is sealed once it reaches 250 bytes (5 x 60)
+        self.assertEqual(metrics["failures"], 0)
+
+        reader = BatchedObjectReader(store, "sim/_batches")
+        self.assertEqual(reader.list_objects(), sorted(objects))
+        for rel_path, data in objects.items():
+            self.assertEqual(reader.read(rel_path), data)
+
+    def test_batching_retries(self):
+        """Failed uploads are retried by the pool and counted."""
+        store = FlakyStore(self.temp_dir, failures=2)
+        uploader = BatchingUploader(store, "b", small_object_bytes=10, max_workers=1, retry=self.no_wait)
+        uploader.upload_bytes(b"x" * 20, "direct.bin")
+        metrics = uploader.close()
+
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["failures"], 0)
+        self.assertEqual(store.download_bytes("direct.bin"), b"x" * 20)
+
+    def test_output_manager_backend(self):
+        """object_store.backend=local routes session output through the store."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "object_store": {"backend": "local", "batching": {"enabled": True}}
+        })
+        task_dir = output_manager.initialize()
+        task_name = os.path.basename(task_dir)
+
+        for index in range(3):
+            session_id = f"p1_m1_{index}"
+            record = SessionRecord(session_id, "p1", "m1", make_spins(session_id, 5), {"session_id": str(index)})
+            self.assertTrue(SessionOutputManager(session_id, output_manager).write_record(record))
+        output_manager.finalize_all_summaries()
+        metrics = output_manager.close_object_store()
+
+        self.assertEqual(metrics["objects"], 4)
+        self.assertEqual(metrics["batches"], 1)
+        store = LocalObjectStore(os.path.join(self.temp_dir, "object_store"))
+        reader = BatchedObjectReader(store, f"{task_name}/_batches")
+        raw = reader.read(f"{task_name}/p1/m1/raw_data/p1_m1_1_raw.csv").decode()
+        self.assertEqual(len(raw.strip().splitlines()), 6)
+        self.assertIn(f"{task_name}/p1/m1/summary/p1_m1_sessions_summary.csv", reader.list_objects())
+
+
+class FakeS3Client:
+    """In-memory S3 client whose first puts fail with a throttling error."""
+
+    def __init__(self, failures=1, code="SlowDown", status=503):
+        self.objects = {}
+        self.failures = failures
+        self.code = code
+        self.status = status
+        self.puts = 0
+        self.gets = 0
+
+    def put_object(self, Bucket, Key, Body):
+        from botocore.exceptions import ClientError
+        self.puts += 1
+        if self.failures:
+            self.failures -= 1
+            raise ClientError({"Error": {"Code": self.code}, "ResponseMetadata": {"HTTPStatusCode": self.status}},
+                              "PutObject")
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key, Range=None):
+        from botocore.exceptions import ClientError
+        self.gets += 1
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        data = self.objects[Key]
+        if Range:
+            start, end = map(int, Range[len("bytes="):].split("-"))
+            data = data[start:end + 1]
+        return {"Body": io.BytesIO(data)}
+
+
+class TestS3Service(unittest.TestCase):
+    """Test cases for the S3 backend with a fake client."""
+
+    def test_retry_and_range(self):
+        from src.infrastructure.output.s3_service import S3Service
+
+        service = S3Service("bucket", "us-west-2", "prefix", retry=RetryPolicy(sleep=lambda delay: None))
+        service.client = FakeS3Client()
+        service.upload_bytes(b"0123456789", "sim/a.bin")
+
+        self.assertEqual(service.retry.retries, 1)
+        self.assertEqual(service.client.objects, {"prefix/sim/a.bin": b"0123456789"})
+        self.assertEqual(service.download_range("sim/a.bin", 2, 3), b"234")
+        with self.assertRaises(FileNotFoundError):
+            service.download_bytes("sim/missing.bin")
+        self.assertEqual((service.client.gets, service.retry.retries), (2, 1))
+
+    def test_batching_retries_throttled_uploads(self):
+        """With batching the S3 errors arrive wrapped in RuntimeError and are still retried when transient."""
+        from src.infrastructure.output.object_store import create_object_store
+
+        config = {"s3": {"region": "us-west-2", "bucket": "bucket", "prefix": "prefix"},
+                  "object_store": {"backend": "s3", "batching": {"enabled": True, "small_object_bytes": 10},
+                                   "retry": {"max_attempts": 4, "base_delay": 0.0}}}
+        uploader = create_object_store(config, tempfile.gettempdir(), "sim/_batches")
+        self.assertIsInstance(uploader, BatchingUploader)
+        uploader.store.client = FakeS3Client(failures=2)
+        uploader.upload_bytes(b"x" * 20, "sim/direct.bin")
+        metrics = uploader.close()
+
+        self.assertEqual((metrics["retries"], metrics["failures"]), (2, 0))
+        self.assertEqual(uploader.store.client.objects, {"prefix/sim/direct.bin": b"x" * 20})
+
+        uploader = create_object_store(config, tempfile.gettempdir(), "sim/_batches")
+        uploader.store.client = FakeS3Client(failures=1, code="AccessDenied", status=403)
+        uploader.upload_bytes(b"x" * 20, "sim/denied.bin")
+        metrics = uploader.close()
+        self.assertEqual((metrics["retries"], metrics["failures"], uploader.store.client.puts), (0, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# tests/test_payout_distribution.py
+import unittest
+import sys
+import os
+import collections
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.machine.services.batch_evaluation import BatchWinEvaluator
+from src.domain.machine.services import reel_statistics
+from src.domain.machine.services.payout_distribution import (
+    PayoutDistribution, spin_distributions, game_distributions
+)
+from tests.test_rtp_estimation import toy_machine, all_stops
+from tests.test_tail_estimator import exact_tail
+
+
+def as_dict(distribution):
+    return dict(zip(np.round(distribution.values, 9).tolist(), distribution.probabilities.tolist()))
+
+
+class TestPayoutDistribution(unittest.TestCase):
+    """Test cases for exact payout distributions."""
+
+    def setUp(self):
+        self.evaluator = BatchWinEvaluator(toy_machine())
+
+    def test_spin_distribution_matches_enumeration(self):
+        """Every win value and its probability equal the enumeration of all stops, split by trigger."""
+        for in_free in (False, True):
+            result = self.evaluator.evaluate(all_stops(self.evaluator, self.evaluator.reel_set_name(in_free)), in_free)
+            parts = spin_distributions(self.evaluator, in_free, max_rows=100)
+            for part, mask in zip(parts, (~result["trigger"], result["trigger"])):
+                counts = collections.Counter(np.round(result["total_win"][mask], 9).tolist())
+                expected = {win: count / len(mask) for win, count in counts.items()}
+                actual = as_dict(part)
+                self.assertEqual(set(actual), set(expected))
+                for win, probability in expected.items():
+                    self.assertAlmostEqual(actual[win], probability, places=12)
+
+    def test_game_distributions_match_exact_moments(self):
+        """Means agree with the closed-form expectations and tails with brute-force convolution."""
+        distributions = game_distributions(self.evaluator)
+        exact = reel_statistics.base_game_expectations(self.evaluator)
+        bonus = distributions["bonus_spin"].mean()
+        self.assertAlmostEqual(distributions["base_spin"].mean(), exact["base_win"], places=12)
+        self.assertAlmostEqual(distributions["trigger"], exact["trigger"], places=12)
+        self.assertAlmostEqual(distributions["free_round"].mean(), self.evaluator.free_spins_count * bonus, places=10)
+        self.assertAlmostEqual(distributions["round"].mean(),
+                               exact["base_win"] + exact["trigger"] * self.evaluator.free_spins_count * bonus,
+                               places=10)
+        for threshold in (10, 40, 100):
+            self.assertAlmostEqual(distributions["round"].tail(threshold), exact_tail(self.evaluator, threshold),
+                                   places=12)
+        self.assertAlmostEqual(distributions["round"].total_probability, 1.0, places=12)
+
+    def test_convolution_and_bands(self):
+        """Lattice convolution, hit frequency and band table of a small distribution."""
+        die = PayoutDistribution.from_values(np.array([0.0, 0.5, 1.0]), np.array([0.5, 0.25, 0.25]))
+        two = die.power(2)
+        self.assertEqual(as_dict(two), {0.0: 0.25, 0.5: 0.25, 1.0: 0.3125, 1.5: 0.125, 2.0: 0.0625})
+        self.assertAlmostEqual(two.mean(), 2 * die.mean())
+        self.assertAlmostEqual(two.variance(), 2 * die.variance())
+        self.assertAlmostEqual(two.hit_frequency(), 0.75)
+        bands = two.bands((0, 1, 2))
+        self.assertEqual([band["probability"] for band in bands], [0.25, 0.5625, 0.1875, 0.0])
+        self.assertAlmostEqual(sum(band.get("rtp_share", 0.0) for band in bands), two.mean())
+
+
+if __name__ == '__main__':
+    unittest.main()
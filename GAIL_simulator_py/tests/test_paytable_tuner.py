@@ -0,0 +1,125 @@
+# tests/test_paytable_tuner.py
+import unittest
+import sys
+import os
+import itertools
+
+import numpy as np
+import yaml
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.machine.entities.slot_machine import SlotMachine
+from src.domain.machine.services.paytable_tuner import PayTableTuner, pay_table_yaml
+from src.domain.machine.services.payout_distribution import game_distributions
+
+
+MACHINE_YAML = """\
+machine_id: "tuning_toy"  # small enough to enumerate
+window_size: 3
+free_spins: 2
+free_spins_multiplier: 2
+symbols:
+  normal: [0, 1, 2, 3]
+  wild: [102]
+  scatter: 20
+reels:
+  normal:
+    reel1: [0, 1, 2, 3, 20, 1, 2, 3, 3]
+    reel2: [3, 0, 102, 2, 1, 20, 3, 2]
+    reel3: [1, 3, 2, 0, 20, 3, 102, 1, 2]
+    reel4: [2, 3, 1, 0, 3, 20, 2, 1]
+    reel5: [3, 1, 2, 0, 3, 2, 20, 1, 3]
+  bonus:
+    reel1: [0, 1, 2, 3, 1, 2]
+    reel2: [102, 1, 0, 2, 3]
+    reel3: [2, 102, 3, 1, 0, 20]
+    reel4: [1, 0, 2, 3, 102]
+    reel5: [3, 2, 1, 0, 2]
+paylines:
+  - indices: [0, 1, 2, 3, 4]
+  - indices: [5, 6, 7, 8, 9]
+  - indices: [10, 11, 12, 13, 14]
+  - indices: [0, 6, 12, 8, 4]
+  - indices: [10, 6, 2, 8, 14]
+pay_table:
+  - symbol: '0'
+    payouts: [50, 100, 400]  # top symbol
+  - symbol: '1'
+    payouts: [20, 60, 200]
+  - symbol: '2'
+    payouts: [10, 40, 100]
+  - symbol: '3'
+    payouts: [5, 20, 60]
+  - symbol: '20'
+    payouts: [2, 10, 50]
+"""
+
+
+def tuning_machine(text=MACHINE_YAML):
+    config = yaml.safe_load(text)
+    return SlotMachine(config["machine_id"], config)
+
+
+class TestPayTableTuner(unittest.TestCase):
+    """Test cases for pay-table tuning from hit moments."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tuner = PayTableTuner(tuning_machine())
+
+    def test_hit_features_reproduce_wins(self):
+        """Hits times payouts equal the evaluated win of every spin."""
+        evaluator = self.tuner.evaluator
+        for in_free in (False, True):
+            lengths = evaluator.reel_lengths(evaluator.reel_set_name(in_free))
+            stops = np.array(list(itertools.product(*[range(length) for length in lengths])))
+            features = evaluator.hit_features(stops, in_free)
+            hits = self.tuner._vector(features["line_hits"], features["scatter_hits"])
+            wins = evaluator.evaluate(stops, in_free)
+            np.testing.assert_allclose(hits @ self.tuner.current, wins["total_win"], atol=1e-12)
+            np.testing.assert_array_equal(features["trigger"], wins["trigger"])
+
+    def test_moments_match_exact_distribution(self):
+        """RTP and standard deviation from the hit moments equal the exact round distribution."""
+        round_win = game_distributions(self.tuner.evaluator)["round"]
+        self.assertEqual(self.tuner.moments, "exact")
+        self.assertAlmostEqual(self.tuner.rtp(self.tuner.current), round_win.mean(), places=10)
+        self.assertAlmostEqual(self.tuner.std(self.tuner.current), round_win.std(), places=8)
+
+    def test_solve_hits_targets_under_constraints(self):
+        """The tuned integer table meets the RTP target, moves the std and stays monotonic."""
+        original_std = self.tuner.std(self.tuner.current)
+        target = 0.9 * self.tuner.rtp(self.tuner.current)
+        for target_std in (None, 1.2 * original_std):
+            result = self.tuner.solve(target, target_std, tolerance=0.005)
+            self.assertLessEqual(abs(result.rtp - target), 0.005)
+            if target_std is not None:
+                self.assertLess(abs(result.std - target_std), 0.05 * target_std)
+            payouts = {entry["symbol"]: entry["payouts"] for entry in result.pay_table}
+            for values in payouts.values():
+                self.assertTrue(all(isinstance(value, int) and value >= 1 for value in values))
+                self.assertEqual(values, sorted(values))
+            for index in range(3):
+                column = [payouts[symbol][index] for symbol in ("0", "1", "2", "3")]
+                self.assertEqual(column, sorted(column, reverse=True))
+            pays = self.tuner.pay_vector(payouts)
+            self.assertAlmostEqual(self.tuner.rtp(pays), result.rtp)
+
+    def test_fixed_symbols_and_yaml_output(self):
+        """Fixed symbols keep their payouts; the YAML keeps comments and loads back as the new table."""
+        result = self.tuner.solve(0.8 * self.tuner.rtp(self.tuner.current), fixed_symbols=("20",), tolerance=0.005)
+        self.assertNotIn("20", result.changes)
+        text = pay_table_yaml(MACHINE_YAML, result.pay_table, machine_id="tuning_toy_tuned")
+        self.assertIn("# top symbol", text)
+        config = yaml.safe_load(text)
+        self.assertEqual(config["machine_id"], "tuning_toy_tuned")
+        self.assertEqual(config["pay_table"], result.pay_table)
+        self.assertEqual(config["reels"], yaml.safe_load(MACHINE_YAML)["reels"])
+        retuned = PayTableTuner(tuning_machine(text))
+        self.assertAlmostEqual(retuned.rtp(retuned.current), result.rtp, places=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
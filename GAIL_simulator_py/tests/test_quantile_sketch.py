@@ -0,0 +1,132 @@
+# tests/test_quantile_sketch.py
+import unittest
+import sys
+import os
+import json
+import pickle
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.session.entities.quantile_sketch import KLLSketch, LogHistogram
+from src.domain.session.entities.session_stats import SessionStats
+from src.domain.session.entities.distribution_stats import DistributionAggregator
+
+
+def rank_error(values, estimate, q):
+    """Distance between q and the empirical rank of the estimate."""
+    values = np.sort(values)
+    rank = np.searchsorted(values, estimate, side="right") / len(values)
+    return abs(rank - q)
+
+
+class TestKLLSketch(unittest.TestCase):
+    """Test cases for the KLL quantile sketch."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.values = rng.lognormal(3.0, 1.2, 60000)
+
+    def test_rank_error_is_bounded(self):
+        """Estimated quantiles stay within a few percent rank of the truth."""
+        sketch = KLLSketch(seed=1)
+        sketch.update_many(self.values.tolist())
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertLess(sum(len(c) for c in sketch.compactors), 2000)
+        for key, q in (("p1", 0.01), ("p50", 0.5), ("p99", 0.99)):
+            self.assertLess(rank_error(self.values, sketch.quantiles()[key], q), 0.02, key)
+        self.assertEqual(sketch.quantile(1.0), self.values.max())
+
+    def test_merged_shards_match_accuracy(self):
+        """Sketches built on shards merge into one sketch with the same accuracy."""
+        shards = [KLLSketch(seed=n) for n in range(4)]
+        for i, value in enumerate(self.values.tolist()):
+            shards[i % 4].update(value)
+        # 经过序列化往返模拟跨进程/分片
+        shards[3] = KLLSketch.from_state(json.loads(json.dumps(shards[3].to_state())))
+        shards[2] = pickle.loads(pickle.dumps(shards[2]))
+        merged = shards[0].merge(shards[1]).merge(shards[2]).merge(shards[3])
+
+        self.assertEqual(merged.count, len(self.values))
+        self.assertEqual(merged.min_value, self.values.min())
+        for key, q in (("p1", 0.01), ("p50", 0.5), ("p99", 0.99)):
+            self.assertLess(rank_error(self.values, merged.quantiles()[key], q), 0.02, key)
+        self.assertEqual(shards[0].count, 15000)
+
+
+class TestLogHistogram(unittest.TestCase):
+    """Test cases for the fixed log-binned histogram."""
+
+    def test_quantiles_within_bin_resolution(self):
+        """Histogram quantiles are within one bin width of the exact quantile."""
+        values = np.random.default_rng(3).lognormal(0.0, 2.0, 20000)
+        histogram = LogHistogram(bins_per_decade=20)
+        for value in values:
+            histogram.update(value)
+        width = 10 ** (1 / 20)
+        for key, q in (("p1", 0.01), ("p50", 0.5), ("p99", 0.99)):
+            exact = np.quantile(values, q)
+            self.assertLess(histogram.quantiles()[key] / exact, width * 1.01, key)
+            self.assertGreater(histogram.quantiles()[key] / exact, 1 / (width * 1.01), key)
+
+    def test_merge_and_signed_values(self):
+        """Merging adds bin counts; zeros and negatives get their own buckets."""
+        a, b = LogHistogram(), LogHistogram()
+        for value in (-50.0, -2.0, 0.0, 1.0):
+            a.update(value)
+        for value in (0.0, 3.0, 1000.0):
+            b.update(value)
+        merged = LogHistogram.from_state(json.loads(json.dumps(a.merge(b).to_state())))
+        self.assertEqual(merged.count, 7)
+        self.assertEqual(merged.zero_count, 2)
+        self.assertEqual(sum(count for _, _, count in merged.buckets()), 7)
+        self.assertLess(merged.quantiles()["p1"], -40.0)
+        self.assertEqual(merged.quantiles((0.4,))["p40"], 0.0)
+        with self.assertRaises(ValueError):
+            a.merge(LogHistogram(bins_per_decade=10))
+
+
+class TestSessionOutcomeQuantiles(unittest.TestCase):
+    """Test cases for session outcome quantiles in the distribution statistics."""
+
+    def make_session(self, n, rng):
+        stats = SessionStats(session_id=f"p1_m1_{n}", player_id="p1", machine_id="m1")
+        stats.initial_balance = balance = 100.0
+        for _ in range(rng.randint(5, 60)):
+            payout = rng.choice([0.0, 0.0, 0.5, 2.0, 25.0])
+            before, balance = balance, balance - 1.0 + payout
+            stats.update_spin(SimpleNamespace(bet=1.0, payout=payout, in_free_spins=False,
+                                              balance_before=before, balance_after=balance))
+        stats.final_balance = balance
+        return stats
+
+    def test_drawdown_and_quantiles_per_pair(self):
+        """Sessions contribute max drawdown and multipliers; shards merge through their saved state."""
+        rng = random.Random(5)
+        sessions = [self.make_session(n, rng) for n in range(400)]
+        for stats in sessions[:3]:
+            self.assertGreaterEqual(stats.max_drawdown, 0.0)
+            self.assertNotIn("win_multiplier_hist", stats.to_dict())
+
+        shard_a, shard_b = DistributionAggregator(), DistributionAggregator()
+        for i, stats in enumerate(sessions):
+            (shard_a if i % 2 else shard_b).add_session(stats)
+        restored = DistributionAggregator.from_state(json.loads(json.dumps(shard_b.to_state())))
+        report = shard_a.merge(restored).to_dict()
+
+        quantiles = report["pairs"]["p1_m1"]["quantiles"]
+        lengths = [s.total_spins for s in sessions]
+        self.assertLess(rank_error(lengths, quantiles["session_length"]["p50"], 0.5), 0.05)
+        self.assertEqual(quantiles["max_win_multiplier"]["p99"], 25.0)
+        self.assertEqual(report["machines"]["m1"]["histograms"]["win_multiplier"]["count"],
+                         sum(s.win_count for s in sessions))
+        self.assertLessEqual(report["overall"]["quantiles"]["max_drawdown"]["p99"],
+                             max(s.max_drawdown for s in sessions))
+
+
+if __name__ == '__main__':
+    unittest.main()
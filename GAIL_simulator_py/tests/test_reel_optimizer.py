@@ -0,0 +1,86 @@
+# tests/test_reel_optimizer.py
+import unittest
+import sys
+import os
+import itertools
+
+import numpy as np
+import yaml
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.machine.services.batch_evaluation import BatchWinEvaluator
+from src.domain.machine.services.payout_distribution import game_distributions
+from src.domain.machine.services.reel_optimizer import ReelStripOptimizer, reel_strips_yaml
+from tests.test_paytable_tuner import MACHINE_YAML, tuning_machine
+
+
+def enumerated_metrics(evaluator):
+    """RTP, hit rate and trigger probability by evaluating every stop combination."""
+    stops = np.array(list(itertools.product(*[range(length) for length in evaluator.reel_lengths("normal")])))
+    result = evaluator.evaluate(stops)
+    return {"rtp": game_distributions(evaluator)["round"].mean(),
+            "hit_rate": (result["total_win"] > 0).mean(),
+            "trigger": result["trigger"].mean()}
+
+
+class TestReelStripOptimizer(unittest.TestCase):
+    """Test cases for reel-strip annealing with exact statistics."""
+
+    def test_metrics_match_enumeration(self):
+        """Cached per-reel statistics reproduce the enumerated RTP, hit rate and trigger."""
+        optimizer = ReelStripOptimizer(tuning_machine())
+        metrics = optimizer.metrics()
+        for name, value in enumerated_metrics(optimizer.evaluator).items():
+            self.assertAlmostEqual(getattr(metrics, name), value, places=10, msg=name)
+
+    def test_incremental_updates_stay_exact(self):
+        """After many accepted moves the incremental caches equal a full rebuild."""
+        optimizer = ReelStripOptimizer(tuning_machine(), reel_sets=("normal", "bonus"))
+        original = optimizer.metrics()
+        optimizer.optimize(0.9 * original.rtp, 1.1 * original.hit_rate, iterations=300,
+                           initial_temperature=1.0, cooling=1.0, seed=5)
+        optimizer.optimize(original.rtp, iterations=200, initial_temperature=1.0, cooling=1.0, seed=6)
+        incremental = optimizer.misses.copy()
+        optimizer.set_strips(optimizer.strips)
+        np.testing.assert_allclose(incremental, optimizer.misses, atol=1e-12)
+
+    def test_optimize_moves_towards_targets(self):
+        """The best strips keep their lengths, use palette symbols and score better than the start."""
+        optimizer = ReelStripOptimizer(tuning_machine(), fixed_reels=("normal/reel1",))
+        lengths = optimizer.evaluator.reel_lengths("normal").tolist()
+        original = optimizer.metrics()
+        result = optimizer.optimize(0.85 * original.rtp, 1.05 * original.hit_rate, iterations=2000, seed=1)
+        self.assertLess(result.score, 0.01 * result.original_score)
+        self.assertLess(abs(result.metrics.rtp / (0.85 * original.rtp) - 1), 0.01)
+        self.assertLess(abs(result.metrics.hit_rate / (1.05 * original.hit_rate) - 1), 0.01)
+
+        strips = result.strips["normal"]
+        self.assertEqual([len(strips[name]) for name in sorted(strips)], lengths)
+        self.assertEqual(strips["reel1"], yaml.safe_load(MACHINE_YAML)["reels"]["normal"]["reel1"])
+        self.assertNotIn("reel1", result.composition.get("normal", {}))
+        self.assertTrue({symbol for strip in strips.values() for symbol in strip} <= {0, 1, 2, 3, 20, 102})
+
+        # The written machine evaluates to the reported statistics
+        text = reel_strips_yaml(MACHINE_YAML, {"normal": strips}, machine_id="tuning_toy_reels")
+        self.assertIn("# top symbol", text)
+        config = yaml.safe_load(text)
+        self.assertEqual(config["machine_id"], "tuning_toy_reels")
+        self.assertEqual(config["reels"]["bonus"], yaml.safe_load(MACHINE_YAML)["reels"]["bonus"])
+        for name, value in enumerated_metrics(BatchWinEvaluator(tuning_machine(text))).items():
+            self.assertAlmostEqual(getattr(result.metrics, name), value, places=10, msg=name)
+
+    def test_rejects_bad_options(self):
+        """Unknown reel sets, metrics and reels missing from the YAML are reported."""
+        with self.assertRaises(ValueError):
+            ReelStripOptimizer(tuning_machine(), reel_sets=("super",))
+        optimizer = ReelStripOptimizer(tuning_machine())
+        with self.assertRaises(ValueError):
+            optimizer.optimize(1.0, weights={"max_win": 1.0})
+        with self.assertRaises(ValueError):
+            reel_strips_yaml(MACHINE_YAML, {"normal": {"reel9": [0, 1, 2]}})
+
+
+if __name__ == '__main__':
+    unittest.main()
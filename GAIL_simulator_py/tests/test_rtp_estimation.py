@@ -0,0 +1,118 @@
+# tests/test_rtp_estimation.py
+import unittest
+import sys
+import os
+import itertools
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.machine.entities.slot_machine import SlotMachine
+from src.domain.machine.services.batch_evaluation import BatchWinEvaluator
+from src.domain.machine.services import reel_statistics
+from src.domain.machine.services.rtp_estimator import RTPEstimator
+
+
+def toy_machine():
+    """A 3-reel machine small enough to enumerate every stop combination."""
+    config = {
+        "window_size": 3,
+        "free_spins": 3,
+        "free_spins_multiplier": 2,
+        "symbols": {"normal": [0, 1, 2], "wild": [101, 102], "scatter": 20},
+        "reels": {
+            "normal": {
+                "reel1": [0, 1, 20, 2, 0, 1, 2, 1],
+                "reel2": [1, 101, 0, 20, 2, 1, 0],
+                "reel3": [2, 0, 102, 1, 20, 0, 1, 2, 1]
+            },
+            "bonus": {
+                "reel1": [0, 1, 2, 0, 1],
+                "reel2": [102, 1, 0, 101, 2],
+                "reel3": [0, 20, 1, 2, 0, 1]
+            }
+        },
+        "paylines": [{"indices": [0, 1, 2]}, {"indices": [3, 4, 5]}, {"indices": [6, 7, 8]},
+                     {"indices": [0, 4, 8]}, {"indices": [6, 4, 2]}],
+        "pay_table": [{"symbol": "0", "payouts": [20, 40, 80]}, {"symbol": "1", "payouts": [10, 20, 40]},
+                      {"symbol": "2", "payouts": [5, 10, 20]}, {"symbol": "20", "payouts": [2, 5, 10]}]
+    }
+    return SlotMachine("toy", config)
+
+
+def all_stops(evaluator, reel_set):
+    return np.array(list(itertools.product(*[range(length) for length in evaluator.reel_lengths(reel_set)])))
+
+
+class TestBatchWinEvaluator(unittest.TestCase):
+    """Test cases for the vectorized win evaluator."""
+
+    def test_matches_scalar_evaluator_on_every_stop(self):
+        """Every stop combination pays exactly what SlotMachine/WinEvaluator pays."""
+        machine = toy_machine()
+        evaluator = BatchWinEvaluator(machine, chunk_size=50)
+        for in_free in (False, True):
+            reel_set = evaluator.reel_set_name(in_free)
+            stops = all_stops(evaluator, reel_set)
+            result = evaluator.evaluate(stops, in_free)
+            grids = evaluator.grids(stops, reel_set)
+            for i, grid in enumerate(grids.tolist()):
+                expected = machine.evaluate_win(grid, 1.0, in_free, None)
+                self.assertAlmostEqual(result["total_win"][i], expected["total_win"], places=12)
+                self.assertAlmostEqual(result["scatter_win"][i], expected["scatter_win"], places=12)
+
+    def test_exact_expectations_match_enumeration(self):
+        """Closed-form base and bonus expectations equal the average over all stops."""
+        evaluator = BatchWinEvaluator(toy_machine())
+        base = evaluator.evaluate(all_stops(evaluator, "normal"))
+        exact = reel_statistics.base_game_expectations(evaluator)
+        self.assertAlmostEqual(exact["line_win"], base["line_win"].mean(), places=12)
+        self.assertAlmostEqual(exact["scatter_win"], base["scatter_win"].mean(), places=12)
+        self.assertAlmostEqual(exact["trigger"], base["trigger"].mean(), places=12)
+
+        bonus = evaluator.evaluate(all_stops(evaluator, "bonus"), in_free=True)["total_win"]
+        self.assertAlmostEqual(reel_statistics.expected_line_win(evaluator, in_free=True)
+                               + reel_statistics.expected_scatter_win(evaluator, in_free=True),
+                               bonus.mean(), places=12)
+
+
+class TestRTPEstimator(unittest.TestCase):
+    """Test cases for variance-reduced RTP estimation."""
+
+    def setUp(self):
+        self.estimator = RTPEstimator(toy_machine(), seed=11, chunk_size=20000)
+        evaluator = self.estimator.evaluator
+        bonus = evaluator.evaluate(all_stops(evaluator, "bonus"), in_free=True)["total_win"].mean()
+        self.exact_rtp = (self.estimator.exact["base_win"]
+                          + self.estimator.exact["trigger"] * evaluator.free_spins_count * bonus)
+
+    def test_estimates_cover_exact_rtp(self):
+        """Every combination of techniques stays within a few standard errors of the exact RTP."""
+        for options in ({}, {"strata_blocks": 2}, {"antithetic": True},
+                        {"strata_blocks": 2, "antithetic": True,
+                         "control_variates": ("line_win", "scatter_win", "trigger")}):
+            result = self.estimator.estimate(60000, batch_size=7000, **options)
+            self.assertLess(abs(result.rtp - self.exact_rtp), 4 * result.standard_error, options)
+            self.assertEqual(result.spins, 60000, options)
+
+    def test_control_variates_increase_effective_sample_size(self):
+        """Regressing out the exactly known base-game quantities shrinks the variance."""
+        plain = self.estimator.estimate(40000)
+        controlled = self.estimator.estimate(40000, control_variates=("line_win", "scatter_win", "trigger"))
+        self.assertAlmostEqual(plain.ess_gain, 1.0, places=3)
+        self.assertGreater(controlled.ess_gain, 1.5)
+        self.assertLess(controlled.half_width, plain.half_width)
+        self.assertEqual(set(controlled.control_coefficients), {"line_win", "scatter_win", "trigger"})
+
+    def test_rejects_bad_options(self):
+        """Unknown controls and too many strata are reported."""
+        with self.assertRaises(ValueError):
+            self.estimator.estimate(1000, control_variates=("jackpot",))
+        with self.assertRaises(ValueError):
+            self.estimator.estimate(100, strata_blocks=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
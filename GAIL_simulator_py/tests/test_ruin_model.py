@@ -0,0 +1,139 @@
+# tests/test_ruin_model.py
+import unittest
+import sys
+import os
+
+import numpy as np
+import yaml
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.machine.services.batch_evaluation import BatchWinEvaluator
+from src.application.analysis.ruin_model import RuinModel, initial_balance_distribution
+from src.application.simulation.session_runner import SessionRunner
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.domain.session.factories.session_factory import SessionFactory
+from tests.test_rtp_estimation import toy_machine
+from tests.test_coordinator import CONFIG_DIR, simulation_registry
+
+
+def simulate_sessions(machine, balance, bet, end_probability, max_spins, sessions, seed=0):
+    """Monte Carlo sessions with the rules of GamingSession/SessionRunner for a fixed-bet player."""
+    evaluator = BatchWinEvaluator(machine)
+    rng = np.random.default_rng(seed)
+    balances = np.full(sessions, float(balance))
+    free = np.zeros(sessions, dtype=int)
+    spins = np.zeros(sessions, dtype=int)
+    outcome = np.where(balances < bet, 1, 0)  # 0 playing, 1 bust, 2 stopped, 3 spin limit
+    while (outcome == 0).any():
+        playing = np.flatnonzero(outcome == 0)
+        base, bonus = playing[free[playing] == 0], playing[free[playing] > 0]
+        if len(base):
+            result = evaluator.evaluate(evaluator.random_stops(rng, len(base)))
+            balances[base] += bet * (result["total_win"] - 1)
+            free[base] = np.where(result["trigger"], evaluator.free_spins_count, 0)
+        if len(bonus):
+            result = evaluator.evaluate(evaluator.random_stops(rng, len(bonus), "bonus"), in_free=True)
+            balances[bonus] += bet * result["total_win"]
+            free[bonus] -= 1
+        spins[playing] += 1
+        busted = balances[playing] < bet - 1e-9
+        outcome[playing[busted]] = 1
+        rest = playing[~busted]
+        if max_spins is not None:
+            outcome[rest[spins[rest] >= max_spins]] = 3
+            rest = rest[spins[rest] < max_spins]
+        outcome[rest[rng.random(len(rest)) < end_probability]] = 2
+    return balances, spins, outcome
+
+
+class TestRuinModel(unittest.TestCase):
+    """Test cases for the Markov-chain risk-of-ruin model."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.machine = toy_machine()
+
+    def test_matches_session_simulation(self):
+        """Bust probability, session length and final balance agree with simulated sessions."""
+        for balance, end_probability, max_spins in ((3.0, 0.05, None), (6.0, 0.0, 30)):
+            result = RuinModel(self.machine, bet=1.0, end_probability=end_probability,
+                               max_spins=max_spins).solve(balance)
+            balances, spins, outcome = simulate_sessions(self.machine, balance, 1.0, end_probability,
+                                                         max_spins, 40000)
+            bust = (outcome == 1).mean()
+            self.assertLess(abs(result.bust_probability - bust), 4 * (bust * (1 - bust) / len(outcome)) ** 0.5 + 1e-3)
+            self.assertLess(abs(result.expected_spins - spins.mean()), 4 * spins.std() / len(spins) ** 0.5)
+            self.assertLess(abs(result.expected_final_balance - balances.mean()),
+                            4 * balances.std() / len(balances) ** 0.5)
+            self.assertAlmostEqual(result.bust_probability + result.stop_probability + result.limit_probability
+                                   + result.unresolved_probability, 1.0, places=9)
+            self.assertAlmostEqual(result.final_probabilities.sum(), 1.0, places=9)
+
+    def test_single_spin_session(self):
+        """With end_probability 1 every session lasts one spin and the expected loss is bet * (1 - base RTP)."""
+        model = RuinModel(self.machine, bet=2.0, end_probability=1.0)
+        result = model.solve(10.0)
+        self.assertAlmostEqual(result.expected_spins, 1.0, places=9)
+        base_rtp = model.no_trigger.mean() + model.trigger.mean()
+        self.assertAlmostEqual(result.expected_final_balance, 10.0 - 2.0 * (1 - base_rtp), places=6)
+        self.assertAlmostEqual(result.bust_probability, 0.0)
+
+        broke = RuinModel(self.machine, bet=2.0, end_probability=0.5).solve(1.0)
+        self.assertAlmostEqual(broke.bust_probability, 1.0)
+        self.assertAlmostEqual(broke.expected_spins, 0.0)
+
+    def test_initial_balance_distribution(self):
+        """The {avg, std, min, max} config is a normal clipped to [min, max], as in Player."""
+        config = {"avg": 100.0, "std": 50.0, "min": 60.0, "max": 200.0}
+        distribution = initial_balance_distribution(config, 0.5, 500)
+        self.assertAlmostEqual(distribution.sum(), 1.0, places=9)
+        samples = np.clip(np.random.default_rng(1).normal(100.0, 50.0, 400000), 60.0, 200.0)
+        self.assertAlmostEqual(np.arange(500) * 0.5 @ distribution, samples.mean(), delta=0.3)
+        self.assertAlmostEqual(distribution[120], (samples == 60.0).mean(), delta=0.01)
+        self.assertEqual(distribution[:120].sum(), 0.0)
+
+        point = initial_balance_distribution(50.25, 0.5, 200)
+        self.assertAlmostEqual(point[100], 0.5)
+        self.assertAlmostEqual(point[101], 0.5)
+
+    def test_player_config_and_validation(self):
+        """Stop rules come from the player's model config; bad parameters are rejected."""
+        player_config = {"model_version": "random",
+                         "model_config_random": {"end_probability": 0.02, "max_spins_per_session": 300}}
+        model = RuinModel.from_player_config(self.machine, player_config, bet=0.5)
+        self.assertEqual((model.end_probability, model.max_spins, model.bet), (0.02, 300, 0.5))
+        defaults = RuinModel.from_player_config(self.machine, {"model_version": "random"})
+        self.assertEqual((defaults.end_probability, defaults.max_spins), (0.01, 500))
+        with self.assertRaises(ValueError):
+            RuinModel(self.machine, bet=0.0)
+        with self.assertRaises(ValueError):
+            RuinModel(self.machine, end_probability=1.5)
+        with self.assertRaises(ValueError):
+            RuinModel(self.machine, balance_cap=10.0).solve(50.0)
+
+
+class TestRuinModelRandomPlayer(unittest.TestCase):
+    """Test the model against the random player running through the real session runner."""
+
+    def test_session_length_matches_simulation(self):
+        """The random player stops with probability end_probability once per spin."""
+        registry = simulation_registry()
+        registry.initialize_instance_pools(1)
+        player = registry.get_player_instance("random_player")
+        machine = toy_machine()
+        machine.set_rng(RNGProvider().get_rng("mersenne", seed=7))
+        factory = SessionFactory()
+        spins = np.array([
+            SessionRunner(factory.create_session(player, machine, f"ruin_{index}")).run()["total_spins"]
+            for index in range(300)
+        ])
+
+        with open(os.path.join(CONFIG_DIR, 'players', 'random_player.yaml'), encoding="utf-8") as f:
+            player_config = yaml.safe_load(f)
+        result = RuinModel.from_player_config(machine, player_config).solve(player_config["initial_balance"])
+        self.assertAlmostEqual(spins.mean(), result.expected_spins, delta=4 * result.spins_std / np.sqrt(len(spins)))
+
+if __name__ == '__main__':
+    unittest.main()
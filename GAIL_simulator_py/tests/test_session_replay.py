@@ -0,0 +1,96 @@
+# tests/test_session_replay.py
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from src.infrastructure.config.validators.schema_validator import SchemaValidator
+from src.infrastructure.rng.rng_provider import RNGProvider
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager
+from src.infrastructure.output.replay_log import encode_runs, decode_runs, load_replay_entries
+from src.application.registry.registry_service import RegistryService
+from src.application.simulation.session_replayer import SessionReplayer, ReplayPlayer
+from src.domain.session.entities.gaming_session import GamingSession
+
+
+MACHINES_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'application', 'config', 'machines')
+
+
+class TestSessionReplay(unittest.TestCase):
+    """Test cases for seed-and-bets replay recording."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.rng_provider = RNGProvider()
+        self.registry = RegistryService(YamlConfigLoader(SchemaValidator()), self.rng_provider)
+        self.registry.load_all_machines(MACHINES_DIR, {"include": ["newBee"]})
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_run_length_encoding(self):
+        """Bets round-trip through the run-length encoding."""
+        bets = [1.0, 1.0, 1.0, 2.5, 2.5, 1.0]
+        self.assertEqual(encode_runs(bets), [[1.0, 3], [2.5, 2], [1.0, 1]])
+        self.assertEqual(decode_runs(encode_runs(bets)), bets)
+
+    def test_replay_is_bit_exact(self):
+        """Replaying the recorded seed and bets regenerates every spin field except the timestamp."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"replay": {"enabled": True, "seed": 42, "keep_spins": True}}
+        })
+        output_manager.initialize()
+        replay_store = output_manager.get_replay_store()
+
+        session_id = "p1_newBee_1"
+        machine = self.registry.machine_registry.create_instance("newBee")
+        machine.set_rng(self.rng_provider.get_rng("mersenne", replay_store.session_seed(session_id)))
+        player = ReplayPlayer({"player_id": "p1", "currency": "CNY", "initial_balance": 500.0,
+                               "bets": [[1.0, 1]]})
+
+        session = GamingSession(session_id, player, machine,
+                                output_manager=SessionOutputManager(session_id, output_manager))
+        self.assertTrue(session.should_record_bets)
+        session.start()
+        for spin in range(60):
+            session.execute_spin(1.0 if spin < 30 else 2.0)
+        original = [dict(spin) for spin in session.spins]
+        session.end()
+
+        paths = output_manager.close_replay_store()
+        entries = load_replay_entries(next(iter(paths)))
+        entry = entries[session_id]
+        self.assertEqual(entry["total_spins"], 60)
+        self.assertLessEqual(len(entry["bets"]), 1 + 2 * session.stats.total_spins)
+
+        replayer = SessionReplayer(self.registry.machine_registry.create_instance("newBee"), self.rng_provider)
+        replayed = replayer.replay(entry)
+        self.assertEqual(len(replayed), len(original))
+        for before, after in zip(original, replayed):
+            before.pop("timestamp")
+            after.pop("timestamp")
+            self.assertEqual(before, after)
+
+    def test_replay_without_spins(self):
+        """By default replay mode keeps no raw spins in memory."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"replay": {"enabled": True}}
+        })
+        output_manager.initialize()
+        session_output = SessionOutputManager("p1_newBee_1", output_manager)
+        self.assertFalse(session_output.should_record_spins)
+        self.assertTrue(session_output.should_record_bets)
+        self.assertNotEqual(output_manager.get_replay_store().session_seed("p1_newBee_1"),
+                            output_manager.get_replay_store().session_seed("p1_newBee_2"))
+
+
+if __name__ == '__main__':
+    unittest.main()
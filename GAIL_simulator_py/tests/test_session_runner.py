@@ -0,0 +1,58 @@
+# tests/test_session_runner.py
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.application.simulation.session_runner import SessionRunner
+from src.domain.session.factories.session_factory import SessionFactory
+from tests.test_coordinator import simulation_registry
+
+
+class TestSessionRunner(unittest.TestCase):
+    """Test cases for how the runner acts on the player's decisions."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.registry = simulation_registry()
+        cls.registry.initialize_instance_pools(1)
+
+    def setUp(self):
+        self.player = self.registry.get_player_instance("random_player")
+        self.machine = self.registry.get_machine_instance("newBee")
+
+    def tearDown(self):
+        self.registry.return_player_instance("random_player", self.player)
+        self.registry.return_machine_instance("newBee", self.machine)
+
+    def run_with_bets(self, bets):
+        """Run a session whose player answers with the given bets and never asks to stop otherwise."""
+        session = SessionFactory().create_session(self.player, self.machine, "runner_test")
+        decisions = iter([(bet, 1.0) for bet in bets])
+        with mock.patch.object(self.player, "play", side_effect=lambda *args: next(decisions)), \
+                mock.patch.object(self.player, "should_end_session", return_value=False):
+            SessionRunner(session, config={"max_spins": 100}).run()
+        return session
+
+    def test_zero_bet_ends_the_session(self):
+        """A zero bet is the model's end-of-session signal, so no zero-stake spin is played."""
+        session = self.run_with_bets([1.0, 1.0, 0.0, 1.0])
+        self.assertEqual(session.stats.total_spins, 3)
+        self.assertTrue(all(spin["bet"] > 0 for spin in session.spins))
+
+    def test_negative_bet_ends_the_session(self):
+        """A negative bet (balance too low) still ends the session."""
+        session = self.run_with_bets([1.0, -1, 1.0])
+        self.assertEqual(session.stats.total_spins, 2)
+
+    def test_positive_bets_continue(self):
+        """Positive bets keep the session running until the spin limit."""
+        session = self.run_with_bets([1.0] * 200)
+        self.assertEqual(session.stats.total_spins, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# tests/test_spin_binary.py
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.output.spin_binary import (
+    BinarySpinLogWriter, BinarySpinLogReader, BinarySpinLogStore, FLAG_BIG_WIN, machine_config_hash, read_header
+)
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager, SessionRecord
+from tests.test_spin_columnar import make_spins
+
+
+class TestSpinBinary(unittest.TestCase):
+    """Test cases for the fixed-width binary spin log."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_memmap_round_trip(self):
+        """Records map back as a structured array with sessions sliceable by id."""
+        path = os.path.join(self.temp_dir, "p1_m1_spins.spinlog")
+        machine_hash = machine_config_hash({"reels": [1, 2, 3]})
+        writer = BinarySpinLogWriter(path, 15, machine_hash, "p1", "m1")
+        sessions = {f"p1_m1_{i}": make_spins(f"p1_m1_{i}", 5 + i, seed=i) for i in range(1, 4)}
+        sessions["p1_m1_2"][2]["big_win"] = True
+        for session_id, spins in sessions.items():
+            writer.append_session(session_id, spins)
+        writer.close()
+
+        header = read_header(path)
+        self.assertEqual(header["record_count"], 6 + 7 + 8)
+        self.assertEqual(header["header_size"] % 64, 0)
+        self.assertEqual(header["machine_hash"], machine_hash.hex())
+
+        reader = BinarySpinLogReader(path)
+        self.assertIsInstance(reader.records, np.memmap)
+        self.assertEqual(reader.session_ids(), list(sessions))
+        self.assertEqual(reader.session_range("p1_m1_2"), (6, 13))
+
+        session = reader.session("p1_m1_2")
+        expected = sessions["p1_m1_2"]
+        self.assertEqual(session["spin_number"].tolist(), list(range(1, 8)))
+        self.assertEqual(session["payout"].tolist(), [s["payout"] for s in expected])
+        self.assertEqual(session["streak"].tolist(), [s["streak"] for s in expected])
+        self.assertEqual(session["grid"].tolist(), [s["result_grid"] for s in expected])
+        self.assertEqual(int(reader.flag(FLAG_BIG_WIN).sum()), 1)
+        self.assertEqual(len(reader.column("bet")), 21)
+
+    def test_store_defers_empty_first_sessions(self):
+        """Empty sessions before the first spins are registered once the grid size is known."""
+        store = BinarySpinLogStore(self.temp_dir)
+        entry = store.append_session("p1", "m1", "p1_m1_1", [])
+        self.assertEqual(entry["rows"], 0)
+        self.assertFalse(os.path.exists(entry["log_path"]))
+        store.append_session("p1", "m1", "p1_m1_2", make_spins("p1_m1_2", 4, seed=2))
+        store.append_session("p1", "m1", "p1_m1_3", [])
+        store.append_session("p1", "m1", "p1_m1_4", make_spins("p1_m1_4", 3, seed=4))
+        store.append_session("p2", "m1", "p2_m1_1", [])
+        self.assertEqual(store.close(), [entry["log_path"]])
+
+        reader = BinarySpinLogReader.for_pair(self.temp_dir, "p1", "m1")
+        self.assertEqual(reader.header["grid_size"], 15)
+        self.assertEqual(reader.session_ids(), ["p1_m1_1", "p1_m1_2", "p1_m1_3", "p1_m1_4"])
+        self.assertEqual([reader.session_range(f"p1_m1_{i}") for i in range(1, 5)],
+                         [(0, 0), (0, 4), (4, 4), (4, 7)])
+        with self.assertRaises(KeyError):
+            reader.session_range("p1_m1_5")
+
+    def test_reopen_discards_uncommitted_records(self):
+        """Records without a registered session id are dropped when the log is reopened."""
+        path = os.path.join(self.temp_dir, "p1_m1_spins.spinlog")
+        writer = BinarySpinLogWriter(path, 15)
+        writer.append_session("p1_m1_1", make_spins("p1_m1_1", 3))
+        writer.append_session("p1_m1_2", make_spins("p1_m1_2", 4))
+        writer.close()
+
+        # Simulate a crash after the records were written but before the session id was
+        with open(writer.sessions_path, "w") as f:
+            f.write("p1_m1_1\n")
+
+        writer = BinarySpinLogWriter(path, 15)
+        entry = writer.append_session("p1_m1_3", make_spins("p1_m1_3", 2))
+        writer.close()
+
+        self.assertEqual(entry, {"session_id": "p1_m1_3", "session_seq": 1, "row_start": 3, "rows": 2})
+        reader = BinarySpinLogReader(path)
+        self.assertEqual(len(reader), 5)
+        self.assertEqual(reader.session_ids(), ["p1_m1_1", "p1_m1_3"])
+        self.assertEqual(len(reader.session("p1_m1_3")), 2)
+
+    def test_output_manager_binary_format(self):
+        """file_format=binary writes one log per pair, even from many threads."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"file_format": "binary"}
+        })
+        output_manager.initialize()
+
+        def run(index):
+            session_id = f"p1_m1_{index}"
+            record = SessionRecord(session_id, "p1", "m1", make_spins(session_id, 10, seed=index))
+            SessionOutputManager(session_id, output_manager)._save_raw_spins_data(record)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(1, 21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        paths = output_manager.close_binary_log_store()
+
+        self.assertEqual(len(paths), 1)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(paths[0]))),
+                         ["p1_m1_spins.sessions", "p1_m1_spins.spinlog"])
+
+        reader = BinarySpinLogReader.for_pair(output_manager.task_dir, "p1", "m1")
+        self.assertEqual(len(reader.session_ids()), 20)
+        for session_id in reader.session_ids():
+            self.assertEqual(reader.session(session_id)["spin_number"].tolist(), list(range(1, 11)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# tests/test_spin_columnar.py
+import unittest
+import sys
+import os
+import random
+import shutil
+import tempfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.output.spin_columnar import (
+    ColumnarSpinWriter, write_spins_file, read_spin_files, read_pair_spins
+)
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager, SessionRecord
+
+
+def make_spins(session_id, count, seed=0):
+    """Build spin dicts shaped like GamingSession.spins entries."""
+    rng = random.Random(seed)
+    player_id, machine_id, index = session_id.rsplit("_", 2)
+    spins = []
+    for n in range(1, count + 1):
+        infos = []
+        if rng.random() < 0.3:
+            infos.append({"line_index": rng.randrange(20), "win_amount": 0.5, "match_count": 3,
+                          "symbol": 4, "multiplier": 1.0})
+        spins.append({
+            "session_id": session_id, "player_id": player_id, "machine_id": machine_id,
+            "session_index": index, "spin_number": n, "timestamp": 1700000000.0 + n,
+            "bet": 1.0, "payout": 0.5 * len(infos), "profit": 0.5 * len(infos) - 1.0,
+            "odds": 0.5 * len(infos), "balance_before": 100.0, "balance_after": 99.0,
+            "result_grid": [rng.choice([1, 2, 3, 20, 101, 110]) for _ in range(15)],
+            "in_free_spins": False, "free_spins_triggered": False, "free_spins_remaining": 0,
+            "free_spins_base_bet": 0.0, "line_wins": [0.0] * 20, "line_wins_info": infos,
+            "scatter_count": 0, "scatter_win": 0.0, "streak": -n, "big_win": False
+        })
+    return spins
+
+
+class TestColumnarSpinWriter(unittest.TestCase):
+    """Test cases for the Parquet/Arrow spin writer."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self):
+        """All fields survive a write/read cycle in both formats."""
+        spins = make_spins("p1_m1_0001", 25)
+        for file_format in ("parquet", "arrow"):
+            path = os.path.join(self.temp_dir, f"spins.{file_format}")
+            self.assertEqual(write_spins_file(path, spins, file_format=file_format), 25)
+
+            rows = read_spin_files(path).to_pylist()
+            self.assertEqual(len(rows), 25)
+            for expected, actual in zip(spins, rows):
+                for key, value in expected.items():
+                    self.assertEqual(actual[key], value, f"{file_format}:{key}")
+
+    def test_schema_types(self):
+        """The grid is a fixed-size int8 list and ids are dictionary encoded."""
+        path = os.path.join(self.temp_dir, "spins.parquet")
+        write_spins_file(path, make_spins("p1_m1_0001", 5))
+        schema = read_spin_files(path).schema
+
+        grid_type = schema.field("result_grid").type
+        self.assertTrue(pa.types.is_fixed_size_list(grid_type))
+        self.assertEqual(grid_type.list_size, 15)
+        self.assertEqual(grid_type.value_type, pa.int8())
+        self.assertTrue(pa.types.is_dictionary(schema.field("session_id").type))
+        self.assertEqual(schema.field("bet").type, pa.float64())
+
+    def test_row_groups(self):
+        """Rows are batched into row groups of the configured size."""
+        path = os.path.join(self.temp_dir, "spins.parquet")
+        with ColumnarSpinWriter(path, "parquet", row_group_size=10) as writer:
+            writer.write_spins(make_spins("p1_m1_0001", 15))
+            writer.write_spins(make_spins("p1_m1_0002", 12))
+
+        metadata = pq.ParquetFile(path).metadata
+        self.assertEqual(metadata.num_rows, 27)
+        self.assertEqual([metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)], [10, 10, 7])
+
+    def test_arrow_multiple_sessions(self):
+        """Arrow IPC files can hold several sessions despite dictionary growth."""
+        path = os.path.join(self.temp_dir, "spins.arrow")
+        with ColumnarSpinWriter(path, "arrow", row_group_size=8) as writer:
+            for index in range(3):
+                writer.write_spins(make_spins(f"p1_m1_000{index}", 10, seed=index))
+
+        table = read_spin_files(path, columns=["session_id", "spin_number"])
+        self.assertEqual(table.num_rows, 30)
+        self.assertEqual(sorted(set(table.column("session_id").to_pylist())), ["p1_m1_0000", "p1_m1_0001", "p1_m1_0002"])
+
+
+class TestSessionOutputManagerColumnar(unittest.TestCase):
+    """Test cases for selecting the columnar format through config."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_file_format_config(self):
+        """session_recording.file_format selects the writer and read_pair_spins loads a whole pair."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"file_format": "parquet"}
+        })
+        output_manager.initialize()
+
+        for index in range(3):
+            session_id = f"p1_m1_000{index}"
+            record = SessionRecord(session_id, "p1", "m1", make_spins(session_id, 10, seed=index))
+            manager = SessionOutputManager(session_id, output_manager)
+            self.assertEqual(manager.file_format, "parquet")
+            path = manager._save_raw_spins_data(record)
+            self.assertTrue(path.endswith("p1_m1_000%d_raw.parquet" % index))
+
+        table = read_pair_spins(output_manager.task_dir, "p1", "m1", columns=["session_id", "profit"])
+        self.assertEqual(table.num_rows, 30)
+        self.assertEqual(table.column_names, ["session_id", "profit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
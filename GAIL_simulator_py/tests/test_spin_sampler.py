@@ -0,0 +1,92 @@
+# tests/test_spin_sampler.py
+import unittest
+import sys
+import os
+import random
+import shutil
+import tempfile
+from collections import Counter
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.output.spin_sampler import SpinSampler, SpinReservoir
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager, SessionRecord
+from src.infrastructure.output.compression import read_csv_rows
+from tests.test_spin_columnar import make_spins
+
+
+class TestSpinSampler(unittest.TestCase):
+    """Test cases for sampled spin recording."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_session_policies(self):
+        """every_k keeps each k-th session; bernoulli is deterministic per session id."""
+        sampler = SpinSampler({"policy": "every_k", "every_k": 4})
+        decisions = [sampler.sample_session(f"p1_m1_{i}") for i in range(1, 13)]
+        self.assertEqual([i for i, (keep, _) in enumerate(decisions, 1) if keep], [1, 5, 9])
+        self.assertTrue(all(weight == 4.0 for _, weight in decisions))
+
+        first = SpinSampler({"policy": "bernoulli", "fraction": 0.25, "seed": 7})
+        second = SpinSampler({"policy": "bernoulli", "fraction": 0.25, "seed": 7})
+        ids = [f"p1_m1_{i}" for i in range(4000)]
+        kept = [first.sample_session(s)[0] for s in ids]
+        self.assertEqual(kept, [second.sample_session(s)[0] for s in ids])
+        self.assertAlmostEqual(sum(kept) / len(ids), 0.25, delta=0.03)
+        self.assertEqual(first.sample_session("p1_m1_0")[1], 4.0)
+
+    def test_reservoir_is_uniform(self):
+        """Algorithm L keeps each offered spin with probability k/N across batches."""
+        counts = Counter()
+        trials = 2000
+        for trial in range(trials):
+            reservoir = SpinReservoir(5, random.Random(trial))
+            for start in range(0, 50, 7):
+                reservoir.offer_many([{"i": i} for i in range(start, min(start + 7, 50))])
+            self.assertEqual(reservoir.seen, 50)
+            self.assertEqual(len(reservoir.items), 5)
+            counts.update(item["i"] for item in reservoir.items)
+
+        expected = trials * 5 / 50
+        for i in range(50):
+            self.assertAlmostEqual(counts[i], expected, delta=expected * 0.35)
+        self.assertEqual(reservoir.weight, 10.0)
+
+    def test_output_manager_sampling(self):
+        """Session sampling adds weights to the summary; reservoir writes one weighted file per pair."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"sampling": {"policy": "every_k", "every_k": 3}}
+        })
+        output_manager.initialize()
+        recorded = [SessionOutputManager(f"p1_m1_{i}", output_manager).should_record_spins for i in range(1, 7)]
+        self.assertEqual(recorded, [True, False, False, True, False, False])
+        self.assertEqual(output_manager.close_spin_sampler()["sessions_recorded"], 2)
+
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"sampling": {"policy": "reservoir", "reservoir_size": 8}}
+        })
+        output_manager.initialize()
+        for i in range(1, 6):
+            session_id = f"p1_m1_{i}"
+            record = SessionRecord(session_id, "p1", "m1", make_spins(session_id, 10, seed=i))
+            SessionOutputManager(session_id, output_manager)._save_raw_spins_data(record)
+
+        metrics = output_manager.close_spin_sampler()
+        self.assertEqual((metrics["spins_seen"], metrics["spins_kept"]), (50, 8))
+        rows = read_csv_rows(metrics["files"]["p1_m1"])
+        self.assertEqual(len(rows), 8)
+        self.assertTrue(all(float(row["sample_weight"]) == 6.25 for row in rows))
+        raw_dir = os.path.dirname(metrics["files"]["p1_m1"])
+        self.assertEqual(os.listdir(raw_dir), ["p1_m1_sampled_spins.csv"])
+
+
+if __name__ == '__main__':
+    unittest.main()
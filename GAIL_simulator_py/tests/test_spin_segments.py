@@ -0,0 +1,97 @@
+# tests/test_spin_segments.py
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.output.spin_segments import SpinSegmentWriter, SpinSegmentReader
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager, SessionRecord
+from tests.test_spin_columnar import make_spins
+
+
+class TestSpinSegments(unittest.TestCase):
+    """Test cases for per-pair segment files with an offset index."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_seek_to_session(self):
+        """Each session can be read back individually in every format."""
+        for file_format in ("csv", "parquet", "arrow"):
+            path = os.path.join(self.temp_dir, file_format, "p1_m1_spins.seg")
+            writer = SpinSegmentWriter(path, file_format)
+            sessions = {f"p1_m1_{i}": make_spins(f"p1_m1_{i}", 5 + i, seed=i) for i in range(1, 4)}
+            for session_id, spins in sessions.items():
+                writer.append_session(session_id, spins)
+            writer.close()
+
+            reader = SpinSegmentReader(path)
+            self.assertEqual(reader.session_ids(), list(sessions))
+            self.assertEqual([reader.entries[s]["row_start"] for s in sessions], [0, 6, 13])
+
+            rows = reader.read_session("p1_m1_2", columns=["spin_number", "profit"])
+            self.assertEqual(len(rows), 7)
+            self.assertEqual([int(r["spin_number"]) for r in rows], list(range(1, 8)))
+            self.assertEqual([float(r["profit"]) for r in rows], [s["profit"] for s in sessions["p1_m1_2"]])
+
+    def test_reopen_and_partial_write(self):
+        """Reopening appends after orphan bytes that have no index entry."""
+        path = os.path.join(self.temp_dir, "p1_m1_spins.seg")
+        writer = SpinSegmentWriter(path, "csv")
+        writer.append_session("p1_m1_1", make_spins("p1_m1_1", 3))
+        writer.close()
+
+        # Simulate a crash between the data write and the index write
+        with open(path, "ab") as f:
+            f.write(b"garbage")
+
+        writer = SpinSegmentWriter(path, "csv")
+        entry = writer.append_session("p1_m1_2", make_spins("p1_m1_2", 4))
+        writer.close()
+
+        self.assertEqual(entry["row_start"], 3)
+        reader = SpinSegmentReader(path)
+        self.assertEqual(reader.session_ids(), ["p1_m1_1", "p1_m1_2"])
+        self.assertEqual(len(reader.read_session("p1_m1_2")), 4)
+
+    def test_output_manager_layout(self):
+        """layout=segments writes one file pair per player-machine pair, even from many threads."""
+        output_manager = OutputManager({
+            "directories": {"base_dir": self.temp_dir},
+            "session_recording": {"layout": "segments"}
+        })
+        output_manager.initialize()
+
+        def run(index):
+            session_id = f"p1_m1_{index}"
+            record = SessionRecord(session_id, "p1", "m1", make_spins(session_id, 10, seed=index))
+            SessionOutputManager(session_id, output_manager)._save_raw_spins_data(record)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(1, 21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        output_manager.close_segment_store()
+
+        raw_dir = os.path.join(output_manager.task_dir, "p1", "m1", "raw_data")
+        self.assertEqual(sorted(os.listdir(raw_dir)), ["p1_m1_spins.idx", "p1_m1_spins.seg"])
+
+        reader = SpinSegmentReader.for_pair(output_manager.task_dir, "p1", "m1")
+        self.assertEqual(len(reader.session_ids()), 20)
+        for session_id in reader.session_ids():
+            rows = reader.read_session(session_id, columns=["session_id"])
+            self.assertEqual({r["session_id"] for r in rows}, {session_id})
+
+
+if __name__ == "__main__":
+    unittest.main()
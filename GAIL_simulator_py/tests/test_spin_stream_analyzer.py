@@ -0,0 +1,168 @@
+# tests/test_spin_stream_analyzer.py
+import unittest
+import sys
+import os
+import random
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.concurrency.task_executor import ExecutionMode
+from src.infrastructure.output.compression import CompressionSettings, open_text_writer
+from src.infrastructure.output.spin_segments import SpinSegmentStore, encode_spins
+from src.infrastructure.output.spin_binary import BinarySpinLogStore
+from src.infrastructure.output.spin_columnar import write_spins_file
+from src.application.analysis.spin_stream_analyzer import (
+    SessionAccumulator, PairAccumulator, analyze_pair, analyze_task_dir, spins_to_chunk
+)
+from src.application.analysis.session_analyzer import SessionAnalyzer
+from tests.test_spin_columnar import make_spins
+
+
+def make_session(session_id, count, seed=0):
+    """Spin dicts with a consistent balance path, varying bets and occasional free spins."""
+    rng = random.Random(seed)
+    spins = make_spins(session_id, count, seed)
+    balance = 100.0
+    free_left = 0
+    for spin in spins:
+        in_free = free_left > 0
+        bet = spin["bet"] = rng.choice([1.0, 1.0, 2.0, 5.0])
+        payout = spin["payout"] = rng.choice([0.0, 0.0, 0.0, 0.5, 2.0, 40.0]) * bet
+        spin["balance_before"] = balance
+        balance += payout - (0.0 if in_free else bet)
+        spin["balance_after"] = balance
+        spin["profit"] = payout - bet
+        spin["big_win"] = payout >= 20 * bet
+        free_left = max(free_left - 1, 0) if in_free else (3 if rng.random() < 0.05 else 0)
+        spin["in_free_spins"] = free_left > 0
+    return spins
+
+
+def reference_metrics(spins):
+    """Straightforward per-spin loop used as the oracle for the vectorized engine."""
+    peak = spins[0]["balance_before"]
+    max_drawdown = 0.0
+    paid_bets = []
+    for spin in spins:
+        peak = max(peak, spin["balance_after"])
+        max_drawdown = max(max_drawdown, peak - spin["balance_after"])
+        wagered = spin["payout"] - (spin["balance_after"] - spin["balance_before"])
+        if wagered > 1e-9:
+            paid_bets.append(wagered)
+    changes = sum(1 for a, b in zip(paid_bets, paid_bets[1:]) if a != b)
+    return {
+        "max_drawdown": max_drawdown,
+        "bet_change_count": changes,
+        "total_wagered": sum(paid_bets),
+        "max_win_multiplier": max((s["payout"] / s["bet"] for s in spins if s["payout"] > 0), default=0.0),
+        "hit_rate": sum(1 for s in spins if s["payout"] > 0) / len(spins)
+    }
+
+
+class TestSpinStreamAnalyzer(unittest.TestCase):
+    """Test cases for the out-of-core raw spin analysis engine."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def raw_dir(self, player_id, machine_id):
+        path = os.path.join(self.temp_dir, player_id, machine_id, "raw_data")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def test_chunking_does_not_change_results(self):
+        """Drawdown, bet progression and moments carry across chunk boundaries."""
+        spins = make_session("p1_m1_1", 500, seed=3)
+        whole = SessionAccumulator()
+        whole.update(spins_to_chunk(spins))
+        chunked = SessionAccumulator()
+        for start in range(0, len(spins), 7):
+            chunked.update(spins_to_chunk(spins[start:start + 7]))
+
+        expected = reference_metrics(spins)
+        for metrics in (whole.to_dict(), chunked.to_dict()):
+            for key, value in expected.items():
+                self.assertAlmostEqual(metrics[key], value, places=6, msg=key)
+        self.assertAlmostEqual(whole.profit.std, chunked.profit.std, places=9)
+        self.assertEqual(whole.to_dict()["end_balance"], spins[-1]["balance_after"])
+
+    def test_all_raw_layouts(self):
+        """CSV (compressed), Parquet, Arrow, segment and binary layouts give identical pair metrics."""
+        sessions = [make_session(f"p1_m1_{n}", 40 + n * 13, seed=n) for n in range(1, 6)]
+        gzip = CompressionSettings("gzip")
+
+        for file_format in ("csv", "parquet", "arrow", "segments", "binary"):
+            player_id = f"p_{file_format}"
+            raw_dir = self.raw_dir(player_id, "m1")
+            segment_store = SpinSegmentStore(self.temp_dir, "csv")
+            binary_store = BinarySpinLogStore(self.temp_dir)
+            for spins in sessions:
+                session_id = spins[0]["session_id"]
+                if file_format == "csv":
+                    with open_text_writer(os.path.join(raw_dir, f"{session_id}_raw.csv.gz"), gzip) as f:
+                        f.write(encode_spins(spins, "csv").decode("utf-8"))
+                elif file_format in ("parquet", "arrow"):
+                    write_spins_file(os.path.join(raw_dir, f"{session_id}_raw.{file_format}"), spins,
+                                     file_format=file_format)
+                elif file_format == "segments":
+                    segment_store.append_session(player_id, "m1", session_id, spins)
+                else:
+                    binary_store.append_session(player_id, "m1", session_id, spins)
+            segment_store.close()
+            binary_store.close()
+
+        report = analyze_task_dir(self.temp_dir, ExecutionMode.MULTITHREAD, max_workers=2, chunk_rows=16)
+        self.assertEqual(len(report["pairs"]), 5)
+
+        expected = PairAccumulator()
+        for spins in sessions:
+            session = SessionAccumulator()
+            session.update(spins_to_chunk(spins))
+            expected.add_session(session)
+        expected = expected.to_dict()
+
+        for key, pair in report["pairs"].items():
+            self.assertEqual(pair["sessions"], 5, key)
+            self.assertEqual(pair["spins"], expected["spins"], key)
+            self.assertEqual(pair["win_multiplier_distribution"], expected["win_multiplier_distribution"], key)
+            for name in ("total_wagered", "total_payout", "profit_std_dev", "max_win_multiplier"):
+                self.assertAlmostEqual(pair[name], expected[name], places=6, msg=f"{key} {name}")
+            self.assertAlmostEqual(pair["session_max_drawdown"]["mean"],
+                                   expected["session_max_drawdown"]["mean"], places=6, msg=key)
+        self.assertEqual(report["overall"]["sessions"], 25)
+
+    def test_per_session_metrics_csv(self):
+        """Per-session metrics are streamed to a CSV with one row per session."""
+        raw_dir = self.raw_dir("p1", "m1")
+        for n in range(1, 4):
+            spins = make_session(f"p1_m1_{n}", 30, seed=n)
+            with open(os.path.join(raw_dir, f"p1_m1_{n}_raw.csv"), "wb") as f:
+                f.write(encode_spins(spins, "csv"))
+        # 抽样文件不是逐会话原始数据
+        with open(os.path.join(raw_dir, "p1_m1_sampled_spins.csv"), "w") as f:
+            f.write("bet\n")
+
+        path = os.path.join(self.temp_dir, "metrics.csv")
+        pair = analyze_pair(self.temp_dir, "p1", "m1", chunk_rows=8, session_metrics_path=path)
+        self.assertEqual(pair.sessions, 3)
+        with open(path) as f:
+            self.assertEqual(len(f.read().strip().splitlines()), 4)
+
+    def test_session_analyzer_uses_spins_and_payout(self):
+        """SessionAnalyzer reads the spins list GamingSession produces and uses payout."""
+        spins = make_session("p1_m1_1", 80, seed=9)
+        analysis = SessionAnalyzer().analyze_session({"session_id": "p1_m1_1", "spins": spins})
+        expected = reference_metrics(spins)
+        self.assertAlmostEqual(analysis["volatility"]["max_drawdown"], expected["max_drawdown"], places=6)
+        self.assertAlmostEqual(analysis["volatility"]["win_frequency"], expected["hit_rate"], places=6)
+        self.assertGreater(analysis["volatility"]["max_win_multiplier"], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
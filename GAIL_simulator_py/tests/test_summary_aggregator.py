@@ -0,0 +1,110 @@
+# tests/test_summary_aggregator.py
+import unittest
+import sys
+import os
+import csv
+import json
+import shutil
+import tempfile
+import threading
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.output.summary_aggregator import SummaryAggregator
+from src.infrastructure.output.output_manager import OutputManager
+from src.infrastructure.output.session_output_manager import SessionOutputManager
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+class TestSummaryAggregator(unittest.TestCase):
+    """Test cases for the streaming session summary aggregator."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_concurrent_pairs(self):
+        """Rows from many threads land in one CSV per pair."""
+        aggregator = SummaryAggregator(self.temp_dir)
+
+        def run(player_id, index):
+            aggregator.add_summary(player_id, "m1", {
+                "session_id": str(index), "total_spins": index, "line_wins": [index, 0]
+            })
+
+        threads = [threading.Thread(target=run, args=(p, i)) for p in ("p1", "p2") for i in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(aggregator.get_row_counts(), {"p1_m1": 50, "p2_m1": 50})
+        results = aggregator.finalize()
+        self.assertEqual(set(results), {"p1_m1", "p2_m1"})
+
+        fields, rows = read_csv(results["p1_m1"])
+        self.assertEqual(fields, ["line_wins", "session_id", "total_spins"])
+        self.assertEqual(sorted(int(r["session_id"]) for r in rows), list(range(50)))
+        row = next(r for r in rows if r["session_id"] == "7")
+        self.assertEqual(json.loads(row["line_wins"]), [7, 0])
+
+    def test_header_extension(self):
+        """A summary with a new field rewrites the file with the union header."""
+        aggregator = SummaryAggregator(self.temp_dir)
+        aggregator.add_summary("p1", "m1", {"session_id": "1", "b": 1})
+        aggregator.add_summary("p1", "m1", {"session_id": "2", "b": 2, "a": 3})
+        aggregator.add_summary("p1", "m1", {"session_id": "3", "b": 4})
+        path = aggregator.finalize()["p1_m1"]
+
+        fields, rows = read_csv(path)
+        self.assertEqual(fields, ["a", "b", "session_id"])
+        self.assertEqual([(r["session_id"], r["a"], r["b"]) for r in rows],
+                         [("1", "", "1"), ("2", "3", "2"), ("3", "", "4")])
+
+    def test_output_manager_finalize(self):
+        """finalize_all_summaries returns the streamed CSVs without temp files."""
+        output_manager = OutputManager({"directories": {"base_dir": self.temp_dir}})
+        task_dir = output_manager.initialize()
+        output_manager.get_summary_aggregator().add_summary("p1", "m1", {"session_id": "1"})
+
+        results = output_manager.finalize_all_summaries()
+        self.assertEqual(list(results), ["p1_m1"])
+        self.assertTrue(os.path.exists(results["p1_m1"]))
+        self.assertFalse(os.path.exists(os.path.join(task_dir, "temp_summaries")))
+        self.assertEqual(output_manager.finalize_all_summaries(), {})
+
+    def test_session_output_manager(self):
+        """save_session_data streams the session summary into the pair CSV."""
+        output_manager = OutputManager({"directories": {"base_dir": self.temp_dir}})
+        output_manager.initialize()
+
+        class StubSession:
+            player = type("Player", (), {"id": "p1"})()
+            machine = type("Machine", (), {"id": "m1"})()
+            spins = []
+
+            def get_session_summary(self):
+                return {"total_spins": 0}
+
+            def get_initial_balance(self):
+                return 100.0
+
+            get_current_balance = get_first_bet = get_sim_duration = get_initial_balance
+
+        for index in range(3):
+            self.assertTrue(SessionOutputManager(f"p1_m1_{index}", output_manager).save_session_data(StubSession()))
+
+        _, rows = read_csv(output_manager.finalize_all_summaries()["p1_m1"])
+        self.assertEqual([r["session_id"] for r in rows], ["0", "1", "2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# tests/test_tail_estimator.py
+import unittest
+import sys
+import os
+import collections
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.machine.entities.slot_machine import SlotMachine
+from src.domain.machine.services.tail_estimator import TailRiskEstimator, StopProposal
+from src.domain.machine.services.payout_distribution import game_distributions
+from src.infrastructure.config.loaders.yaml_loader import YamlConfigLoader
+from tests.test_rtp_estimation import toy_machine, all_stops
+
+NEWBEE = os.path.join(os.path.dirname(__file__), '..', 'src', 'application', 'config', 'machines', 'newBee.yaml')
+
+
+def exact_tail(evaluator, threshold):
+    """P(round win >= threshold) from full enumeration of base stops and free rounds."""
+    base = evaluator.evaluate(all_stops(evaluator, "normal"))
+    bonus = evaluator.evaluate(all_stops(evaluator, "bonus"), in_free=True)["total_win"]
+    spin = collections.Counter(np.round(bonus, 9).tolist())
+    free_round = {0.0: 1.0}
+    for _ in range(evaluator.free_spins_count):
+        convolved = collections.defaultdict(float)
+        for total, p in free_round.items():
+            for win, count in spin.items():
+                convolved[round(total + win, 9)] += p * count / len(bonus)
+        free_round = convolved
+
+    probability = 0.0
+    for win, trigger in zip(base["total_win"], base["trigger"]):
+        if trigger:
+            probability += sum(p for free, p in free_round.items() if win + free >= threshold - 1e-9)
+        else:
+            probability += float(win >= threshold - 1e-9)
+    return probability / len(base["total_win"])
+
+
+class TestTailRiskEstimator(unittest.TestCase):
+    """Test cases for importance-sampled big-win probabilities."""
+
+    def setUp(self):
+        self.estimator = TailRiskEstimator(toy_machine(), seed=3, chunk_size=20000)
+
+    def test_uniform_proposal_has_unit_likelihood_ratio(self):
+        """Without tilting the sampler is plain Monte Carlo."""
+        rounds = self.estimator.sample_rounds(5000, StopProposal.uniform(self.estimator.lengths))
+        np.testing.assert_allclose(rounds["log_ratio"], 0.0, atol=1e-12)
+        self.assertEqual(rounds["bonus_stops"].shape[0], int(rounds["trigger"].sum()))
+
+    def test_fitted_proposal_matches_exact_tail(self):
+        """The tilted estimates cover the exact probabilities with far fewer rounds than brute force."""
+        self.estimator.fit(80, spins_per_iteration=20000)
+        report = self.estimator.estimate([40, 80], 60000, batch_size=25000)
+        for estimate in report.estimates:
+            exact = exact_tail(self.estimator.evaluator, estimate.threshold)
+            self.assertLess(abs(estimate.probability - exact), 4 * estimate.standard_error, estimate)
+            self.assertGreater(estimate.hits, 10)
+        self.assertGreater(report.estimates[-1].variance_reduction, 10)
+        self.assertEqual(report.rounds, 60000)
+
+    def test_max_win_is_exact(self):
+        """The reported max win is attained by enumeration and never exceeded by a sampled round."""
+        self.estimator.fit(80, spins_per_iteration=10000, max_iterations=5)
+        report = self.estimator.estimate([80], 30000)
+        exact = game_distributions(self.estimator.evaluator)
+        for key in ("base_spin", "bonus_spin", "free_round", "round"):
+            self.assertAlmostEqual(report.max_win[key], exact[key].values.max(), places=9)
+        self.assertLessEqual(report.observed_max_win, report.max_win["round"] + 1e-9)
+
+    def test_zero_hits_give_upper_bound(self):
+        """Without hits the interval is a one-sided bound, and it collapses to zero above the max win."""
+        max_win = self.estimator.max_win()["round"]
+        report = self.estimator.estimate([max_win, max_win + 1], 200, proposal=StopProposal.uniform(self.estimator.lengths))
+        reachable, beyond = report.estimates
+        if reachable.hits == 0:
+            self.assertEqual(reachable.probability, 0.0)
+            self.assertGreater(reachable.ci_high, 0.0)
+        self.assertTrue(reachable.attainable)
+        self.assertFalse(beyond.attainable)
+        self.assertEqual((beyond.probability, beyond.ci_low, beyond.ci_high), (0.0, 0.0, 0.0))
+
+
+class TestTailRiskEstimatorNewBee(unittest.TestCase):
+    """Big-win tails of a shipped machine against its exact payout distribution."""
+
+    @classmethod
+    def setUpClass(cls):
+        config = YamlConfigLoader().load_file(NEWBEE)
+        cls.estimator = TailRiskEstimator(SlotMachine("newBee", config), seed=1)
+        cls.exact = game_distributions(cls.estimator.evaluator)["round"]
+
+    def test_big_win_tail_matches_exact_distribution(self):
+        """500x wins (about 1e-8 per round) are estimated within their confidence interval."""
+        self.estimator.fit(500, spins_per_iteration=30000, settle=3)
+        report = self.estimator.estimate([500], 100000)
+        estimate = report.estimates[0]
+        exact = self.exact.tail(500)
+        self.assertGreater(estimate.hits, 1000)
+        self.assertLess(abs(estimate.probability - exact), 4 * estimate.standard_error, (estimate, exact))
+        self.assertLess(estimate.relative_error, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
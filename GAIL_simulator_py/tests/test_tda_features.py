@@ -0,0 +1,82 @@
+# tests/test_tda_features.py
+import unittest
+import sys
+import os
+import numpy as np
+from sklearn.decomposition import PCA
+from gtda.homology import VietorisRipsPersistence
+from gtda.diagrams import PersistenceEntropy
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.domain.player.models.v1.services.tda_features import (
+    SlidingTDAFeatures, h0_lifetimes, pairwise_distances
+)
+
+
+def gtda_entropy(window_obs):
+    """Reference pipeline previously used by V1ModelService."""
+    if window_obs.shape[1] > 4:
+        window_obs = PCA(n_components=4).fit_transform(window_obs)
+    point_cloud = window_obs.reshape(1, window_obs.shape[0], -1)
+    barcodes = VietorisRipsPersistence(homology_dimensions=[0, 1], collapse_edges=True, n_jobs=1).fit_transform(point_cloud)
+    return PersistenceEntropy().fit_transform(barcodes)[0]
+
+
+class TestTDAFeatures(unittest.TestCase):
+    """Test cases for the small point cloud TDA features."""
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+        self.tda = SlidingTDAFeatures(window_size=5, n_components=4)
+
+    def test_h0_is_mst(self):
+        """H0 lifetimes are the MST edge lengths."""
+        points = np.array([[0.0], [1.0], [3.0], [6.0]])
+        lifetimes = np.sort(h0_lifetimes(pairwise_distances(points)))
+        np.testing.assert_allclose(lifetimes, [1.0, 2.0, 3.0])
+
+    def test_matches_gtda_random(self):
+        """Random windows match the gtda entropies."""
+        for _ in range(50):
+            window = self.rng.normal(size=(5, 8))
+            np.testing.assert_allclose(self.tda.compute(window), gtda_entropy(window), atol=1e-5)
+
+    def test_matches_gtda_with_loops(self):
+        """Windows with a non-trivial H1 class match gtda."""
+        angles = np.linspace(0, 2 * np.pi, 5, endpoint=False)
+        for _ in range(20):
+            window = np.c_[np.cos(angles), np.sin(angles), 0.05 * self.rng.normal(size=(5, 6))]
+            expected = gtda_entropy(window)
+            self.assertNotEqual(expected[1], -1.0)
+            np.testing.assert_allclose(self.tda.compute(window), expected, atol=1e-5)
+
+    def test_matches_gtda_with_pca(self):
+        """Larger windows go through the SVD projection."""
+        tda = SlidingTDAFeatures(window_size=7, n_components=4)
+        for _ in range(20):
+            window = self.rng.normal(size=(7, 8))
+            np.testing.assert_allclose(tda.compute(window), gtda_entropy(window), atol=1e-5)
+
+    def test_sliding_window(self):
+        """Incremental updates agree with recomputing each window."""
+        states = self.rng.normal(size=(30, 8))
+        for i, state in enumerate(states):
+            self.tda.push(state)
+            self.assertEqual(self.tda.is_ready(), i >= 4)
+            if self.tda.is_ready():
+                np.testing.assert_allclose(self.tda.features(), gtda_entropy(states[i - 4:i + 1]), atol=1e-5)
+
+    def test_reset(self):
+        """Reset empties the window."""
+        for state in self.rng.normal(size=(5, 8)):
+            self.tda.push(state)
+        self.tda.reset()
+        self.assertFalse(self.tda.is_ready())
+        with self.assertRaises(ValueError):
+            self.tda.features()
+
+
+if __name__ == "__main__":
+    unittest.main()